@@ -16,18 +16,31 @@
 
 # =============enthought library imports=======================
 # =============standard library imports ========================
+import atexit
 import logging
 import os
 import shutil
 from logging.handlers import RotatingFileHandler
 
 from pychron.core.helpers.filetools import list_directory, unique_path2
+from pychron.core.helpers.queue_logging import install, uninstall
 from pychron.paths import paths
 
 NAME_WIDTH = 40
 gFORMAT = '%(name)-{}s: %(asctime)s %(levelname)-9s (%(threadName)-10s) %(message)s'.format(NAME_WIDTH)
 gLEVEL = logging.DEBUG
 
+# QueueListener writing the root logger's records. None if logging is not queued
+gLISTENER = None
+
+
+def _stop_listener():
+    if gLISTENER:
+        gLISTENER.stop()
+
+
+atexit.register(_stop_listener)
+
 
 def simple_logger(name):
     logger = logging.getLogger(name)
@@ -38,9 +51,19 @@ def simple_logger(name):
     return logger
 
 
+def get_root_handlers():
+    """
+        handlers writing the root logger's records, including those behind the logging queue
+    """
+    hs = list(logging.getLogger().handlers)
+    if gLISTENER:
+        gLISTENER.flush()
+        hs.extend(gLISTENER.handlers)
+    return hs
+
+
 def get_log_text(n):
-    root = logging.getLogger()
-    for h in root.handlers:
+    for h in get_root_handlers():
         if isinstance(h, RotatingFileHandler):
             with open(h.baseFilename) as rfile:
                 return tail(rfile, n)
@@ -89,9 +112,13 @@ def tail(f, lines=20):
 #         logger.addHandler(h)
 
 
-def logging_setup(name, use_archiver=True, root=None, use_file=True, **kw):
+def logging_setup(name, use_archiver=True, root=None, use_file=True, use_queue=True, log_rate=0, **kw):
     """
+        use_queue: write records on a background thread. see queue_logging
+        log_rate: records per second each logger may log below WARNING when use_queue. 0 for no limit
     """
+    global gLISTENER
+
     # set up deprecation warnings
     # import warnings
     #     warnings.simplefilter('default')
@@ -131,6 +158,12 @@ def logging_setup(name, use_archiver=True, root=None, use_file=True, **kw):
 
     root = logging.getLogger()
     root.setLevel(gLEVEL)
+
+    if gLISTENER:
+        # already set up. replace the queue and its handlers
+        uninstall(gLISTENER, root)
+        gLISTENER = None
+
     shandler = logging.StreamHandler()
 
     handlers = [shandler]
@@ -143,7 +176,11 @@ def logging_setup(name, use_archiver=True, root=None, use_file=True, **kw):
     for hi in handlers:
         hi.setLevel(gLEVEL)
         hi.setFormatter(fmt)
-        root.addHandler(hi)
+        if not use_queue:
+            root.addHandler(hi)
+
+    if use_queue:
+        gLISTENER = install(handlers, root, rate=log_rate)
 
 
 def add_root_handler(path, level=None, strformat=None, **kw):
@@ -152,18 +189,22 @@ def add_root_handler(path, level=None, strformat=None, **kw):
     if format is None:
         strformat = gFORMAT
 
-    root = logging.getLogger()
     handler = logging.FileHandler(path, **kw)
     handler.setLevel(level)
     handler.setFormatter(logging.Formatter(strformat))
-    root.addHandler(handler)
+    if gLISTENER:
+        gLISTENER.add_handler(handler)
+    else:
+        logging.getLogger().addHandler(handler)
 
     return handler
 
 
 def remove_root_handler(handler):
-    root = logging.getLogger()
-    root.removeHandler(handler)
+    if gLISTENER and handler in gLISTENER.handlers:
+        gLISTENER.remove_handler(handler)
+    else:
+        logging.getLogger().removeHandler(handler)
 
 
 
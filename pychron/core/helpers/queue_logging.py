@@ -0,0 +1,251 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+non-blocking logging.
+
+a QueueHandler on the root logger puts records on a bounded queue. a QueueListener thread takes them off and passes
+them to the real handlers, e.g. the log file. producers never do I/O and never block. if the queue is full records
+are dropped and counted.
+
+the message is formatted by the producer, so the listener never reads the state of the objects that were logged, but
+only for records that pass the logger's level, see LazyMessage.
+
+optionally a RateLimiter caps the records per second each logger may queue so a log storm cannot swamp the queue
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import copy
+import logging
+import time
+from Queue import Queue, Full
+from threading import Thread, Lock, Event
+
+# ============= local library imports  ==========================
+
+QUEUE_SIZE = 10000
+
+
+class LazyMessage(object):
+    """
+        str.format style message formatted only when the record is written
+    """
+
+    def __init__(self, fmt, args):
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self):
+        return self.fmt.format(*self.args)
+
+
+class RateLimiter(object):
+    """
+        token bucket per logger. each logger may log ``rate`` records per second with bursts of up to ``burst``
+    """
+
+    def __init__(self, rate=50, burst=200):
+        self.rate = float(rate)
+        self.burst = burst
+        self._buckets = {}
+        self._lock = Lock()
+
+    def allow(self, name):
+        """
+            return (allowed, number of records suppressed since the last allowed record)
+        """
+        now = time.time()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[name] = (tokens - 1, now, 0)
+                return True, suppressed
+
+            self._buckets[name] = (tokens, now, suppressed + 1)
+            return False, 0
+
+
+class QueueHandler(logging.Handler):
+    """
+        put prepared records on a queue. warnings and above are never rate limited
+    """
+
+    def __init__(self, queue, rate_limiter=None):
+        super(QueueHandler, self).__init__()
+        self.queue = queue
+        self.rate_limiter = rate_limiter
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+            return a copy of record with the message, including any traceback, formatted and the args and exc_info
+            cleared, so nothing is formatted on the listener thread and the logged objects are not kept alive
+        """
+        msg = self.format(record)
+        record = copy.copy(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def emit(self, record):
+        rl = self.rate_limiter
+        if rl is not None and record.levelno < logging.WARNING:
+            allowed, suppressed = rl.allow(record.name)
+            if not allowed:
+                return
+
+            if suppressed:
+                self._put(self._make_record(record.name, logging.WARNING,
+                                            'rate limit. suppressed {} messages'.format(suppressed)))
+        try:
+            self._put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def _put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def _make_record(self, name, level, msg):
+        return logging.LogRecord(name, level, __file__, 0, msg, None, None)
+
+
+class QueueListener(object):
+    """
+        thread writing queued records to handlers
+    """
+
+    def __init__(self, queue, handlers):
+        self.queue = queue
+        self.handlers = list(handlers)
+        self._thread = None
+        self.source = None
+
+    def start(self):
+        self._thread = t = Thread(name='logging', target=self._run)
+        t.setDaemon(True)
+        t.start()
+
+    def stop(self):
+        """
+            write the records queued so far then stop
+        """
+        t = self._thread
+        if t is not None:
+            self.queue.put(None)
+            t.join()
+            self._thread = None
+
+    def flush(self):
+        """
+            block until the records queued so far are written
+        """
+        if self._thread is not None:
+            evt = Event()
+            self.queue.put(evt.set)
+            evt.wait()
+
+    def add_handler(self, handler):
+        self._call(self.handlers.append, handler)
+
+    def remove_handler(self, handler):
+        """
+            the handler receives every record queued before it was removed
+        """
+        self._call(self.handlers.remove, handler)
+
+    def handle(self, record):
+        for h in self.handlers:
+            if record.levelno >= h.level:
+                h.handle(record)
+
+    # private
+    def _call(self, func, *args):
+        """
+            run func on the listener thread so it is ordered with the records
+        """
+        if self._thread is None:
+            func(*args)
+        else:
+            self.queue.put(lambda: func(*args))
+            self.flush()
+
+    def _report_dropped(self):
+        src = self.source
+        if src is not None and src.dropped:
+            n, src.dropped = src.dropped, 0
+            self.handle(logging.LogRecord('logging', logging.WARNING, __file__, 0,
+                                          'queue full. dropped {} messages'.format(n), None, None))
+
+    def _run(self):
+        q = self.queue
+        while 1:
+            r = q.get()
+            if r is None:
+                break
+            elif isinstance(r, logging.LogRecord):
+                self._report_dropped()
+                try:
+                    self.handle(r)
+                except BaseException:
+                    pass
+            else:
+                r()
+
+
+def install(handlers, logger=None, queue_size=QUEUE_SIZE, rate=0, burst=200):
+    """
+        route the records of logger, the root logger by default, through a queue to handlers.
+
+        rate: records per second a logger may queue below WARNING. 0, the default, disables rate limiting
+
+        return the started QueueListener
+    """
+    if logger is None:
+        logger = logging.getLogger()
+
+    q = Queue(queue_size)
+    rl = RateLimiter(rate, burst) if rate else None
+    qh = QueueHandler(q, rl)
+
+    listener = QueueListener(q, handlers)
+    listener.source = qh
+    listener.start()
+
+    logger.addHandler(qh)
+    return listener
+
+
+def uninstall(listener, logger=None):
+    """
+        undo install. the records queued so far are written, then the listener's handlers are closed
+    """
+    if logger is None:
+        logger = logging.getLogger()
+
+    logger.removeHandler(listener.source)
+    listener.stop()
+    for h in listener.handlers:
+        h.close()
+
+# ============= EOF =============================================
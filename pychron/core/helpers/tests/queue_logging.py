@@ -0,0 +1,139 @@
+import logging
+import unittest
+from Queue import Queue
+
+from pychron.core.helpers.queue_logging import QueueHandler, QueueListener, RateLimiter, LazyMessage, install, \
+    uninstall
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+class Formatted(object):
+    nformats = 0
+
+    def __str__(self):
+        Formatted.nformats += 1
+        return 'formatted'
+
+
+class QueueLoggingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('queue_logging_test')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = ListHandler()
+        self.listener = None
+
+    def tearDown(self):
+        if self.listener:
+            self.listener.stop()
+        self.logger.handlers = []
+
+    def _install(self, **kw):
+        self.listener = install([self.handler], self.logger, **kw)
+
+    def test_order(self):
+        self._install(rate=0)
+        for i in range(100):
+            self.logger.debug('msg %s', i)
+        self.listener.flush()
+        self.assertListEqual(self.handler.messages, ['msg {}'.format(i) for i in range(100)])
+
+    def test_stop_flushes(self):
+        self._install(rate=0)
+        self.logger.info('a')
+        self.listener.stop()
+        self.listener = None
+        self.assertListEqual(self.handler.messages, ['a'])
+
+    def test_lazy(self):
+        self._install(rate=0)
+        Formatted.nformats = 0
+        self.logger.setLevel(logging.INFO)
+        self.logger.debug(LazyMessage('{}', (Formatted(),)))
+        self.logger.info(LazyMessage('value={}', (Formatted(),)))
+        self.listener.flush()
+        self.assertEqual(Formatted.nformats, 1)
+        self.assertListEqual(self.handler.messages, ['value=formatted'])
+
+    def test_format_on_emit(self):
+        self._install()
+        d = {'a': 1}
+        self.logger.info('value=%(a)s', d)
+        d['a'] = 2
+        try:
+            raise ValueError('bad')
+        except ValueError:
+            self.logger.exception('error')
+
+        self.listener.flush()
+        self.assertEqual(self.handler.messages[0], 'value=1')
+        self.assertTrue(self.handler.messages[1].startswith('error\nTraceback'))
+        self.assertEqual(self.handler.messages[1].count('ValueError: bad'), 1)
+
+    def test_no_rate_limit(self):
+        self._install()
+        for i in range(500):
+            self.logger.debug('%s', i)
+        self.listener.flush()
+        self.assertEqual(len(self.handler.messages), 500)
+
+    def test_uninstall(self):
+        self._install()
+        uninstall(self.listener, self.logger)
+        self.listener = None
+        self.assertListEqual(self.logger.handlers, [])
+
+    def test_rate_limit(self):
+        self._install(rate=1, burst=5)
+        for i in range(20):
+            self.logger.debug('storm %s', i)
+        self.logger.warning('warning')
+        self.listener.flush()
+        self.assertListEqual(self.handler.messages, ['storm {}'.format(i) for i in range(5)] + ['warning'])
+
+    def test_rate_limit_report(self):
+        rl = RateLimiter(rate=1000, burst=1)
+        self.assertEqual(rl.allow('a'), (True, 0))
+        self.assertEqual(rl.allow('a'), (False, 0))
+        self.assertEqual(rl.allow('b'), (True, 0))
+
+        rl._buckets['a'] = (1, rl._buckets['a'][1], 1)
+        self.assertEqual(rl.allow('a'), (True, 1))
+
+    def test_full_queue(self):
+        q = Queue(2)
+        qh = QueueHandler(q)
+        self.logger.addHandler(qh)
+        for i in range(5):
+            self.logger.info('%s', i)
+        self.assertEqual(qh.dropped, 3)
+
+        self.listener = listener = QueueListener(q, [self.handler])
+        listener.source = qh
+        listener.start()
+        listener.flush()
+        self.assertListEqual(self.handler.messages, ['queue full. dropped 3 messages', '0', '1'])
+
+    def test_add_remove_handler(self):
+        self._install(rate=0)
+        h = ListHandler()
+        self.logger.info('a')
+        self.listener.add_handler(h)
+        self.logger.info('b')
+        self.listener.remove_handler(h)
+        self.logger.info('c')
+        self.listener.flush()
+        self.assertListEqual(h.messages, ['b'])
+        self.assertListEqual(self.handler.messages, ['a', 'b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
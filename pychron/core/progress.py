@@ -115,6 +115,53 @@ def progress_loader(xs, func, threshold=50, progress=None,
             return []
 
 
+def progress_imap(xs, func, imap, threshold=50, progress=None,
+                  reraise_cancel=False, step=1, message=None):
+    """
+        xs: list or tuple
+        func: callable with signature func(xi). executed by the pool so it must not touch the progress dialog
+        imap: an ordered map e.g. ThreadPool.imap or Pool.imap
+        message: callable with signature message(ri, i, n) returning the progress message for the ith result
+
+        results are yielded by imap in the same order as xs. cancel/accept are handled the same as progress_loader.
+        it is the callers responsibility to terminate the pool if the loading is canceled
+
+        return: list
+    """
+    n = len(xs)
+    if not progress and n >= threshold:
+        progress = open_progress(n / step)
+
+    def gen():
+        for i, r in enumerate(imap(func, xs)):
+            if progress:
+                if progress.canceled:
+                    raise CancelLoadingError
+                elif progress.accepted:
+                    break
+
+                if message and (i == 0 or i == n - 1 or not i % step):
+                    progress.change_message(message(r, i, n))
+
+            if r is not None:
+                yield r
+
+    try:
+        items = list(gen())
+        if progress:
+            progress.close()
+
+        return items
+    except CancelLoadingError:
+        if progress:
+            progress.close()
+
+        if reraise_cancel:
+            raise CancelLoadingError
+
+        return []
+
+
 def progress_iterator(xs, func, threshold=50, progress=None, reraise_cancel=False):
     """
         see progress_loader documentation
@@ -31,6 +31,32 @@ from tinv import tinv
 logger = logging.getLogger('BaseRegressor')
 
 
+def format_percent_error(s, e):
+    try:
+        return '{:0.2}%'.format(abs(e / s * 100))
+    except ZeroDivisionError:
+        return 'Inf'
+
+
+def format_coefficients(cs, ce, sig_figs=5):
+    """
+        cs, ce: coefficients and errors, highest order first
+    """
+    coeffs = []
+    for a, ci, ei in zip(ALPHAS, cs, ce):
+        pp = '({})'.format(format_percent_error(ci, ei))
+        fmt = '{{:0.{}e}}' if abs(ci) < math.pow(10, -sig_figs) else '{{:0.{}f}}'
+        ci = fmt.format(sig_figs).format(ci)
+
+        fmt = '{{:0.{}e}}' if abs(ei) < math.pow(10, -sig_figs) else '{{:0.{}f}}'
+        ei = fmt.format(sig_figs).format(ei)
+
+        vfmt = u'{{}}= {{}} {} {{}} {{}}'.format(PLUSMINUS)
+        coeffs.append(vfmt.format(a, ci, ei, pp))
+
+    return u', '.join(coeffs)
+
+
 class BaseRegressor(HasTraits):
     xs = Array
     ys = Array
@@ -132,10 +158,7 @@ class BaseRegressor(HasTraits):
         pass
 
     def format_percent_error(self, s, e):
-        try:
-            return '{:0.2}%'.format(abs(e / s * 100))
-        except ZeroDivisionError:
-            return 'Inf'
+        return format_percent_error(s, e)
 
     def predict(self, x):
         raise NotImplementedError
@@ -249,21 +272,7 @@ class BaseRegressor(HasTraits):
 
         cs = self.coefficients[::-1]
         ce = self.coefficient_errors[::-1]
-
-        coeffs = []
-        for a, ci, ei in zip(ALPHAS, cs, ce):
-            pp = '({})'.format(self.format_percent_error(ci, ei))
-            fmt = '{{:0.{}e}}' if abs(ci) < math.pow(10, -sig_figs) else '{{:0.{}f}}'
-            ci = fmt.format(sig_figs).format(ci)
-
-            fmt = '{{:0.{}e}}' if abs(ei) < math.pow(10, -sig_figs) else '{{:0.{}f}}'
-            ei = fmt.format(sig_figs).format(ei)
-
-            vfmt = u'{{}}= {{}} {} {{}} {{}}'.format(PLUSMINUS)
-            coeffs.append(vfmt.format(a, ci, ei, pp))
-
-        s = u', '.join(coeffs)
-        return s
+        return format_coefficients(cs, ce, sig_figs)
 
     def make_equation(self):
         """
@@ -0,0 +1,311 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from numpy import asarray, zeros, ones_like, einsum, sqrt, linalg, arange, where, \
+    errstate, isfinite, nan, logical_xor
+# ============= local library imports  ==========================
+from pychron.core.helpers.fits import FITS
+from pychron.core.helpers.formatting import floatfmt
+from pychron.core.regression.base_regressor import format_coefficients, format_percent_error
+from pychron.core.regression.tinv import tinv
+from pychron.pychron_constants import SEM, MSEM
+
+MEAN_FITS = ('average',)
+
+
+def fit_to_batch_degree(fit):
+    """
+        return the polynomial degree for ``fit``. 0 is used for averages.
+        return None if the batch engine cannot handle this fit
+    """
+    if isinstance(fit, int):
+        return fit if 0 < fit <= len(FITS) else None
+
+    if isinstance(fit, (str, unicode)):
+        f = fit.lower()
+        if f in FITS:
+            return FITS.index(f) + 1
+        elif f in MEAN_FITS:
+            return 0
+
+
+def _pad(arrs, m):
+    ps = zeros((len(arrs), m))
+    for i, a in enumerate(arrs):
+        ps[i, :a.shape[0]] = a
+    return ps
+
+
+def _mask(idxs, n, m):
+    mask = zeros((n, m), dtype=bool)
+    if idxs is not None:
+        for i, ei in enumerate(idxs):
+            if ei is not None and len(ei):
+                mask[i, list(ei)] = True
+    return mask
+
+
+class BatchRegressionResult(object):
+    """
+        results of a batch regression. arrays are indexed by series.
+
+        coefficients and coefficient_errors follow the OLSRegressor convention i.e. [c, b, a] for y=ax**2+bx+c.
+        for averages coefficients=[mean] and coefficient_errors=[std, sem] same as MeanRegressor
+    """
+
+    def __init__(self, n):
+        self.degrees = zeros(n, dtype=int)
+        self.coefficients = [None] * n
+        self.coefficient_errors = [None] * n
+        self.n = zeros(n, dtype=int)
+        self.npoints = zeros(n, dtype=int)
+        self.sef = zeros(n)
+        self.value = zeros(n)
+        self.error = zeros(n)
+        self.clean = [None] * n
+        self.outlier_excluded = [None] * n
+        self.supported = zeros(n, dtype=bool)
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def noutliers(self, i):
+        return self.npoints[i] - self.n[i]
+
+    def predict(self, i, xs):
+        xs = asarray(xs, dtype=float)
+        cs = self.coefficients[i]
+        if self.degrees[i] == 0:
+            return ones_like(xs) * cs[0]
+
+        return sum(c * xs ** p for p, c in enumerate(cs))
+
+    def tostring(self, i, sig_figs=5):
+        cs, ce = self.coefficients[i], self.coefficient_errors[i]
+        if self.degrees[i] == 0:
+            m = cs[0]
+            std, sem = ce
+            return 'mean={}, n={}({}), std={} ({}), sem={} ({})'.format(floatfmt(m, n=9), self.n[i], self.npoints[i],
+                                                                        floatfmt(std, n=9),
+                                                                        format_percent_error(m, std),
+                                                                        floatfmt(sem, n=9),
+                                                                        format_percent_error(m, sem))
+        else:
+            return format_coefficients(cs[::-1], ce[::-1], sig_figs)
+
+
+def batch_regress(xs, ys, fits, error_calc_types=None, filter_outliers_dicts=None,
+                  user_excluded=None, truncate_excluded=None):
+    """
+        fit many series at once.
+
+        xs, ys: sequence of 1D arrays. the series may be ragged
+        fits: sequence of fits. "linear", "parabolic", "cubic", "quartic", "average" or an integer degree
+        error_calc_types: sequence of SEM, MSEM, SD, CI or None. None is interpreted the same as the
+            per-object regressors i.e. SD for polynomial fits and SEM for averages. the series have no y errors
+            so there is no MSWD and MSEM is the same as SEM
+        filter_outliers_dicts: sequence of dicts with keys filter_outliers, iterations, std_devs
+        user_excluded, truncate_excluded: sequence of index lists
+
+        series are grouped by degree and each group is solved with stacked normal equations.
+        the results match OLSRegressor and MeanRegressor. Series that can not be replicated by the batch engine
+        (unsupported fit, too few points) are flagged with ``result.supported[i]==False`` and should be
+        fit with the per-object regressors
+    """
+    n = len(ys)
+    result = BatchRegressionResult(n)
+    if not n:
+        return result
+
+    xs = [asarray(x, dtype=float) for x in xs]
+    ys = [asarray(y, dtype=float) for y in ys]
+
+    if error_calc_types is None:
+        error_calc_types = [None] * n
+    if filter_outliers_dicts is None:
+        filter_outliers_dicts = [None] * n
+
+    degrees = [fit_to_batch_degree(f) for f in fits]
+    for d in set(degrees):
+        if d is None:
+            continue
+
+        idxs = [i for i, di in enumerate(degrees) if di == d and ys[i].shape[0] == xs[i].shape[0]]
+        if not idxs:
+            continue
+
+        gx = [xs[i] for i in idxs]
+        gy = [ys[i] for i in idxs]
+        fods = [filter_outliers_dicts[i] or {} for i in idxs]
+        ects = [error_calc_types[i] for i in idxs]
+        ue = [user_excluded[i] for i in idxs] if user_excluded is not None else None
+        te = [truncate_excluded[i] for i in idxs] if truncate_excluded is not None else None
+
+        _regress_group(result, idxs, d, gx, gy, ects, fods, ue, te)
+
+    return result
+
+
+def _regress_group(result, idxs, degree, xs, ys, error_calc_types, fods, user_excluded, truncate_excluded):
+    s = len(idxs)
+    lens = asarray([y.shape[0] for y in ys])
+    m = lens.max()
+
+    X = _pad(xs, m)
+    Y = _pad(ys, m)
+    valid = arange(m) < lens[:, None]
+
+    # BaseRegressor._clean_array uses the symmetric difference of the excluded sets.
+    # this is replicated so the batch results match the per-object regressors
+    fixed = logical_xor(_mask(user_excluded, s, m), _mask(truncate_excluded, s, m))
+    outliers = zeros((s, m), dtype=bool)
+
+    def clean_mask():
+        return valid & ~logical_xor(fixed, outliers)
+
+    if degree:
+        V = X[:, :, None] ** arange(degree + 1)
+        fit = lambda w: _ols(V, Y, w, degree + 1)
+    else:
+        fit = lambda w: _mean(Y, w)
+
+    # iterative outlier exclusion. see BaseRegressor.calculate_filtered_data
+    filtering = asarray([bool(f.get('filter_outliers', False)) for f in fods])
+    iterations = asarray([f.get('iterations', 1) if fi else 0 for f, fi in zip(fods, filtering)])
+    nsigma = asarray([f.get('std_devs', 2) for f in fods], dtype=float)
+    for it in xrange(iterations.max() if s else 0):
+        active = iterations > it
+        w = clean_mask()
+        beta, sef, _ = fit(w)
+        threshold = (sef * nsigma)[:, None]
+        with errstate(invalid='ignore'):
+            if degree:
+                o = abs(Y - _predict(V, beta)) >= threshold
+            else:
+                # MeanRegressor uses a strict inequality
+                o = abs(Y - beta) > threshold
+
+        outliers |= o & valid & active[:, None]
+
+    w = clean_mask()
+    beta, sef, C = fit(w)
+    cn = w.sum(1)
+
+    q = degree + 1
+    for j, i in enumerate(idxs):
+        n = cn[j]
+        et = error_calc_types[j]
+
+        result.degrees[i] = degree
+        result.n[i] = n
+        result.npoints[i] = lens[j]
+        result.sef[i] = sef[j]
+        result.clean[i] = w[j, :lens[j]]
+        result.outlier_excluded[i] = where(outliers[j, :lens[j]])[0]
+
+        if degree:
+            # OLSRegressor duplicates a single point and statsmodels returns nan for dof<=0.
+            # leave those cases to the per-object regressor
+            supported = n > q and (et != 'CI' or n > 2)
+            cs = beta[j]
+            c00 = C[j, 0, 0]
+            with errstate(invalid='ignore'):
+                bse = sqrt(C[j].diagonal() * sef[j] ** 2)
+
+            e = sef[j] * c00 ** 0.5
+            if et in (SEM, MSEM):
+                pass
+            elif et == 'CI':
+                e = _ci_error(X[j, w[j]], Y[j, w[j]], cs)
+            else:
+                e = (sef[j] ** 2 + sef[j] ** 2 * c00) ** 0.5
+
+            result.coefficients[i] = cs
+            result.coefficient_errors[i] = bse
+            result.value[i] = cs[0]
+            result.error[i] = e
+        else:
+            supported = n > 1
+            mean, std = beta[j, 0], sef[j]
+            sem = std * n ** -0.5 if n else 0
+            if et in (SEM, MSEM, None):
+                e = sem
+            else:
+                e = std
+
+            result.coefficients[i] = [mean]
+            result.coefficient_errors[i] = [std, sem]
+            result.value[i] = mean
+            result.error[i] = e
+
+        result.supported[i] = bool(supported and isfinite(result.value[i]) and isfinite(result.error[i]))
+
+
+def _ols(V, Y, w, q):
+    """
+        solve the normal equations for each series. w is the boolean mask of points to include
+
+        return beta (s, q), standard error of fit (s,), normalized covariance matrices (s, q, q)
+    """
+    wf = w.astype(float)
+    # use the pseudo-inverse of the masked design matrices, same as statsmodels, rather than inverting X'X.
+    # the normal equations are poorly conditioned for cubic fits over long counting times
+    P = linalg.pinv(V * wf[:, :, None])
+    beta = einsum('sim,sm->si', P, Y * wf)
+    C = einsum('sim,sjm->sij', P, P)
+
+    resid = Y - _predict(V, beta)
+    ssr = (wf * resid ** 2).sum(1)
+    dof = wf.sum(1) - q
+    with errstate(divide='ignore', invalid='ignore'):
+        sef = where(dof > 0, (ssr / dof) ** 0.5, nan)
+    return beta, sef, C
+
+
+def _mean(Y, w):
+    """
+        return means (s, 1), std (ddof=1) (s,)
+    """
+    wf = w.astype(float)
+    n = wf.sum(1)
+    with errstate(divide='ignore', invalid='ignore'):
+        mean = (wf * Y).sum(1) / n
+        std = ((wf * (Y - mean[:, None]) ** 2).sum(1) / (n - 1)) ** 0.5
+    return mean[:, None], std, None
+
+
+def _predict(V, beta):
+    return einsum('smi,si->sm', V, beta)
+
+
+def _ci_error(x, y, cs, confidence=95):
+    """
+        see BaseRegressor._calculate_confidence_interval evaluated at x=0
+    """
+    alpha = 1.0 - confidence / 100.0
+    n = y.shape[0]
+    xm = x.mean()
+    ti = tinv(alpha, n - 1)
+
+    model = sum(c * x ** p for p, c in enumerate(cs))
+    syx = (1. / (n - 2) * ((y - model) ** 2).sum()) ** 0.5
+    ssx = ((x - xm) ** 2).sum()
+    d = n ** -1 + xm ** 2 / ssx
+    return ti * syx * d ** 0.5 / 2.
+
+# ============= EOF =============================================
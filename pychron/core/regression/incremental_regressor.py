@@ -0,0 +1,286 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from numpy import zeros, arange, asarray, dot, outer, linalg, isfinite, errstate, where, ones_like
+
+# ============= local library imports  ==========================
+from pychron.core.regression.tinv import tinv
+from pychron.pychron_constants import SEM, MSEM
+
+MAX_INCREMENTAL_DEGREE = 3
+
+
+class IncrementalRegressor(object):
+    """
+        least squares fit maintained from running sums so that adding a point is O(1).
+
+        degree=0 is a mean, 1-3 are linear, parabolic and cubic polynomials.
+
+        the sums are accumulated relative to the first point added (x0, y0) to limit cancellation and the
+        normal equations are column scaled before solving. errors follow the same conventions as
+        OLSRegressor/MeanRegressor (see batch_regressor) so the results can stand in for a full regression
+    """
+    error_calc_type = None
+
+    def __init__(self, degree=1, error_calc_type=None):
+        if not 0 <= degree <= MAX_INCREMENTAL_DEGREE:
+            raise ValueError('Invalid incremental regression degree {}'.format(degree))
+
+        self.degree = degree
+        self.error_calc_type = error_calc_type
+        self.clear()
+
+    def clear(self):
+        q = self.degree + 1
+        self.n = 0
+        self._x0 = None
+        self._y0 = None
+        self._su = zeros(2 * q - 1)
+        self._suy = zeros(q)
+        self._syy = 0.0
+        self._sw = 0.0
+        self._swy = 0.0
+        self._swyy = 0.0
+        self._nerrors = 0
+        self._scale = 0.0
+        self._solved = None
+
+    def copy(self):
+        r = IncrementalRegressor.__new__(IncrementalRegressor)
+        r.__dict__.update(self.__dict__)
+        r._su = self._su.copy()
+        r._suy = self._suy.copy()
+        r._solved = None
+        return r
+
+    def add(self, x, y, e=None):
+        self._update(asarray([x], dtype=float), asarray([y], dtype=float),
+                     None if e is None else asarray([e], dtype=float), 1)
+
+    def remove(self, x, y, e=None):
+        self._update(asarray([x], dtype=float), asarray([y], dtype=float),
+                     None if e is None else asarray([e], dtype=float), -1)
+
+    def add_many(self, xs, ys, es=None):
+        self._update(asarray(xs, dtype=float), asarray(ys, dtype=float),
+                     None if es is None else asarray(es, dtype=float), 1)
+
+    def remove_many(self, xs, ys, es=None):
+        self._update(asarray(xs, dtype=float), asarray(ys, dtype=float),
+                     None if es is None else asarray(es, dtype=float), -1)
+
+    def filter_outliers(self, xs, ys, iterations=1, nsigma=2):
+        """
+            replicate BaseRegressor.calculate_filtered_data.
+
+            xs, ys must be the points that were added to this regressor.
+            return a regressor fit to the clean points and the indices of the excluded points
+        """
+        xs = asarray(xs, dtype=float)
+        ys = asarray(ys, dtype=float)
+
+        mask = zeros(ys.shape[0], dtype=bool)
+        for _ in xrange(iterations):
+            reg = self._without(xs, ys, mask)
+            if not reg.supported:
+                break
+
+            mask |= reg.outliers(xs, ys, nsigma)
+
+        return self._without(xs, ys, mask), where(mask)[0]
+
+    def outliers(self, xs, ys, nsigma=2):
+        """
+            return a mask of the points further than nsigma * sef from the fit
+        """
+        r = abs(asarray(ys, dtype=float) - self.predict(asarray(xs, dtype=float)))
+        t = self.sef * nsigma
+        with errstate(invalid='ignore'):
+            # MeanRegressor uses a strict inequality
+            return r > t if self.degree == 0 else r >= t
+
+    @property
+    def supported(self):
+        """
+            True if there are enough points for a result that matches the full regressors
+        """
+        n = self.n
+        if self.degree:
+            ok = n > self.degree + 1 and (self.error_calc_type != 'CI' or n > 2)
+        else:
+            ok = n > 1
+
+        return ok and isfinite(self.value) and isfinite(self.error)
+
+    @property
+    def value(self):
+        return self.predict(0)
+
+    @property
+    def error(self):
+        return self.predict_error(0)
+
+    @property
+    def sef(self):
+        return self._solve()['sef']
+
+    @property
+    def mswd(self):
+        """
+            MSWD of the points about their weighted mean. see pychron.core.stats.core.calculate_mswd.
+            None unless every point was added with an error
+        """
+        n = self.n
+        if not n or self._nerrors != n:
+            return
+
+        if n < 2:
+            return 0
+
+        k = self.degree + 1 if self.degree else 1
+        with errstate(divide='ignore', invalid='ignore'):
+            chi = self._swyy - self._swy ** 2 / self._sw
+            return chi / float(n - k)
+
+    def predict(self, x):
+        s = self._solve()
+        u = asarray(x, dtype=float) - self._x0
+        if self.degree:
+            return self._y0 + sum(c * u ** p for p, c in enumerate(s['beta']))
+        else:
+            return self._y0 + s['beta'][0] * ones_like(u)
+
+    def predict_error(self, x):
+        s = self._solve()
+        et = self.error_calc_type
+        sef = s['sef']
+        mswd = self.mswd
+        mf = mswd ** 0.5 if mswd is not None and mswd > 1 else 1
+
+        n = self.n
+        if self.degree:
+            v = (asarray(x, dtype=float) - self._x0) ** arange(self.degree + 1)
+            c00 = dot(v, dot(s['cov'], v))
+
+            if et == SEM:
+                e = sef * c00 ** 0.5
+            elif et == MSEM:
+                e = sef * c00 ** 0.5 * mf
+            elif et == 'CI':
+                e = self._ci_error(x, s)
+            else:
+                e = (sef ** 2 + sef ** 2 * c00) ** 0.5
+        else:
+            sem = sef * n ** -0.5 if n else 0
+            if et in (SEM, None):
+                e = sem
+            elif et == MSEM:
+                e = sem * mf
+            else:
+                e = sef
+
+        return e
+
+    # private
+    def _without(self, xs, ys, mask):
+        reg = self.copy()
+        if mask.any():
+            reg.remove_many(xs[mask], ys[mask])
+        return reg
+
+    def _update(self, xs, ys, es, sign):
+        if not xs.shape[0]:
+            return
+
+        if self._x0 is None:
+            self._x0 = xs[0]
+            self._y0 = ys[0]
+
+        q = self.degree + 1
+        u = xs - self._x0
+        v = ys - self._y0
+
+        p = u[:, None] ** arange(2 * q - 1)
+        self._su += sign * p.sum(0)
+        self._suy += sign * (p[:, :q] * v[:, None]).sum(0)
+        self._syy += sign * (v * v).sum()
+        self.n += sign * xs.shape[0]
+
+        if es is not None:
+            with errstate(divide='ignore'):
+                w = es ** -2
+            self._sw += sign * w.sum()
+            self._swy += sign * (w * ys).sum()
+            self._swyy += sign * (w * ys * ys).sum()
+            self._nerrors += sign * xs.shape[0]
+
+        self._scale = max(self._scale, abs(u).max())
+        self._solved = None
+
+    def _solve(self):
+        s = self._solved
+        if s is not None:
+            return s
+
+        q = self.degree + 1
+        n = self.n
+        idx = arange(q)
+        A = self._su[idx[:, None] + idx[None, :]]
+        b = self._suy
+
+        # scale the columns of the design matrix to [-1, 1] to improve the conditioning of X'X
+        scale = self._scale or 1.0
+        d = scale ** -idx.astype(float)
+        As = A * outer(d, d)
+        bs = b * d
+
+        with errstate(divide='ignore', invalid='ignore'):
+            try:
+                cov_s = linalg.inv(As)
+            except linalg.LinAlgError:
+                cov_s = linalg.pinv(As)
+
+            beta_s = dot(cov_s, bs)
+            beta = beta_s * d
+            cov = cov_s * outer(d, d)
+
+            ssr = max(self._syy - dot(beta_s, bs), 0)
+            dof = n - q
+            sef = (ssr / dof) ** 0.5 if dof > 0 else float('nan')
+
+        self._solved = s = {'beta': beta, 'cov': cov, 'ssr': ssr, 'sef': sef}
+        return s
+
+    def _ci_error(self, x, s, confidence=95):
+        """
+            see BaseRegressor._calculate_confidence_interval
+        """
+        alpha = 1.0 - confidence / 100.0
+        n = self.n
+        su, suu = self._su[1], self._su[2]
+
+        um = su / n
+        xm = self._x0 + um
+        ssx = suu - n * um ** 2
+        ti = tinv(alpha, n - 1)
+
+        syx = (s['ssr'] / (n - 2.)) ** 0.5
+        d = n ** -1 + (xm - x) ** 2 / ssx
+        return ti * syx * d ** 0.5 / 2.
+
+# ============= EOF =============================================
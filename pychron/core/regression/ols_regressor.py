@@ -18,7 +18,7 @@
 import logging
 
 from numpy import asarray, column_stack, ones, \
-    matrix, sqrt, dot, linalg, zeros_like, hstack
+    matrix, sqrt, dot, linalg, zeros_like, hstack, eye
 from statsmodels.api import OLS
 from traits.api import Int, Property
 
@@ -37,6 +37,7 @@ class OLSRegressor(BaseRegressor):
     _degree = Int
     constant = None
     _ols = None
+    _pinv_wexog = None
 
     def set_degree(self, d, refresh=True):
         if isinstance(d, str):
@@ -70,11 +71,40 @@ class OLSRegressor(BaseRegressor):
 
         currently useful for monte_carlo_estimation
         """
-        if not hasattr(self, 'pinv_wexog'):
-            self.pinv_wexog = linalg.pinv(self._ols.wexog)
-        beta = dot(self.pinv_wexog, endog)
+        return self.fast_predict_many(asarray(endog)[None], exog)[0]
 
-        return dot(exog, beta)
+    def fast_predict_many(self, endogs, exog):
+        """
+        predict exog for many sets of observations at once.
+
+        endogs: (ntrials, n) array. each row replaces the observations of the fitted model
+        returns (ntrials, len(exog)) array
+
+        every trial is solved with one product against the cached pseudo-inverse of the whitened design matrix
+        """
+        ols = self._ols
+        wendogs = ols.whiten(asarray(endogs, dtype=float).T)
+        beta = dot(self.get_pinv_wexog(), wendogs)
+        return dot(exog, beta).T
+
+    def get_prediction_matrix(self, exog):
+        """
+        matrix H such that dot(H, endog) == fast_predict2(endog, exog).
+        whitening is folded into H so many trials or regressors can be predicted with a single product
+        """
+        ols = self._ols
+        n = ols.wexog.shape[0]
+        return dot(exog, dot(self.get_pinv_wexog(), ols.whiten(eye(n))))
+
+    def get_pinv_wexog(self):
+        """
+        pseudo-inverse of the whitened design matrix. cached until the model is refit
+        """
+        ols = self._ols
+        cache = self._pinv_wexog
+        if cache is None or cache[0] is not ols:
+            cache = self._pinv_wexog = (ols, linalg.pinv(ols.wexog))
+        return cache[1]
 
     def calculate(self, filtering=False):
         cxs = self.clean_xs
@@ -0,0 +1,110 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from unittest import TestCase
+
+from numpy import linspace, random, asarray
+
+# ============= local library imports  ==========================
+from pychron.core.regression.batch_regressor import batch_regress
+from pychron.core.regression.mean_regressor import MeanRegressor
+from pychron.core.regression.ols_regressor import PolynomialRegressor
+from pychron.core.regression.tests.standard_data import ols_data, filter_data
+
+
+def make_regressor(xs, ys, fit, error_calc_type, fod):
+    if fit == 'average':
+        reg = MeanRegressor(xs=xs, ys=ys, filter_outliers_dict=fod, error_calc_type=error_calc_type or 'SEM')
+    else:
+        reg = PolynomialRegressor(xs=xs, ys=ys, error_calc_type=error_calc_type)
+        reg.set_degree(fit, refresh=False)
+        reg.filter_outliers_dict = fod
+    reg.calculate()
+    return reg
+
+
+class BatchRegressionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rs = random.RandomState(123456)
+        xs, ys, fits, ets, fods = [], [], [], [], []
+        for i in range(40):
+            n = rs.randint(5, 60)
+            x = linspace(1, 100, n)
+            y = 10 - 0.02 * x + 0.0001 * x ** 2 + rs.normal(0, 0.05, n)
+            if i % 5 == 0:
+                y[2] += 3
+
+            xs.append(x)
+            ys.append(y)
+            fits.append(('linear', 'parabolic', 'cubic', 'average')[i % 4])
+            ets.append((None, 'SEM', 'SD', 'MSEM', 'CI')[i % 5])
+            fods.append({'filter_outliers': i % 2 == 0, 'iterations': 1 + i % 3, 'std_devs': 2})
+
+        x, y, _ = ols_data()
+        xs.append(asarray(x))
+        ys.append(asarray(y))
+        fits.append('linear')
+        ets.append('SEM')
+        fods.append({})
+
+        x, y, _ = filter_data()
+        xs.append(asarray(x))
+        ys.append(asarray(y))
+        fits.append('linear')
+        ets.append('SEM')
+        fods.append({'filter_outliers': True, 'iterations': 1, 'std_devs': 2})
+
+        cls.args = xs, ys, fits, ets, fods
+        cls.result = batch_regress(xs, ys, fits, error_calc_types=ets, filter_outliers_dicts=fods)
+        cls.regs = [make_regressor(*a) for a in zip(xs, ys, fits, ets, fods)]
+
+    def test_supported(self):
+        self.assertTrue(all(self.result.supported))
+
+    def test_value(self):
+        for i, reg in enumerate(self.regs):
+            self.assertAlmostEqual(self.result.value[i], reg.predict(0), 9)
+
+    def test_error(self):
+        for i, reg in enumerate(self.regs):
+            self.assertAlmostEqual(self.result.error[i], reg.predict_error(0), 9)
+
+    def test_coefficients(self):
+        for i, reg in enumerate(self.regs):
+            for a, b in zip(self.result.coefficients[i], reg.coefficients):
+                self.assertAlmostEqual(a, b, 7)
+
+            for a, b in zip(self.result.coefficient_errors[i], reg.coefficient_errors):
+                self.assertAlmostEqual(a, b, 7)
+
+    def test_n(self):
+        for i, reg in enumerate(self.regs):
+            self.assertEqual(self.result.n[i], reg.n)
+
+    def test_tostring(self):
+        for i, reg in enumerate(self.regs):
+            self.assertEqual(self.result.tostring(i), reg.tostring())
+
+    def test_unsupported(self):
+        r = batch_regress([linspace(0, 1, 5), linspace(0, 1, 2)],
+                          [linspace(0, 1, 5), linspace(0, 1, 2)],
+                          ['exponential', 'parabolic'])
+        self.assertListEqual(list(r.supported), [False, False])
+
+# ============= EOF =============================================
@@ -0,0 +1,210 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from threading import Thread, Event
+from unittest import TestCase
+
+from numpy import linspace, random, std
+
+# ============= local library imports  ==========================
+from pychron.core.regression.incremental_regressor import IncrementalRegressor
+from pychron.core.regression.tests.batch_regression import make_regressor
+from pychron.processing.isotope import Isotope
+
+FITS = ('average', 'linear', 'parabolic', 'cubic')
+
+
+def make_data(n=300, seed=1):
+    rs = random.RandomState(seed)
+    xs = linspace(5, 600, n)
+    ys = 50 - 0.02 * xs + 0.00001 * xs ** 2 + rs.normal(0, 0.05, n)
+    ys[3] += 2
+    return xs, ys
+
+
+class IncrementalRegressionTest(TestCase):
+    def _compare(self, et, fod, places=7):
+        xs, ys = make_data()
+        for degree, fit in enumerate(FITS):
+            if et == 'CI' and not degree:
+                continue
+
+            reg = IncrementalRegressor(degree, et if degree else et or 'SEM')
+            for x, y in zip(xs, ys):
+                reg.add(x, y)
+
+            r = reg
+            if fod.get('filter_outliers'):
+                r, _ = reg.filter_outliers(xs, ys, fod['iterations'], fod['std_devs'])
+
+            full = make_regressor(xs, ys, fit, et, fod)
+            self.assertEqual(r.n, full.clean_xs.shape[0])
+            self.assertAlmostEqual(r.value / full.predict(0), 1, places)
+            self.assertAlmostEqual(r.error / full.predict_error(0), 1, places)
+
+    def test_sd(self):
+        self._compare(None, {})
+
+    def test_sem(self):
+        self._compare('SEM', {})
+
+    def test_ci(self):
+        self._compare('CI', {})
+
+    def test_filtered(self):
+        self._compare('SEM', {'filter_outliers': True, 'iterations': 2, 'std_devs': 2})
+
+    def test_remove(self):
+        xs, ys = make_data()
+        a = IncrementalRegressor(2)
+        a.add_many(xs, ys)
+        a.remove_many(xs[100:], ys[100:])
+
+        b = IncrementalRegressor(2)
+        b.add_many(xs[:100], ys[:100])
+        self.assertAlmostEqual(a.value, b.value, 9)
+        self.assertAlmostEqual(a.error, b.error, 9)
+
+    def test_mswd(self):
+        reg = IncrementalRegressor(0)
+        for y in (1, 2, 3):
+            reg.add(0, y, 1)
+        self.assertAlmostEqual(reg.mswd, 1.0)
+
+    def test_isotope(self):
+        xs, ys = make_data()
+        iso = Isotope('Ar40', 'H1')
+        iso.set_fit('parabolic')
+        iso.set_incremental()
+        for x, y in zip(xs, ys):
+            iso.append_point(x, y)
+            if x > 100:
+                self.assertIsNotNone(iso._get_incremental_result())
+                break
+
+        v = iso.value
+        iso.set_incremental(False)
+        self.assertAlmostEqual(v / iso.value, 1, 9)
+
+    def test_isotope_outlier_refit(self):
+        xs, ys = make_data()
+        iso = Isotope('Ar40', 'H1')
+        iso.set_fit('linear')
+        iso.set_filter_outliers_dict()
+        iso.set_incremental()
+        for x, y in zip(xs, ys)[:10]:
+            iso.append_point(x, y)
+
+        # the first evaluation establishes the excluded set and requires a full refit
+        self.assertIsNone(iso._get_incremental_result())
+        self.assertIsNone(iso._get_incremental_result())
+
+        # excluded set unchanged
+        iso.append_point(xs[10], ys[10])
+        r = iso._get_incremental_result()
+        self.assertIsNotNone(r)
+        self.assertEqual(r['noutliers'], 1)
+
+    def test_isotope_outlier_agrees(self):
+        # the incremental excluded set and fit must match a full filtered regression at every count
+        xs, ys = make_data()
+        ys[150] += 5
+        iso = Isotope('Ar40', 'H1')
+        iso.set_fit('parabolic')
+        iso.set_filter_outliers_dict()
+        iso.set_incremental()
+
+        nfast = 0
+        for i, (x, y) in enumerate(zip(xs, ys)[:200]):
+            iso.append_point(x, y)
+            if i < 20 or i % 5:
+                continue
+
+            r = iso._get_incremental_result()
+            full = Isotope('Ar40', 'H1')
+            full.xs, full.ys = xs[:i + 1], ys[:i + 1]
+            full.set_fit('parabolic')
+            full.set_filter_outliers_dict()
+            reg = full.regressor
+            if r is not None:
+                nfast += 1
+                self.assertEqual(r['noutliers'], reg.xs.shape[0] - reg.clean_xs.shape[0])
+                self.assertAlmostEqual(r['value'] / reg.predict(0), 1, 7)
+                self.assertAlmostEqual(r['error'] / reg.predict_error(0), 1, 5)
+
+        self.assertGreater(nfast, 20)
+
+    def test_isotope_outlier_readmitted(self):
+        # an early outlier becomes an inlier as the scatter of the later points grows. the later points are never
+        # outliers themselves so only retesting the excluded points finds it
+        ys = [0, .01, -.01, .01, -.01, .01, -.01, .01, -.01, .01, 1.0]
+        clean = ys[:10]
+        for i in xrange(400):
+            y = (-1) ** i * 1.8 * std(clean, ddof=1)
+            ys.append(y)
+            clean.append(y)
+
+        iso = Isotope('Ar40', 'H1')
+        iso.set_fit('average')
+        iso.set_filter_outliers_dict()
+        iso.set_incremental()
+        for x, y in enumerate(ys):
+            iso.append_point(x, y)
+            r = iso._get_incremental_result()
+            if x == 300:
+                self.assertEqual(r['noutliers'], 1)
+
+        # the excluded set changed. the change is reported with a full refit once
+        if r is None:
+            r = iso._get_incremental_result()
+        self.assertEqual(r['noutliers'], 0)
+        v = r['value']
+        iso.set_incremental(False)
+        self.assertAlmostEqual(v, iso.value, 9)
+        self.assertEqual(iso.noutliers(), 0)
+
+    def test_isotope_concurrent(self):
+        xs, ys = make_data()
+        iso = Isotope('Ar40', 'H1')
+        iso.set_fit('linear')
+        iso.set_filter_outliers_dict()
+        iso.set_incremental()
+
+        done = Event()
+
+        def read():
+            while not done.is_set():
+                iso.value, iso.error
+
+        ts = [Thread(target=read) for _ in range(4)]
+        for t in ts:
+            t.start()
+
+        try:
+            for x, y in zip(xs, ys):
+                iso.append_point(x, y)
+        finally:
+            done.set()
+            for t in ts:
+                t.join()
+
+        iso._get_incremental_result()
+        # every point was added to the running sums once
+        self.assertEqual(iso._incremental['regressor'].n, xs.shape[0])
+
+# ============= EOF =============================================
@@ -16,42 +16,91 @@
 
 # ============= enthought library imports =======================
 # ============= standard library imports ========================
-from numpy import zeros, percentile, array
-from scipy.stats import norm
+from collections import OrderedDict
+
+from numpy import zeros, percentile, asarray, random, matmul, vstack, hstack
 # ============= local library imports  ==========================
 
+# maximum number of random draws made at once. bounds the temporary arrays to ~32 MB
+MAX_CHUNK_ELEMENTS = 2 ** 22
+PERCENTILES = (15.87, 84.13)
+
+
+def monte_carlo_error_estimation(reg, nominal_ys, pts, ntrials=100, random_state=None):
+    return batch_monte_carlo_error_estimation([(reg, nominal_ys, pts)], ntrials, random_state)[0]
+
+
+def batch_monte_carlo_error_estimation(items, ntrials=100, random_state=None):
+    """
+        items: sequence of (regressor, nominal_ys, pts)
+
+        estimate the prediction errors of many regressors. the observations of each regressor
+        are perturbed by their errors and every trial is solved with one matrix product against the
+        regressor's prediction matrix (see OLSRegressor.get_prediction_matrix).
+
+        the points of items that share a regressor are predicted from the same perturbed observations.
+        regressors with the same number of observations are stacked and solved together
 
-def monte_carlo_error_estimation(reg, nominal_ys, pts, ntrials=100):
-    exog = reg.get_exog(pts)
-    ys = reg.ys
-    yserr = reg.yserr
-    n = len(ys)
-    yes = array((ys, yserr)).T
-    ga = norm().rvs((ntrials, n))
-    yp = zeros(n)
-    res = zeros((ntrials, len(pts)))
-
-    pred = reg.fast_predict2
-    for i in xrange(ntrials):
-        res[i] = perturb(pred, exog, nominal_ys, yes, ga[i], yp)
-
-    res = res.T
-    ret = zeros(len(pts))
-    pct = (15.87, 84.13)
-    for i, po in enumerate(pts):
-        ri = res[i]
-        ai, bi = percentile(ri, pct)
-        ret[i] = (abs(ai) + abs(bi)) * 0.5
+        returns a list of error arrays, one per item
+    """
+    if random_state is None:
+        random_state = random
+
+    # one prediction matrix per regressor for all of its points
+    regs = OrderedDict()
+    for i, (reg, nominal_ys, pts) in enumerate(items):
+        h = reg.get_prediction_matrix(reg.get_exog(pts))
+        regs.setdefault(id(reg), (reg, []))[1].append((i, h, asarray(nominal_ys, dtype=float)))
+
+    groups = OrderedDict()
+    for reg, hs in regs.itervalues():
+        h = vstack([hi for _, hi, _ in hs])
+        ys = asarray(reg.ys, dtype=float)
+        es = asarray(reg.yserr, dtype=float)
+
+        # the predictions are linear in the observations
+        offsets = hstack([ni for _, _, ni in hs]) - h.dot(ys)
+        groups.setdefault(h.shape[1], []).append((hs, offsets, h * es))
+
+    ret = [None] * len(items)
+    for n, gs in groups.iteritems():
+        # pad the predictions to the longest in the group. the padding predicts 0 and is dropped
+        m = max(o.shape[0] for _, o, _ in gs)
+        offsets = zeros((len(gs), m))
+        hes = zeros((len(gs), m, n))
+        for k, (_, o, he) in enumerate(gs):
+            offsets[k, :o.shape[0]] = o
+            hes[k, :o.shape[0]] = he
+
+        res = perturb(offsets, hes, ntrials, random_state)
+        a, b = percentile(res, PERCENTILES, axis=1)
+        es = (abs(a) + abs(b)) * 0.5
+        for k, (hs, _, _) in enumerate(gs):
+            j = 0
+            for i, h, _ in hs:
+                ret[i] = es[k, j:j + h.shape[0]]
+                j += h.shape[0]
 
     return ret
 
 
-def perturb(pred, exog, nominal_ys, y_es, ga, yp):
-    for i, (y, e) in enumerate(y_es):
-        yp[i] = y + e * ga[i]
+def perturb(offsets, hes, ntrials, random_state):
+    """
+        offsets: (k, m) nominal values minus the unperturbed predictions
+        hes: (k, m, n) prediction matrices scaled by the observation errors
+
+        returns (k, ntrials, m) nominal minus perturbed predictions.
+        the trials are drawn in chunks to limit memory use
+    """
+    k, m, n = hes.shape
+    res = zeros((k, ntrials, m))
+    step = max(1, MAX_CHUNK_ELEMENTS // max(k * max(n, m), 1))
+    het = hes.transpose(0, 2, 1)
+    for i in xrange(0, ntrials, step):
+        ga = random_state.standard_normal((k, min(step, ntrials - i), n))
+        res[:, i:i + step] = offsets[:, None, :] - matmul(ga, het)
 
-    pys = pred(yp, exog)
-    return nominal_ys - pys
+    return res
 
 
 # if __name__ == '__main__':
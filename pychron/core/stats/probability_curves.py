@@ -17,38 +17,132 @@
 # ============= enthought library imports =======================
 
 # ============= standard library imports ========================
+from collections import OrderedDict
+from hashlib import sha1
 from math import pi
 
-from numpy import linspace, zeros, ones, exp
-
+from numpy import linspace, zeros, exp, asarray, ascontiguousarray, argsort, ndarray
 
 # ============= local library imports  ==========================
 
+# maximum number of ages x bins evaluated at once. bounds the temporary arrays to ~32 MB
+MAX_CHUNK_ELEMENTS = 2 ** 22
+MAX_CHUNK_AGES = 256
+# exp(-x) underflows to zero for x > ~745, i.e. further than ~38.6 sigma from an age
+CUTOFF_SIGMA = 40
+CURVE_CACHE_SIZE = 100
+
+
+class CurveCache(object):
+    """
+        LRU cache of probability curves keyed by a digest of the ages and errors, the bin range and
+        the number of bins. lets an ideogram be panned or restyled without recomputing its curves.
+
+        entries are tuples, e.g. (bins, probs)
+    """
+
+    def __init__(self, size=CURVE_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, key, factory):
+        entry = self._items.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            entry = factory()
+        else:
+            self.hits += 1
+
+        # reinsert to mark as most recently used
+        self._items[key] = entry
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+        # return copies so callers can modify the curves without corrupting the cache
+        return tuple(e.copy() if isinstance(e, ndarray) else e for e in entry)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+curve_cache = CurveCache()
+
+
+def curve_key(kind, ages, errors, xmi, xma, n):
+    h = sha1(ascontiguousarray(ages).tostring())
+    h.update(ascontiguousarray(errors).tostring())
+    return kind, h.hexdigest(), float(xmi), float(xma), int(n)
+
 
-def cumulative_probability(ages, errors, xmi, xma, n=100):
+def cumulative_probability(ages, errors, xmi, xma, n=100, use_cache=True):
+    ages = asarray(ages, dtype=float)
+    errors = asarray(errors, dtype=float)
+
+    # skip zero ages and errors
+    mask = (abs(ages) >= 1e-10) & (abs(errors) >= 1e-10)
+    ages, errors = ages[mask], errors[mask]
+
+    factory = lambda: _cumulative_probability(ages, errors, xmi, xma, n)
+    if use_cache:
+        return curve_cache.get(curve_key('cumulative', ages, errors, xmi, xma, n), factory)
+    else:
+        return factory()
+
+
+def kernel_density(ages, errors, xmi, xma, n=100, use_cache=True):
+    ages = asarray(ages, dtype=float)
+    errors = asarray(errors, dtype=float)
+
+    factory = lambda: _kernel_density(ages, xmi, xma, n)
+    if use_cache:
+        return curve_cache.get(curve_key('kernel', ages, errors, xmi, xma, n), factory)
+    else:
+        return factory()
+
+
+def _cumulative_probability(ages, errors, xmi, xma, n):
+    """
+        sum of the normal distributions of each age, see http://en.wikipedia.org/wiki/Normal_distribution
+
+        p = 1/(2*pi*sigma2)**0.5 * exp(-(x-u)**2/(2*sigma2))
+
+        the ages are sorted and evaluated in chunks so memory stays bounded for large populations.
+        each chunk is only evaluated over the bins within CUTOFF_SIGMA of its ages, beyond which
+        exp underflows to zero
+    """
     bins = linspace(xmi, xma, n)
     probs = zeros(n)
 
-    for ai, ei in zip(ages, errors):
-        if abs(ai) < 1e-10 or abs(ei) < 1e-10:
-            continue
+    idx = argsort(ages)
+    ages, errors = ages[idx], errors[idx]
 
-        # calculate probability curve for ai+/-ei
-        # p=1/(2*pi*sigma2) *exp (-(x-u)**2)/(2*sigma2)
-        # see http://en.wikipedia.org/wiki/Normal_distribution
-        ds = (ones(n) * ai - bins) ** 2
-        es = ones(n) * ei
-        es2 = 2 * es * es
-        gs = (es2 * pi) ** -0.5 * exp(-ds / es2)
+    na = ages.shape[0]
+    step = max(1, min(MAX_CHUNK_AGES, MAX_CHUNK_ELEMENTS // max(n, 1)))
+    for i in xrange(0, na, step):
+        ai = ages[i:i + step]
+        ei = errors[i:i + step]
 
-        # cumulate probabilities
-        # numpy element_wise addition
-        probs += gs
+        w = CUTOFF_SIGMA * ei
+        lo = bins.searchsorted((ai - w).min())
+        hi = bins.searchsorted((ai + w).max(), side='right')
+        if lo == hi:
+            continue
+
+        es2 = 2 * ei[:, None] ** 2
+        gs = (ai[:, None] - bins[lo:hi]) ** 2
+        gs /= -es2
+        exp(gs, out=gs)
+        gs *= (es2 * pi) ** -0.5
+        probs[lo:hi] += gs.sum(0)
 
     return bins, probs
 
 
-def kernel_density(self, ages, errors, xmi, xma, n=100):
+def _kernel_density(ages, xmi, xma, n):
     from scipy.stats.kde import gaussian_kde
 
     pdf = gaussian_kde(ages)
@@ -57,4 +151,5 @@ def kernel_density(self, ages, errors, xmi, xma, n=100):
 
     return x, y
 
+
 # ============= EOF =============================================
@@ -0,0 +1,99 @@
+import unittest
+
+from numpy import random, column_stack, zeros, percentile, vstack, hstack
+
+from pychron.core.regression.flux_regressor import PlaneFluxRegressor
+from pychron.core.stats import monte_carlo
+from pychron.core.stats.monte_carlo import monte_carlo_error_estimation, batch_monte_carlo_error_estimation
+
+
+def make_regressor(weighted=False, seed=1):
+    rs = random.RandomState(seed)
+    x, y = rs.uniform(-1, 1, (2, 20))
+    xy = column_stack((x, y))
+    j = 0.01 + 0.001 * x + 0.0005 * y + rs.normal(0, 1e-5, 20)
+    je = rs.uniform(1e-5, 3e-5, 20)
+
+    reg = PlaneFluxRegressor(xs=xy, ys=j, yserr=je, use_weighted_fit=weighted)
+    reg.calculate()
+    return reg, xy[:7]
+
+
+def slow_estimation(reg, nominal_ys, pts, ga):
+    exog = reg.get_exog(pts)
+    res = zeros((ga.shape[0], len(pts)))
+    for i, gi in enumerate(ga):
+        res[i] = nominal_ys - reg.fast_predict(reg.ys + reg.yserr * gi, exog)
+
+    a, b = percentile(res, (15.87, 84.13), axis=0)
+    return (abs(a) + abs(b)) * 0.5
+
+
+class MonteCarloTestCase(unittest.TestCase):
+    def _compare(self, weighted):
+        reg, pts = make_regressor(weighted)
+        nominals = reg.predict(pts)
+
+        es = monte_carlo_error_estimation(reg, nominals, pts, 500, random.RandomState(5))
+        ga = random.RandomState(5).standard_normal((500, 20))
+        for a, b in zip(es, slow_estimation(reg, nominals, pts, ga)):
+            self.assertAlmostEqual(a / b, 1, 9)
+
+    def test_unweighted(self):
+        self._compare(False)
+
+    def test_weighted(self):
+        self._compare(True)
+
+    def test_fast_predict2(self):
+        reg, pts = make_regressor(True)
+        ps = reg.fast_predict2(reg.ys, reg.get_exog(pts))
+        for a, b in zip(ps, reg.predict(pts)):
+            self.assertAlmostEqual(a, b, 12)
+
+    def test_chunked(self):
+        reg, pts = make_regressor()
+        nominals = reg.predict(pts)
+        a = monte_carlo_error_estimation(reg, nominals, pts, 100, random.RandomState(5))
+
+        chunk = monte_carlo.MAX_CHUNK_ELEMENTS
+        monte_carlo.MAX_CHUNK_ELEMENTS = 7 * 20
+        try:
+            b = monte_carlo_error_estimation(reg, nominals, pts, 100, random.RandomState(5))
+        finally:
+            monte_carlo.MAX_CHUNK_ELEMENTS = chunk
+
+        self.assertListEqual(list(a), list(b))
+
+    def test_batch(self):
+        items = []
+        for seed in (1, 2, 3):
+            reg, pts = make_regressor(seed=seed)
+            items.append((reg, reg.predict(pts), pts))
+
+        # fewer points than the other regressors. padded in the same group
+        reg, pts = make_regressor(seed=4)
+        items.append((reg, reg.predict(pts[:3]), pts[:3]))
+
+        es = batch_monte_carlo_error_estimation(items, 20000, random.RandomState(5))
+        self.assertEqual(len(es), 4)
+        self.assertEqual(len(es[3]), 3)
+        for (reg, nominals, pts), e in zip(items, es):
+            single = monte_carlo_error_estimation(reg, nominals, pts, 20000, random.RandomState(6))
+            for a, b in zip(e, single):
+                self.assertAlmostEqual(a / b, 1, 1)
+
+    def test_batch_shared_regressor(self):
+        # e.g. the flux positions and the error envelope. the points of one regressor are solved together
+        reg, pts = make_regressor()
+        epts = pts[:4] * 0.5
+        items = [(reg, reg.predict(pts), pts), (reg, reg.predict(epts), epts)]
+        a, b = batch_monte_carlo_error_estimation(items, 500, random.RandomState(5))
+
+        aps = vstack((pts, epts))
+        e = monte_carlo_error_estimation(reg, reg.predict(aps), aps, 500, random.RandomState(5))
+        self.assertListEqual(list(hstack((a, b))), list(e))
+
+
+if __name__ == '__main__':
+    unittest.main()
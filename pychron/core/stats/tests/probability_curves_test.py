@@ -0,0 +1,72 @@
+import unittest
+from math import pi
+
+from numpy import linspace, exp, random, zeros
+
+from pychron.core.stats import probability_curves
+from pychron.core.stats.probability_curves import cumulative_probability, curve_cache
+
+
+def slow_cumulative_probability(ages, errors, xmi, xma, n):
+    bins = linspace(xmi, xma, n)
+    probs = zeros(n)
+    for ai, ei in zip(ages, errors):
+        if abs(ai) < 1e-10 or abs(ei) < 1e-10:
+            continue
+        es2 = 2 * ei * ei
+        probs += (es2 * pi) ** -0.5 * exp(-(ai - bins) ** 2 / es2)
+    return bins, probs
+
+
+class CumulativeProbabilityTestCase(unittest.TestCase):
+    def setUp(self):
+        rs = random.RandomState(0)
+        self.ages = rs.uniform(1, 100, 500)
+        self.errors = rs.uniform(0.1, 5, 500)
+        self.ages[3] = 0
+        self.errors[5] = 0
+        curve_cache.clear()
+
+    def _compare(self, n=1000):
+        bins, probs = cumulative_probability(self.ages, self.errors, -10, 120, n, use_cache=False)
+        ebins, eprobs = slow_cumulative_probability(self.ages, self.errors, -10, 120, n)
+        self.assertListEqual(list(bins), list(ebins))
+        for a, b in zip(probs, eprobs):
+            self.assertAlmostEqual(a, b, 12)
+
+    def test_matches_sum(self):
+        self._compare()
+
+    def test_chunked(self):
+        chunk = probability_curves.MAX_CHUNK_AGES
+        probability_curves.MAX_CHUNK_AGES = 7
+        try:
+            self._compare()
+        finally:
+            probability_curves.MAX_CHUNK_AGES = chunk
+
+    def test_out_of_range(self):
+        bins, probs = cumulative_probability([1000], [1], 0, 10, 10)
+        self.assertEqual(probs.sum(), 0)
+
+    def test_cache(self):
+        a = cumulative_probability(self.ages, self.errors, 0, 100, 100)
+        b = cumulative_probability(self.ages, self.errors, 0, 100, 100)
+        self.assertEqual(curve_cache.hits, 1)
+        self.assertListEqual(list(a[1]), list(b[1]))
+
+        # cached curves are copied
+        b[1][:] = 0
+        c = cumulative_probability(self.ages, self.errors, 0, 100, 100)
+        self.assertListEqual(list(a[1]), list(c[1]))
+
+    def test_cache_key(self):
+        cumulative_probability(self.ages, self.errors, 0, 100, 100)
+        self.errors[0] *= 2
+        cumulative_probability(self.ages, self.errors, 0, 100, 100)
+        cumulative_probability(self.ages, self.errors, 0, 101, 100)
+        self.assertEqual(curve_cache.misses, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
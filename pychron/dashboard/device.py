@@ -16,7 +16,7 @@
 
 # ============= enthought library imports =======================
 
-from traits.api import Str, Bool, List, Instance, Event
+from traits.api import Str, Bool, List, Instance, Event, Float
 from traitsui.api import View, ListEditor, InstanceEditor, UItem, VGroup, HGroup, VSplit
 # ============= standard library imports ========================
 import random
@@ -37,6 +37,8 @@ from pychron.paths import paths
 class DashboardDevice(Loggable):
     name = Str
     use = Bool
+    # seconds a poll may take before it is flagged as an overrun. 0 means the period of the value
+    deadline = Float
 
     values = List
     hardware_device = Instance(ICoreDevice)
@@ -77,17 +79,29 @@ class DashboardDevice(Loggable):
             trigger a new value if appropriate
         """
         for value in self.values:
-            if not value.enabled:
-                continue
-
-            st = time.time()
-            dt = st - value.last_time
-            if value.period == 'on_change':
-                if value.timeout and dt > value.timeout:
-                    self.debug('Force trigger. timeout={}'.format(value.timeout))
-                    self._trigger(value, force=True)
-            elif dt > value.period:
-                self._trigger(value)
+            self.trigger_value(value)
+
+    def trigger_value(self, value, scheduled=False):
+        """
+            trigger a new value if appropriate
+
+            scheduled: the caller keeps the period of the value, e.g. the PollScheduler
+
+            return True if the value was triggered
+        """
+        if not value.enabled:
+            return
+
+        st = time.time()
+        dt = st - value.last_time
+        if value.period == 'on_change':
+            if value.timeout and dt > value.timeout:
+                self.debug('Force trigger. timeout={}'.format(value.timeout))
+                self._trigger(value, force=True)
+                return True
+        elif scheduled or dt > value.period:
+            self._trigger(value)
+            return True
 
     def _trigger(self, value, **kw):
         try:
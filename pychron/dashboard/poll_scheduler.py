@@ -0,0 +1,262 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+concurrent polling of dashboard process values.
+
+each enabled ProcessValue is polled at its own period. polls are run on a bounded pool of worker threads with at
+most one poll per device in flight, so a slow or hung device only delays its own values. a poll that takes longer
+than the device deadline, or a value that comes due again before its last poll ran, is an overrun
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import heapq
+import logging
+import math
+import time
+from Queue import Queue
+from collections import deque
+from itertools import count
+from threading import Thread, Condition, Lock
+
+# ============= local library imports  ==========================
+
+logger = logging.getLogger('PollScheduler')
+
+# how often on_change values are checked for their timeout
+ON_CHANGE_PERIOD = 1
+
+
+class PollStats(object):
+    """
+        running latency and jitter statistics of a process value.
+
+        latency: seconds a poll took
+        jitter: standard deviation of the delay between when a poll was due and when it started
+    """
+
+    def __init__(self):
+        self.npolls = 0
+        self.noverruns = 0
+        self.overrun = False
+        self.latency = 0
+        self.max_latency = 0
+        self.mean_latency = 0
+        self.mean_lag = 0
+        self._m2_lag = 0
+
+    @property
+    def jitter(self):
+        if self.npolls > 1:
+            return math.sqrt(self._m2_lag / (self.npolls - 1))
+        return 0
+
+    def add(self, due, start, end, deadline=None):
+        """
+            record a poll. return True if it overran the deadline
+        """
+        self.npolls += 1
+        n = self.npolls
+
+        self.latency = lt = end - start
+        self.max_latency = max(self.max_latency, lt)
+        self.mean_latency += (lt - self.mean_latency) / n
+
+        lag = start - due
+        d = lag - self.mean_lag
+        self.mean_lag += d / n
+        self._m2_lag += d * (lag - self.mean_lag)
+
+        self.overrun = bool(deadline and lt > deadline)
+        if self.overrun:
+            self.noverruns += 1
+        return self.overrun
+
+    def skip(self):
+        """
+            the value came due while its last poll was still waiting or running
+        """
+        self.noverruns += 1
+        self.overrun = True
+
+    def tostring(self):
+        return 'latency={:0.0f}ms max={:0.0f}ms jitter={:0.0f}ms polls={} overruns={}'.format(
+            self.mean_latency * 1000, self.max_latency * 1000, self.jitter * 1000, self.npolls, self.noverruns)
+
+    def __repr__(self):
+        return 'PollStats<{}>'.format(self.tostring())
+
+
+class DevicePoller(object):
+    """
+        the polls of a device waiting to run. only one runs at a time
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.pending = deque()
+        self.busy = False
+        self.running = None
+
+    @property
+    def deadline(self):
+        return getattr(self.device, 'deadline', 0)
+
+
+class PollScheduler(object):
+    """
+        poll the enabled process values of devices on nworkers threads.
+
+        a device polls a value with device.trigger_value(value, scheduled=True), which returns True if the value was
+        measured
+    """
+
+    def __init__(self, devices, nworkers=4):
+        self.devices = devices
+        self.nworkers = max(1, nworkers)
+
+        self._heap = []
+        self._seq = count()
+        self._cond = Condition(Lock())
+        self._queue = Queue()
+        self._threads = []
+        self._alive = False
+
+    def start(self):
+        self._alive = True
+        now = time.time()
+        with self._cond:
+            self._heap = []
+            for dev in self.devices:
+                if not dev.use:
+                    continue
+
+                poller = DevicePoller(dev)
+                for pv in dev.values:
+                    if pv.enabled:
+                        if pv.poll_stats is None:
+                            pv.poll_stats = PollStats()
+                        self._push(now, poller, pv)
+
+        ts = [Thread(name='dashboard_poll_{}'.format(i), target=self._work) for i in xrange(self.nworkers)]
+        ts.append(Thread(name='dashboard_poll_scheduler', target=self._schedule))
+        for t in ts:
+            t.setDaemon(True)
+            t.start()
+        self._threads = ts
+
+    def stop(self, join=True):
+        self._alive = False
+        with self._cond:
+            self._cond.notify_all()
+
+        for _ in xrange(self.nworkers):
+            self._queue.put(None)
+
+        if join:
+            for t in self._threads:
+                # a worker may be stuck on a hung device
+                t.join(1)
+        self._threads = []
+
+    @property
+    def is_alive(self):
+        return self._alive
+
+    # private
+    def _push(self, due, poller, pv):
+        heapq.heappush(self._heap, (due, next(self._seq), poller, pv))
+
+    def _period(self, pv):
+        p = pv.period
+        if p == 'on_change':
+            return ON_CHANGE_PERIOD
+        return max(float(p), 0.01)
+
+    def _schedule(self):
+        cond = self._cond
+        while self._alive:
+            with cond:
+                if not self._heap:
+                    cond.wait()
+                    continue
+
+                now = time.time()
+                due = self._heap[0][0]
+                if due > now:
+                    cond.wait(due - now)
+                    continue
+
+                due, _, poller, pv = heapq.heappop(self._heap)
+                self._submit(poller, pv, due)
+
+                # fixed rate. if polls were missed move to the next period in the future
+                p = self._period(pv)
+                ndue = due + p
+                if ndue <= now:
+                    ndue += p * math.ceil((now - ndue) / p)
+                self._push(ndue, poller, pv)
+
+    def _submit(self, poller, pv, due):
+        """
+            called with the lock held
+        """
+        if poller.running is pv or any(pi is pv for pi, _ in poller.pending):
+            pv.poll_stats.skip()
+            pv.overrun = True
+            logger.debug('overrun {}. previous poll has not finished'.format(pv.tag))
+            return
+
+        poller.pending.append((pv, due))
+        if not poller.busy:
+            poller.busy = True
+            self._queue.put(poller)
+
+    def _work(self):
+        while self._alive:
+            poller = self._queue.get()
+            if poller is None:
+                break
+
+            while self._alive:
+                with self._cond:
+                    if not poller.pending:
+                        poller.busy = False
+                        poller.running = None
+                        break
+                    pv, due = poller.pending.popleft()
+                    poller.running = pv
+
+                self._poll(poller, pv, due)
+
+    def _poll(self, poller, pv, due):
+        st = time.time()
+        try:
+            polled = poller.device.trigger_value(pv, scheduled=True)
+        except BaseException, e:
+            logger.warning('poll {} failed. {}'.format(pv.tag, e))
+            polled = True
+
+        if polled:
+            deadline = poller.deadline or self._period(pv)
+            if pv.poll_stats.add(due, st, time.time(), deadline):
+                logger.warning('overrun {}. poll took {:0.2f}s, deadline={}s'.format(pv.tag,
+                                                                                     pv.poll_stats.latency,
+                                                                                     deadline))
+            pv.overrun = pv.poll_stats.overrun
+
+# ============= EOF =============================================
@@ -17,7 +17,7 @@
 # ============= enthought library imports =======================
 import time
 
-from traits.api import HasTraits, Str, Either, Property, Float, Int, Bool, List, Enum
+from traits.api import HasTraits, Str, Either, Property, Float, Int, Bool, List, Enum, Any
 from traitsui.api import View, VGroup, HGroup, UItem, ListEditor, InstanceEditor, Readonly
 
 # ============= standard library imports ========================
@@ -47,6 +47,11 @@ class ProcessValue(HasTraits):
     record = Bool(False)
     display_name = Property
 
+    # PollStats maintained by the PollScheduler
+    poll_stats = Any
+    overrun = Bool
+    poll_stats_str = Property(depends_on='last_time, overrun')
+
     def is_different(self, v):
         ret = None
         ct = time.time()
@@ -75,6 +80,7 @@ class ProcessValue(HasTraits):
                                       Readonly('period')),
                                HGroup(Readonly('last_time_str'),
                                       Readonly('last_value')),
+                               HGroup(Readonly('poll_stats_str', label='Poll')),
                                VGroup(UItem('conditionals', editor=ListEditor(editor=InstanceEditor(),
                                                                               style='custom',
                                                                               mutable=False)),
@@ -83,6 +89,14 @@ class ProcessValue(HasTraits):
                                enabled_when='enabled')))
         return v
 
+    def _get_poll_stats_str(self):
+        r = ''
+        if self.poll_stats:
+            r = self.poll_stats.tostring()
+            if self.overrun:
+                r = 'OVERRUN {}'.format(r)
+        return r
+
     def _get_last_time_str(self):
         r = ''
         if self.last_time:
@@ -17,13 +17,12 @@
 # ============= enthought library imports =======================
 from traits.api import Instance, on_trait_change, List, Button
 # ============= standard library imports ========================
-from threading import Thread
 import os
 import pickle
-import time
 # ============= local library imports  ==========================
 from pychron.dashboard.constants import CRITICAL, NOERROR, WARNING
 from pychron.dashboard.device import DashboardDevice
+from pychron.dashboard.poll_scheduler import PollScheduler
 from pychron.globals import globalv
 from pychron.hardware.core.i_core_device import ICoreDevice
 from pychron.core.helpers.filetools import add_extension
@@ -73,7 +72,9 @@ class DashboardServer(Loggable):
     labspy_client = Instance('pychron.labspy.client.LabspyClient')
 
     use_db = False
-    _alive = False
+    # number of poll worker threads. 0 means one per device
+    nworkers = 0
+    _scheduler = None
 
     def activate(self):
         if not self.extraction_line_manager:
@@ -89,7 +90,7 @@ class DashboardServer(Loggable):
             self.labspy_client.start()
 
     def deactivate(self):
-        pass
+        self.stop_poll()
 
     # def deactivate(self):
     # if self.use_db:
@@ -111,19 +112,31 @@ class DashboardServer(Loggable):
                 pass
 
         self.notifier.port = port
+
+        elem = parser.get_elements('workers')
+        if elem is not None:
+            try:
+                self.nworkers = int(elem[0].text.strip())
+            except (IndexError, ValueError):
+                pass
         # host = gethostbyname(gethostname())
         # self.url = '{}:{}'.format(host, port)
         # add a config request handler
         self.notifier.add_request_handler('config', self._handle_config)
 
     def start_poll(self):
-        self.info('starting dashboard poll')
-        self._alive = True
-        t = Thread(name='poll',
-                   target=self._poll)
+        self.stop_poll()
+
+        n = self.nworkers or len([d for d in self.devices if d.use])
+        self.info('starting dashboard poll. workers={}'.format(n))
+        self._scheduler = s = PollScheduler(self.devices, nworkers=n)
+        s.start()
 
-        t.setDaemon(1)
-        t.start()
+    def stop_poll(self):
+        if self._scheduler:
+            self.info('stopping dashboard poll')
+            self._scheduler.stop()
+            self._scheduler = None
 
     def load_devices(self):
         dd = self._assemble_dev_dicts()
@@ -142,6 +155,11 @@ class DashboardServer(Loggable):
             if denabled is not None:
                 denabled = to_bool(denabled.text.strip())
 
+            try:
+                deadline = float(get_xml_value(dev, 'deadline', 0))
+            except ValueError:
+                deadline = 0
+
             vs = []
             for v in dev.findall('value'):
                 n = v.text.strip()
@@ -199,6 +217,7 @@ class DashboardServer(Loggable):
             dd = {'name': name,
                   'device': dname.text.strip(),
                   'enabled': bool(denabled),
+                  'deadline': deadline,
                   'values': vs}
             yield dd
 
@@ -216,7 +235,8 @@ class DashboardServer(Loggable):
                 else:
                     continue
 
-            d = DashboardDevice(name=name, use=dd['enabled'], hardware_device=device)
+            d = DashboardDevice(name=name, use=dd['enabled'], hardware_device=device,
+                                deadline=dd.get('deadline', 0))
             for args, cs in dd['values']:
                 pv = d.add_value(**args)
                 self.values.append(pv)
@@ -239,35 +259,6 @@ class DashboardServer(Loggable):
 
         return pickle.dumps(config)
 
-    def _poll(self):
-        if any((v.period == 'on_change' for dev in self.devices for v in dev.values)):
-            mperiod = 1
-        else:
-            mperiod = min((v.period for dev in self.devices for v in dev.values))
-
-        self.debug('min period {}'.format(mperiod))
-        while self._alive:
-            sst = time.time()
-            # self.debug('============= poll iteration start ============')
-            for dev in self.devices:
-                if not dev.use:
-                    continue
-
-                dev.trigger()
-
-            st = time.time()
-            pp = mperiod - (st - sst)
-            if pp >= 3:
-                self.debug('sleeping for {}'.format(pp))
-
-            while self._alive:
-                if time.time() - st >= pp:
-                    break
-                time.sleep(0.1)
-
-            # dur = time.time() - sst
-            # self.debug('============= poll iteration finished dur={:0.1f}============'.format(dur))
-
     # def _set_error_flag(self, obj, msg):
     # self.notifier.send_message('error {}'.format(msg))
 
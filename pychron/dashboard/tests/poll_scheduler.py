@@ -0,0 +1,83 @@
+import time
+import unittest
+from threading import Event
+
+from pychron.dashboard.poll_scheduler import PollScheduler, PollStats
+
+
+class Value(object):
+    def __init__(self, tag, period):
+        self.tag = tag
+        self.period = period
+        self.enabled = True
+        self.poll_stats = None
+        self.overrun = False
+        self.times = []
+
+
+class Device(object):
+    def __init__(self, name, values, delay=0, deadline=0):
+        self.name = name
+        self.values = values
+        self.use = True
+        self.delay = delay
+        self.deadline = deadline
+        self.release = Event()
+
+    def trigger_value(self, value, scheduled=False):
+        value.times.append(time.time())
+        if self.delay:
+            self.release.wait(self.delay)
+        return True
+
+
+class PollSchedulerTestCase(unittest.TestCase):
+    def test_slow_device(self):
+        gauge = Value('gauge', 0.1)
+        pyrometer = Value('pyrometer', 0.1)
+        fast = Device('fast', [gauge])
+        slow = Device('slow', [pyrometer], delay=5, deadline=0.5)
+
+        s = PollScheduler([fast, slow], nworkers=2)
+        s.start()
+        time.sleep(1.05)
+        slow.release.set()
+        s.stop()
+
+        # the hung pyrometer does not delay the gauge
+        self.assertGreaterEqual(len(gauge.times), 9)
+        self.assertLess(gauge.poll_stats.jitter, 0.05)
+        self.assertFalse(gauge.overrun)
+
+        # the pyrometer was polled once and came due while it was hung
+        self.assertEqual(len(pyrometer.times), 1)
+        self.assertTrue(pyrometer.overrun)
+        self.assertGreater(pyrometer.poll_stats.noverruns, 0)
+
+    def test_device_values_serialized(self):
+        a = Value('a', 0.1)
+        b = Value('b', 0.1)
+        dev = Device('dev', [a, b])
+
+        s = PollScheduler([dev], nworkers=4)
+        s.start()
+        time.sleep(0.35)
+        s.stop()
+
+        self.assertGreaterEqual(len(a.times), 3)
+        self.assertGreaterEqual(len(b.times), 3)
+
+    def test_stats(self):
+        s = PollStats()
+        s.add(0, 0.01, 0.11, deadline=1)
+        s.add(1, 1.03, 1.23, deadline=0.15)
+        self.assertEqual(s.npolls, 2)
+        self.assertEqual(s.noverruns, 1)
+        self.assertTrue(s.overrun)
+        self.assertAlmostEqual(s.mean_latency, 0.15)
+        self.assertAlmostEqual(s.max_latency, 0.2)
+        self.assertAlmostEqual(s.jitter, 0.0141421, places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
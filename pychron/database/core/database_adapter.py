@@ -18,15 +18,17 @@
 
 import os
 import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from threading import Lock
+from threading import Lock, local, current_thread
 
-from sqlalchemy import create_engine, distinct, MetaData
+from sqlalchemy import create_engine, distinct, MetaData, event
 from sqlalchemy.exc import SQLAlchemyError, InvalidRequestError, StatementError, \
-    DBAPIError, OperationalError
+    DBAPIError, OperationalError, DisconnectionError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
-from traits.api import Password, Bool, Str, on_trait_change, Any, Property, cached_property
+from traits.api import Password, Bool, Str, on_trait_change, Any, Property, cached_property, Int, Float
 
 from pychron import version
 from pychron.database.core.base_orm import AlembicVersionTable
@@ -36,6 +38,19 @@ from pychron.loggable import Loggable
 ATTR_KEYS = ['kind', 'username', 'host', 'name', 'password']
 
 
+def _ping_connection(dbapi_connection, connection_record, connection_proxy):
+    """
+        pool checkout listener. test the connection before it is used. a DisconnectionError makes the pool
+        discard the connection and check out a new one
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+        cursor.close()
+    except Exception:
+        raise DisconnectionError()
+
+
 # class SessionCTX(object):
 #     """
 #     Session Context Manager.
@@ -181,7 +196,6 @@ class DatabaseAdapter(Loggable):
     ``_retrieve_items``
 
     """
-    session = None
 
     sess_stack = 0
     reraise = False
@@ -225,8 +239,30 @@ class DatabaseAdapter(Loggable):
     _trying_to_add = False
     _test_connection_enabled = True
 
-    # def __init__(self, *args, **kw):
-    #     super(DatabaseAdapter, self).__init__(*args, **kw)
+    # session pool mode. each thread gets its own session and connection from a pooled engine
+    # instead of sharing one session
+    use_session_pool = Bool(False)
+    pool_size = Int(5)
+    max_overflow = Int(10)
+    pool_timeout = Int(30)
+    pool_pre_ping = Bool(True)
+    # log a warning if checking out a connection takes longer than this (seconds)
+    pool_wait_warning = Float(1.0)
+
+    # optional read only replica. sessions opened inside ``read_only_ctx`` use it when in session pool mode
+    replica_host = Str
+    read_session_factory = None
+
+    _session = None
+    _local = None
+    _pool_lock = None
+    _pool_stats = None
+
+    def __init__(self, *args, **kw):
+        super(DatabaseAdapter, self).__init__(*args, **kw)
+        # session pool mode can be turned on before the next connect
+        self._pool_lock = Lock()
+        self._pool_stats = {'checkouts': 0, 'total_wait': 0, 'max_wait': 0}
 
     def create_all(self, metadata):
         """
@@ -248,22 +284,78 @@ class DatabaseAdapter(Loggable):
     #             sess = self.sess
     #         return SessionCTX(sess, parent=self, commit=commit, rollback=rollback)
 
-    _session_cnt = 0
+    _shared_session_cnt = 0
+
+    def _get_session(self):
+        if self.use_session_pool:
+            return getattr(self._thread_state(), 'session', None)
+        return self._session
+
+    def _set_session(self, v):
+        if self.use_session_pool:
+            self._thread_state().session = v
+        else:
+            self._session = v
+
+    session = property(_get_session, _set_session)
+
+    def _get_session_cnt(self):
+        if self.use_session_pool:
+            return getattr(self._thread_state(), 'session_cnt', 0)
+        return self._shared_session_cnt
+
+    def _set_session_cnt(self, v):
+        if self.use_session_pool:
+            self._thread_state().session_cnt = v
+        else:
+            self._shared_session_cnt = v
+
+    _session_cnt = property(_get_session_cnt, _set_session_cnt)
 
     def session_ctx(self, use_parent_session=True):
+        if self.use_session_pool:
+            # sessions are per thread so there is nothing to serialize
+            return SessionCTX(self, use_parent_session)
+
         with self._session_lock:
             return SessionCTX(self, use_parent_session)
 
+    @contextmanager
+    def read_only_ctx(self):
+        """
+            session context for queries that can be served by the read only replica.
+            only used in session pool mode and only if the thread does not already have a session
+        """
+        st = self._thread_state()
+        prev = getattr(st, 'read_only', False)
+        st.read_only = True
+        try:
+            with self.session_ctx() as sess:
+                yield sess
+        finally:
+            st.read_only = prev
+
     def create_session(self):
         if self.connected:
             if self.session_factory:
                 if not self.session:
-                    self.debug('create new session {}'.format(id(self)))
-                    self.session = self.session_factory()
+                    if self.use_session_pool:
+                        self.session = self._checkout_session()
+                    else:
+                        self.debug('create new session {}'.format(id(self)))
+                        self.session = self.session_factory()
                 self._session_cnt += 1
         else:
             self.session = MockSession()
 
+    def get_pool_stats(self):
+        """
+            return a copy of the session pool checkout statistics
+        """
+        if self._pool_stats:
+            with self._pool_lock:
+                return dict(self._pool_stats)
+
     def close_session(self):
         if self.session and not isinstance(self.session, MockSession):
             self.session.flush()
@@ -284,7 +376,7 @@ class DatabaseAdapter(Loggable):
 
         return globalv.username
 
-    @on_trait_change('username,host,password,name,kind,path')
+    @on_trait_change('username,host,password,name,kind,path,use_session_pool,replica_host')
     def reset_connection(self):
         """
         Trip the ``connection_parameters_changed`` flag. Next ``connect`` call with use the new values
@@ -332,12 +424,20 @@ class DatabaseAdapter(Loggable):
                 url = self.url
                 if url is not None:
                     self.info('{} connecting to database {}'.format(id(self), self.public_url))
-                    engine = create_engine(url, echo=self.echo)
+                    engine = self._engine_factory(url)
                     #                     Session.configure(bind=engine)
 
-                    self.session_factory = sessionmaker(bind=engine, autoflush=self.autoflush,
-                                                        expire_on_commit=False,
-                                                        autocommit=self.autocommit)
+                    self.session_factory = self._session_factory_factory(engine)
+
+                    self.read_session_factory = None
+                    if self.use_session_pool:
+                        with self._pool_lock:
+                            self._pool_stats = {'checkouts': 0, 'total_wait': 0, 'max_wait': 0}
+
+                        rurl = self._make_url(self.replica_host) if self.replica_host else None
+                        if rurl:
+                            self.info('using read only replica {}'.format(self.replica_host))
+                            self.read_session_factory = self._session_factory_factory(self._engine_factory(rurl))
                     # self.session_factory = scoped_session(sessionmaker(bind=engine, autoflush=self.autoflush))
                     if test:
                         if not self._test_connection_enabled:
@@ -441,10 +541,12 @@ host= {}\nurl= {}'.format(self.name, self.username, self.host, self.public_url)
 
     @cached_property
     def _get_url(self):
+        return self._make_url(self.host)
+
+    def _make_url(self, host):
         kind = self.kind
         password = self.password
         user = self.username
-        host = self.host
         name = self.name
         if kind in ('mysql', 'postgresql'):
             if kind == 'mysql':
@@ -464,6 +566,62 @@ host= {}\nurl= {}'.format(self.name, self.username, self.host, self.public_url)
 
         return url
 
+    def _engine_factory(self, url):
+        kw = {'echo': self.echo}
+        if self.use_session_pool and self.kind != 'sqlite':
+            kw.update(pool_size=self.pool_size,
+                      max_overflow=self.max_overflow,
+                      pool_timeout=self.pool_timeout)
+            self.debug('session pool size={} overflow={} timeout={} pre_ping={}'.format(self.pool_size,
+                                                                                        self.max_overflow,
+                                                                                        self.pool_timeout,
+                                                                                        self.pool_pre_ping))
+        engine = create_engine(url, **kw)
+        if self.use_session_pool and self.kind != 'sqlite' and self.pool_pre_ping:
+            # create_engine(pool_pre_ping=True) requires SQLAlchemy 1.2
+            event.listen(engine, 'checkout', _ping_connection)
+        return engine
+
+    def _session_factory_factory(self, engine):
+        return sessionmaker(bind=engine, autoflush=self.autoflush,
+                            expire_on_commit=False,
+                            autocommit=self.autocommit)
+
+    def _thread_state(self):
+        st = self._local
+        if st is None:
+            st = self._local = local()
+        return st
+
+    def _checkout_session(self):
+        """
+            make a session for the current thread and check out its connection so the time spent
+            waiting on the pool can be logged
+        """
+        factory = self.session_factory
+        if getattr(self._thread_state(), 'read_only', False) and self.read_session_factory:
+            factory = self.read_session_factory
+
+        st = time.time()
+        sess = factory()
+        sess.connection()
+        wait = time.time() - st
+
+        with self._pool_lock:
+            stats = self._pool_stats
+            stats['checkouts'] += 1
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+            n = stats['checkouts']
+
+        msg = 'session checkout thread={} wait={:0.3f}s checkouts={} {}'.format(current_thread().name, wait, n,
+                                                                                sess.bind.pool.status())
+        if wait > self.pool_wait_warning:
+            self.warning(msg)
+        else:
+            self.debug(msg)
+        return sess
+
     def _import_mysql_driver(self):
         try:
             '''
@@ -21,6 +21,7 @@ import time
 # ============= standard library imports ========================
 # import re
 # ============= local library imports  ==========================
+from pychron.core.helpers.datetime_tools import make_timef
 from pychron.experiment.utilities.identifier import make_runid
 from pychron.pychron_constants import ALPHAS
 
@@ -145,6 +146,77 @@ class DVCIsotopeRecordView:
         #     return '{} {} {} {}'.format(self.identifier, self.aliquot, self.timestamp, self.uuid)
 
 
+class FlatDVCIsotopeRecordView(object):
+    """
+        lightweight stand in for DVCIsotopeRecordView built from a flat row of columns
+        (see DVCDatabase.make_record_views) so no relationships are walked per analysis.
+
+        like DVCIsotopeRecordView other attributes are looked up on dbrecord, the AnalysisTbl
+        set by the browser's reattach. it is None until then
+    """
+    __slots__ = ('id', 'uuid', 'timestamp', 'analysis_type', 'aliquot', 'increment',
+                 'mass_spectrometer', 'extract_device', 'extract_value', 'extract_units',
+                 'cleanup', 'duration', 'weight', 'comment', 'measurementName', 'extractionName',
+                 'identifier', 'irradiation_position_position', 'irradiation_level', 'irradiation',
+                 'sample', 'project', 'principal_investigator', 'tag',
+                 'step', 'record_id', 'rundate', 'analysis_timestamp', 'timestampf', 'irradiation_info',
+                 'meas_script_name', 'extract_script_name', 'position',
+                 'repository_identifier', 'repository_ids', 'use_repository_suffix',
+                 'review_status', 'is_plateau_step', 'group_id', 'graph_id', 'delta_time', 'frozen',
+                 'dbrecord')
+
+    def __init__(self, row, repository, repository_ids=None, positions=None, use_repository_suffix=False):
+        self.dbrecord = None
+        for k, v in row.iteritems():
+            setattr(self, k, v)
+
+        self.repository_identifier = repository
+        self.repository_ids = repository_ids or [repository]
+        self.use_repository_suffix = use_repository_suffix
+        self.position = ','.join(['{}'.format(p) for p in positions or () if p])
+
+        self.review_status = 0
+        self.is_plateau_step = False
+        self.group_id = 0
+        self.graph_id = 0
+        self.delta_time = 0
+        self.frozen = False
+
+        self.init()
+
+    def __getattr__(self, item):
+        # only called for attributes that are not set. dbrecord may not be set yet if the view is being built
+        try:
+            dbrecord = object.__getattribute__(self, 'dbrecord')
+        except AttributeError:
+            dbrecord = None
+
+        if dbrecord is None:
+            raise AttributeError(item)
+        return getattr(dbrecord, item)
+
+    def init(self):
+        if self.increment is not None and self.increment >= 0:
+            self.step = ALPHAS[self.increment]
+        else:
+            self.step = ''
+
+        rid = make_runid(self.identifier, self.aliquot, self.step)
+        if self.use_repository_suffix:
+            rid = '{}-{}'.format(rid, self.repository_identifier)
+        self.record_id = rid
+
+        self.rundate = self.analysis_timestamp = self.timestamp
+        self.timestampf = make_timef(self.timestamp) if self.timestamp else 0
+        self.irradiation_info = '{}{} {}'.format(self.irradiation, self.irradiation_level,
+                                                 self.irradiation_position_position)
+        self.meas_script_name = self.measurementName
+        self.extract_script_name = self.extractionName
+
+    def set_tag(self, tag):
+        self.tag = tag
+
+
 class IsotopeRecordView(object):
     # __slots__ = ('sample', 'project', 'labnumber', 'identifier', 'aliquot', 'step',
     #              '_increment',
@@ -239,6 +239,9 @@ class ConnectionPreferencesPane(PreferencesPane):
                        show_border=True,
                        label='Pychron DB')
 
+        return self._make_view(db_grp)
+
+    def _make_view(self, db_grp):
         return View(db_grp)
 
 # ============= EOF =============================================
@@ -79,13 +79,10 @@ def get_spec_sha(p):
     return SPEC_SHAS[p]
 
 
-def analysis_path(runid, repository, modifier=None, extension='.json', mode='r', root=None):
-
-    if root is None:
-        root = paths.repository_dataset_dir
-
-    root = os.path.join(root, repository)
-
+def runid_subdir_length(runid):
+    """
+        number of leading characters of runid used as the analysis subdirectory. see analysis_path
+    """
     l = 3
     if runid.count('-') > 1:
         args = runid.split('-')[:-1]
@@ -93,6 +90,24 @@ def analysis_path(runid, repository, modifier=None, extension='.json', mode='r',
             l = 4
         else:
             l = 5
+    return l
+
+
+def modifier_name(tail, modifier):
+    fmt = '{}.{}'
+    if modifier.startswith('.'):
+        fmt = '{}{}'
+    return fmt.format(tail, modifier[:4])
+
+
+def analysis_path(runid, repository, modifier=None, extension='.json', mode='r', root=None):
+
+    if root is None:
+        root = paths.repository_dataset_dir
+
+    root = os.path.join(root, repository)
+
+    l = runid_subdir_length(runid)
 
     try:
         root, tail = subdirize(root, runid, l=l, mode=mode)
@@ -108,10 +123,7 @@ def analysis_path(runid, repository, modifier=None, extension='.json', mode='r',
             os.mkdir(d)
 
         root = d
-        fmt = '{}.{}'
-        if modifier.startswith('.'):
-            fmt = '{}{}'
-        tail = fmt.format(tail, modifier[:4])
+        tail = modifier_name(tail, modifier)
 
     name = add_extension(tail, extension)
 
@@ -0,0 +1,180 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+persistent cache of computed analyses.
+
+an entry is keyed by the git blob SHAs of every file the analysis was made from (its json files in the dataset
+repository and the irradiation files in the MetaData repository) and the Ar/Ar constants used for the age
+calculation. an entry is therefore only used if none of its sources changed. stale entries are replaced the next
+time the analysis is made
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import cPickle as pickle
+import hashlib
+import os
+import sqlite3
+import time
+from threading import Lock
+
+# ============= local library imports  ==========================
+
+# increment to invalidate every entry, e.g. when the age calculation or the pickled analysis layout changes
+VERSION = 2
+
+AGE = 'age'
+F = 'F'
+
+CONSTANT_ATTRS = ('lambda_b_v', 'lambda_b_e', 'lambda_e_v', 'lambda_e_e',
+                  'lambda_Cl36_v', 'lambda_Cl36_e', 'lambda_Ar37_v', 'lambda_Ar37_e',
+                  'lambda_Ar39_v', 'lambda_Ar39_e', 'atm4036_v', 'atm4036_e', 'atm4038_v', 'atm4038_e',
+                  'k3739_mode', 'k3739_v', 'k3739_e', 'age_units', 'abundance_sensitivity',
+                  'allow_negative_ca_correction')
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS analyses (
+repository TEXT NOT NULL,
+runid TEXT NOT NULL,
+mode TEXT NOT NULL,
+key TEXT NOT NULL,
+timestamp REAL,
+blob BLOB,
+PRIMARY KEY (repository, runid, mode))'''
+
+
+def blob_sha(path):
+    """
+        the SHA git uses for the blob of path. i.e. `git hash-object path`. returns '' if path does not exist
+    """
+    if path and os.path.isfile(path):
+        with open(path, 'rb') as rfile:
+            txt = rfile.read()
+
+        h = hashlib.sha1('blob {}\0'.format(len(txt)))
+        h.update(txt)
+        return h.hexdigest()
+    return ''
+
+
+def source_key(ps, *extra):
+    """
+        combine the blob SHAs of paths and any extra values into a single key
+    """
+    h = hashlib.sha1(str(VERSION))
+    for p in ps:
+        h.update(blob_sha(p))
+        h.update('\0')
+
+    for e in extra:
+        h.update(e)
+        h.update('\0')
+    return h.hexdigest()
+
+
+def constants_key(arar_constants):
+    vs = arar_constants.trait_get(*CONSTANT_ATTRS)
+    return hashlib.sha1(repr(sorted(vs.items()))).hexdigest()
+
+
+class AnalysisCache(object):
+    """
+        sqlite store of pickled analyses. safe to share between threads
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, repository, runid, key, modes=(AGE,)):
+        """
+            return the analysis cached for the first of modes that matches key, or None
+        """
+        with self._lock:
+            cur = self._connection().cursor()
+            for mode in modes:
+                cur.execute('SELECT key, blob FROM analyses WHERE repository=? AND runid=? AND mode=?',
+                            (repository, runid, mode))
+                row = cur.fetchone()
+                if row and row[0] == key:
+                    self.hits += 1
+                    return pickle.loads(str(row[1]))
+
+            self.misses += 1
+
+    def put(self, repository, runid, key, analysis, mode=AGE):
+        """
+            add or replace an entry. changes are not written until commit is called
+        """
+        blob = sqlite3.Binary(pickle.dumps(analysis, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._connection().execute('INSERT OR REPLACE INTO analyses VALUES (?,?,?,?,?,?)',
+                                       (repository, runid, mode, key, time.time(), blob))
+
+    def commit(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+
+    def remove(self, repository, runid=None):
+        with self._lock:
+            conn = self._connection()
+            if runid is None:
+                conn.execute('DELETE FROM analyses WHERE repository=?', (repository,))
+            else:
+                conn.execute('DELETE FROM analyses WHERE repository=? AND runid=?', (repository, runid))
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM analyses')
+            conn.commit()
+            conn.execute('VACUUM')
+
+    def count(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    # private
+    def _connection(self):
+        if self._conn is None:
+            d = os.path.dirname(self.path)
+            if d and not os.path.isdir(d):
+                os.makedirs(d)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def __repr__(self):
+        return 'AnalysisCache<{}, hits={}, misses={}>'.format(self.path, self.hits, self.misses)
+
+# ============= EOF =============================================
@@ -20,32 +20,44 @@ import time
 from datetime import datetime
 from itertools import groupby
 from math import isnan
+from threading import Lock, Thread, current_thread, _MainThread
+from multiprocessing.pool import ThreadPool
 from git import Repo
+from git.exc import GitCommandError
 from uncertainties import nominal_value, std_dev, ufloat
 
 # ============= enthought library imports =======================
 from apptools.preferences.preference_binding import bind_preference
-from traits.api import Instance, Str, Set, List, provides
+from traits.api import Instance, Str, Set, List, provides, Bool, Int
 
 from pychron.core.helpers.filetools import remove_extension, list_subdirectories
 from pychron.core.i_datastore import IDatastore
-from pychron.core.progress import progress_loader, progress_iterator
+from pychron.core.progress import progress_loader, progress_iterator, progress_imap
+from pychron.core.ui.gui import invoke_in_main_thread
 from pychron.database.interpreted_age import InterpretedAge
 from pychron.dvc import dvc_dump, dvc_load, analysis_path, repository_path, AnalysisNotAnvailableError
+from pychron.dvc.analysis_cache import AnalysisCache, source_key, constants_key, AGE, F
 from pychron.dvc.defaults import TRIGA, HOLDER_24_SPOKES, LASER221, LASER65
 from pychron.dvc.dvc_analysis import DVCAnalysis, PATH_MODIFIERS
 from pychron.dvc.dvc_database import DVCDatabase
 from pychron.dvc.func import find_interpreted_age_path, GitSessionCTX, push_repositories
 from pychron.dvc.meta_repo import MetaRepo, Production
+from pychron.dvc.repository_sync import RepositorySyncService
+from pychron.dvc.tasks import list_local_repos
+from pychron.dvc.sparse import sparse_clone, checkout_analyses, analysis_patterns, is_sparse, DEFAULT_MODIFIERS
 from pychron.envisage.browser.record_views import InterpretedAgeRecordView
 from pychron.git.hosts import IGitHost, CredentialException
 from pychron.git_archive.repo_manager import GitRepoManager, format_date, get_repository_branch
 from pychron.globals import globalv
 from pychron.loggable import Loggable
 from pychron.paths import paths, r_mkdir
+from pychron.processing.arar_constants import ArArConstants
 from pychron.pychron_constants import RATIO_KEYS, INTERFERENCE_KEYS, NULL_STR
 from pychron import json
 
+# the files an analysis is made from. see DVCAnalysis.__init__ and DVC._get_frozen_production
+CACHE_MODIFIERS = (None, 'productions') + DEFAULT_MODIFIERS
+
 TESTSTR = {'blanks': 'auto update blanks', 'iso_evo': 'auto update iso_evo'}
 
 
@@ -136,8 +148,23 @@ class DVC(Loggable):
     pulled_repositories = Set
     selected_repositories = List
 
+    use_parallel_loading = Bool
+    nloader_threads = Int(4)
+    use_binary_raw_data = Bool
+    use_sparse_checkout = Bool
+    nprefetch = Int(100)
+
+    # skip pulling repositories the sync service fetched recently
+    use_repository_sync = Bool
+    sync_service = Instance(RepositorySyncService)
+
+    # reuse analyses made from unchanged files. see pychron.dvc.analysis_cache
+    use_analysis_cache = Bool
+    analysis_cache = Instance(AnalysisCache)
+
     def __init__(self, bind=True, *args, **kw):
         super(DVC, self).__init__(*args, **kw)
+        self._sync_lock = Lock()
 
         if bind:
             self._bind_preferences()
@@ -458,9 +485,19 @@ class DVC(Loggable):
         # else:
         #     self.debug('{} {} not reviewed'.format(ai, attr))
 
-    def update_analyses(self, ans, modifier, msg):
+    def update_analyses(self, ans, modifier, msg, bulk=False):
+        """
+            commit the `modifier` files of `ans`. one commit per repository.
+
+            modifier: str or tuple of str
+            bulk: stage every path with one index update. see GitRepoManager.transaction
+        """
         key = lambda x: x.repository_identifier
         ans = sorted(ans, key=key)
+
+        if bulk:
+            return self._bulk_update_analyses(ans, key, modifier, msg)
+
         mod_repositories = []
         for expid, ais in groupby(ans, key=key):
             paths = map(lambda x: analysis_path(x.record_id, x.repository_identifier, modifier=modifier), ais)
@@ -537,7 +574,9 @@ class DVC(Loggable):
         return ias
 
     def find_references(self, ans, atypes, hours, exclude=None, make_records=True, **kw):
-        records = self.db.find_references(ans, atypes, hours, exclude=exclude, **kw)
+        db = self.db
+        with db.read_only_ctx():
+            records = db.find_references(ans, atypes, hours, exclude=exclude, **kw)
 
         if records:
             if make_records:
@@ -583,13 +622,16 @@ class DVC(Loggable):
         # load repositories
         st = time.time()
 
+        runids = self._group_runids(records)
+
         def func(xi, prog, i, n):
             if prog:
                 prog.change_message('Syncing repository= {}'.format(xi))
             try:
-                self.sync_repo(xi, use_progress=False)
-            except BaseException:
-                pass
+                self.sync_repo(xi, use_progress=False, runids=runids.get(xi), use_cache=True)
+            except BaseException, e:
+                self.warning('failed syncing repository {}. error={}'.format(xi, e))
+                self.debug_exception()
 
         exps = {r.repository_identifier for r in records}
         progress_iterator(exps, func, threshold=1)
@@ -597,22 +639,36 @@ class DVC(Loggable):
         # for ei in exps:
         branches = {ei: get_repository_branch(os.path.join(paths.repository_dataset_dir, ei)) for ei in exps}
 
-        make_record = self._make_record
+        lookup = self._make_analysis_cache_lookup(branches, calculate_f_only)
 
-        def func(*args):
-            try:
-                r = make_record(branches=branches, calculate_f_only=calculate_f_only, *args)
-                return r
-            except BaseException:
-                self.debug('make analysis exception')
-                self.debug_exception()
+        n = len(records)
+        if self.use_parallel_loading and n > 1:
+            ret = self._make_analyses_parallel(records, branches, calculate_f_only, lookup)
+        else:
+            make_record = self._make_record
+            cache_analysis = self._cache_analysis
 
-        ret = progress_loader(records, func, threshold=1, step=25)
-        et = time.time() - st
+            def func(record, *args):
+                try:
+                    a, key = lookup(record)
+                    if a is None:
+                        a = make_record(record, branches=branches, calculate_f_only=calculate_f_only, *args)
+                        cache_analysis(key, a, calculate_f_only)
+                    return a
+                except BaseException:
+                    self.debug('make analysis exception')
+                    self.debug_exception()
 
-        n = len(records)
+            ret = progress_loader(records, func, threshold=1, step=25)
 
-        self.debug('Make analysis time, total: {}, n: {}, average: {}'.format(et, n, et / float(n)))
+        if self.use_analysis_cache:
+            self.analysis_cache.commit()
+            self.debug('Analysis cache {}'.format(self.analysis_cache))
+
+        et = time.time() - st
+        self.debug('Make analysis time, total: {}, n: {}, average: {}, '
+                   'parallel: {}'.format(et, n, et / float(n), self.use_parallel_loading))
+        self.debug('Meta repo {}'.format(self.meta_repo.object_cache))
         return ret
 
     # repositories
@@ -620,6 +676,10 @@ class DVC(Loggable):
         repo = self._get_repository(repository_identifier)
         return repo.add_paths(paths)
 
+    def repository_transaction(self, repository_identifier, message):
+        repo = self._get_repository(repository_identifier)
+        return repo.transaction(message)
+
     def repository_commit(self, repository, msg):
         self.debug('Experiment commit: {} msg: {}'.format(repository, msg))
         repo = self._get_repository(repository)
@@ -658,25 +718,45 @@ class DVC(Loggable):
     def git_session_ctx(self, repository_identifier, message):
         return GitSessionCTX(self, repository_identifier, message)
 
-    def sync_repo(self, name, use_progress=True):
+    def sync_repo(self, name, use_progress=True, runids=None, use_cache=False):
         """
         pull or clone an repo
 
+        runids: analyses to check out if the repository is a sparse clone. see pychron.dvc.sparse
+        use_cache: do not pull if the sync service fetched the repository recently and it was up-to-date
         """
         root = os.path.join(paths.repository_dataset_dir, name)
         exists = os.path.isdir(os.path.join(root, '.git'))
         self.debug('sync repository {}. exists={}'.format(name, exists))
 
         if exists:
+            if runids:
+                checkout_analyses(root, runids, logger=self)
+
+            sync = self.sync_service
+            if use_cache and self.use_repository_sync and sync.is_fresh(name):
+                self.debug('{} is up-to-date. {}'.format(name, sync.status(name)))
+                return True
+
             repo = self._get_repository(name)
-            repo.pull(use_progress=use_progress)
+            try:
+                if repo.pull(use_progress=use_progress, handled=False):
+                    sync.mark_synced(name)
+            except GitCommandError, e:
+                # the local copy can still be used. it is pulled again next time
+                self.warning('failed to pull repository {}. {}'.format(name, e))
             return True
         else:
             self.debug('getting repository from remote')
             names = self.remote_repository_names()
             service = self.application.get_service(IGitHost)
             if name in names:
-                service.clone_from(name, root, self.organization)
+                if self.use_sparse_checkout:
+                    ps = [p for r in runids or () for p in analysis_patterns(r)]
+                    sparse_clone(self.make_url(name), root, ps, logger=self)
+                else:
+                    service.clone_from(name, root, self.organization)
+                self.sync_service.mark_synced(name)
                 return True
             else:
                 self.debug('name={} not in available repos from service={}, organization={}'.format(name,
@@ -685,6 +765,19 @@ class DVC(Loggable):
                 for ni in names:
                     self.debug('available repo== {}'.format(ni))
 
+    def prefetch_analyses(self, records):
+        """
+            check out the first `nprefetch` records of sparse repositories in the background so they are on
+            disk before they are made
+        """
+        if not self.use_sparse_checkout or not records:
+            return
+
+        runids = self._group_runids(records[:self.nprefetch])
+        t = Thread(name='prefetch', target=self._prefetch, args=(runids,))
+        t.setDaemon(True)
+        t.start()
+
     def rollback_repository(self, expid):
         repo = self._get_repository(expid)
 
@@ -756,23 +849,26 @@ class DVC(Loggable):
         self.meta_commit('updated chronology for {}'.format(name))
 
     def meta_pull(self, **kw):
-        return self.meta_repo.smart_pull(**kw)
+        with self.meta_repo.lock:
+            return self.meta_repo.smart_pull(**kw)
 
     def meta_push(self):
-        self.meta_repo.push()
+        with self.meta_repo.lock:
+            self.meta_repo.push()
 
     def meta_add_all(self):
         self.meta_repo.add_unstaged(paths.meta_root, add_all=True)
 
     def meta_commit(self, msg):
-        changes = self.meta_repo.has_staged()
-        if changes:
-            self.debug('meta repo has changes: {}'.format(changes))
-            self.meta_repo.report_status()
-            self.meta_repo.commit(msg)
-            self.meta_repo.clear_cache = True
-        else:
-            self.debug('no changes to meta repo')
+        with self.meta_repo.lock:
+            changes = self.meta_repo.has_staged()
+            if changes:
+                self.debug('meta repo has changes: {}'.format(changes))
+                self.meta_repo.report_status()
+                self.meta_repo.commit(msg)
+                self.meta_repo.clear_cache = True
+            else:
+                self.debug('no changes to meta repo')
 
     def add_production(self, irrad, name, prod):
         self.meta_repo.add_production_to_irradiation(irrad, name, prod)
@@ -1026,11 +1122,178 @@ class DVC(Loggable):
         if self.repository_add_paths(rid, p):
             self.repository_commit(rid, '<IA> added interpreted age {}'.format(ia.name))
 
+    def _bulk_update_analyses(self, ans, key, modifier, msg):
+        mods = modifier if isinstance(modifier, tuple) else (modifier,)
+
+        mod_repositories = []
+        for expid, ais in groupby(ans, key=key):
+            st = time.time()
+            with self.repository_transaction(expid, msg) as t:
+                for ai in ais:
+                    for mi in mods:
+                        t.add(analysis_path(ai.record_id, ai.repository_identifier, modifier=mi))
+
+            if t.committed:
+                mod_repositories.append(expid)
+
+            self.debug('bulk update {} {} paths, {} total={:0.3f}s'.format(expid, len(t.paths), t.report(),
+                                                                           time.time() - st))
+        return mod_repositories
+
+    def _group_runids(self, records):
+        """
+            dict of repository: runids
+        """
+        ret = {}
+        for r in records:
+            expid = r.repository_identifier
+            if expid:
+                ret.setdefault(expid, []).append(self._record_runid(r))
+        return ret
+
+    def _record_runid(self, record):
+        rid = record.record_id
+        if getattr(record, 'use_repository_suffix', False):
+            rid = '-'.join(rid.split('-')[:-1])
+        return rid
+
+    def _make_analysis_cache_lookup(self, branches, calculate_f_only):
+        """
+            return a function, record -> (analysis, key).
+
+            analysis is the cached analysis or None. key identifies the files the analysis is made from and is
+            used to cache the analysis once it is made
+        """
+        if not self.use_analysis_cache:
+            return lambda record: (None, None)
+
+        cache = self.analysis_cache
+        modes = (F, AGE) if calculate_f_only else (AGE,)
+        constants = constants_key(ArArConstants())
+        meta_keys = {}
+
+        def lookup(record):
+            expid = record.repository_identifier
+            if not expid or isinstance(record, DVCAnalysis):
+                return None, None
+
+            rid = self._record_runid(record)
+            try:
+                ps = [analysis_path(rid, expid, modifier=m) for m in CACHE_MODIFIERS]
+            except AnalysisNotAnvailableError:
+                return None, None
+
+            irrad, level = getattr(record, 'irradiation', None), getattr(record, 'irradiation_level', None)
+            mkey = ''
+            if irrad and irrad not in ('NoIrradiation',):
+                mkey = meta_keys.get((irrad, level))
+                if mkey is None:
+                    mkey = meta_keys[(irrad, level)] = self._meta_source_key(irrad, level)
+
+            key = expid, rid, source_key(ps, mkey, constants)
+            try:
+                a = cache.get(expid, rid, key[2], modes)
+            except BaseException:
+                self.debug('failed getting {} from the analysis cache'.format(rid))
+                self.debug_exception()
+                return None, None
+
+            if a is not None:
+                a.branch = branches.get(expid, '')
+                a.group_id = record.group_id
+            return a, key
+
+        return lookup
+
+    def _meta_source_key(self, irrad, level):
+        root = os.path.join(paths.meta_root, irrad)
+        ps = [os.path.join(root, 'chronology.txt'),
+              os.path.join(root, 'productions.json'),
+              self.meta_repo.get_level_path(irrad, level)]
+
+        pd = os.path.join(root, 'productions')
+        if os.path.isdir(pd):
+            ps.extend(os.path.join(pd, p) for p in sorted(os.listdir(pd)))
+        return source_key(ps)
+
+    def _cache_analysis(self, key, a, calculate_f_only):
+        if key and a is not None:
+            repository, runid, k = key
+            try:
+                self.analysis_cache.put(repository, runid, k, a, F if calculate_f_only else AGE)
+            except BaseException:
+                self.debug('failed adding {} to the analysis cache'.format(runid))
+                self.debug_exception()
+
+    def _prefetch(self, runids):
+        st = time.time()
+        for name, rids in runids.iteritems():
+            root = os.path.join(paths.repository_dataset_dir, name)
+            if os.path.isdir(os.path.join(root, '.git')) and is_sparse(root):
+                try:
+                    checkout_analyses(root, rids, logger=self)
+                except GitCommandError, e:
+                    self.debug('prefetch {} failed. {}'.format(name, e))
+        self.debug('prefetch time={:0.3f}s'.format(time.time() - st))
+
     def _load_repository(self, expid, prog, i, n):
         if prog:
             prog.change_message('Loading repository {}. {}/{}'.format(expid, i, n))
         self.sync_repo(expid)
 
+    def _make_analyses_parallel(self, records, branches, calculate_f_only, lookup):
+        """
+            make the analyses on a thread pool. cache lookups, file I/O, JSON parsing, MetaRepo lookups and the
+            age calculations are done by the loader threads.
+
+            the analyses are not sent to a process pool. forking the GUI process while other threads hold locks
+            (logging, save queue, Qt) can deadlock the child
+
+            return the analyses in the same order as ``records``
+        """
+        make_record = self._make_record
+
+        def load(record):
+            try:
+                a, key = lookup(record)
+                if a is not None:
+                    return a, key, True
+
+                a = make_record(record, None, 0, 0, branches=branches, calculate_f_only=calculate_f_only)
+                if a:
+                    return a, key, False
+            except BaseException:
+                self.debug('make analysis exception')
+                self.debug_exception()
+
+        def message(r, i, n):
+            return 'Loading analysis {}. {}/{}'.format(r[0].record_id if r else '', i, n)
+
+        tpool = ThreadPool(self.nloader_threads)
+        try:
+            st = time.time()
+            rs = progress_imap(records, load, tpool.imap, threshold=1, step=25, message=message)
+            lt = time.time() - st
+        finally:
+            tpool.terminate()
+
+        for a, key, cached in rs:
+            if not cached:
+                self._cache_analysis(key, a, calculate_f_only)
+
+        n = float(len(records))
+        self.debug('Parallel make analyses. load: {:0.3f}s ({:0.5f}s/analysis)'.format(lt, lt / n))
+        return [a for a, _, _ in rs]
+
+    def _loader_warning_dialog(self, msg):
+        """
+            analyses are made on loader threads when loading in parallel. open the dialog on the GUI thread
+        """
+        if isinstance(current_thread(), _MainThread):
+            self.warning_dialog(msg)
+        else:
+            invoke_in_main_thread(self.warning_dialog, msg)
+
     def _make_record(self, record, prog, i, n, branches=None, calculate_f_only=False):
         meta_repo = self.meta_repo
         if prog:
@@ -1059,23 +1322,23 @@ class DVC(Loggable):
         else:
             # self.debug('use_repo_suffix={} record_id={}'.format(record.use_repository_suffix, record.record_id))
             try:
-                rid = record.record_id
-                if record.use_repository_suffix:
-                    rid = '-'.join(rid.split('-')[:-1])
+                rid = self._record_runid(record)
                 a = DVCAnalysis(rid, expid)
                 a.group_id = record.group_id
             except AnalysisNotAnvailableError:
                 self.info('Analysis {} not available. Trying to clone repository "{}"'.format(rid, expid))
                 try:
-                    self.sync_repo(expid)
+                    # parallel loading can reach this from several threads at once
+                    with self._sync_lock:
+                        self.sync_repo(expid, runids=[rid])
                 except (CredentialException, BaseException):
-                    self.warning_dialog('Invalid credentials for GitHub/GitLab')
+                    self._loader_warning_dialog('Invalid credentials for GitHub/GitLab')
                     return
 
                 try:
                     a = DVCAnalysis(rid, expid)
                 except AnalysisNotAnvailableError:
-                    self.warning_dialog('Analysis {} not in repository {}'.format(rid, expid))
+                    self._loader_warning_dialog('Analysis {} not in repository {}'.format(rid, expid))
                     return
 
             # get repository branch
@@ -1138,11 +1401,19 @@ class DVC(Loggable):
     def _bind_preferences(self):
 
         prefid = 'pychron.dvc'
-        for attr in ('meta_repo_name', 'organization', 'default_team'):
+        for attr in ('meta_repo_name', 'organization', 'default_team',
+                     'use_parallel_loading', 'nloader_threads',
+                     'use_binary_raw_data', 'use_sparse_checkout', 'use_repository_sync',
+                     'use_analysis_cache'):
             bind_preference(self, attr, '{}.{}'.format(prefid, attr))
 
+        for attr in ('period', 'nworkers', 'tolerance'):
+            bind_preference(self.sync_service, attr, '{}.repository_sync_{}'.format(prefid, attr))
+
         prefid = 'pychron.dvc.db'
-        for attr in ('username', 'password', 'name', 'host', 'kind', 'path'):
+        for attr in ('username', 'password', 'name', 'host', 'kind', 'path',
+                     'use_session_pool', 'pool_size', 'max_overflow', 'pool_timeout', 'pool_pre_ping',
+                     'replica_host'):
             bind_preference(self.db, attr, '{}.{}'.format(prefid, attr))
 
         self._meta_repo_name_changed()
@@ -1215,6 +1486,16 @@ class DVC(Loggable):
                            host='localhost',
                            name='pychronmeta')
 
+    def _sync_service_default(self):
+        return RepositorySyncService(root=paths.repository_dataset_dir,
+                                     names=self._get_sync_repository_names)
+
+    def _get_sync_repository_names(self):
+        return list_local_repos()
+
+    def _analysis_cache_default(self):
+        return AnalysisCache(paths.dvc_analysis_cache)
+
     def _meta_repo_default(self):
         return MetaRepo()
 
@@ -27,6 +27,8 @@ from pychron.core.helpers.datetime_tools import make_timef
 from pychron.core.helpers.filetools import add_extension
 from pychron.core.helpers.iterfuncs import partition
 from pychron.dvc import dvc_dump, dvc_load, analysis_path, make_ref_list, get_spec_sha, get_masses
+from pychron.dvc.raw_store import open_raw_store, raw_store_path, make_key, SIGNAL, BASELINE, SNIFF
+from pychron.dvc.sparse import checkout_analyses
 from pychron.experiment.utilities.environmentals import set_environmentals
 from pychron.experiment.utilities.identifier import make_aliquot_step, make_step
 from pychron.paths import paths
@@ -199,8 +201,30 @@ class DVCAnalysis(Analysis):
         return jd
 
     def load_raw_data(self, keys=None, n_only=False, use_name_pairs=True):
+        """
+        load signal, baseline and sniff data.
+
+        if a binary raw data store (<runid>.dat.npz) exists and is not older than the json raw data file only the
+        series matching ``keys`` are read from it, otherwise the json raw data file is parsed.
+
+        if the raw data was released to a RawDataCache and is still cached it is restored instead
+        """
+        cache = self.raw_data_cache
+        if cache is not None and not n_only and cache.restore(self, keys):
+            return
 
         path = self._analysis_path(modifier='.data')
+        if not path or not os.path.isfile(path):
+            # fetch the raw data if this is a sparse clone
+            root = os.path.join(paths.repository_dataset_dir, self.repository_identifier)
+            if checkout_analyses(root, (self.record_id,), ('.data',)):
+                path = self._analysis_path(modifier='.data')
+
+        store = open_raw_store(raw_store_path(path), path) if path else None
+        if store is not None:
+            self._load_raw_store(store, keys, n_only, use_name_pairs)
+            return
+
         isotopes = self.isotopes
 
         jd = dvc_load(path)
@@ -389,6 +413,49 @@ class DVCAnalysis(Analysis):
         return self._analysis_path(modifier=modifier)
 
     # private
+    def _load_raw_store(self, store, keys, n_only, use_name_pairs):
+        isotopes = self.isotopes
+        get = store.get
+
+        baselines = store.baselines()
+        for isok, det in store.signals():
+            key = isok
+            if use_name_pairs:
+                key = '{}{}'.format(isok, det)
+
+            if keys and key not in keys and isok not in keys:
+                continue
+
+            iso = next((i for i in isotopes.itervalues() if i.detector == det and i.name == isok), None)
+            if not iso:
+                continue
+
+            iso.unpack_array(get(make_key(SIGNAL, isok, det)), n_only)
+            if det in baselines:
+                iso.baseline.unpack_array(get(make_key(BASELINE, det)), n_only)
+
+        # loop thru keys to make sure none were missed this can happen when only loading baseline
+        if keys:
+            for k in keys:
+                if k in baselines:
+                    a = get(make_key(BASELINE, k))
+                    for iso in isotopes.itervalues():
+                        if iso.detector == k:
+                            iso.baseline.unpack_array(a, n_only)
+
+        for name, det in store.sniffs():
+            isok = name
+            if use_name_pairs:
+                isok = '{}{}'.format(name, det)
+
+            if keys and isok not in keys:
+                continue
+
+            a = get(make_key(SNIFF, name, det))
+            for iso in isotopes.itervalues():
+                if iso.detector == det:
+                    iso.sniff.unpack_array(a, n_only)
+
     def _load_peakcenter(self, jd):
 
         refdet = jd.get('reference_detector')
@@ -15,9 +15,11 @@
 # ===============================================================================
 
 # ============= enthought library imports =======================
+from collections import OrderedDict
 from datetime import timedelta, datetime
 
 from sqlalchemy import not_, func, distinct, or_, select, and_, join
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql.functions import count
 from sqlalchemy.util import OrderedSet
@@ -28,6 +30,7 @@ from pychron.core.helpers.datetime_tools import bin_timestamps, bin_datetimes
 from pychron.core.spell_correct import correct
 from pychron.database.core.database_adapter import DatabaseAdapter, binfunc
 from pychron.database.core.query import compile_query, in_func
+from pychron.database.records.isotope_record import FlatDVCIsotopeRecordView
 from pychron.dvc.dvc_orm import AnalysisTbl, ProjectTbl, MassSpectrometerTbl, \
     IrradiationTbl, LevelTbl, SampleTbl, \
     MaterialTbl, IrradiationPositionTbl, UserTbl, ExtractDeviceTbl, LoadTbl, \
@@ -123,6 +126,99 @@ def analysis_type_filter(q, analysis_types):
     return q
 
 
+def date_ranges_filter(q, ranges):
+    def bounds(low, high):
+        cs = []
+        if low:
+            cs.append(AnalysisTbl.timestamp >= low)
+        if high:
+            cs.append(AnalysisTbl.timestamp <= high)
+        return cs
+
+    if len(ranges) == 1:
+        cs = bounds(*ranges[0])
+        if cs:
+            q = q.filter(*cs)
+    else:
+        q = q.filter(or_(*[and_(*bounds(low, high)) for low, high in ranges]))
+    return q
+
+
+def record_view_load_options():
+    """
+        eager load everything AnalysisTbl.record_views touches so making the record views does not
+        issue a query per analysis
+    """
+    return (joinedload('irradiation_position').joinedload('level').joinedload('irradiation'),
+            joinedload('irradiation_position').joinedload('sample').joinedload('project'),
+            joinedload('change'),
+            joinedload('repository_associations'),
+            joinedload('measured_positions'))
+
+
+def record_view_query(sess):
+    """
+        one row per analysis, repository association and measured position with every column
+        FlatDVCIsotopeRecordView needs
+    """
+    q = sess.query(AnalysisTbl.id, AnalysisTbl.uuid, AnalysisTbl.timestamp, AnalysisTbl.analysis_type,
+                   AnalysisTbl.aliquot, AnalysisTbl.increment,
+                   AnalysisTbl.mass_spectrometer, AnalysisTbl.extract_device, AnalysisTbl.extract_value,
+                   AnalysisTbl.extract_units, AnalysisTbl.cleanup, AnalysisTbl.duration, AnalysisTbl.weight,
+                   AnalysisTbl.comment, AnalysisTbl.measurementName, AnalysisTbl.extractionName,
+                   IrradiationPositionTbl.identifier,
+                   IrradiationPositionTbl.position.label('irradiation_position_position'),
+                   LevelTbl.name.label('irradiation_level'),
+                   IrradiationTbl.name.label('irradiation'),
+                   SampleTbl.name.label('sample'),
+                   ProjectTbl.name.label('project'),
+                   PrincipalInvestigatorTbl.last_name.label('pi_last_name'),
+                   PrincipalInvestigatorTbl.first_initial.label('pi_first_initial'),
+                   AnalysisChangeTbl.tag,
+                   RepositoryAssociationTbl.idrepositoryassociationTbl.label('repository_association_id'),
+                   RepositoryAssociationTbl.repository,
+                   MeasuredPositionTbl.id.label('measured_position_id'),
+                   MeasuredPositionTbl.position.label('measured_position'))
+
+    q = q.select_from(AnalysisTbl)
+    q = q.outerjoin(IrradiationPositionTbl, AnalysisTbl.irradiation_positionID == IrradiationPositionTbl.id)
+    q = q.outerjoin(LevelTbl, IrradiationPositionTbl.levelID == LevelTbl.id)
+    q = q.outerjoin(IrradiationTbl, LevelTbl.irradiationID == IrradiationTbl.id)
+    q = q.outerjoin(SampleTbl, IrradiationPositionTbl.sampleID == SampleTbl.id)
+    q = q.outerjoin(ProjectTbl, SampleTbl.projectID == ProjectTbl.id)
+    q = q.outerjoin(PrincipalInvestigatorTbl, ProjectTbl.principal_investigatorID == PrincipalInvestigatorTbl.id)
+    q = q.outerjoin(AnalysisChangeTbl, AnalysisChangeTbl.analysisID == AnalysisTbl.id)
+    q = q.outerjoin(RepositoryAssociationTbl, RepositoryAssociationTbl.analysisID == AnalysisTbl.id)
+    q = q.outerjoin(MeasuredPositionTbl, MeasuredPositionTbl.analysisID == AnalysisTbl.id)
+    return q.order_by(RepositoryAssociationTbl.idrepositoryassociationTbl, MeasuredPositionTbl.id)
+
+
+def analysis_result_dict(iso):
+    """
+        AnalysisIntensitiesTbl column values for an isotope as plain python types
+    """
+    d = {'isotope': iso.name,
+         'detector': iso.detector,
+         'blank_value': float(iso.blank.value),
+         'blank_error': float(iso.blank.error)}
+
+    attrs = ('value', 'error', 'n', 'fit', 'fit_error_type:error_type')
+    for i, tag in ((iso, ''), (iso.baseline, 'baseline_')):
+        for a in attrs:
+            if ':' in a:
+                a, b = a.split(':')
+            else:
+                a, b = a, a
+
+            v = getattr(i, b)
+            if b in ('value', 'error'):
+                v = float(v)
+            elif b == 'n':
+                v = int(v)
+            d['{}{}'.format(tag, a)] = v
+    return d
+
+
 class NewMassSpectrometerView(HasTraits):
     name = Str
     kind = Str
@@ -290,27 +386,81 @@ class DVCDatabase(DatabaseAdapter):
         with self.session_ctx():
             # delta = 60 * 60 * hours  # seconds
             delta = timedelta(hours=hours)
-            refs = OrderedSet()
-            ex = None
 
-            times = [ti if isinstance(ti, datetime) else ti.rundate for ti in times]
+            times = sorted(ti if isinstance(ti, datetime) else ti.rundate for ti in times)
+            if not times:
+                return []
+
             ctimes = list(bin_datetimes(times, delta))
             self.debug('find references ntimes={} compresstimes={}'.format(len(times), len(ctimes)))
 
-            for low, high in ctimes:
-                rs = self.get_analyses_by_date_range(low, high,
-                                                     extract_devices=extract_devices,
-                                                     mass_spectrometers=mass_spectrometers,
-                                                     analysis_types=atypes,
-                                                     exclude=ex,
-                                                     exclude_uuids=exclude,
-                                                     exclude_invalid=exclude_invalid,
-                                                     verbose=True)
-                refs.update(rs)
-                ex = [r.id for r in refs]
+            # one query for all the windows. the windows are disjoint so each analysis is returned once
+            refs = self.get_analyses_by_date_ranges(ctimes,
+                                                    extract_devices=extract_devices,
+                                                    mass_spectrometers=mass_spectrometers,
+                                                    analysis_types=atypes,
+                                                    exclude_uuids=exclude,
+                                                    exclude_invalid=exclude_invalid,
+                                                    eager=True,
+                                                    verbose=True)
 
             return [rii for ri in refs for rii in ri.record_views]
 
+    def make_record_views(self, analyses):
+        """
+            analyses: AnalysisTbl instances or analysis ids
+
+            return flat record views, in the same order and with the same repository expansion as
+            AnalysisTbl.record_views, from a single joined query of the required columns
+        """
+        ids = [a if isinstance(a, (int, long)) else a.id for a in analyses]
+        if not ids:
+            return []
+
+        # sqlite limits the number of bound parameters
+        step = 900 if self.kind == 'sqlite' else len(ids)
+
+        rows = {}
+        with self.session_ctx() as sess:
+            for i in xrange(0, len(ids), step):
+                q = record_view_query(sess)
+                q = q.filter(AnalysisTbl.id.in_(ids[i:i + step]))
+                for r in self._query_all(q):
+                    r = r._asdict()
+                    aid = r['id']
+                    repo = r.pop('repository')
+                    rid = r.pop('repository_association_id')
+                    pos = r.pop('measured_position')
+                    pid = r.pop('measured_position_id')
+                    last, first = r.pop('pi_last_name'), r.pop('pi_first_initial')
+
+                    try:
+                        row, repos, positions = rows[aid]
+                    except KeyError:
+                        r['principal_investigator'] = '{}, {}'.format(last, first) if first else last
+                        row, repos, positions = rows[aid] = (r, OrderedDict(), OrderedDict())
+
+                    if rid is not None:
+                        repos[rid] = repo
+                    if pid is not None:
+                        positions[pid] = pos
+
+        views = []
+        for aid in ids:
+            try:
+                row, repos, positions = rows[aid]
+            except KeyError:
+                continue
+
+            repos = repos.values()
+            positions = positions.values()
+            if len(repos) == 1:
+                views.append(FlatDVCIsotopeRecordView(row, repos[0], repos, positions))
+            else:
+                views.extend([FlatDVCIsotopeRecordView(row, r, repos, positions, use_repository_suffix=True)
+                              for r in repos])
+        return views
+
     def get_blanks(self, ms=None, limit=100):
         with self.session_ctx() as sess:
             q = sess.query(AnalysisTbl)
@@ -499,32 +649,16 @@ class DVCDatabase(DatabaseAdapter):
                 self._add_item(s)
 
     def add_analysis_result(self, analysis, iso):
-        with self.session_ctx():
-            result = AnalysisIntensitiesTbl()
-            result.isotope = iso.name
-            result.detector = iso.detector
-            result.blank_value = float(iso.blank.value)
-            result.blank_error = float(iso.blank.error)
-
-            attrs = ('value', 'error', 'n', 'fit', 'fit_error_type:error_type')
-            for i, tag in ((iso, ''), (iso.baseline, 'baseline_')):
-
-                for a in attrs:
-                    if ':' in a:
-                        a, b = a.split(':')
-                    else:
-                        a, b = a, a
-
-                    v = getattr(i, b)
-                    if b in ('value', 'error'):
-                        v = float(v)
-                    elif b == 'n':
-                        v = int(v)
-                    setattr(result, '{}{}'.format(tag, a), v)
+        return self.add_analysis_result_dict(analysis, analysis_result_dict(iso))
 
+    def add_analysis_result_dict(self, analysis, d):
+        """
+            d: dict of AnalysisIntensitiesTbl column values. see analysis_result_dict
+        """
+        with self.session_ctx():
+            result = AnalysisIntensitiesTbl(**d)
             result.analysis = analysis
-
-            self._add_item(result)
+            return self._add_item(result)
 
     def get_search_attributes(self):
         with self.session_ctx() as sess:
@@ -1066,7 +1200,11 @@ class DVCDatabase(DatabaseAdapter):
                                repositories=None,
                                loads=None,
                                order='asc',
+                               ids_only=False,
                                **kw):
+        """
+            ids_only: return the analysis ids instead of AnalysisTbl instances. see make_record_views
+        """
 
         with self.session_ctx() as sess:
             q = sess.query(AnalysisTbl)
@@ -1103,6 +1241,8 @@ class DVCDatabase(DatabaseAdapter):
                 q = q.order_by(getattr(AnalysisTbl.timestamp, order)())
 
             tc = q.count()
+            if ids_only:
+                return self._query_ids(q, verbose_query=True), tc
             return self._query_all(q, verbose_query=True), tc
 
     def get_repository_date_range(self, names):
@@ -1121,24 +1261,40 @@ class DVCDatabase(DatabaseAdapter):
 
             return self._get_date_range(q)
 
-    def get_analyses_by_date_range(self, lpost, hpost,
-                                   labnumber=None,
-                                   limit=None,
-                                   analysis_types=None,
-                                   mass_spectrometers=None,
-                                   extract_devices=None,
-                                   project=None,
-                                   repositories=None,
-                                   loads=None,
-                                   order='asc',
-                                   exclude=None,
-                                   exclude_uuids=None,
-                                   exclude_invalid=True,
-                                   verbose=True):
+    def get_analyses_by_date_range(self, lpost, hpost, **kw):
+        return self.get_analyses_by_date_ranges(((lpost, hpost),), **kw)
+
+    def get_analyses_by_date_ranges(self, ranges,
+                                    labnumber=None,
+                                    limit=None,
+                                    analysis_types=None,
+                                    mass_spectrometers=None,
+                                    extract_devices=None,
+                                    project=None,
+                                    repositories=None,
+                                    loads=None,
+                                    order='asc',
+                                    exclude=None,
+                                    exclude_uuids=None,
+                                    exclude_invalid=True,
+                                    eager=False,
+                                    ids_only=False,
+                                    verbose=True):
+        """
+            ranges: list of (low, high) datetimes. an analysis matching any range is returned.
+            either bound may be None
+
+            eager: load the relationships needed by ``record_views`` in the same query
+            ids_only: return the analysis ids instead of AnalysisTbl instances. see make_record_views
+        """
 
         self.debug('------get analyses by date range parameters------')
-        self.debug('low={}'.format(lpost))
-        self.debug('high={}'.format(hpost))
+        if len(ranges) == 1:
+            lpost, hpost = ranges[0]
+            self.debug('low={}'.format(lpost))
+            self.debug('high={}'.format(hpost))
+        else:
+            self.debug('ranges={} {} - {}'.format(len(ranges), ranges[0][0], ranges[-1][1]))
         self.debug('labnumber={}'.format(labnumber))
         self.debug('analysis_types={}'.format(analysis_types))
         self.debug('mass spectrometers={}'.format(mass_spectrometers))
@@ -1183,20 +1339,24 @@ class DVCDatabase(DatabaseAdapter):
 
             if project:
                 q = q.filter(ProjectTbl.name == project)
-            if lpost:
-                q = q.filter(AnalysisTbl.timestamp >= lpost)
-            if hpost:
-                q = q.filter(AnalysisTbl.timestamp <= hpost)
+
+            q = date_ranges_filter(q, ranges)
+
             if exclude_invalid:
                 q = q.filter(AnalysisChangeTbl.tag != 'invalid')
             if exclude:
                 q = q.filter(not_(AnalysisTbl.id.in_(exclude)))
             if exclude_uuids:
                 q = q.filter(not_(AnalysisTbl.uuid.in_(exclude_uuids)))
+            if eager and not ids_only:
+                q = q.options(*record_view_load_options())
+
             q = q.order_by(getattr(AnalysisTbl.timestamp, order)())
             if limit:
                 q = q.limit(limit)
 
+            if ids_only:
+                return self._query_ids(q, verbose_query=verbose)
             return self._query_all(q, verbose_query=verbose)
 
     def _get_date_range(self, q, asc=None, desc=None, hours=0):
@@ -2043,5 +2203,17 @@ class DVCDatabase(DatabaseAdapter):
                     ret = [ni.name for ni in names or []]
             return ret
 
+    def _query_ids(self, q, **kw):
+        """
+            return the unique analysis ids of the AnalysisTbl query q, in order
+        """
+        q = q.with_entities(AnalysisTbl.id)
+        ids, seen = [], set()
+        for (aid,) in self._query_all(q, **kw):
+            if aid not in seen:
+                seen.add(aid)
+                ids.append(aid)
+        return ids
+
 
 # ============= EOF =============================================
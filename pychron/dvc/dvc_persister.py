@@ -23,17 +23,23 @@ import struct
 from datetime import datetime
 
 from git.exc import GitCommandError
-from traits.api import Instance, Bool, Str
+from traits.api import Instance, Bool, Str, Int
 from uncertainties import std_dev, nominal_value
 
+from pychron.core.ui.gui import invoke_in_main_thread
 from pychron.dvc import dvc_dump, analysis_path
 from pychron.dvc.dvc_analysis import META_ATTRS, EXTRACTION_ATTRS, PATH_MODIFIERS
+from pychron.dvc.dvc_database import analysis_result_dict
+from pychron.dvc.raw_store import dump_raw_data, raw_store_path
+from pychron.dvc.save_queue import DVCSaveQueue, GIT, DB
 from pychron.experiment.automated_run.persistence import BasePersister
 # from pychron.experiment.classifier.isotope_classifier import IsotopeClassifier
 from pychron.git_archive.repo_manager import GitRepoManager
 from pychron.paths import paths
 from pychron.pychron_constants import DVC_PROTOCOL, LINE_STR, NULL_STR
 
+TIMESTAMP_FMT = '%Y-%m-%d %H:%M:%S.%f'
+
 
 def format_repository_identifier(project):
     return project.replace('/', '_').replace('\\', '_')
@@ -61,6 +67,13 @@ class DVCPersister(BasePersister):
     macrochron_enabled = Bool(True)
     save_log_enabled = Bool(False)
 
+    # stage/commit and save to the database in the background. see DVCSaveQueue.
+    # requires the database session pool so the queue does not share the run thread's session
+    use_async_save = Bool(False)
+    save_retries = Int(3)
+    save_queue = Instance(DVCSaveQueue)
+    _async_save = False
+
     def per_spec_save(self, pr, repository_identifier=None, commit=False, commit_tag=None):
         self.per_spec = pr
 
@@ -85,6 +98,14 @@ class DVCPersister(BasePersister):
 
         self.dvc.initialize()
 
+        self._async_save = self.use_async_save
+        if self._async_save:
+            if self.dvc.db.use_session_pool:
+                self.save_queue.start()
+            else:
+                self.warning('Asynchronous DVC save requires the database session pool. Saving synchronously')
+                self._async_save = False
+
         repository = format_repository_identifier(repository)
         self.active_repository = repo = GitRepoManager()
 
@@ -94,7 +115,8 @@ class DVCPersister(BasePersister):
         remote = 'origin'
         if repo.has_remote(remote) and pull:
             self.info('pulling changes from repo: {}'.format(repository))
-            self.active_repository.pull(remote=remote, use_progress=False)
+            with repo.lock:
+                self.active_repository.pull(remote=remote, use_progress=False)
 
     def pre_extraction_save(self):
         pass
@@ -173,9 +195,30 @@ class DVCPersister(BasePersister):
         :return:
         """
         self.debug('================= post measurement started')
-        ret = True
-
         ar = self.active_repository
+        # the DVCSaveQueue may be pulling the repository
+        with ar.lock:
+            ret = self._post_measurement_save(ar, commit, commit_tag)
+
+        self.debug('================= post measurement finished')
+        return ret
+
+    def save_run_log_file(self, path):
+        if self.save_enabled and self.save_log_enabled:
+            self.debug('saving run log file')
+
+            npath = self._make_path('logs', '.log')
+            shutil.copyfile(path, npath)
+            ar = self.active_repository
+            with ar.lock:
+                ar.smart_pull(accept_their=True)
+                ar.add(npath, commit=False)
+                ar.commit('<COLLECTION> log')
+                self.dvc.push_repository(ar)
+
+    # private
+    def _post_measurement_save(self, ar, commit, commit_tag):
+        ret = True
 
         # save spectrometer
         spec_sha = self._get_spectrometer_sha()
@@ -206,58 +249,24 @@ class DVCPersister(BasePersister):
         self._save_peak_center(self.per_spec.peak_center)
 
         # stage files
-        dvc = self.dvc
+        commits = None
+        if self.stage_files and commit:
+            commits = self._make_commits(spec_path, commit_tag)
 
-        if self.stage_files:
-            if commit:
-                try:
-                    ar.smart_pull(accept_their=True)
-
-                    pms = (None, '.data', 'tags', 'peakcenter', 'extraction', 'monitor')
-                    paths = [spec_path, ] + [self._make_path(modifier=m) for m in pms]
-
-                    for p in paths:
-                        if os.path.isfile(p):
-                            ar.add(p, commit=False)
-                        else:
-                            self.debug('not at valid file {}'.format(p))
-
-                    # commit files
-                    ar.commit('<{}>'.format(commit_tag))
-
-                    # commit default data reduction
-                    add = False
-                    p = self._make_path('intercepts')
-                    if os.path.isfile(p):
-                        ar.add(p, commit=False)
-                        add = True
-
-                    p = self._make_path('baselines')
-                    if os.path.isfile(p):
-                        ar.add(p, commit=False)
-                        add = True
-
-                    if add:
-                        ar.commit('<ISOEVO> default collection fits')
-
-                    for pp, tag, msg in (('blanks', 'BLANKS',
-                                          'preceding {}'.format(self.per_spec.previous_blank_runid)),
-                                         ('icfactors', 'ICFactor', 'default')):
-                        p = self._make_path(pp)
-                        if os.path.isfile(p):
-                            ar.add(p, commit=False)
-                            ar.commit('<{}> {}'.format(tag, msg))
-
-                    # push changes
-                    dvc.push_repository(ar)
-
-                    # update meta
-                    dvc.meta_pull(accept_our=True)
-
-                    dvc.meta_commit('repo updated for analysis {}'.format(self.per_spec.run_spec.runid))
+        db_payload = self._make_db_payload(timestamp)
+        runid = self.per_spec.run_spec.runid
 
-                    # push commit
-                    dvc.meta_push()
+        if self._async_save:
+            q = self.save_queue
+            if commits:
+                q.put(GIT, {'repository': ar.path, 'runid': runid, 'commits': commits})
+            q.put(DB, db_payload)
+            self.debug('queued post measurement save. backlog={}'.format(q.backlog))
+        else:
+            if commits:
+                try:
+                    self._commit_repository(ar, commits)
+                    self._commit_meta([runid])
                 except GitCommandError, e:
                     self.warning(e)
                     if self.confirmation_dialog('NON FATAL\n\n'
@@ -267,24 +276,11 @@ class DVCPersister(BasePersister):
                                                 timeout=30):
                         ret = False
 
-        with dvc.session_ctx():
-            self._save_analysis_db(timestamp)
-        self.debug('================= post measurement finished')
-        return ret
-
-    def save_run_log_file(self, path):
-        if self.save_enabled and self.save_log_enabled:
-            self.debug('saving run log file')
+            with self.dvc.session_ctx():
+                self._save_db_payload(db_payload)
 
-            npath = self._make_path('logs', '.log')
-            shutil.copyfile(path, npath)
-            ar = self.active_repository
-            ar.smart_pull(accept_their=True)
-            ar.add(npath, commit=False)
-            ar.commit('<COLLECTION> log')
-            self.dvc.push_repository(ar)
+        return ret
 
-    # private
     def _check_repository_identifier(self):
         repo_id = self.per_spec.run_spec.repository_identifier
         db = self.dvc.db
@@ -296,7 +292,107 @@ class DVCPersister(BasePersister):
             if repo is None:
                 db.add_repository('NoRepo', self.default_principal_investigator)
 
-    def _save_analysis_db(self, timestamp):
+    def _make_commits(self, spec_path, commit_tag):
+        """
+            list of (paths, message). one git commit per item
+        """
+
+        def existing(ps):
+            ret = []
+            for p in ps:
+                if os.path.isfile(p):
+                    ret.append(p)
+                else:
+                    self.debug('not at valid file {}'.format(p))
+            return ret
+
+        pms = (None, '.data', 'tags', 'peakcenter', 'extraction', 'monitor')
+        ps = [spec_path, ] + [self._make_path(modifier=m) for m in pms]
+        ps.append(raw_store_path(self._make_path(modifier='.data')))
+
+        commits = [(existing(ps), '<{}>'.format(commit_tag))]
+
+        # commit default data reduction
+        ps = [p for p in (self._make_path('intercepts'), self._make_path('baselines')) if os.path.isfile(p)]
+        if ps:
+            commits.append((ps, '<ISOEVO> default collection fits'))
+
+        for pp, tag, msg in (('blanks', 'BLANKS',
+                              'preceding {}'.format(self.per_spec.previous_blank_runid)),
+                             ('icfactors', 'ICFactor', 'default')):
+            p = self._make_path(pp)
+            if os.path.isfile(p):
+                commits.append(([p], '<{}> {}'.format(tag, msg)))
+
+        return commits
+
+    def _commit_repository(self, ar, commits):
+        with ar.lock:
+            ar.smart_pull(accept_their=True)
+
+            for ps, msg in commits:
+                for p in ps:
+                    ar.add(p, commit=False)
+
+                # a retried job may already have been committed
+                if ar.has_staged():
+                    ar.commit(msg)
+
+            # push changes
+            self.dvc.push_repository(ar)
+
+    def _commit_meta(self, runids):
+        dvc = self.dvc
+        with dvc.meta_repo.lock:
+            # update meta
+            dvc.meta_pull(accept_our=True)
+
+            dvc.meta_commit('repo updated for analysis {}'.format(', '.join(runids)))
+
+            # push commit
+            dvc.meta_push()
+
+    def _handle_git_jobs(self, jobs):
+        """
+            DVCSaveQueue handler. one pull/push per repository and one meta commit for all the jobs
+        """
+        repos = {}
+        for job in jobs:
+            d = job['payload']
+            repos.setdefault(d['repository'], []).extend(d['commits'])
+
+        for root, commits in repos.iteritems():
+            ar = GitRepoManager()
+            ar.open_repo(root)
+            self._commit_repository(ar, commits)
+
+        self._commit_meta([job['payload']['runid'] for job in jobs])
+
+    def _handle_save_failure(self, kind, jobs, error):
+        """
+            DVCSaveQueue on_failure. the jobs stay journaled and are queued again by the save queue
+        """
+        if kind == GIT:
+            what = 'DVC/Git upload'
+        else:
+            what = 'Database save'
+
+        msg = 'NON FATAL\n\n{} of {} analysis(es) not successful. error={}\n\n' \
+              'It will be retried in {} seconds'.format(what, len(jobs), error, self.save_queue.failed_retry_period)
+        invoke_in_main_thread(self.warning_dialog, msg)
+
+    def _handle_db_job(self, job):
+        d = job['payload']
+        with self.dvc.session_ctx():
+            if self.dvc.db.get_analysis_uuid(d['analysis']['uuid']):
+                self.debug('analysis {} already saved'.format(d['analysis']['uuid']))
+            else:
+                self._save_db_payload(d)
+
+    def _make_db_payload(self, timestamp):
+        """
+            everything _save_db_payload needs as json serializable types so that it can be journaled
+        """
         rs = self.per_spec.run_spec
         d = {k: getattr(rs, k) for k in ('uuid', 'analysis_type', 'aliquot',
                                          'increment', 'mass_spectrometer', 'weight', 'comment',
@@ -308,38 +404,54 @@ class DVCPersister(BasePersister):
         else:
             d['extract_device'] = ed
 
-        d['timestamp'] = timestamp
+        d['timestamp'] = timestamp.strftime(TIMESTAMP_FMT)
 
         # save script names
         d['measurementName'] = self.per_spec.measurement_name
         d['extractionName'] = self.per_spec.extraction_name
 
+        media = []
+        if self.per_spec.snapshots:
+            media.extend(self.per_spec.snapshots)
+        if self.per_spec.videos:
+            media.extend(self.per_spec.videos)
+
+        return {'analysis': d,
+                'results': [analysis_result_dict(iso) for iso in self.per_spec.isotope_group.isotopes.values()],
+                'media': media,
+                'positions': self._positions,
+                'load_name': self.per_spec.load_name,
+                'load_holder': self.per_spec.load_holder,
+                'repository_identifier': rs.repository_identifier if self.per_spec.use_repository_association
+                else None,
+                'identifier': rs.identifier,
+                'tag': self.per_spec.tag}
+
+    def _save_db_payload(self, payload):
+        d = dict(payload['analysis'])
+        d['timestamp'] = datetime.strptime(d['timestamp'], TIMESTAMP_FMT)
+
         db = self.dvc.db
         an = db.add_analysis(**d)
 
         # save results
-        for iso in self.per_spec.isotope_group.isotopes.values():
-            db.add_analysis_result(an, iso)
+        for r in payload['results']:
+            db.add_analysis_result_dict(an, r)
 
         # save media
-        if self.per_spec.snapshots:
-            for p in self.per_spec.snapshots:
-                db.add_media(p, an)
+        for p in payload['media']:
+            db.add_media(p, an)
 
-        if self.per_spec.videos:
-            for p in self.per_spec.videos:
-                db.add_media(p, an)
-
-        if self._positions:
-            db = self.dvc.db
-            load_name = self.per_spec.load_name
-            load_holder = self.per_spec.load_holder
+        positions = payload['positions']
+        if positions:
+            load_name = payload['load_name']
+            load_holder = payload['load_holder']
 
             db.add_load(load_name, load_holder)
             db.flush()
             db.commit()
 
-            for position in self._positions:
+            for position in positions:
                 dbpos = db.add_measured_position(load=load_name, **position)
                 an.measured_positions.append(dbpos)
 
@@ -347,19 +459,18 @@ class DVCPersister(BasePersister):
         # all associations are handled by the ExperimentExecutor._retroactive_experiment_identifiers
         # *** _retroactive_experiment_identifiers is currently disabled ***
 
-        if self.per_spec.use_repository_association:
-            db.add_repository_association(rs.repository_identifier, an)
+        if payload['repository_identifier']:
+            db.add_repository_association(payload['repository_identifier'], an)
 
-        self.debug('get identifier "{}"'.format(rs.identifier))
-        pos = db.get_identifier(rs.identifier)
+        identifier = payload['identifier']
+        self.debug('get identifier "{}"'.format(identifier))
+        pos = db.get_identifier(identifier)
         self.debug('setting analysis irradiation position={}'.format(pos))
         an.irradiation_position = pos
 
-        t = self.per_spec.tag
-
         db.flush()
 
-        change = db.add_analysis_change(tag=t)
+        change = db.add_analysis_change(tag=payload['tag'])
         an.change = change
 
         db.commit()
@@ -524,6 +635,11 @@ class DVCPersister(BasePersister):
                 'signals': signals, 'baselines': baselines, 'sniffs': sniffs}
         dvc_dump(data, p)
 
+        # dump runid.dat.npz
+        if self.dvc.use_binary_raw_data:
+            keys = dump_raw_data(data, raw_store_path(p), p)
+            self.debug('saved binary raw data. keys={}'.format(','.join(keys)))
+
     def _save_macrochron(self, obj):
         pass
 
@@ -574,6 +690,12 @@ class DVCPersister(BasePersister):
 
             dvc_dump(obj, p)
 
+    def _save_queue_default(self):
+        return DVCSaveQueue(paths.dvc_save_journal_dir,
+                            {GIT: self._handle_git_jobs, DB: self._handle_db_job},
+                            retries=self.save_retries,
+                            on_failure=self._handle_save_failure)
+
     def _make_path(self, modifier=None, extension='.json'):
         runid = self.per_spec.run_spec.runid
         repository_identifier = self.per_spec.run_spec.repository_identifier
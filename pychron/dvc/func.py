@@ -50,7 +50,7 @@ def push_repositories(ps, remote='origin', branch='master', quiet=True):
         repo.open_repo(pp)
 
         if repo.smart_pull(remote=remote, branch=branch, quiet=quiet):
-            repo.push(remote, branch)
+            repo.push(branch=branch, remote=remote)
 
 
 def get_review_status(record):
@@ -17,10 +17,12 @@
 import os
 import shutil
 import time
+from collections import OrderedDict
 from datetime import datetime
+from threading import Lock
 from uncertainties import ufloat, std_dev
 # ============= enthought library imports =======================
-from traits.api import Bool
+from traits.api import Bool, Instance, Int
 
 from pychron.canvas.utils import iter_geom
 from pychron.core.helpers.datetime_tools import ISO_FORMAT_STR
@@ -328,8 +330,91 @@ class Cached(object):
 cached = Cached
 
 
+def _file_signature(p):
+    try:
+        st = os.stat(p)
+        return st.st_mtime, st.st_size
+    except OSError:
+        return None
+
+
+class MetaObjectCache(object):
+    """
+        LRU cache of objects loaded from the meta repository.
+
+        an entry is valid as long as the mtime and size of its source files are unchanged.
+        MetaRepo also clears the cache explicitly whenever it pulls or writes level/production files
+    """
+
+    def __init__(self, size=200):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, paths, factory, force=False):
+        sig = tuple(_file_signature(p) for p in paths)
+        with self._lock:
+            entry = self._items.pop(key, None)
+            if entry is not None and not force and entry[0] == sig:
+                # reinsert to mark as most recently used
+                self._items[key] = entry
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+
+        obj = factory()
+        with self._lock:
+            self._items[key] = (sig, obj)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return obj
+
+    def invalidate(self, *key):
+        """
+            remove all entries whose key starts with ``key``
+        """
+        n = len(key)
+        with self._lock:
+            for k in [k for k in self._items if k[:n] == key]:
+                self._items.pop(k)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return 'MetaObjectCache(n={}, size={}, hits={}, misses={})'.format(len(self), self.size,
+                                                                          self.hits, self.misses)
+
+
 class MetaRepo(GitRepoManager):
     clear_cache = Bool
+    object_cache_size = Int(200)
+    object_cache = Instance(MetaObjectCache, ())
+
+    def smart_pull(self, *args, **kw):
+        ret = super(MetaRepo, self).smart_pull(*args, **kw)
+        self.clear_object_cache()
+        return ret
+
+    def pull(self, *args, **kw):
+        ret = super(MetaRepo, self).pull(*args, **kw)
+        self.clear_object_cache()
+        return ret
+
+    def clear_object_cache(self):
+        self.debug('clear object cache. {}'.format(self.object_cache))
+        self.object_cache.clear()
 
     def get_molecular_weights(self):
         p = os.path.join(paths.meta_root, 'molecular_weights.json')
@@ -424,6 +509,8 @@ class MetaRepo(GitRepoManager):
         self.commit('updated production {}'.format(prod.name))
 
     def update_productions(self, irrad, level, production, add=True):
+        self.object_cache.invalidate('productions', irrad)
+
         p = os.path.join(paths.meta_root, irrad, 'productions.json')
 
         obj = dvc_load(p)
@@ -582,6 +669,7 @@ class MetaRepo(GitRepoManager):
                 ip['j_err'] = e
 
             dvc_dump(jd, p)
+            self.object_cache.invalidate('level', irradiation, level)
             if add:
                 self.add(p, commit=False)
 
@@ -618,6 +706,7 @@ class MetaRepo(GitRepoManager):
 
         obj = {'z': z, 'positions': npositions}
         dvc_dump(obj, p)
+        self.object_cache.invalidate('level', irradiation, level)
         if add:
             self.add(p, commit=False)
 
@@ -663,26 +752,24 @@ class MetaRepo(GitRepoManager):
         # path = os.path.join(paths.meta_root, irradiation, add_extension(level, '.json'))
         j, je, lambda_k = 0, 0, None
         standard_name, standard_material, standard_age = 'FC-2', 'sanidine', ufloat(28.201, 0)
-        positions = self._get_level_positions(irradiation, level)
-        if positions:
-            pos = next((p for p in positions if p['position'] == position), None)
-            if pos:
-                j, je = pos.get('j', 0), pos.get('j_err', 0)
-                dc = pos.get('decay_constants')
-                if dc:
-                    # this was a temporary fix and likely can be removed
-                    if isinstance(dc, float):
-                        v, e = dc, 0
-                    else:
-                        v, e = dc.get('lambda_k_total', 0), dc.get('lambda_k_total_error', 0)
-                    lambda_k = ufloat(v, e)
-                mon = pos.get('monitor')
-                if mon:
-                    standard_name = mon.get('name', 'FC-2')
-                    sa = mon.get('age', 28.201)
-                    se = mon.get('error', 0)
-                    standard_age = ufloat(sa, se)
-                    standard_material = mon.get('material', 'sanidine')
+        pos = self._get_level_position(irradiation, level, position)
+        if pos:
+            j, je = pos.get('j', 0), pos.get('j_err', 0)
+            dc = pos.get('decay_constants')
+            if dc:
+                # this was a temporary fix and likely can be removed
+                if isinstance(dc, float):
+                    v, e = dc, 0
+                else:
+                    v, e = dc.get('lambda_k_total', 0), dc.get('lambda_k_total_error', 0)
+                lambda_k = ufloat(v, e)
+            mon = pos.get('monitor')
+            if mon:
+                standard_name = mon.get('name', 'FC-2')
+                sa = mon.get('age', 28.201)
+                se = mon.get('error', 0)
+                standard_age = ufloat(sa, se)
+                standard_material = mon.get('material', 'sanidine')
 
         fd = {'j': ufloat(j, je), 'lambda_k': lambda_k,
               'standard_name': standard_name,
@@ -707,20 +794,21 @@ class MetaRepo(GitRepoManager):
         p = self._gain_path(name)
         return Gains(p)
 
-    # @cached('clear_cache')
-    def get_production(self, irrad, level, **kw):
+    def get_production(self, irrad, level, force=False, **kw):
+        cache = self.object_cache
         path = os.path.join(paths.meta_root, irrad, 'productions.json')
-        obj = dvc_load(path)
+        obj = cache.get(('productions', irrad), (path,), lambda: dvc_load(path), force=force)
+
         pname = obj[level]
         p = os.path.join(paths.meta_root, irrad, 'productions', add_extension(pname, ext='.json'))
 
-        ip = Production(p)
-        # print 'new production id={}, name={}, irrad={}, level={}'.format(id(ip), pname, irrad, level)
+        ip = cache.get(('production', irrad, pname), (p,), lambda: Production(p), force=force)
         return pname, ip
 
-    # @cached('clear_cache')
-    def get_chronology(self, name, **kw):
-        return irradiation_chronology(name)
+    def get_chronology(self, name, force=False, **kw):
+        p = self._chron_name(name)
+        return self.object_cache.get(('chronology', name), (p,), lambda: irradiation_chronology(name),
+                                     force=force)
 
     @cached('clear_cache')
     def get_irradiation_holder_holes(self, name, **kw):
@@ -742,6 +830,24 @@ class MetaRepo(GitRepoManager):
             positions = obj.get('positions', [])
         return positions
 
+    def _get_level_position(self, irrad, level, position):
+        """
+            positions are indexed by hole and cached so that a level file is parsed once, not once per analysis
+        """
+        p = self.get_level_path(irrad, level)
+
+        def factory():
+            return {pos['position']: pos for pos in self._get_level_positions(irrad, level)}
+
+        return self.object_cache.get(('level', irrad, level), (p,), factory).get(position)
+
+    def _object_cache_size_changed(self, new):
+        self.object_cache.size = new
+
+    def _clear_cache_changed(self, new):
+        if new:
+            self.object_cache.clear()
+
     def _chron_name(self, name):
         return os.path.join(paths.meta_root, name, 'chronology.txt')
 
@@ -0,0 +1,315 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import struct
+import zipfile
+
+from numpy import frombuffer, asarray, memmap, savez
+from numpy.lib import format as npformat
+
+# ============= local library imports  ==========================
+from pychron.core.helpers.binpack import format_blob
+from pychron.dvc.analysis_cache import blob_sha
+
+# Binary columnar sidecar for the DVC raw data file (<runid>.dat.json).
+#
+# Each signal, baseline and sniff series is stored as its own member of an uncompressed npz archive
+# written next to the json file (<runid>.dat.npz). Members are little endian float arrays of shape (2, n), float32
+# for 'ff' blobs and float64 for 'dd' blobs, laid out in the same column order as the packed json blob.
+#
+# The git blob SHA of the json file the archive was made from is saved as the archive comment. mtimes say nothing
+# about content after a clone, checkout or pull so a store is only used if the json file still has that SHA.
+#
+# Because the archive is not compressed, every member can be memory mapped directly from the archive
+# and its shape can be read from the npy header without touching the data. This lets
+# DVCAnalysis.load_raw_data read only the series it was asked for.
+#
+# key format
+#     signal.<isotope>.<detector>
+#     baseline.<detector>
+#     sniff.<isotope>.<detector>
+
+RAW_STORE_EXTENSION = '.npz'
+
+# struct format character -> numpy type
+BLOB_TYPES = {'f': 'f4', 'd': 'f8'}
+
+SIGNAL = 'signal'
+BASELINE = 'baseline'
+SNIFF = 'sniff'
+
+SOURCE_TAG = 'source='
+
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+
+def make_key(kind, *args):
+    return '.'.join((kind,) + args)
+
+
+def split_key(key):
+    return key.split('.')
+
+
+def blob_to_array(blob, fmt='>ff'):
+    """
+    convert a packed (base64 encoded) json blob into a 2xN array
+
+    :param blob: base64 encoded str
+    :param fmt: struct format of a single point. only two-column float or double formats are supported
+    :return: 2xN array
+    """
+    endianness, t = blob_type(fmt)
+    raw = format_blob(blob or '')
+    a = frombuffer(raw, dtype='{}{}'.format(endianness, t))
+    return a.reshape(-1, 2).T.astype('<{}'.format(t), order='C')
+
+
+def blob_type(fmt):
+    """
+    return the endianness and numpy type of a struct format, e.g. '>ff' -> ('>', 'f4')
+
+    raise ValueError if fmt is not a supported two-column format
+    """
+    endianness = '>'
+    cs = fmt
+    if fmt and fmt[0] in '<>!=@':
+        endianness, cs = fmt[0], fmt[1:]
+        if endianness == '!':
+            endianness = '>'
+        elif endianness == '@':
+            endianness = '='
+
+    if len(cs) != 2 or cs[0] != cs[1] or cs[0] not in BLOB_TYPES:
+        raise ValueError('Unsupported raw data format "{}"'.format(fmt))
+
+    return endianness, BLOB_TYPES[cs[0]]
+
+
+def raw_store_path(json_path):
+    """
+    return the sidecar path for a raw data json path
+    """
+    head, ext = os.path.splitext(json_path)
+    return '{}{}'.format(head, RAW_STORE_EXTENSION)
+
+
+def dump_raw_data(data, path, source=None):
+    """
+    write a raw data dictionary, as dumped to the .data json file, to an npz sidecar
+
+    :param data: dict with ``signals``, ``baselines`` and ``sniffs`` lists
+    :param path: destination path
+    :param source: the json file ``data`` was dumped to. its blob SHA is saved with the store
+    :return: list of keys written
+    """
+    fmt = data.get('format', '>ff')
+
+    arrays = {}
+    for kind, tag in ((SIGNAL, 'signals'), (SNIFF, 'sniffs')):
+        for sd in data.get(tag, []):
+            iso, det = sd.get('isotope'), sd.get('detector')
+            if iso is None or det is None:
+                continue
+            arrays[make_key(kind, iso, det)] = blob_to_array(sd.get('blob'), fmt)
+
+    for bd in data.get('baselines', []):
+        det = bd.get('detector')
+        if det is None:
+            continue
+        arrays[make_key(BASELINE, det)] = blob_to_array(bd.get('blob'), fmt)
+
+    # write to a temporary file first so a partially written archive is never picked up by a reader
+    tmp = '{}.tmp'.format(path)
+    with open(tmp, 'wb') as wfile:
+        savez(wfile, **arrays)
+
+    if source:
+        zf = zipfile.ZipFile(tmp, 'a')
+        try:
+            zf.comment = '{}{}'.format(SOURCE_TAG, blob_sha(source))
+        finally:
+            zf.close()
+
+    if os.path.isfile(path):
+        os.remove(path)
+    os.rename(tmp, path)
+
+    return sorted(arrays.keys())
+
+
+def open_raw_store(path, source=None):
+    """
+    return a RawDataStore for path or None if path does not exist or is not a valid archive
+
+    :param source: the json file the store was made from. if its content is not the content the store was
+        made from the store is stale and None is returned
+    """
+    if path and os.path.isfile(path):
+        try:
+            store = RawDataStore(path)
+        except (zipfile.BadZipfile, IOError, ValueError):
+            return
+
+        if source and os.path.isfile(source) and store.source_sha != blob_sha(source):
+            return
+        return store
+
+
+class RawDataStore(object):
+    """
+    read only accessor for an npz raw data sidecar.
+
+    Only the zip directory and, on request, individual npy headers are parsed. Series data is memory
+    mapped straight out of the archive so loading a single isotope does not read any of the others
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._members = {}
+        self._headers = {}
+        self.source_sha = None
+
+        zf = zipfile.ZipFile(path)
+        try:
+            if zf.comment.startswith(SOURCE_TAG):
+                self.source_sha = zf.comment[len(SOURCE_TAG):]
+
+            for info in zf.infolist():
+                name = info.filename
+                if not name.endswith('.npy'):
+                    continue
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError('Compressed raw data store members are not supported. {}'.format(name))
+
+                self._members[name[:-4]] = info
+        finally:
+            zf.close()
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def keys(self):
+        return self._members.keys()
+
+    def iter_keys(self, kind):
+        for k in self._members:
+            args = split_key(k)
+            if args[0] == kind:
+                yield tuple(args[1:])
+
+    def signals(self):
+        return list(self.iter_keys(SIGNAL))
+
+    def baselines(self):
+        return [d for d, in self.iter_keys(BASELINE)]
+
+    def sniffs(self):
+        return list(self.iter_keys(SNIFF))
+
+    def shape(self, key):
+        return self._header(key)[1]
+
+    def count(self, key):
+        """
+        number of points in series ``key``. only the npy header is read
+        """
+        return self.shape(key)[-1]
+
+    def get(self, key, mmap=True):
+        """
+        return the 2xN array for ``key``
+
+        :param mmap: if True return a read only memory mapped array, otherwise read into memory
+        """
+        offset, shape, fortran, dtype = self._header(key)
+        if not shape or not shape[-1]:
+            return asarray([[], []], dtype=dtype)
+
+        order = 'F' if fortran else 'C'
+        m = memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape, order=order)
+        if not mmap:
+            m = asarray(m).copy()
+        return m
+
+    # private
+    def _header(self, key):
+        try:
+            return self._headers[key]
+        except KeyError:
+            pass
+
+        info = self._members[key]
+        with open(self.path, 'rb') as rfile:
+            rfile.seek(info.header_offset)
+            h = _LOCAL_HEADER.unpack(rfile.read(_LOCAL_HEADER.size))
+            nname, nextra = h[-2:]
+            rfile.seek(nname + nextra, 1)
+
+            version = npformat.read_magic(rfile)
+            if version == (1, 0):
+                shape, fortran, dtype = npformat.read_array_header_1_0(rfile)
+            else:
+                shape, fortran, dtype = npformat.read_array_header_2_0(rfile)
+            offset = rfile.tell()
+
+        r = self._headers[key] = (offset, shape, fortran, dtype)
+        return r
+
+
+def convert_repository(root, force=False, logger=None):
+    """
+    write npz sidecars for all raw data json files in the repository at ``root``
+
+    :param root: repository directory
+    :param force: overwrite existing sidecars
+    :return: list of sidecar paths written
+    """
+    from pychron.dvc import dvc_load
+
+    written = []
+    for d, dirs, fs in os.walk(root):
+        if '.git' in dirs:
+            dirs.remove('.git')
+
+        if os.path.basename(d) != '.data':
+            continue
+
+        for f in fs:
+            if not f.endswith('.json'):
+                continue
+
+            src = os.path.join(d, f)
+            dest = raw_store_path(src)
+            if not force and open_raw_store(dest, src) is not None:
+                continue
+
+            try:
+                dump_raw_data(dvc_load(src), dest, src)
+                written.append(dest)
+            except BaseException, e:
+                if logger:
+                    logger.warning('Failed converting {}. error={}'.format(src, e))
+
+    return written
+
+# ============= EOF =============================================
@@ -0,0 +1,160 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+from traits.api import Int, Str, Any
+# ============= standard library imports ========================
+import os
+import time
+from multiprocessing.pool import ThreadPool
+from threading import Event, Lock
+
+from git import Repo
+from git.exc import GitCommandError
+
+# ============= local library imports  ==========================
+from pychron.git_archive.utils import repository_lock
+from pychron.loggable import Loggable
+
+
+class RepositoryStatus(object):
+    """
+        result of the last fetch or pull of a repository
+    """
+    __slots__ = ('name', 'timestamp', 'behind', 'error')
+
+    def __init__(self, name, timestamp=None, behind=None, error=None):
+        self.name = name
+        self.timestamp = timestamp
+        self.behind = behind
+        self.error = error
+
+    @property
+    def age(self):
+        if self.timestamp is not None:
+            return time.time() - self.timestamp
+
+    def __repr__(self):
+        return '{}<age={}, behind={}, error={}>'.format(self.name, self.age, self.behind, self.error)
+
+
+class RepositorySyncService(Loggable):
+    """
+        fetch dataset repositories in the background and keep track of how stale each one is.
+
+        a repository is fresh if it was fetched or pulled within `tolerance` seconds and the local branch was
+        not behind the remote. DVC.sync_repo skips pulling fresh repositories
+    """
+    root = Str
+    # seconds between fetches
+    period = Int(60)
+    nworkers = Int(4)
+    tolerance = Int(600)
+    remote = 'origin'
+
+    # callable returning the names of the repositories to fetch
+    names = Any
+
+    def __init__(self, *args, **kw):
+        super(RepositorySyncService, self).__init__(*args, **kw)
+        self._status = {}
+        self._lock = Lock()
+        self._stop_evt = Event()
+
+    def run(self):
+        """
+            fetch the repositories every `period` seconds until stop is called
+        """
+        self._stop_evt.clear()
+        while not self._stop_evt.is_set():
+            st = time.time()
+            self.fetch_all()
+            self._stop_evt.wait(max(0, self.period - (time.time() - st)))
+
+    def stop(self):
+        self._stop_evt.set()
+
+    def fetch_all(self):
+        names = list(self.names()) if self.names else []
+        return self.fetch_many(names)
+
+    def fetch_many(self, names):
+        if not names:
+            return []
+
+        st = time.time()
+        pool = ThreadPool(max(1, min(self.nworkers, len(names))))
+        try:
+            ret = pool.map(self.fetch, names)
+        finally:
+            pool.terminate()
+
+        self.debug('fetched {} repositories in {:0.2f}s'.format(len(names), time.time() - st))
+        return ret
+
+    def fetch(self, name):
+        path = os.path.join(self.root, name)
+        try:
+            repo = Repo(path)
+            if not any(r.name == self.remote for r in repo.remotes):
+                return self._set_status(name, error='no remote "{}"'.format(self.remote))
+
+            # share the lock of pull and push so refs are not updated by two threads
+            with repository_lock(path):
+                repo.git.fetch(self.remote)
+                behind = self._behind(repo)
+        except (GitCommandError, OSError), e:
+            self.debug('fetch {} failed. {}'.format(name, e))
+            return self._set_status(name, error=str(e))
+
+        return self._set_status(name, timestamp=time.time(), behind=behind)
+
+    def mark_synced(self, name):
+        """
+            record that `name` was just pulled
+        """
+        self._set_status(name, timestamp=time.time(), behind=0)
+
+    def status(self, name):
+        with self._lock:
+            return self._status.get(name)
+
+    def is_fresh(self, name, tolerance=None):
+        if tolerance is None:
+            tolerance = self.tolerance
+
+        s = self.status(name)
+        if s is None or s.error or s.behind is None or s.behind:
+            return False
+
+        return s.age <= tolerance
+
+    # private
+    def _behind(self, repo):
+        try:
+            branch = repo.active_branch.name
+            return int(repo.git.rev_list('--count', 'HEAD..{}/{}'.format(self.remote, branch)))
+        except (GitCommandError, TypeError, ValueError):
+            # detached head or no remote tracking branch
+            return
+
+    def _set_status(self, name, **kw):
+        s = RepositoryStatus(name, **kw)
+        with self._lock:
+            self._status[name] = s
+        return s
+
+# ============= EOF =============================================
@@ -0,0 +1,285 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from threading import Thread, Condition
+
+# ============= local library imports  ==========================
+from pychron.loggable import Loggable
+
+GIT = 'git'
+DB = 'db'
+
+JOURNAL_EXT = '.job.json'
+
+
+class DVCSaveQueue(Loggable):
+    """
+        background queue for the slow parts of a DVC post measurement save.
+
+        every job is written to a journal directory before it is queued and removed once it has been
+        handled, so jobs that have not completed when pychron exits are replayed by the next `start`.
+
+        handlers is a dict of kind: callable. a GIT handler is called with a list of every GIT job
+        currently queued so that consecutive runs share one pull/push. a DB handler is called with one job.
+        failed jobs are retried `retries` times, left in the journal and queued again after `failed_retry_period`
+        seconds. `on_failure` is called with (kind, jobs, error) each time jobs are given up on
+    """
+
+    def __init__(self, root, handlers, retries=3, retry_delay=5, failed_retry_period=300, on_failure=None,
+                 *args, **kw):
+        super(DVCSaveQueue, self).__init__(*args, **kw)
+        self.root = root
+        self.handlers = handlers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.failed_retry_period = failed_retry_period
+        self.on_failure = on_failure
+
+        self._jobs = deque()
+        self._failed = []
+        self._active = 0
+        self._cnt = 0
+        self._cond = Condition()
+        self._thread = None
+        self._alive = False
+
+    @property
+    def backlog(self):
+        """
+            number of jobs queued or being handled
+        """
+        with self._cond:
+            return len(self._jobs) + self._active
+
+    @property
+    def failed(self):
+        """
+            number of jobs waiting to be retried after failing
+        """
+        with self._cond:
+            return sum(len(jobs) for _, jobs in self._failed)
+
+    def start(self):
+        """
+            start the worker thread and replay any jobs left in the journal
+        """
+        with self._cond:
+            if self._alive:
+                return
+
+            self._alive = True
+            for job in self._load_journal():
+                self.debug('replaying journaled {} job {}'.format(job['kind'], job['id']))
+                self._jobs.append(job)
+
+        self._thread = t = Thread(name='DVCSaveQueue', target=self._run)
+        t.setDaemon(True)
+        t.start()
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._alive = False
+            self._cond.notify_all()
+
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put(self, kind, payload):
+        if not self._alive:
+            self.start()
+
+        job = {'id': self._make_id(), 'kind': kind, 'payload': payload, 'attempts': 0}
+        self._journal(job)
+
+        with self._cond:
+            self._jobs.append(job)
+            self._cond.notify_all()
+
+        return job['id']
+
+    def wait(self, backlog=0, timeout=None):
+        """
+            block until no more than `backlog` jobs are outstanding.
+
+            return True if the backlog was reached before `timeout`
+        """
+        st = time.time()
+        with self._cond:
+            while len(self._jobs) + self._active > backlog:
+                if timeout is not None:
+                    rem = timeout - (time.time() - st)
+                    if rem <= 0:
+                        return False
+                    self._cond.wait(rem)
+                else:
+                    # Condition.wait without a timeout cannot be interrupted in python 2
+                    self._cond.wait(1)
+            return True
+
+    def flush(self, timeout=None):
+        return self.wait(0, timeout)
+
+    # private
+    def _run(self):
+        while 1:
+            jobs = None
+            try:
+                with self._cond:
+                    while self._alive and not self._jobs:
+                        self._requeue_failed()
+                        if self._jobs:
+                            break
+                        self._cond.wait(1)
+
+                    if not self._alive:
+                        break
+
+                    jobs = self._pop()
+                    self._active = len(jobs)
+
+                self._handle(jobs)
+            except BaseException, e:
+                # keep the worker alive. the jobs are still journaled and are retried later
+                try:
+                    self.warning('save queue error. error={}'.format(e))
+                    self.debug_exception()
+                except BaseException:
+                    pass
+
+                if jobs:
+                    self._give_up(jobs, e)
+            finally:
+                with self._cond:
+                    self._active = 0
+                    self._cond.notify_all()
+
+    def _requeue_failed(self):
+        now = time.time()
+        failed = []
+        for due, jobs in self._failed:
+            if due <= now:
+                for j in jobs:
+                    j['attempts'] = 0
+                self._jobs.extend(jobs)
+            else:
+                failed.append((due, jobs))
+        self._failed = failed
+
+    def _give_up(self, jobs, error):
+        with self._cond:
+            self._failed.append((time.time() + self.failed_retry_period, jobs))
+
+        # no need to notify when stopping. the jobs are replayed by the next start
+        if self.on_failure and self._alive:
+            try:
+                self.on_failure(jobs[0]['kind'], jobs, error)
+            except BaseException, e:
+                self.warning('save failure notification failed. error={}'.format(e))
+
+    def _pop(self):
+        job = self._jobs.popleft()
+        jobs = [job]
+        if job['kind'] == GIT:
+            # batch all queued git jobs. git and db jobs are independent so leaving the db jobs in place is safe
+            rest = deque()
+            while self._jobs:
+                j = self._jobs.popleft()
+                if j['kind'] == GIT:
+                    jobs.append(j)
+                else:
+                    rest.append(j)
+            self._jobs = rest
+        return jobs
+
+    def _handle(self, jobs):
+        kind = jobs[0]['kind']
+        func = self.handlers[kind]
+        while 1:
+            try:
+                if kind == GIT:
+                    func(jobs)
+                else:
+                    func(jobs[0])
+                break
+            except BaseException, e:
+                self.warning('{} save failed. attempt {}. error={}'.format(kind, jobs[0]['attempts'] + 1, e))
+                for j in jobs:
+                    j['attempts'] += 1
+
+                if jobs[0]['attempts'] > self.retries or not self._alive:
+                    self.warning('giving up on {} {} job(s). left in journal {}. retrying in {}s'.format(
+                        len(jobs), kind, self.root, self.failed_retry_period))
+                    self._give_up(jobs, e)
+                    return
+
+                time.sleep(self.retry_delay)
+
+        for j in jobs:
+            self._remove_journal(j)
+
+    def _make_id(self):
+        with self._cond:
+            self._cnt += 1
+            cnt = self._cnt
+        return '{}-{:06d}'.format(datetime.now().strftime('%Y%m%d%H%M%S%f'), cnt)
+
+    def _journal_path(self, job):
+        return os.path.join(self.root, '{}{}'.format(job['id'], JOURNAL_EXT))
+
+    def _journal(self, job):
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+
+        p = self._journal_path(job)
+        tmp = '{}.tmp'.format(p)
+        with open(tmp, 'w') as wfile:
+            json.dump(job, wfile)
+        os.rename(tmp, p)
+
+    def _remove_journal(self, job):
+        p = self._journal_path(job)
+        if os.path.isfile(p):
+            os.remove(p)
+
+    def _load_journal(self):
+        jobs = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                if name.endswith(JOURNAL_EXT):
+                    with open(os.path.join(self.root, name), 'r') as rfile:
+                        try:
+                            job = json.load(rfile)
+                        except ValueError:
+                            self.warning('invalid journal file {}'.format(name))
+                            continue
+
+                    if not isinstance(job, dict) or job.get('kind') not in self.handlers or 'id' not in job:
+                        self.warning('invalid journal job {}'.format(name))
+                        continue
+
+                    job['attempts'] = 0
+                    jobs.append(job)
+        return jobs
+
+# ============= EOF =============================================
@@ -0,0 +1,183 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+sparse, partial clones of dataset repositories.
+
+a sparse repository is cloned with --filter=blob:none and --no-checkout so only the commits and trees are
+downloaded. the files of an analysis are checked out, and their blobs fetched from the remote, the first time
+the analysis is requested by adding patterns to .git/info/sparse-checkout.
+
+git's non-cone matching cost grows with patterns x files so patterns are added per identifier, not per analysis.
+the index is only modified while holding the repository's lock, see pychron.git_archive.utils.repository_lock
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import re
+from threading import RLock
+
+from git import Repo
+
+# ============= local library imports  ==========================
+from pychron.dvc import runid_subdir_length
+from pychron.git_archive.utils import repository_lock
+
+# top level files, e.g. the spectrometer files, and the interpreted ages (see find_interpreted_age_path)
+# are always checked out
+BASE_PATTERNS = ('/*.json', '/.gitignore', '/*/ia/')
+
+# the files DVCAnalysis reads when it is made. .data is checked out on demand by load_raw_data
+DEFAULT_MODIFIERS = ('extraction', 'intercepts', 'baselines', 'blanks', 'icfactors', 'tags', 'peakcenter')
+
+_lock = RLock()
+_sparse_cache = {}
+
+
+def analysis_patterns(runid, modifiers=DEFAULT_MODIFIERS):
+    """
+        sparse checkout patterns for the files of every analysis of runid's identifier.
+        see pychron.dvc.analysis_path
+    """
+    l = runid_subdir_length(runid)
+    head = runid[:l]
+    # e.g. 12345-01A -> 45-*, bu-FD-o-001 -> -o-*
+    tail = '{}-*'.format(runid.rsplit('-', 1)[0][l:])
+
+    ps = ['/{}/{}'.format(head, tail)]
+    for m in modifiers:
+        ps.append('/{}/{}/{}'.format(head, m, tail))
+    return ps
+
+
+def sparse_checkout_path(root):
+    return os.path.join(root, '.git', 'info', 'sparse-checkout')
+
+
+def is_sparse(root):
+    with _lock:
+        s = _sparse_cache.get(root)
+        if s is None:
+            s = False
+            if os.path.isfile(sparse_checkout_path(root)):
+                v = Repo(root).config_reader().get_value('core', 'sparseCheckout', False)
+                s = v is True or str(v).lower() == 'true'
+            _sparse_cache[root] = s
+        return s
+
+
+def sparse_clone(url, root, patterns=None, logger=None):
+    """
+        clone url to root without checking out or downloading any files except BASE_PATTERNS and `patterns`
+    """
+    if logger:
+        logger.debug('sparse clone {} to {}'.format(url, root))
+
+    ps = list(BASE_PATTERNS)
+    if patterns:
+        ps.extend(p for p in patterns if p not in ps)
+
+    with repository_lock(root):
+        # servers that do not support partial clones ignore --filter and send every blob
+        Repo.clone_from(url, root, filter='blob:none', no_checkout=True)
+        repo = Repo(root)
+        repo.git.config('core.sparseCheckout', 'true')
+
+        _write_patterns(root, ps)
+        repo.git.read_tree('-mu', 'HEAD')
+
+    with _lock:
+        _sparse_cache[root] = True
+
+
+def read_patterns(root):
+    p = sparse_checkout_path(root)
+    if os.path.isfile(p):
+        with open(p, 'r') as rfile:
+            return [line.strip() for line in rfile if line.strip()]
+    return []
+
+
+def add_patterns(root, patterns, logger=None, checkout=True):
+    """
+        check out the files matching `patterns`. missing blobs are fetched from the remote by git.
+        patterns already matched by a pattern in the file are skipped and patterns matched by a new pattern,
+        e.g. the per analysis patterns written by older versions, are removed
+
+        checkout: False to only add the patterns, e.g. for files that were just written
+
+        return the number of new patterns
+    """
+    with repository_lock(root):
+        existing = read_patterns(root)
+        new = []
+        for p in patterns:
+            if not any(_covers(e, p) for e in existing + new):
+                new.append(p)
+
+        if new:
+            existing = [e for e in existing if not any(_covers(p, e) for p in new)]
+            _write_patterns(root, existing + new)
+            if logger:
+                logger.debug('sparse checkout {} new patterns in {}'.format(len(new), root))
+            if checkout:
+                Repo(root).git.read_tree('-mu', 'HEAD')
+
+        return len(new)
+
+
+def checkout_analyses(root, runids, modifiers=DEFAULT_MODIFIERS, logger=None):
+    """
+        check out the files for runids if root is a sparse repository
+    """
+    if is_sparse(root):
+        ps = [p for r in runids for p in analysis_patterns(r, modifiers)]
+        return add_patterns(root, ps, logger=logger)
+
+
+def include_paths(root, ps, logger=None):
+    """
+        add patterns for files written to a sparse repository. call before staging them,
+        otherwise the next checkout removes them from the working tree
+    """
+    if is_sparse(root):
+        ps = ['/{}'.format(os.path.relpath(os.path.join(root, p), root).replace(os.sep, '/')) for p in ps]
+        return add_patterns(root, ps, logger=logger, checkout=False)
+
+
+def _covers(pattern, other):
+    """
+        True if `other` only matches paths that `pattern` matches. like git, * and ? do not match /
+        and a pattern ending in / matches everything in the directory
+    """
+    r = re.escape(pattern).replace('\\*', '[^/]*').replace('\\?', '[^/]')
+    if pattern.endswith('/'):
+        r = '{}.*'.format(r)
+    return re.match('{}$'.format(r), other) is not None
+
+
+def _write_patterns(root, patterns):
+    p = sparse_checkout_path(root)
+    d = os.path.dirname(p)
+    if not os.path.isdir(d):
+        os.makedirs(d)
+
+    with open(p, 'w') as wfile:
+        wfile.write('\n'.join(patterns))
+        wfile.write('\n')
+
+# ============= EOF =============================================
@@ -68,6 +68,11 @@ class PullAction(LocalRepositoryAction):
     image = icon('arrow_down')
 
 
+class ConvertRawDataAction(LocalRepositoryAction):
+    name = 'Convert Raw Data'
+    method = 'convert_raw_data'
+
+
 class FindChangesAction(TaskAction):
     name = 'Find Changes'
     method = 'find_changes'
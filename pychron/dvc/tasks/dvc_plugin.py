@@ -15,10 +15,6 @@
 # ===============================================================================
 
 # ============= enthought library imports =======================
-import time
-
-import os
-from git import Repo, GitCommandError
 from traits.api import List
 # ============= standard library imports ========================
 # ============= local library imports  ==========================
@@ -28,14 +24,12 @@ from pyface.tasks.action.schema_addition import SchemaAddition
 
 from pychron.dvc.dvc import DVC
 from pychron.dvc.dvc_persister import DVCPersister
-from pychron.dvc.tasks import list_local_repos
 from pychron.dvc.tasks.actions import WorkOfflineAction, UseOfflineDatabase, ShareChangesAction, SyncMetaDataAction
 from pychron.dvc.tasks.dvc_preferences import DVCPreferencesPane, \
     DVCDBConnectionPreferencesPane, DVCExperimentPreferencesPane
 from pychron.dvc.tasks.repo_task import ExperimentRepoTask
 from pychron.envisage.tasks.base_task_plugin import BaseTaskPlugin
 from pychron.git.hosts import IGitHost
-from pychron.paths import paths
 
 
 class DVCPlugin(BaseTaskPlugin):
@@ -61,6 +55,11 @@ class DVCPlugin(BaseTaskPlugin):
         # prog.change_message('Pushing changes to meta repository')
         # dvc.meta_repo.cmd('push', '-u','origin','master')
 
+        # let an in progress git commit/push finish. outstanding jobs stay journaled and are replayed on startup
+        persister = self.application.get_service(DVCPersister)
+        if persister:
+            persister.save_queue.stop(timeout=60)
+
         dvc = self.application.get_service(DVC)
         with dvc.session_ctx(use_parent_session=False):
             names = dvc.get_usernames()
@@ -101,16 +100,8 @@ class DVCPlugin(BaseTaskPlugin):
         return r
 
     def _fetch(self):
-        period = 60
-        while 1:
-            for name in list_local_repos():
-                r = Repo(os.path.join(paths.repository_dataset_dir, name))
-                try:
-                    r.git.fetch()
-                except GitCommandError, e:
-                    self.warning('error examining {}. {}'.format(name, e))
-
-            time.sleep(period)
+        dvc = self.application.get_service(DVC)
+        dvc.sync_service.run()
 
     # defaults
     def _background_processes_default(self):
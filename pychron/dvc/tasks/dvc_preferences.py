@@ -16,7 +16,7 @@
 
 # ============= enthought library imports =======================
 from envisage.ui.tasks.preferences_pane import PreferencesPane
-from traits.api import Str, Password, Bool
+from traits.api import Str, Password, Bool, Int
 from traitsui.api import View, Item, VGroup, UItem
 
 from pychron.database.tasks.connection_preferences import ConnectionPreferences, ConnectionPreferencesPane
@@ -31,6 +31,15 @@ class DVCPreferences(BasePreferencesHelper):
     work_offline_user = Str
     work_offline_password = Password
     work_offline_host = Str
+    use_parallel_loading = Bool
+    nloader_threads = Int(4)
+    use_binary_raw_data = Bool
+    use_sparse_checkout = Bool
+    use_repository_sync = Bool
+    repository_sync_period = Int(60)
+    repository_sync_nworkers = Int(4)
+    repository_sync_tolerance = Int(600)
+    use_analysis_cache = Bool
 
 
 class DVCDBConnectionPreferences(ConnectionPreferences):
@@ -38,11 +47,38 @@ class DVCDBConnectionPreferences(ConnectionPreferences):
     _adapter_klass = 'pychron.dvc.dvc_database.DVCDatabase'
     _schema_identifier = 'AnalysisTbl'
 
+    use_session_pool = Bool
+    pool_size = Int(5)
+    max_overflow = Int(10)
+    pool_timeout = Int(30)
+    pool_pre_ping = Bool(True)
+    replica_host = Str
+
 
 class DVCDBConnectionPreferencesPane(ConnectionPreferencesPane):
     model_factory = DVCDBConnectionPreferences
     category = 'DVC'
 
+    def _make_view(self, db_grp):
+        pool_grp = VGroup(Item('use_session_pool', label='Use Session Pool',
+                               tooltip='Give each thread its own database session and connection so long '
+                                       'queries do not block each other'),
+                          Item('pool_size', label='Pool Size', enabled_when='use_session_pool'),
+                          Item('max_overflow', label='Max. Overflow', enabled_when='use_session_pool'),
+                          Item('pool_timeout', label='Timeout (s)',
+                               tooltip='Seconds to wait for a connection when the pool is exhausted',
+                               enabled_when='use_session_pool'),
+                          Item('pool_pre_ping', label='Pre-Ping',
+                               tooltip='Test connections when they are checked out of the pool',
+                               enabled_when='use_session_pool'),
+                          Item('replica_host', label='Read Replica Host',
+                               tooltip='Optional read only replica used by browser and pipeline queries',
+                               enabled_when='use_session_pool'),
+                          visible_when='kind=="mysql"',
+                          show_border=True,
+                          label='Session Pool')
+        return View(VGroup(db_grp, pool_grp))
+
 
 class DVCPreferencesPane(PreferencesPane):
     model_factory = DVCPreferences
@@ -59,15 +95,40 @@ class DVCPreferencesPane(PreferencesPane):
                          label='Work Offline',
                          show_border=True)
 
+        loading = VGroup(Item('use_parallel_loading', label='Parallel Loading',
+                              tooltip='Load analyses and calculate their ages on a thread pool'),
+                         Item('nloader_threads', label='Loader Threads', enabled_when='use_parallel_loading'),
+                         Item('use_binary_raw_data', label='Save Binary Raw Data',
+                              tooltip='Save signals, baselines and sniffs to a binary <runid>.dat.npz file in '
+                                      'addition to the json raw data file. The binary file is used '
+                                      'preferentially when loading raw data'),
+                         Item('use_sparse_checkout', label='Sparse Checkout',
+                              tooltip='Clone repositories without their files and only check out the '
+                                      'analyses that are requested. Missing files are fetched on demand'),
+                         Item('use_analysis_cache', label='Cache Analyses',
+                              tooltip='Save made analyses to a local database and reuse them until any of '
+                                      'their files change'),
+                         label='Loading', show_border=True)
+
+        sync = VGroup(Item('use_repository_sync', label='Skip Fresh Repositories',
+                           tooltip='Do not pull a repository before loading analyses if the background sync '
+                                   'found it up-to-date within the tolerance'),
+                      Item('repository_sync_period', label='Fetch Period (s)'),
+                      Item('repository_sync_nworkers', label='Fetch Workers'),
+                      Item('repository_sync_tolerance', label='Tolerance (s)', enabled_when='use_repository_sync'),
+                      label='Repository Sync', show_border=True)
+
         v = View(VGroup(VGroup(org, meta), label='Git',
                         show_border=True),
-                 offline)
+                 offline, loading, sync)
         return v
 
 
 class DVCExperimentPreferences(BasePreferencesHelper):
     preferences_path = 'pychron.dvc.experiment'
     use_dvc_persistence = Bool
+    use_async_dvc_save = Bool
+    max_dvc_save_backlog = Int
 
 
 class DVCExperimentPreferencesPane(PreferencesPane):
@@ -76,6 +137,13 @@ class DVCExperimentPreferencesPane(PreferencesPane):
 
     def traits_view(self):
         v = View(VGroup(Item('use_dvc_persistence', label='Use DVC Persistence'),
+                        Item('use_async_dvc_save', label='Save in Background',
+                             enabled_when='use_dvc_persistence',
+                             tooltip='Commit and save analyses to the database in the background so the next run '
+                                     'can start immediately'),
+                        Item('max_dvc_save_backlog', label='Max. Save Backlog',
+                             enabled_when='use_async_dvc_save',
+                             tooltip='Wait before starting the next run if more saves than this are outstanding'),
                         label='DVC', show_border=True))
         return v
 
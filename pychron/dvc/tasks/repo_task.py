@@ -25,9 +25,10 @@ from traits.api import List, Str, Any, HasTraits, Bool, Instance, Int
 
 # ============= local library imports  ==========================
 from pychron.core.progress import progress_loader
+from pychron.dvc.raw_store import convert_repository
 from pychron.dvc.tasks import list_local_repos
 from pychron.dvc.tasks.actions import CloneAction, AddBranchAction, CheckoutBranchAction, PushAction, PullAction, \
-    FindChangesAction
+    FindChangesAction, ConvertRawDataAction
 from pychron.dvc.tasks.panes import RepoCentralPane, SelectionPane
 from pychron.envisage.tasks.base_task import BaseTask
 # from pychron.git_archive.history import from_gitlog
@@ -70,7 +71,8 @@ class ExperimentRepoTask(BaseTask):
                           CheckoutBranchAction(),
                           PushAction(),
                           PullAction(),
-                          FindChangesAction())]
+                          FindChangesAction(),
+                          ConvertRawDataAction())]
 
     commits = List
     _repo = None
@@ -120,6 +122,13 @@ class ExperimentRepoTask(BaseTask):
     def pull(self):
         self._repo.smart_pull(quiet=False)
 
+    def convert_raw_data(self):
+        name = self.selected_local_repository_name.name
+        ps = convert_repository(self._repo.path, logger=self)
+        self.information_dialog('Wrote {} binary raw data files for {}'.format(len(ps), name))
+        if ps and self._repo.add_paths(ps):
+            self._repo.commit('<RAWDATA> added binary raw data stores')
+
     def push(self):
         if not self._repo.has_remote():
             from pychron.dvc.tasks.add_remote_view import AddRemoteView
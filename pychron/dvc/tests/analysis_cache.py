@@ -0,0 +1,113 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from git import Git
+
+# ============= local library imports  ==========================
+from pychron.dvc.analysis_cache import AnalysisCache, blob_sha, source_key, constants_key, AGE, F
+from pychron.processing.arar_constants import ArArConstants
+
+
+class AnalysisCacheTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'cache', 'analyses.sqlite')
+        self.cache = AnalysisCache(self.path)
+
+        self.a = self._write('a.json', '{"runid": "12345-01A"}')
+        self.b = self._write('b.json', '{}')
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.root)
+
+    def _write(self, name, txt):
+        p = os.path.join(self.root, name)
+        with open(p, 'w') as wfile:
+            wfile.write(txt)
+        return p
+
+    def test_blob_sha(self):
+        self.assertEqual(blob_sha(self.a), Git(self.root).hash_object(self.a))
+        self.assertEqual(blob_sha(os.path.join(self.root, 'missing.json')), '')
+        self.assertEqual(blob_sha(None), '')
+
+    def test_source_key(self):
+        k = source_key((self.a, self.b), 'meta')
+        self.assertEqual(k, source_key((self.a, self.b), 'meta'))
+        self.assertNotEqual(k, source_key((self.b, self.a), 'meta'))
+        self.assertNotEqual(k, source_key((self.a, self.b), 'other'))
+
+        self._write('b.json', '{"modified": 1}')
+        self.assertNotEqual(k, source_key((self.a, self.b), 'meta'))
+
+    def test_constants_key(self):
+        a, b = ArArConstants(), ArArConstants()
+        self.assertEqual(constants_key(a), constants_key(b))
+        b.lambda_b_v = 5.463e-10
+        self.assertNotEqual(constants_key(a), constants_key(b))
+
+    def test_put_get(self):
+        self.cache.put('repo', '12345-01A', 'k1', {'age': 1.0})
+        self.assertEqual(self.cache.get('repo', '12345-01A', 'k1'), {'age': 1.0})
+        self.assertIsNone(self.cache.get('repo', '12345-01A', 'k2'))
+        self.assertIsNone(self.cache.get('other', '12345-01A', 'k1'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_replace(self):
+        self.cache.put('repo', '12345-01A', 'k1', 1)
+        self.cache.put('repo', '12345-01A', 'k2', 2)
+        self.assertEqual(self.cache.count(), 1)
+        self.assertIsNone(self.cache.get('repo', '12345-01A', 'k1'))
+        self.assertEqual(self.cache.get('repo', '12345-01A', 'k2'), 2)
+
+    def test_modes(self):
+        self.cache.put('repo', '12345-01A', 'k', 'age', mode=AGE)
+        self.assertEqual(self.cache.get('repo', '12345-01A', 'k', (F, AGE)), 'age')
+        self.assertIsNone(self.cache.get('repo', '12345-01A', 'k', (F,)))
+
+        self.cache.put('repo', '12345-01A', 'k', 'F', mode=F)
+        self.assertEqual(self.cache.get('repo', '12345-01A', 'k', (F, AGE)), 'F')
+        self.assertEqual(self.cache.count(), 2)
+
+    def test_persistent(self):
+        self.cache.put('repo', '12345-01A', 'k', [1, 2, 3])
+        self.cache.commit()
+
+        cache = AnalysisCache(self.path)
+        self.assertEqual(cache.get('repo', '12345-01A', 'k'), [1, 2, 3])
+        cache.close()
+
+    def test_remove(self):
+        self.cache.put('repo', '12345-01A', 'k', 1)
+        self.cache.put('repo', '12345-01B', 'k', 2)
+        self.cache.put('other', '12345-01A', 'k', 3)
+
+        self.cache.remove('repo', '12345-01A')
+        self.assertEqual(self.cache.count(), 2)
+        self.cache.remove('repo')
+        self.assertEqual(self.cache.count(), 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.count(), 0)
+
+# ============= EOF =============================================
@@ -0,0 +1,150 @@
+import cPickle as pickle
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from numpy import linspace
+
+import pychron.dvc
+from pychron.core.helpers.binpack import encode_blob
+from pychron.dvc import analysis_path
+from pychron.dvc.dvc_analysis import DVCAnalysis
+from pychron.paths import paths
+
+RUNID = '12345-01A'
+REPOSITORY = 'Test'
+SPEC_SHA = 'abcdef'
+
+
+class AuxFit(object):
+    """
+        the attributes of a fit aux plot read by FitSpec
+    """
+
+    def __init__(self, name, fit):
+        self.name = name
+        self.fit = fit
+        self.error_type = 'SEM'
+        self.filter_outliers = False
+        self.filter_outlier_iterations = 1
+        self.filter_outlier_std_devs = 2
+        self.time_zero_offset = 0
+        self.include_baseline_error = False
+
+
+def dump(path, obj):
+    d = os.path.dirname(path)
+    if not os.path.isdir(d):
+        os.makedirs(d)
+    with open(path, 'w') as wfile:
+        json.dump(obj, wfile)
+
+
+class DVCAnalysisPickleTestCase(unittest.TestCase):
+    """
+        analyses are pickled to the pipeline process pool and to the analysis cache
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self._paths = paths.repository_dataset_dir, pychron.dvc.MASSES
+        paths.repository_dataset_dir = self.root
+        pychron.dvc.MASSES = {'Ar40': 39.962, 'Ar39': 38.964}
+
+        repo = os.path.join(self.root, REPOSITORY)
+        dump(os.path.join(repo, '123', 'extraction', '45-01A.extr.json'),
+             {'extract_device': 'Laser', 'extract_value': 5, 'extract_units': 'W'})
+        dump(os.path.join(repo, '123', '45-01A.json'),
+             {'timestamp': '2016-01-01T12:00:00',
+              'spec_sha': SPEC_SHA,
+              'analysis_type': 'unknown',
+              'aliquot': 1,
+              'increment': 0,
+              'identifier': '12345',
+              'sample': 'FC-2',
+              'isotopes': {'Ar40': {'name': 'Ar40', 'detector': 'H1'},
+                           'Ar39': {'name': 'Ar39', 'detector': 'AX'}}})
+        dump(os.path.join(repo, '{}.json'.format(SPEC_SHA)),
+             {'spectrometer': {}, 'gains': {}, 'deflections': {}})
+
+        an = DVCAnalysis(RUNID, REPOSITORY)
+        xs = linspace(0, 100, 50)
+        for i, iso in enumerate(an.isotopes.itervalues()):
+            iso.xs = xs
+            iso.ys = 10 * (i + 1) - 0.01 * xs + 0.001 * (xs % 3)
+            iso.set_fit('linear')
+        self.analysis = an
+
+    def tearDown(self):
+        paths.repository_dataset_dir, pychron.dvc.MASSES = self._paths
+        shutil.rmtree(self.root)
+
+    def _roundtrip(self, an):
+        return pickle.loads(pickle.dumps(an, pickle.HIGHEST_PROTOCOL))
+
+    def test_attributes(self):
+        an = self.analysis
+        ran = self._roundtrip(an)
+        for attr in ('record_id', 'repository_identifier', 'sample', 'aliquot', 'identifier', 'rundate',
+                     'timestamp', 'extract_device', 'extract_value'):
+            self.assertEqual(getattr(ran, attr), getattr(an, attr))
+
+        self.assertEqual(sorted(ran.isotopes.keys()), sorted(an.isotopes.keys()))
+
+    def test_fits(self):
+        an = self.analysis
+        for iso in an.isotopes.itervalues():
+            iso.cache_fit()
+
+        ran = self._roundtrip(an)
+        for k, iso in an.isotopes.iteritems():
+            riso = ran.isotopes[k]
+            self.assertEqual(riso.fit, iso.fit)
+            self.assertEqual(riso.detector, iso.detector)
+            self.assertIsNotNone(riso._get_batch_result())
+            self.assertAlmostEqual(riso.value, iso.value)
+            self.assertAlmostEqual(riso.error, iso.error)
+            self.assertListEqual(list(riso.xs), list(iso.xs))
+
+    def test_pipeline_worker(self):
+        """
+            the process pool round trip of FitIsotopeEvolutionNode. see fit_isotope_evolution
+        """
+        from pychron.pipeline.nodes.fit import FitSpec, fit_isotope_evolution
+
+        an = self.analysis
+        signals = [{'isotope': iso.name, 'detector': iso.detector, 'blob': encode_blob(iso.pack('>', as_hex=False))}
+                   for iso in an.isotopes.itervalues()]
+        dump(analysis_path(RUNID, REPOSITORY, modifier='.data', mode='w', root=self.root),
+             {'signals': signals, 'baselines': [], 'sniffs': []})
+
+        keys = ['Ar40', 'Ar39']
+        fits = [FitSpec(AuxFit(k, 'parabolic')) for k in keys]
+
+        # serial
+        san = self._roundtrip(an)
+        san.load_raw_data(keys)
+        san.set_fits(fits)
+
+        # the arguments are pickled to the worker and the fit isotopes pickled back
+        isotopes = self._roundtrip(fit_isotope_evolution(self._roundtrip((an, keys, fits))))
+        an.isotopes = isotopes
+        for k in keys:
+            iso, siso = an.isotopes[k], san.isotopes[k]
+            self.assertEqual(iso.fit, 'parabolic')
+            self.assertIsNotNone(iso._get_batch_result())
+            self.assertEqual(iso.n, siso.n)
+            self.assertAlmostEqual(iso.value, siso.value)
+            self.assertAlmostEqual(iso.error, siso.error)
+
+    def test_uncached_fits(self):
+        an = self.analysis
+        ran = self._roundtrip(an)
+        for k, iso in an.isotopes.iteritems():
+            self.assertAlmostEqual(ran.isotopes[k].value, iso.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
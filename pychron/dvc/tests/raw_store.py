@@ -0,0 +1,158 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import base64
+import os
+import shutil
+import struct
+import tempfile
+import time
+from unittest import TestCase
+
+from numpy import linspace, array_equal
+
+# ============= local library imports  ==========================
+from pychron.dvc.raw_store import dump_raw_data, open_raw_store, raw_store_path, make_key, SIGNAL, BASELINE, \
+    SNIFF, convert_repository, blob_to_array
+from pychron.processing.isotope import Isotope
+
+
+def make_isotope(name, det, n, scale):
+    xs = linspace(0, n * 1.1, n)
+    iso = Isotope(name, det)
+    iso.xs = xs
+    iso.ys = scale + 0.01 * xs
+    iso.baseline.xs = xs
+    iso.baseline.ys = 0.001 * xs
+    iso.sniff.xs = xs[:5]
+    iso.sniff.ys = iso.ys[:5]
+    return iso
+
+
+def pack(m):
+    return base64.b64encode(m.pack('>', as_hex=False))
+
+
+class RawDataStoreTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.isotopes = [make_isotope('Ar40', 'H1', 100, 10),
+                         make_isotope('Ar39', 'AX', 50, 1),
+                         make_isotope('Ar36', 'CDD', 0, 0.01)]
+
+        signals, sniffs, baselines = [], [], []
+        for iso in self.isotopes:
+            signals.append({'isotope': iso.name, 'detector': iso.detector, 'blob': pack(iso)})
+            sniffs.append({'isotope': iso.name, 'detector': iso.detector, 'blob': pack(iso.sniff)})
+            baselines.append({'detector': iso.detector, 'blob': pack(iso.baseline)})
+
+        self.data = {'format': '>ff', 'signals': signals, 'sniffs': sniffs, 'baselines': baselines}
+        self.path = os.path.join(self.root, 'a.dat.npz')
+        self.keys = dump_raw_data(self.data, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_keys(self):
+        store = open_raw_store(self.path)
+        self.assertEqual(len(store), 9)
+        self.assertListEqual(sorted(store.keys()), self.keys)
+        self.assertListEqual(sorted(store.baselines()), ['AX', 'CDD', 'H1'])
+        self.assertIn(('Ar40', 'H1'), store.signals())
+
+    def test_count(self):
+        store = open_raw_store(self.path)
+        self.assertEqual(store.count(make_key(SIGNAL, 'Ar40', 'H1')), 100)
+        self.assertEqual(store.count(make_key(SNIFF, 'Ar39', 'AX')), 5)
+        self.assertEqual(store.count(make_key(SIGNAL, 'Ar36', 'CDD')), 0)
+
+    def test_matches_json_blob(self):
+        store = open_raw_store(self.path)
+        for iso, sd, bd in zip(self.isotopes, self.data['signals'], self.data['baselines']):
+            for key, blob, m in ((make_key(SIGNAL, iso.name, iso.detector), sd['blob'], iso),
+                                 (make_key(BASELINE, iso.detector), bd['blob'], iso.baseline)):
+                a = Isotope(iso.name, iso.detector)
+                a.unpack_data(base64.b64decode(blob))
+
+                b = Isotope(iso.name, iso.detector)
+                b.unpack_array(store.get(key))
+
+                self.assertTrue(array_equal(a.xs, b.xs))
+                self.assertTrue(array_equal(a.ys, b.ys))
+
+    def test_n_only(self):
+        store = open_raw_store(self.path)
+        iso = Isotope('Ar39', 'AX')
+        iso.unpack_array(store.get(make_key(SIGNAL, 'Ar39', 'AX')), n_only=True)
+        self.assertEqual(iso.n, 50)
+        self.assertEqual(iso.xs.shape[0], 0)
+
+    def test_double_format(self):
+        pts = [(1.5, 1e-12), (2.25, 123456.789012)]
+        blob = base64.b64encode(''.join(struct.pack('>dd', x, y) for x, y in pts))
+        a = blob_to_array(blob, '>dd')
+        self.assertEqual(a.dtype.str, '<f8')
+        self.assertListEqual(a[0].tolist(), [1.5, 2.25])
+        self.assertListEqual(a[1].tolist(), [1e-12, 123456.789012])
+
+    def test_unsupported_format(self):
+        self.assertRaises(ValueError, blob_to_array, '', '>fd')
+        self.assertRaises(ValueError, blob_to_array, '', '>fff')
+
+    def test_stale(self):
+        from pychron.dvc import dvc_dump
+
+        src = os.path.join(self.root, 'a.dat.json')
+        dvc_dump(self.data, src)
+        dump_raw_data(self.data, self.path, src)
+        self.assertIsNotNone(open_raw_store(self.path, src))
+
+        # a newer json file with the same content, e.g. after a clone or checkout
+        t = time.time()
+        os.utime(src, (t + 10, t + 10))
+        self.assertIsNotNone(open_raw_store(self.path, src))
+
+        # different content with an older mtime, e.g. after a pull
+        self.data['signals'] = self.data['signals'][:1]
+        dvc_dump(self.data, src)
+        os.utime(src, (t - 10, t - 10))
+        self.assertIsNone(open_raw_store(self.path, src))
+
+        # stores without a source SHA can not be verified
+        dump_raw_data(self.data, self.path)
+        self.assertIsNone(open_raw_store(self.path, src))
+
+    def test_missing(self):
+        self.assertIsNone(open_raw_store(os.path.join(self.root, 'b.dat.npz')))
+
+    def test_convert_repository(self):
+        from pychron.dvc import dvc_dump
+
+        d = os.path.join(self.root, 'repo', '12345', '.data')
+        os.makedirs(d)
+        src = os.path.join(d, '12345-01A.dat.json')
+        dvc_dump(self.data, src)
+
+        ps = convert_repository(os.path.join(self.root, 'repo'))
+        self.assertListEqual(ps, [raw_store_path(src)])
+        self.assertListEqual(sorted(open_raw_store(ps[0]).keys()), self.keys)
+
+        # up to date stores are skipped
+        self.assertListEqual(convert_repository(os.path.join(self.root, 'repo')), [])
+
+# ============= EOF =============================================
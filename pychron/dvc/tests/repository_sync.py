@@ -0,0 +1,96 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import shutil
+import tempfile
+from threading import Thread
+from unittest import TestCase
+
+from git import Repo
+
+# ============= local library imports  ==========================
+from pychron.dvc.repository_sync import RepositorySyncService
+from pychron.git_archive.utils import repository_lock
+
+
+def commit(repo, name):
+    with open(os.path.join(repo.working_dir, name), 'w') as wfile:
+        wfile.write(name)
+    repo.git.add(name)
+    repo.git.commit('-m', name)
+
+
+class RepositorySyncTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = Repo.init(os.path.join(self.root, 'remotes', 'a'))
+        w = self.src.config_writer()
+        w.set_value('user', 'name', 'test')
+        w.set_value('user', 'email', 'test@example.com')
+        w.release()
+        commit(self.src, 'a.json')
+
+        self.dest = os.path.join(self.root, 'repositories')
+        Repo.clone_from(self.src.working_dir, os.path.join(self.dest, 'a'))
+        Repo.init(os.path.join(self.dest, 'local'))
+
+        self.service = RepositorySyncService(root=self.dest, names=lambda: ['a', 'local', 'missing'])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_fetch_locked(self):
+        lock = repository_lock(os.path.join(self.dest, 'a'))
+        with lock:
+            t = Thread(target=self.service.fetch, args=('a',))
+            t.start()
+            t.join(0.5)
+            self.assertTrue(t.is_alive())
+            self.assertIsNone(self.service.status('a'))
+
+        t.join(5)
+        self.assertTrue(self.service.is_fresh('a'))
+
+    def test_fetch_all(self):
+        ss = self.service.fetch_all()
+        self.assertListEqual([s.name for s in ss], ['a', 'local', 'missing'])
+
+        self.assertTrue(self.service.is_fresh('a'))
+        self.assertEqual(self.service.status('a').behind, 0)
+        self.assertFalse(self.service.is_fresh('local'))
+        self.assertIsNotNone(self.service.status('local').error)
+        self.assertFalse(self.service.is_fresh('missing'))
+        self.assertFalse(self.service.is_fresh('unknown'))
+
+    def test_behind(self):
+        commit(self.src, 'b.json')
+        s = self.service.fetch('a')
+        self.assertEqual(s.behind, 1)
+        self.assertFalse(self.service.is_fresh('a'))
+
+        Repo(os.path.join(self.dest, 'a')).git.merge('FETCH_HEAD')
+        self.service.mark_synced('a')
+        self.assertTrue(self.service.is_fresh('a'))
+
+    def test_tolerance(self):
+        self.service.fetch('a')
+        self.assertTrue(self.service.is_fresh('a', tolerance=60))
+        self.assertFalse(self.service.is_fresh('a', tolerance=-1))
+
+# ============= EOF =============================================
@@ -0,0 +1,154 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import shutil
+import tempfile
+import time
+from threading import Event
+from unittest import TestCase
+
+# ============= local library imports  ==========================
+from pychron.dvc.save_queue import DVCSaveQueue, GIT, DB, JOURNAL_EXT
+
+
+class DVCSaveQueueTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.git = []
+        self.db = []
+        self.nfail = 0
+        self.failures = []
+        self.warnings = []
+        self.queue = self._make_queue()
+
+    def tearDown(self):
+        self.queue.stop(5)
+        shutil.rmtree(self.root)
+
+    def _make_queue(self, **kw):
+        q = DVCSaveQueue(self.root, {GIT: self._handle_git, DB: self._handle_db}, retries=2, retry_delay=0,
+                         on_failure=self._handle_failure, **kw)
+        # warnings open a display which needs a gui
+        q.warning = self.warnings.append
+        return q
+
+    def _handle_failure(self, kind, jobs, error):
+        self.failures.append((kind, [j['payload'] for j in jobs]))
+
+    def _handle_git(self, jobs):
+        self.git.append([j['payload'] for j in jobs])
+
+    def _handle_db(self, job):
+        if self.nfail:
+            self.nfail -= 1
+            raise ValueError('db not available')
+        self.db.append(job['payload'])
+
+    def _wait_for(self, func, timeout=5):
+        st = time.time()
+        while not func():
+            if time.time() - st > timeout:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _journal(self):
+        return [p for p in os.listdir(self.root) if p.endswith(JOURNAL_EXT)]
+
+    def test_save(self):
+        self.queue.put(GIT, 'a')
+        self.queue.put(DB, {'uuid': 'a'})
+        self.assertTrue(self.queue.flush(5))
+
+        self.assertListEqual(self.git, [['a']])
+        self.assertListEqual(self.db, [{'uuid': 'a'}])
+        self.assertEqual(self.queue.backlog, 0)
+        self.assertListEqual(self._journal(), [])
+
+    def test_batch_git(self):
+        evt = Event()
+        self.queue.handlers[DB] = lambda job: evt.wait(5)
+
+        # block the worker so that the git jobs accumulate
+        self.queue.put(DB, 'block')
+        for i in range(3):
+            self.queue.put(GIT, i)
+            self.queue.put(DB, i)
+
+        self.assertEqual(self.queue.backlog, 7)
+        evt.set()
+        self.assertTrue(self.queue.flush(5))
+        self.assertListEqual(self.git, [[0, 1, 2]])
+
+    def test_retry(self):
+        self.nfail = 2
+        self.queue.put(DB, 'a')
+        self.assertTrue(self.queue.flush(5))
+        self.assertListEqual(self.db, ['a'])
+        self.assertListEqual(self._journal(), [])
+
+    def test_give_up(self):
+        self.nfail = 10
+        self.queue.put(DB, 'a')
+        self.assertTrue(self.queue.flush(5))
+        self.assertListEqual(self.db, [])
+        self.assertEqual(len(self._journal()), 1)
+        self.assertEqual(self.queue.failed, 1)
+        self.assertListEqual(self.failures, [(DB, ['a'])])
+
+    def test_retry_failed(self):
+        self.queue.stop(5)
+        self.queue = self._make_queue(failed_retry_period=0)
+
+        self.nfail = 3
+        self.queue.put(DB, 'a')
+        self.assertTrue(self._wait_for(lambda: self.db == ['a']))
+        self.assertTrue(self.queue.flush(5))
+        self.assertEqual(self.queue.failed, 0)
+        self.assertListEqual(self.failures, [(DB, ['a'])])
+        self.assertListEqual(self._journal(), [])
+
+    def test_unexpected_error(self):
+        def warning(msg):
+            raise ValueError('logging failed')
+
+        self.queue.warning = warning
+        self.queue.put('unknown', 'a')
+        self.queue.put(DB, 'b')
+        self.assertTrue(self.queue.flush(5))
+        self.assertListEqual(self.db, ['b'])
+        self.assertEqual(self.queue.failed, 1)
+
+    def test_replay(self):
+        self.nfail = 10
+        self.queue.put(DB, 'a')
+        self.queue.put(DB, 'b')
+        self.assertTrue(self.queue.flush(5))
+        self.queue.stop(5)
+
+        self.nfail = 0
+        self.failures = []
+        self.warnings = []
+        self.queue = self._make_queue()
+        self.queue.start()
+        self.assertTrue(self.queue.flush(5))
+        self.assertListEqual(self.db, ['a', 'b'])
+        self.assertListEqual(self._journal(), [])
+
+# ============= EOF =============================================
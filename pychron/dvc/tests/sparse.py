@@ -0,0 +1,138 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from git import Repo
+
+# ============= local library imports  ==========================
+from pychron.dvc import analysis_path, dvc_dump
+from pychron.dvc.sparse import sparse_clone, checkout_analyses, analysis_patterns, is_sparse, read_patterns, \
+    BASE_PATTERNS, DEFAULT_MODIFIERS
+from pychron.git_archive.transaction import GitTransaction
+
+RUNIDS = ('12345-01A', '12345-01B', '12346-01A', 'bu-FD-o-001')
+
+
+class SparseCheckoutTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        src = os.path.join(self.root, 'src')
+        os.mkdir(src)
+
+        repo = Repo.init(src)
+        w = repo.config_writer()
+        w.set_value('user', 'name', 'test')
+        w.set_value('user', 'email', 'test@example.com')
+        w.release()
+
+        dvc_dump({}, os.path.join(src, 'spec.json'))
+        for r in RUNIDS:
+            for m in (None, 'intercepts', '.data'):
+                p = analysis_path(r, 'src', modifier=m, mode='w', root=self.root)
+                dvc_dump({'runid': r}, p)
+
+        repo.git.add('.')
+        repo.git.commit('-m', 'init')
+
+        self.url = 'file://{}'.format(src)
+        self.dest = os.path.join(self.root, 'dest')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _path(self, runid, modifier=None):
+        return analysis_path(runid, 'dest', modifier=modifier, root=self.root)
+
+    def test_patterns(self):
+        self.assertListEqual(analysis_patterns('12345-01A', ('intercepts', '.data')),
+                             ['/123/45-*', '/123/intercepts/45-*', '/123/.data/45-*'])
+        self.assertListEqual(analysis_patterns('bu-FD-o-001', ()), ['/bu-FD/-o-*'])
+
+    def test_clone(self):
+        sparse_clone(self.url, self.dest, analysis_patterns('12345-01A'))
+
+        self.assertTrue(is_sparse(self.dest))
+        self.assertTrue(os.path.isfile(os.path.join(self.dest, 'spec.json')))
+        self.assertTrue(os.path.isfile(self._path('12345-01A')))
+        self.assertTrue(os.path.isfile(self._path('12345-01A', 'intercepts')))
+        self.assertIsNone(self._path('12345-01A', '.data'))
+        # every analysis of the identifier is checked out
+        self.assertTrue(os.path.isfile(self._path('12345-01B')))
+        self.assertFalse(os.path.isfile(self._path('12346-01A')))
+        self.assertFalse(os.path.isdir(os.path.join(self.dest, 'bu-')))
+
+    def test_checkout(self):
+        sparse_clone(self.url, self.dest)
+        n = 2 * (len(DEFAULT_MODIFIERS) + 1)
+        self.assertEqual(checkout_analyses(self.dest, ('12346-01A', 'bu-FD-o-001')), n)
+        self.assertTrue(os.path.isfile(self._path('12346-01A', 'intercepts')))
+        self.assertTrue(os.path.isfile(self._path('bu-FD-o-001')))
+        self.assertFalse(os.path.isfile(self._path('12345-01A')))
+
+        # already checked out
+        self.assertEqual(checkout_analyses(self.dest, ('12346-01A',)), 0)
+        self.assertEqual(checkout_analyses(self.dest, ('12346-01B',)), 0)
+
+        self.assertEqual(checkout_analyses(self.dest, ('12346-01A',), ('.data',)), 1)
+        self.assertTrue(os.path.isfile(self._path('12346-01A', '.data')))
+
+    def test_compact_patterns(self):
+        sparse_clone(self.url, self.dest, ['/123/45-01A.json', '/123/intercepts/45-01A.inte.*'])
+        self.assertEqual(checkout_analyses(self.dest, ('12345-01B',)), len(DEFAULT_MODIFIERS) + 1)
+
+        ps = read_patterns(self.dest)
+        self.assertNotIn('/123/45-01A.json', ps)
+        self.assertNotIn('/123/intercepts/45-01A.inte.*', ps)
+        self.assertEqual(len(ps), len(BASE_PATTERNS) + len(DEFAULT_MODIFIERS) + 1)
+        self.assertTrue(os.path.isfile(self._path('12345-01A')))
+
+    def test_stage_new_files(self):
+        sparse_clone(self.url, self.dest)
+        repo = Repo(self.dest)
+        w = repo.config_writer()
+        w.set_value('user', 'name', 'test')
+        w.set_value('user', 'email', 'test@example.com')
+        w.release()
+
+        p = analysis_path('12347-01A', 'dest', mode='w', root=self.root)
+        dvc_dump({'runid': '12347-01A'}, p)
+        ia = os.path.join(self.dest, '123', 'ia', '45-01A.ia.json')
+        os.makedirs(os.path.dirname(ia))
+        dvc_dump({}, ia)
+
+        with GitTransaction(repo, 'new analysis') as t:
+            t.add_paths([p, ia])
+
+        self.assertEqual(len(t.staged), 2)
+
+        # checking out other analyses must not remove the new files
+        checkout_analyses(self.dest, ('12346-01A',))
+        self.assertTrue(os.path.isfile(p))
+        self.assertTrue(os.path.isfile(ia))
+        self.assertFalse(repo.is_dirty())
+
+    def test_not_sparse(self):
+        Repo.clone_from(self.url, self.dest)
+        self.assertFalse(is_sparse(self.dest))
+        self.assertIsNone(checkout_analyses(self.dest, ('12345-01A',)))
+
+# ============= EOF =============================================
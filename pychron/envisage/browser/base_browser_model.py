@@ -471,38 +471,41 @@ class BaseBrowserModel(PersistenceLoggable, ColumnSorterMixin):
                            make_records=True,
                            analysis_types=None):
         db = self.db
-        if samples:
-            lns = [si.labnumber for si in samples]
-            self.debug('retrieving identifiers={}'.format(','.join(lns)))
-            # if low_post is None:
-            # lps = [si.low_post for si in samples if si.low_post is not None]
-            #     low_post = min(lps) if lps else None
-            ans, tc = db.get_labnumber_analyses(lns,
-                                                order=order,
-                                                low_post=low_post,
-                                                high_post=high_post,
-                                                limit=limit,
-                                                exclude_identifiers=exclude_identifiers,
-                                                exclude_uuids=exclude_uuids,
-                                                include_invalid=include_invalid,
-                                                mass_spectrometers=mass_spectrometers,
-                                                repositories=repositories,
-                                                loads=loads)
-            self.debug('retrieved analyses n={}'.format(tc))
-        else:
-            self.debug('retrieved analyses by date range')
-            ans = db.get_analyses_by_date_range(low_post, high_post,
-                                                order=order,
-                                                mass_spectrometers=mass_spectrometers,
-                                                repositories=repositories,
-                                                limit=limit,
-                                                analysis_types=analysis_types,
-                                                loads=loads)
-
-        if make_records:
-            return self._make_records(ans)
-        else:
-            return ans
+        with db.read_only_ctx():
+            if samples:
+                lns = [si.labnumber for si in samples]
+                self.debug('retrieving identifiers={}'.format(','.join(lns)))
+                # if low_post is None:
+                # lps = [si.low_post for si in samples if si.low_post is not None]
+                #     low_post = min(lps) if lps else None
+                ans, tc = db.get_labnumber_analyses(lns,
+                                                    order=order,
+                                                    low_post=low_post,
+                                                    high_post=high_post,
+                                                    limit=limit,
+                                                    exclude_identifiers=exclude_identifiers,
+                                                    exclude_uuids=exclude_uuids,
+                                                    include_invalid=include_invalid,
+                                                    mass_spectrometers=mass_spectrometers,
+                                                    repositories=repositories,
+                                                    loads=loads,
+                                                    ids_only=make_records)
+                self.debug('retrieved analyses n={}'.format(tc))
+            else:
+                self.debug('retrieved analyses by date range')
+                ans = db.get_analyses_by_date_range(low_post, high_post,
+                                                    order=order,
+                                                    mass_spectrometers=mass_spectrometers,
+                                                    repositories=repositories,
+                                                    limit=limit,
+                                                    analysis_types=analysis_types,
+                                                    loads=loads,
+                                                    ids_only=make_records)
+
+            if make_records:
+                return self._make_records(ans)
+            else:
+                return ans
 
     # def _retrieve_sample_analyses(self, samples, **kw):
     #    return self._retrieve_analyses(samples=samples, **kw)
@@ -540,20 +543,11 @@ class BaseBrowserModel(PersistenceLoggable, ColumnSorterMixin):
         import time
         st = time.time()
 
-        def func(xi, prog, i, n):
-            if prog:
-                if i == 0:
-                    prog.change_message('Loading')
-                elif i == n - 1:
-                    prog.change_message('Finished')
-                    # if prog and i % 25 == 0:
-                else:
-                    prog.change_message('Loading {}'.format(xi.record_id))
-
-            return xi.record_views
-
-        ret = progress_loader(ans, func, threshold=25, step=50)
+        ret = self.db.make_record_views(ans)
         self.debug('make records {}'.format(time.time() - st))
+
+        if self.dvc:
+            self.dvc.prefetch_analyses(ret)
         return ret
 
     def _get_sample_filter_parameter(self):
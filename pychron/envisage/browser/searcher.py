@@ -19,7 +19,6 @@ import yaml
 import re
 import os
 # ============= local library imports  ==========================
-from pychron.core.progress import progress_loader
 from pychron.dvc.dvc_database import DVCDatabase
 from pychron.loggable import Loggable
 from pychron.paths import paths
@@ -101,13 +100,7 @@ class Searcher(Loggable):
                 yaml.dump([str(s) for s in self.search_entries], wfile)
 
     def _make_records(self, ans):
-        def func(xi, prog, i, n):
-            if prog:
-                # if prog and i % 25 == 0:
-                prog.change_message('Loading {}'.format(xi.record_id))
-            return xi.record_views
-
-        return progress_loader(ans, func, threshold=25, step=25)
+        return self.db.make_record_views(ans)
 
     def _load_entries(self):
         p = paths.hidden_path('search_entries')
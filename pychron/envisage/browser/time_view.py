@@ -27,7 +27,6 @@ from traitsui.handler import Controller, Handler
 from traitsui.menu import Action
 from traitsui.tabular_adapter import TabularAdapter
 
-from pychron.core.progress import progress_loader
 from pychron.core.ui.tabular_editor import myTabularEditor
 from pychron.envisage.icon_button_editor import icon_button_editor
 from pychron.paths import paths
@@ -240,18 +239,10 @@ class TimeViewModel(HasTraits):
                                             mass_spectrometers=mass_spectrometer,
                                             analysis_types=analysis_type,
                                             extract_devices=extract_device,
-                                            limit=self.limit, order='desc')
-        self.oanalyses = self._make_records(ans)
+                                            limit=self.limit, order='desc', ids_only=True)
+        self.oanalyses = db.make_record_views(ans)
         self.analyses = self.oanalyses[:]
 
-    def _make_records(self, ans):
-        def func(xi, prog, i, n):
-            if prog:
-                prog.change_message('Loading {}'.format(xi.record_id))
-            return xi.record_views
-
-        return progress_loader(ans, func, threshold=25)
-
     def traits_view(self):
         v = ATimeView
         v.handler = TVHandler()
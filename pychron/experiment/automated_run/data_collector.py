@@ -40,6 +40,7 @@ class DataCollector(Consoleable):
     ncounts = CInt
 
     is_baseline = Bool(False)
+    use_incremental_regression = Bool(True)
     for_peak_hop = Bool(False)
     fits = List
     series_idx = Int
@@ -112,7 +113,13 @@ class DataCollector(Consoleable):
 
         self._alive = True
 
-        self._measure(evt)
+        self._reserve_data()
+        self._set_incremental(self.use_incremental_regression)
+        try:
+            self._measure(evt)
+        finally:
+            # final values always come from a full regression
+            self._set_incremental(False)
 
         tt = time.time() - st
         self.debug('estimated time: {:0.3f} actual time: :{:0.3f}'.format(et, tt))
@@ -128,6 +135,21 @@ class DataCollector(Consoleable):
         self._temp_conds = None
 
     # private
+    def _reserve_data(self):
+        """
+        size the isotope data buffers for the expected number of counts so appending a point does not
+        copy the existing data
+        """
+        ig = self.isotope_group
+        if ig is not None and self.ncounts:
+            kind = BASELINE if self.is_baseline and self.for_peak_hop else self.collection_kind
+            ig.reserve_data(kind, self.ncounts)
+
+    def _set_incremental(self, enabled):
+        ig = self.isotope_group
+        if ig is not None:
+            ig.set_incremental(enabled)
+
     def _measure(self, evt):
         self.debug('starting measurement')
 
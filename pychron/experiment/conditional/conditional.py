@@ -214,7 +214,6 @@ class AutomatedRunConditional(BaseConditional):
 
     _teststr = None
     _ctx = None
-    value_context = None
 
     # def __init__(self, attr, teststr,
     # start_count=0,
@@ -253,6 +252,14 @@ class AutomatedRunConditional(BaseConditional):
                 'level': self.level,
                 'analysis_types': self.analysis_types, 'location': self.location}
 
+    @property
+    def value_context(self):
+        """
+            the context of the last check. formatted on demand, i.e. when the conditional trips, not on every check
+        """
+        if self._ctx is not None:
+            return pprint.pformat(self._ctx, width=1)
+
     def result_dict(self):
         hash_id = self._hash_id()
         return {'teststr': self._teststr, 'context': self.value_context, 'hash_id': hash_id}
@@ -286,18 +293,15 @@ class AutomatedRunConditional(BaseConditional):
         teststr, ctx = self._make_context(run, data)
         self._teststr, self._ctx = teststr, ctx
 
-        self.value_context = vc = pprint.pformat(ctx, width=1)
-
-        self.debug('testing {}'.format(teststr))
+        self.debug('testing {}', teststr)
         if verbose:
-            self.debug('attribute context {}'.format(pprint.pformat(self._attr_dict(), width=1)))
-        msg = 'evaluate ot="{}" t="{}", ctx="{}"'.format(self.teststr, teststr, vc)
-        self.debug(msg)
+            self.debug('attribute context {}', self._attr_dict())
+        self.debug('evaluate ot="{}" t="{}", ctx="{}"', self.teststr, teststr, ctx)
         if teststr and ctx:
-            if eval(teststr, ctx):
+            # eval adds __builtins__ to its globals. keep ctx clean for value_context
+            if eval(teststr, dict(ctx)):
                 self.trips += 1
-                self.debug('condition {} is true trips={}/{}'.format(teststr, self.trips,
-                                                                     self.ntrips))
+                self.debug('condition {} is true trips={}/{}', teststr, self.trips, self.ntrips)
                 if self.trips >= self.ntrips:
                     self.tripped = True
                     self.message = 'condition {} is True'.format(teststr)
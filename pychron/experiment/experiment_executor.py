@@ -170,6 +170,9 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
     use_memory_check = Bool(True)
     memory_threshold = Int
     use_dvc = Bool(False)
+    use_async_dvc_save = Bool(False)
+    max_dvc_save_backlog = Int(4)
+    dvc_save_flush_timeout = Int(300)
     use_autoplot = Bool(False)
     monitor_name = 'FC-2'
     experiment_type = Str(AR_AR)
@@ -254,7 +257,9 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
         self._preference_binder(prefid, attrs)
 
         # dvc
-        self._preference_binder('pychron.dvc.experiment', ('use_dvc_persistence',))
+        self._preference_binder('pychron.dvc.experiment', ('use_dvc_persistence',
+                                                           'use_async_dvc_save',
+                                                           'max_dvc_save_backlog'))
 
         # dashboard
         self._preference_binder('pychron.dashboard.experiment', ('use_dashboard_client',))
@@ -463,6 +468,33 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
                     self.info('canceling experiment queues')
                     self.cancel(confirm=False)
 
+        self._wait_for_dvc_save_backlog()
+
+    def _wait_for_dvc_save_backlog(self, backlog=None):
+        """
+            wait until no more than `backlog` DVC post measurement saves are outstanding.
+            defaults to max_dvc_save_backlog
+        """
+        q = self._get_dvc_save_queue()
+        if q is None:
+            return
+
+        if backlog is None:
+            backlog = self.max_dvc_save_backlog
+
+        if q.backlog > backlog:
+            self.info('Waiting for DVC save backlog. {} > {}'.format(q.backlog, backlog))
+            self.set_extract_state('Waiting for DVC save', flash=False)
+            while self.is_alive() and not q.wait(backlog, timeout=1):
+                pass
+            self.set_extract_state('')
+
+    def _get_dvc_save_queue(self):
+        if self.use_dvc_persistence and self.use_async_dvc_save and self.application:
+            dvcp = self.application.get_service('pychron.dvc.dvc_persister.DVCPersister')
+            if dvcp:
+                return dvcp.save_queue
+
     def _execute(self):
         """
             execute opened experiment queues
@@ -980,6 +1012,13 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
         if self.stats:
             self.stats.stop_timer()
 
+        q = self._get_dvc_save_queue()
+        if q is not None and q.backlog:
+            self.info('waiting for {} DVC save(s) to finish'.format(q.backlog))
+            if not q.flush(timeout=self.dvc_save_flush_timeout):
+                self.warning('DVC saves not finished after {}s. {} save(s) continuing in the '
+                             'background'.format(self.dvc_save_flush_timeout, q.backlog))
+
         # self.db.close()
         self.set_extract_state(False)
         # self.extraction_state = False
@@ -1258,6 +1297,7 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
             if dvcp:
                 dvcp.load_name = exp.load_name
                 dvcp.default_principal_investigator = self.default_principal_investigator
+                dvcp.use_async_save = self.use_async_dvc_save
                 arun.dvc_persister = dvcp
 
                 repid = spec.repository_identifier
@@ -2001,7 +2041,7 @@ class ExperimentExecutor(Consoleable, PreferenceMixin):
         for e in experiment_ids:
             if prog:
                 prog.change_message('Syncing {}'.format(e))
-                if not self.datahub.mainstore.sync_repo(e, use_progress=False):
+                if not self.datahub.mainstore.sync_repo(e, use_progress=False, use_cache=True):
                     return e
 
     def _post_run_check(self, run):
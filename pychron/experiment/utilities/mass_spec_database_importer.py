@@ -67,6 +67,9 @@ class MassSpecDatabaseImporter(Loggable):
     reference_isotope_name = Str
     use_reference_detector_by_isotope = Bool
 
+    save_retries = Int(2)
+    retry_delay = 2
+
     _current_spec = None
     _analysis = None
     _database_version = 0
@@ -195,48 +198,50 @@ class MassSpecDatabaseImporter(Loggable):
 
     def add_analysis(self, spec, commit=True):
         db = self.db
-        # for i in range(3):
-        with db.session_ctx(use_parent_session=False) as session:
-            irradpos = spec.irradpos
-            rid = spec.runid
-            trid = rid.lower()
-            identifier = spec.labnumber
-
-            if trid.startswith('b'):
-                runtype = 'Blank'
-                irradpos = -1
-            elif trid.startswith('a'):
-                runtype = 'Air'
-                irradpos = -2
-            elif trid.startswith('c'):
-                runtype = 'Unknown'
-                identifier = irradpos = self.get_identifier(spec)
-            else:
-                runtype = 'Unknown'
-
-            rid = make_runid(identifier, spec.aliquot, spec.step)
-
-            self._analysis = None
-            db.reraise = True
-            try:
-                ret = self._add_analysis(session, spec, irradpos, rid, runtype)
-                db.commit()
-                return ret
-            except Exception, e:
-                import traceback
-                self.debug('Mass Spec save exception. {}'.format(e))
-                tb = traceback.format_exc()
-                self.debug(tb)
-                self.message('Could not save spec. runid={} rid={} to MassSpec DB.\n{}'.format(spec.runid, rid, tb))
-                # if i == 2:
-                #     self.message('Could not save spec.runid={} rid={} '
-                #                  'to Mass Spec database.\n {}'.format(spec.runid, rid, tb))
-                # else:
-                #     self.debug('retry mass spec save')
-                # # if commit:
-                # db.rollback()
-            finally:
-                self.db.reraise = True
+        n = self.save_retries + 1
+        for i in range(n):
+            if i:
+                time.sleep(self.retry_delay)
+
+            with db.session_ctx(use_parent_session=False) as session:
+                irradpos = spec.irradpos
+                rid = spec.runid
+                trid = rid.lower()
+                identifier = spec.labnumber
+
+                if trid.startswith('b'):
+                    runtype = 'Blank'
+                    irradpos = -1
+                elif trid.startswith('a'):
+                    runtype = 'Air'
+                    irradpos = -2
+                elif trid.startswith('c'):
+                    runtype = 'Unknown'
+                    identifier = irradpos = self.get_identifier(spec)
+                else:
+                    runtype = 'Unknown'
+
+                rid = make_runid(identifier, spec.aliquot, spec.step)
+
+                self._analysis = None
+                db.reraise = True
+                try:
+                    ret = self._add_analysis(session, spec, irradpos, rid, runtype)
+                    db.commit()
+                    return ret
+                except Exception, e:
+                    import traceback
+                    self.debug('Mass Spec save exception. {}'.format(e))
+                    tb = traceback.format_exc()
+                    self.debug(tb)
+                    if i == n - 1:
+                        self.message('Could not save spec. runid={} rid={} to MassSpec DB.\n{}'.format(spec.runid,
+                                                                                                        rid, tb))
+                    else:
+                        self.debug('retry mass spec save')
+                        db.rollback()
+                finally:
+                    self.db.reraise = True
 
     def _add_analysis(self, sess, spec, irradpos, rid, runtype):
 
@@ -35,7 +35,8 @@ from pychron.envisage.view_util import open_view
 from pychron.git_archive.commit import Commit
 from pychron.git_archive.diff_view import DiffView, DiffModel
 from pychron.git_archive.merge_view import MergeModel, MergeView
-from pychron.git_archive.utils import get_head_commit, ahead_behind
+from pychron.git_archive.transaction import GitTransaction
+from pychron.git_archive.utils import get_head_commit, ahead_behind, repository_lock
 from pychron.git_archive.views import NewBranchView
 from pychron.loggable import Loggable
 
@@ -102,6 +103,10 @@ class GitRepoManager(Loggable):
     path_dirty = Event
     remote = Str
 
+    @property
+    def lock(self):
+        return repository_lock(self.path)
+
     def set_name(self, p):
         self.name = '{}<GitRepo>'.format(os.path.basename(p))
 
@@ -164,6 +169,7 @@ class GitRepoManager(Loggable):
         changed = bool(ps)
         for p in ps:
             self.debug('adding to index: {}'.format(os.path.relpath(p, self.path)))
+        self._include_sparse(ps)
         self.index.add(ps)
         return changed
 
@@ -456,6 +462,7 @@ class GitRepoManager(Loggable):
             if ps:
                 self.debug('adding to index {}'.format(ps))
 
+                self._include_sparse(ps)
                 index.add(ps)
 
         if use_diff:
@@ -557,6 +564,10 @@ class GitRepoManager(Loggable):
     def pull(self, branch='master', remote='origin', handled=True, use_progress=True):
         """
             fetch and merge
+
+            handled: log git errors. if False they are raised
+
+            return True if the changes were fetched and merged
         """
         self.debug('pulling {} from {}'.format(branch, remote))
 
@@ -574,22 +585,31 @@ class GitRepoManager(Loggable):
                                      show_percent=False,
                                      title='Pull Repository {}'.format(self.name), close_at_end=False)
                 prog.change_message('Fetching branch:"{}" from "{}"'.format(branch, remote))
+            ret = True
             try:
-                self.fetch(remote)
-            except GitCommandError, e:
-                self.debug(e)
-                if not handled:
-                    raise e
-            self.debug('fetch complete')
-            # if use_progress:
-            #     for i in range(100):
-            #         prog.change_message('Merging {}'.format(i))
-            #         time.sleep(1)
-
-            self._git_command(lambda: repo.git.merge('FETCH_HEAD'), 'merge')
+                try:
+                    self.fetch(remote)
+                except GitCommandError, e:
+                    self.debug(e)
+                    if not handled:
+                        raise e
+                    ret = False
+                self.debug('fetch complete')
+                # if use_progress:
+                #     for i in range(100):
+                #         prog.change_message('Merging {}'.format(i))
+                #         time.sleep(1)
+
+                if handled:
+                    ret = self._git_command(lambda: repo.git.merge('FETCH_HEAD'), 'merge') is not None and ret
+                else:
+                    repo.git.merge('FETCH_HEAD')
+            finally:
+                if use_progress:
+                    prog.close()
 
-            if use_progress:
-                prog.close()
+            self.debug('pull complete')
+            return ret
 
         self.debug('pull complete')
 
@@ -603,7 +623,9 @@ class GitRepoManager(Loggable):
         repo = self._repo
         rr = self._get_remote(remote)
         if rr:
+            st = time.time()
             self._git_command(lambda: repo.git.push(remote, branch), tag='GitRepoManager.push')
+            self.debug('push time={:0.3f}s'.format(time.time() - st))
         else:
             self.warning('No remote called "{}"'.format(remote))
 
@@ -693,6 +715,12 @@ class GitRepoManager(Loggable):
         # repo.git.merge(src.commit)
         self._git_command(lambda: repo.git.merge(src.commit), 'GitRepoManager.merge')
 
+    def transaction(self, message):
+        """
+            stage many paths with one index update and make one commit. see GitTransaction
+        """
+        return GitTransaction(self._repo, message, manager=self)
+
     def commit(self, msg):
         self.debug('commit message={}'.format(msg))
         index = self.index
@@ -790,11 +818,20 @@ class GitRepoManager(Loggable):
         dv = DiffView(model=model)
         return dv
 
+    def _include_sparse(self, ps):
+        """
+            keep paths written to a sparse clone checked out. see pychron.dvc.sparse
+        """
+        # lazy import because of circular dependency
+        from pychron.dvc.sparse import include_paths
+        include_paths(self.path, ps, logger=self)
+
     def _add_to_repo(self, p, msg, commit=True):
         index = self.index
         if index:
             if not isinstance(p, list):
                 p = [p]
+            self._include_sparse(p)
             try:
                 index.add(p)
             except IOError, e:
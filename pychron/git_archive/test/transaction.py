@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from git import Repo
+
+from pychron.git_archive.transaction import GitTransaction
+
+
+class GitTransactionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.repo = Repo.init(self.root)
+        w = self.repo.config_writer()
+        w.set_value('user', 'name', 'test')
+        w.set_value('user', 'email', 'test@example.com')
+        w.release()
+
+        self._write('README', 'a')
+        self.repo.git.add('README')
+        self.repo.git.commit('-m', 'init')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, name, txt):
+        p = os.path.join(self.root, name)
+        d = os.path.dirname(p)
+        if not os.path.isdir(d):
+            os.makedirs(d)
+        with open(p, 'w') as wfile:
+            wfile.write(txt)
+        return p
+
+    def _ncommits(self):
+        return len(self.repo.git.log('--pretty=%H').splitlines())
+
+    def test_one_commit(self):
+        with GitTransaction(self.repo, 'bulk') as t:
+            for i in range(20):
+                t.add(self._write(os.path.join('a', '{}.json'.format(i)), str(i)))
+            t.add(self._write('README', 'b'))
+
+        self.assertTrue(t.committed)
+        self.assertEqual(len(t.staged), 21)
+        self.assertEqual(self._ncommits(), 2)
+        self.assertEqual(self.repo.head.commit.message.strip(), 'bulk')
+        self.assertFalse(self.repo.is_dirty())
+        self.assertIn('staging', t.timings)
+        self.assertIn('commit', t.timings)
+
+    def test_no_changes(self):
+        with GitTransaction(self.repo, 'nothing') as t:
+            t.add(os.path.join(self.root, 'README'))
+            t.add(os.path.join(self.root, 'missing.json'))
+
+        self.assertFalse(t.committed)
+        self.assertEqual(self._ncommits(), 1)
+
+    def test_exception(self):
+        try:
+            with GitTransaction(self.repo, 'failed') as t:
+                t.add(self._write('b.json', 'b'))
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertFalse(t.committed)
+        self.assertEqual(self._ncommits(), 1)
+
+    def test_relative_paths(self):
+        self._write('c.json', 'c')
+        with GitTransaction(self.repo, 'relative') as t:
+            t.add_paths(['c.json', 'c.json'])
+
+        self.assertListEqual(t.paths, ['c.json'])
+        self.assertListEqual(t.staged, ['c.json'])
+
+    def test_previously_staged(self):
+        # staged before the transaction. must not be part of its commit
+        self._write('d.json', 'd')
+        self.repo.git.add('d.json')
+
+        with GitTransaction(self.repo, 'only mine') as t:
+            t.add(self._write('e.json', 'e'))
+
+        self.assertListEqual(t.staged, ['e.json'])
+        self.assertListEqual(self.repo.git.show('--name-only', '--pretty=').split(), ['e.json'])
+        self.assertListEqual(self.repo.git.diff('--cached', '--name-only').split(), ['d.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import os
+import time
+
+# ============= local library imports  ==========================
+
+# number of paths passed to one "git add" so the command line stays short
+STAGE_CHUNK = 500
+
+
+class GitTransaction(object):
+    """
+        accumulate the paths written for many analyses and commit them together.
+
+        the paths are staged with "git add" (one index update per STAGE_CHUNK paths) instead of an
+        index scan per path and a single commit of only those paths is made. changes staged before the
+        transaction are not committed. the time spent staging, committing and pushing is kept in `timings`
+
+        with repo.transaction('<BLANKS> msg') as t:
+            for ai in ans:
+                t.add(path(ai))
+
+        commits when the block exits without an exception
+    """
+
+    def __init__(self, repo, message, manager=None):
+        """
+            repo: git.Repo
+            manager: GitRepoManager. git commands are run and logged through its _git_command
+        """
+        self._repo = repo
+        self._manager = manager
+        self.message = message
+        self.paths = []
+        self.timings = {}
+        self.staged = []
+        self.committed = False
+
+        self._added = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+
+    def add(self, p):
+        if p not in self._added:
+            self._added.add(p)
+            self.paths.append(p)
+
+    def add_paths(self, ps):
+        if isinstance(ps, (str, unicode)):
+            ps = (ps,)
+
+        for p in ps:
+            self.add(p)
+
+    def stage(self):
+        """
+            add the accumulated paths to the index. return the staged paths relative to the repository
+        """
+        st = time.time()
+        root = self._repo.working_dir
+        ps = []
+        for p in self.paths:
+            if os.path.isfile(p) or os.path.isfile(os.path.join(root, p)):
+                ps.append(os.path.relpath(os.path.join(root, p), root))
+            else:
+                self._debug('not a valid file {}'.format(p))
+
+        # lazy import because of circular dependency
+        from pychron.dvc.sparse import include_paths
+        include_paths(root, ps, logger=self._manager)
+
+        git = self._repo.git
+        staged = []
+        for i in xrange(0, len(ps), STAGE_CHUNK):
+            chunk = ps[i:i + STAGE_CHUNK]
+            if self._git_command(lambda: git.add('--', *chunk), 'GitTransaction.stage') is None:
+                self.staged = []
+                return self.staged
+
+            # only the transaction's paths. other changes may already be staged
+            out = git.diff('--cached', '--name-only', '--', *chunk)
+            if out:
+                staged.extend(out.splitlines())
+
+        self.staged = staged
+
+        self._timing('staging', st)
+        self._debug('staged {} of {} paths in {:0.3f}s'.format(len(self.staged), len(ps), self.timings['staging']))
+        return self.staged
+
+    def commit(self, message=None):
+        """
+            stage and commit. return True if a commit was made
+        """
+        if self.committed:
+            return True
+
+        if not self.stage():
+            self._debug('no changes to commit')
+            return False
+
+        if message is None:
+            message = self.message
+
+        st = time.time()
+        git = self._repo.git
+        if self._git_command(lambda: git.commit('-m', message, '--', *self.staged), 'GitTransaction.commit') is None:
+            return False
+
+        self.committed = True
+
+        self._timing('commit', st)
+        self._debug('commit message={} time={:0.3f}s'.format(message, self.timings['commit']))
+        return True
+
+    def push(self, remote='origin', branch='master'):
+        st = time.time()
+        self._git_command(lambda: self._repo.git.push(remote, branch), 'GitTransaction.push')
+        self._timing('push', st)
+        self._debug('push {} {} time={:0.3f}s'.format(remote, branch, self.timings['push']))
+
+    def report(self):
+        return ', '.join('{}={:0.3f}s'.format(k, self.timings[k])
+                         for k in ('staging', 'commit', 'push') if k in self.timings)
+
+    # private
+    def _timing(self, key, st):
+        self.timings[key] = time.time() - st
+
+    def _git_command(self, func, tag):
+        """
+            return None if the command failed
+        """
+        if self._manager:
+            return self._manager._git_command(func, tag)
+        return func()
+
+    def _debug(self, msg):
+        if self._manager:
+            self._manager.debug(msg)
+
+# ============= EOF =============================================
@@ -17,6 +17,7 @@
 # ============= enthought library imports =======================
 import os
 from datetime import datetime
+from threading import Lock, RLock
 
 import re
 from git import Repo, Blob, Diff
@@ -28,6 +29,23 @@ from traits.api import HasTraits, Str, Bool, Date
 
 TAG_RE = re.compile(r'^\<\w+\>')
 
+_REPOSITORY_LOCKS = {}
+_REPOSITORY_LOCKS_LOCK = Lock()
+
+
+def repository_lock(path):
+    """
+        return the lock shared by every GitRepoManager of the repository at path.
+        hold it to keep other threads from using the repository, e.g. the DVCSaveQueue
+    """
+    path = os.path.realpath(path)
+    with _REPOSITORY_LOCKS_LOCK:
+        try:
+            return _REPOSITORY_LOCKS[path]
+        except KeyError:
+            lock = _REPOSITORY_LOCKS[path] = RLock()
+            return lock
+
 
 class GitShaObject(HasTraits):
     message = Str
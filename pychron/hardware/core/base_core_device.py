@@ -168,7 +168,9 @@ class BaseCoreDevice(HasCommunicator, ConsumerMixin):
 
         comm = self.communicator
         if comm is not None:
-            if comm.scheduler:
+            # a multiplexed communicator queues its requests, including the collision delay of a shared bus.
+            # requests it reads from the handle directly still need the scheduler
+            if comm.scheduler and comm.get_ask_channel(**kw) is None:
                 r = comm.scheduler.schedule(comm.ask, args=(cmd,),
                                             kwargs=kw)
             else:
@@ -94,6 +94,18 @@ class Communicator(HeadlessConfigLoadable):
         """
         time.sleep(ms / 1000.0)
 
+    def get_channel(self):
+        """
+            the IOLoop channel used for the I/O of this communicator. None if it is not multiplexed
+        """
+        return
+
+    def get_ask_channel(self, **kw):
+        """
+            the IOLoop channel ask(**kw) goes through. None if it uses the handle directly
+        """
+        return self.get_channel()
+
     def ask(self, *args, **kw):
         pass
 
@@ -25,6 +25,7 @@ from traits.api import Float
 from pychron.globals import globalv
 from pychron.hardware.core.checksum_helper import computeCRC
 from pychron.hardware.core.communicators.communicator import Communicator, process_response
+from pychron.hardware.core.communicators.io_loop import get_io_loop, Request, TCPChannel, UDPChannel
 
 
 class MessageFrame(object):
@@ -48,6 +49,49 @@ class MessageFrame(object):
                 self.checksum = True
                 self.message_len = True
 
+    def split(self, buf, terminator=None):
+        """
+            split the first message off buf. return (message, remaining buf) or None if buf does not contain a
+            complete message yet
+        """
+        if self.message_len:
+            nm = self.nmessage_len
+            if len(buf) >= nm:
+                try:
+                    n = int(buf[:nm], 16)
+                except ValueError:
+                    return buf, ''
+
+                if len(buf) >= n:
+                    return buf[:n], buf[n:]
+        elif terminator:
+            i = buf.find(terminator)
+            if i >= 0:
+                i += len(terminator)
+                return buf[:i], buf[i:]
+        elif buf:
+            return buf, ''
+
+    def decode(self, data):
+        """
+            strip the message length header and check the checksum. return None if the checksum fails
+        """
+        data = data.strip()
+        if self.message_len:
+            # trim off header
+            data = data[self.nmessage_len:]
+
+        if self.checksum:
+            nc = self.nchecksum
+            checksum = data[-nc:]
+            data = data[:-nc]
+            comp = computeCRC(data)
+            if comp != checksum:
+                print 'checksum fail computed={}, expected={}'.format(comp, checksum)
+                return
+
+        return data
+
 
 class Handler(object):
     sock = None
@@ -105,22 +149,7 @@ class Handler(object):
             if sum >= msg_len:
                 break
 
-        data = ''.join(ss)
-        data = data.strip()
-        if frame.message_len:
-            # trim off header
-            data = data[nm:]
-
-        if frame.checksum:
-            nc = frame.nchecksum
-            checksum = data[-nc:]
-            data = data[:-nc]
-            comp = computeCRC(data)
-            if comp != checksum:
-                print 'checksum fail computed={}, expected={}'.format(comp, checksum)
-                return
-
-        return data
+        return frame.decode(''.join(ss))
 
 
 class TCPHandler(Handler):
@@ -179,6 +208,14 @@ class EthernetCommunicator(Communicator):
 
     default_timeout = 3
 
+    # use the shared IOLoop instead of a blocking socket per communicator
+    multiplexed = False
+    # max number of requests sent before their responses are read. only used if multiplexed and responses are
+    # framed by message length or read_terminator
+    pipeline = 1
+    read_terminator = None
+    _channel = None
+
     @property
     def address(self):
         return '{}://{}:{}'.format(self.kind, self.host, self.port)
@@ -199,6 +236,15 @@ class EthernetCommunicator(Communicator):
         self.message_frame = self.config_get(config, 'Communications', 'message_frame', optional=True, default='')
         self.default_timeout = self.config_get(config, 'Communications', 'default_timeout', cast='int',
                                                optional=True, default=3)
+        self.multiplexed = self.config_get(config, 'Communications', 'multiplexed', cast='boolean', optional=True,
+                                           default=False)
+        self.pipeline = self.config_get(config, 'Communications', 'pipeline', cast='int', optional=True,
+                                        default=1)
+        self.read_terminator = self.config_get(config, 'Communications', 'read_terminator', optional=True)
+        if self.read_terminator == 'chr(10)':
+            self.read_terminator = chr(10)
+        elif self.read_terminator == 'chr(13)':
+            self.read_terminator = chr(13)
 
         if self.kind is None:
             self.kind = 'UDP'
@@ -216,8 +262,11 @@ class EthernetCommunicator(Communicator):
     def test_connection(self):
         self.simulation = False
 
-        with self._lock:
-            handler = self.get_handler()
+        if self.multiplexed:
+            handler = self.get_channel()
+        else:
+            with self._lock:
+                handler = self.get_handler()
 
         # send a test command so see if wer have connection
         cmd = self.test_cmd
@@ -285,6 +334,9 @@ class EthernetCommunicator(Communicator):
                 self.info('no handle    {}'.format(cmd.strip()))
             return
 
+        if self.multiplexed:
+            return self._ask_multiplexed(cmd, retries, verbose, quiet, info, timeout, message_frame)
+
         # print self.write_terminator
         cmd = '{}{}'.format(cmd, self.write_terminator)
         # print cmd
@@ -322,7 +374,62 @@ class EthernetCommunicator(Communicator):
 
         return r
 
+    def ask_async(self, cmd, timeout=None, message_frame=None, callback=None):
+        """
+            send cmd without waiting for the response. only available if multiplexed
+
+            @param callback: callable(request) called from the IOLoop thread when the response arrives
+            return a Request. Request.wait() blocks until it is done and returns the response
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+
+        kw = {}
+        if message_frame is not None:
+            kw = dict(framer=lambda buf: message_frame.split(buf, self.read_terminator),
+                      decoder=message_frame.decode)
+
+        r = Request('{}{}'.format(cmd, self.write_terminator), timeout, **kw)
+        if callback:
+            r.add_done_callback(callback)
+
+        return self.get_channel().submit(r)
+
+    def get_channel(self):
+        """
+            the IOLoop channel of this communicator, or None if not multiplexed. communicators with the same address
+            share a channel
+        """
+        ch = self._channel
+        if ch is None and self.multiplexed:
+            frame = MessageFrame()
+            frame.set_str(self.message_frame)
+            terminator = self.read_terminator
+
+            def factory():
+                klass = UDPChannel if self.kind.lower() == 'udp' else TCPChannel
+                pipeline = self.pipeline if frame.message_len or terminator else 1
+                return klass((self.host, self.port),
+                             framer=lambda buf: frame.split(buf, terminator),
+                             decoder=frame.decode,
+                             max_inflight=pipeline,
+                             close_after=self.use_end)
+
+            ch = self._channel = get_io_loop().channel(self._channel_key(), factory)
+        return ch
+
+    def close(self):
+        if self._channel is not None:
+            # the channel stays open while other communicators with this address use it
+            get_io_loop().remove(self._channel_key())
+            self._channel = None
+
     def reset(self):
+        if self.multiplexed:
+            if self._channel is not None:
+                get_io_loop().reset(self._channel_key())
+            return
+
         if self.handler:
             self.handler.end()
         self._reset_connection()
@@ -334,8 +441,15 @@ class EthernetCommunicator(Communicator):
                 return handler.get_packet('')
 
     def tell(self, cmd, verbose=True, quiet=False, info=None):
+        if self.multiplexed:
+            cmd = '{}{}'.format(cmd, self.write_terminator)
+            self.get_channel().submit(Request(cmd, self.default_timeout, expect_response=False))
+            if verbose or self.verbose and not quiet:
+                self.log_tell(cmd, info)
+            return
+
         with self._lock:
-            handler = self.get_handler(cmd, timeout)
+            handler = self.get_handler(cmd)
             try:
                 cmd = '{}{}'.format(cmd, self.write_terminator)
                 handler.send_packet(cmd)
@@ -346,6 +460,31 @@ class EthernetCommunicator(Communicator):
                 self.error_mode = True
 
     # private
+    def _channel_key(self):
+        return self.kind.lower(), self.host, self.port
+
+    def _ask_multiplexed(self, cmd, retries, verbose, quiet, info, timeout, message_frame):
+        """
+            blocking facade over ask_async. requests for this device are queued by its channel so no lock is taken
+        """
+        r = None
+        for i in xrange(retries):
+            req = self.ask_async(cmd, timeout=timeout, message_frame=message_frame)
+            r = req.wait()
+            if r is not None:
+                break
+
+            self.debug('doing retry {}. {}'.format(i, req.error))
+
+        if r is not None:
+            re = process_response(r)
+        else:
+            re = 'ERROR: No response: {}, timeout={}'.format(self.address, timeout)
+
+        if verbose or (self.verbose and not quiet):
+            self.log_response('{}{}'.format(cmd, self.write_terminator), re, info)
+        return r
+
     def _reset_connection(self):
         self.handler = None
         self.error_mode = False
@@ -0,0 +1,803 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+multiplexed device I/O.
+
+a single IOLoop thread services the sockets and serial ports of every multiplexed communicator with ``select``.
+each device has a Channel with its own request queue. a request is written when the channel is free, its response
+is framed out of the bytes read and handed back to the waiting Request. responses are matched to requests in the
+order they were sent or, if the channel has a ``response_key``, by key.
+
+a channel allows up to ``max_inflight`` outstanding requests, i.e. pipelining, if its protocol frames responses
+unambiguously. timeouts are deadlines checked by the loop, nothing sleeps.
+
+communicators keep their blocking ask/tell API by submitting a Request and waiting on it.
+
+communicators with the same address share a channel. the loop counts the references and only removes a channel
+when the last communicator releases it.
+
+a channel can be held to use its connection directly, e.g. a serial read that the framers cannot express. the loop
+finishes the requests in flight and then leaves the connection alone until the channel is released
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import errno
+import logging
+import os
+import select
+import socket
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+
+# ============= local library imports  ==========================
+
+logger = logging.getLogger('IOLoop')
+
+DATASIZE = 2 ** 12
+
+# seconds Request.wait() waits past the request's timeout before giving up on the loop
+WAIT_MARGIN = 1.0
+
+
+class Request(object):
+    """
+        a command sent on a Channel and its response
+    """
+
+    def __init__(self, payload, timeout=1.0, expect_response=True, key=None, framer=None, decoder=None,
+                 clear_input=False):
+        self.payload = payload
+        self.timeout = timeout
+        self.expect_response = expect_response
+        self.key = key
+        self.framer = framer
+        self.decoder = decoder
+        # discard unread input before the request is written, e.g. serial flushInput
+        self.clear_input = clear_input
+
+        self.deadline = None
+        self.response = None
+        self.error = None
+
+        self._event = Event()
+        self._lock = Lock()
+        self._callbacks = []
+
+    @property
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """
+            block until the request is done. return the response or None if it failed or timed out.
+
+            the loop completes a request by its deadline. timeout (default the request's timeout plus WAIT_MARGIN)
+            only guards against a loop that is not running
+        """
+        if timeout is None:
+            timeout = self.timeout + WAIT_MARGIN
+
+        if not self._event.wait(timeout):
+            self.set_result(error='no response from the IOLoop')
+        return self.response
+
+    def add_done_callback(self, func):
+        """
+            func(request) is called from the loop thread when the request is done, or immediately if it already is
+        """
+        with self._lock:
+            if not self.done:
+                self._callbacks.append(func)
+                return
+        func(self)
+
+    def set_result(self, response=None, error=None):
+        with self._lock:
+            if self.done:
+                return
+
+            self.response = response
+            self.error = error
+            self._event.set()
+            cbs, self._callbacks = self._callbacks, []
+
+        for cb in cbs:
+            try:
+                cb(self)
+            except BaseException, e:
+                logger.warning('request callback failed. {}'.format(e))
+
+    def __repr__(self):
+        return 'Request<{!r}>'.format(self.payload)
+
+
+def read_all(buf):
+    """
+        default framer. everything read so far is one message
+    """
+    if buf:
+        return buf, ''
+
+
+def terminator_framer(terminators):
+    """
+        frame messages ending with any of terminators. whitespace only messages are skipped
+    """
+    if isinstance(terminators, str):
+        terminators = (terminators,)
+
+    def framer(buf):
+        start = 0
+        while 1:
+            hits = [(i, -len(t)) for t in terminators for i in (buf.find(t, start),) if i >= 0]
+            if not hits:
+                return
+
+            i, nt = min(hits)
+            end = i - nt
+            if buf[start:i].strip():
+                return buf[start:end], buf[end:]
+            start = end
+
+    return framer
+
+
+def nchars_framer(n):
+    def framer(buf):
+        if len(buf) >= n:
+            return buf[:n], buf[n:]
+
+    return framer
+
+
+class Channel(object):
+    """
+        one device connection and its request queue.
+
+        the queue may be appended to from any thread. everything else is only touched by the loop thread
+    """
+    kind = None
+
+    def __init__(self, address, framer=None, decoder=None, max_inflight=1, min_interval=0,
+                 close_after=False, response_key=None):
+        """
+            framer: callable(buf) returning (message, remaining buf) or None if buf does not contain a full message
+            decoder: callable(message) returning the response
+            max_inflight: number of requests written before their responses are read
+            min_interval: seconds to wait after a transaction before the next request is written,
+                e.g. the collision delay of a shared RS-485 bus
+            close_after: close the connection after every transaction
+            response_key: callable(response) returning the key of the Request it answers
+        """
+        self.address = address
+        self.framer = framer or read_all
+        self.decoder = decoder
+        self.max_inflight = max(1, max_inflight)
+        self.min_interval = min_interval
+        self.close_after = close_after
+        self.response_key = response_key
+
+        self.loop = None
+        self.queue = deque()
+        self._inflight = deque()
+        self._out = ''
+        self._buf = ''
+        self._next_send = 0
+
+        self._hold = Event()
+        self._held = Event()
+        self._hold_lock = Lock()
+
+    @property
+    def held(self):
+        return self._held.is_set()
+
+    def submit(self, request):
+        """
+            queue request. it fails immediately if the channel was removed from its loop or cannot be prepared
+        """
+        loop = self.loop
+        if loop is None:
+            request.set_result(error='channel {} is closed'.format(self.address))
+            return request
+
+        try:
+            self.prepare()
+        except (socket.error, OSError, IOError), e:
+            request.set_result(error='could not connect to {}. {}'.format(self.address, e))
+            return request
+
+        self.queue.append(request)
+        loop.wake()
+        return request
+
+    def prepare(self):
+        """
+            called by submit on the caller's thread for work that must not block the loop, e.g. name resolution
+        """
+        pass
+
+    def dispose(self):
+        """
+            called by the loop when the channel is removed
+        """
+        pass
+
+    def hold(self, timeout=None):
+        """
+            stop the loop from using the connection so the caller can use it directly, e.g. a blocking serial read.
+            waits for the requests in flight. queued requests are written once the channel is released.
+
+            return True if the channel is held. a held channel must be released
+        """
+        self._hold_lock.acquire()
+        self._hold.set()
+        loop = self.loop
+        if loop is None:
+            return True
+
+        loop.wake()
+        if self._held.wait(timeout):
+            return True
+
+        self.release()
+        return False
+
+    def release(self):
+        self._hold.clear()
+        self._held.clear()
+        self._hold_lock.release()
+
+        loop = self.loop
+        if loop is not None:
+            loop.wake()
+
+    # loop interface
+    def fileno(self):
+        raise NotImplementedError
+
+    def is_open(self):
+        raise NotImplementedError
+
+    def open(self):
+        """
+            start opening the connection. return False if it failed
+        """
+        raise NotImplementedError
+
+    def close(self, error=None):
+        """
+            close the connection and fail the outstanding requests
+        """
+        self._close()
+        self._out = ''
+        self._buf = ''
+        inflight, self._inflight = self._inflight, deque()
+        for r in inflight:
+            r.set_result(error=error or 'connection closed')
+
+    def wants_read(self):
+        return self.is_open()
+
+    def wants_write(self):
+        return self.is_open() and bool(self._out)
+
+    def service(self, now):
+        """
+            write queued requests while the channel is free
+        """
+        if self._hold.is_set():
+            if not self._inflight and not self._out:
+                self._held.set()
+            return
+
+        while self.queue and len(self._inflight) < self.max_inflight and not self._out:
+            if now < self._next_send:
+                break
+
+            if not self.is_open() and not self.open():
+                self.queue.popleft().set_result(error='could not connect to {}'.format(self.address))
+                continue
+
+            r = self.queue.popleft()
+            if r.done:
+                continue
+
+            if not self._inflight:
+                # anything left over belongs to a request that timed out
+                self._drain()
+            if r.clear_input:
+                self._clear_input()
+
+            self._out = r.payload
+            r.deadline = now + r.timeout
+            self._inflight.append(r)
+            self.handle_write()
+
+    def next_deadline(self):
+        ds = [r.deadline for r in self._inflight]
+        if self.queue and self._next_send and not self._hold.is_set():
+            ds.append(self._next_send)
+        return min(ds) if ds else None
+
+    def check_timeouts(self, now):
+        if any(r.deadline <= now for r in self._inflight):
+            # a late response would be mistaken for the answer to the next request. start over
+            self.close(error='timeout')
+
+    def handle_write(self):
+        if self._out:
+            try:
+                n = self._send(self._out)
+            except (socket.error, OSError, IOError), e:
+                self.close(error=str(e))
+                return
+
+            self._out = self._out[n:]
+            if not self._out:
+                self._written()
+
+    def handle_read(self):
+        try:
+            data = self._recv()
+        except (socket.error, OSError, IOError), e:
+            if getattr(e, 'errno', None) in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return
+            self.close(error=str(e))
+            return
+
+        if not data:
+            if self.kind == 'TCP':
+                self.close(error='connection closed by {}'.format(self.address))
+            return
+
+        self._buf += data
+        while self._inflight:
+            head = self._inflight[0]
+            framer = head.framer or self.framer
+            m = framer(self._buf)
+            if m is None:
+                break
+
+            msg, self._buf = m
+            self._complete(msg)
+
+    # private
+    def _written(self):
+        """
+            the current request was written. requests that do not expect a response are complete
+        """
+        r = self._inflight[-1]
+        if not r.expect_response:
+            self._inflight.pop()
+            r.set_result()
+            self._end_transaction()
+
+    def _complete(self, msg):
+        head = self._inflight[0]
+        decoder = head.decoder or self.decoder
+        response = decoder(msg) if decoder else msg
+
+        r = None
+        if self.response_key:
+            key = self.response_key(response)
+            r = next((ri for ri in self._inflight if ri.key == key), None)
+            if r is None:
+                logger.debug('unmatched response {!r} from {}'.format(response, self.address))
+                return
+            self._inflight.remove(r)
+        else:
+            r = self._inflight.popleft()
+
+        r.set_result(response)
+        self._end_transaction()
+
+    def _end_transaction(self):
+        if self.min_interval:
+            self._next_send = time.time() + self.min_interval
+
+        if self.close_after and not self._inflight and not self._out:
+            self._close()
+
+    def _drain(self):
+        self._buf = ''
+        try:
+            while self.wants_read() and select.select([self], [], [], 0)[0]:
+                if not self._recv():
+                    break
+        except (socket.error, select.error, OSError, IOError, ValueError):
+            pass
+
+    def _clear_input(self):
+        self._drain()
+
+    def _send(self, data):
+        raise NotImplementedError
+
+    def _recv(self):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '{}<{}>'.format(self.__class__.__name__, self.address)
+
+
+class SocketChannel(Channel):
+    sock = None
+    # the resolved address. see prepare
+    sockaddr = None
+
+    def prepare(self):
+        if self.sockaddr is None:
+            host, port = self.address
+            self.sockaddr = socket.getaddrinfo(host, port, socket.AF_INET)[0][4]
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def is_open(self):
+        return self.sock is not None
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except socket.error:
+                pass
+            self.sock = None
+
+
+class TCPChannel(SocketChannel):
+    kind = 'TCP'
+    _connecting = False
+
+    def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(0)
+        err = sock.connect_ex(self.sockaddr)
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', None)):
+            sock.close()
+            logger.debug('connect {} failed. {}'.format(self.address, os.strerror(err)))
+            return False
+
+        self.sock = sock
+        self._connecting = err != 0
+        return True
+
+    def wants_read(self):
+        return self.is_open() and not self._connecting
+
+    def wants_write(self):
+        return self.is_open() and (self._connecting or bool(self._out))
+
+    def handle_write(self):
+        if self._connecting:
+            err = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err:
+                self.close(error='connect {} failed. {}'.format(self.address, os.strerror(err)))
+                return
+            self._connecting = False
+
+        super(TCPChannel, self).handle_write()
+
+    def _send(self, data):
+        if self._connecting:
+            return 0
+        return self.sock.send(data)
+
+    def _recv(self):
+        return self.sock.recv(DATASIZE)
+
+    def _close(self):
+        self._connecting = False
+        super(TCPChannel, self)._close()
+
+
+class UDPChannel(SocketChannel):
+    kind = 'UDP'
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(0)
+        return True
+
+    def _send(self, data):
+        self.sock.sendto(data, self.sockaddr)
+        return len(data)
+
+    def _recv(self):
+        return self.sock.recvfrom(DATASIZE)[0]
+
+
+class SerialChannel(Channel):
+    """
+        channel for an open pyserial handle. only usable where the handle has a selectable file descriptor, i.e.
+        not on Windows
+    """
+    kind = 'Serial'
+    # close the handle when the channel is removed. set when the communicator that opened it is closed while
+    # other communicators still use the channel
+    owns_handle = False
+
+    def __init__(self, handle, *args, **kw):
+        super(SerialChannel, self).__init__(*args, **kw)
+        self.handle = handle
+
+    def dispose(self):
+        if self.owns_handle and self.handle is not None:
+            self.handle.close()
+
+    def fileno(self):
+        return self.handle.fileno()
+
+    def is_open(self):
+        return self.handle is not None and self.handle.isOpen()
+
+    def open(self):
+        return self.is_open()
+
+    def _send(self, data):
+        return os.write(self.fileno(), data)
+
+    def _recv(self):
+        return os.read(self.fileno(), DATASIZE)
+
+    def _clear_input(self):
+        self._buf = ''
+        self.handle.flushInput()
+        self.handle.flushOutput()
+
+    def _close(self):
+        # the handle belongs to the communicator. just drop what is buffered
+        pass
+
+
+def selectable(handle):
+    return os.name == 'posix' and hasattr(handle, 'fileno')
+
+
+class IOLoop(object):
+    """
+        thread multiplexing the I/O of all registered channels
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._refs = {}
+        self._lock = Lock()
+        self._thread = None
+        self._alive = False
+        self._waker = None
+        self._closing = []
+        self._resetting = []
+
+    def channel(self, key, factory):
+        """
+            return the channel registered as key. if there is none register factory().
+
+            every call adds a reference to the channel. release it with remove
+        """
+        with self._lock:
+            ch = self._channels.get(key)
+            if ch is None:
+                ch = factory()
+                ch.loop = self
+                self._channels[key] = ch
+                self._refs[key] = 0
+            self._refs[key] += 1
+        self.start()
+        return ch
+
+    def remove(self, key):
+        """
+            release a reference to the channel registered as key. the channel is closed and removed when its last
+            reference is released. return True if it was removed
+        """
+        with self._lock:
+            if key not in self._channels:
+                return False
+
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return False
+
+            del self._refs[key]
+            ch = self._channels.pop(key)
+            ch.loop = None
+            # close on the loop thread
+            self._closing.append(ch)
+        self.wake()
+        return True
+
+    def reset(self, key):
+        """
+            close the connection of the channel registered as key. it is opened again by the next request
+        """
+        with self._lock:
+            ch = self._channels.get(key)
+            if ch is not None:
+                self._resetting.append(ch)
+        self.wake()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._waker = Waker()
+                self._alive = True
+                self._thread = t = Thread(target=self._run, name='IOLoop')
+                t.setDaemon(True)
+                t.start()
+
+    def stop(self):
+        self._alive = False
+        self.wake()
+        t = self._thread
+        if t is not None:
+            t.join()
+            self._thread = None
+
+    def wake(self):
+        w = self._waker
+        if w is not None:
+            w.wake()
+
+    @property
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # private
+    def _run(self):
+        waker = self._waker
+        while self._alive:
+            now = time.time()
+            with self._lock:
+                chs = self._channels.values()
+                closing, self._closing = self._closing, []
+                resetting, self._resetting = self._resetting, []
+
+            for ch in closing:
+                self._close_channel(ch, 'channel removed')
+                self._call(ch, ch.dispose)
+
+            for ch in resetting:
+                self._call(ch, ch.close, 'connection reset')
+
+            timeout = None
+            for ch in chs:
+                self._call(ch, ch.service, now)
+                d = ch.next_deadline()
+                if d is not None:
+                    timeout = d - now if timeout is None else min(timeout, d - now)
+
+            # a held channel's connection is used by another thread
+            rs = [waker] + [ch for ch in chs if not ch.held and ch.wants_read()]
+            ws = [ch for ch in chs if not ch.held and ch.wants_write()]
+            try:
+                rs, ws, _ = select.select(rs, ws, [], None if timeout is None else max(0, timeout))
+            except (select.error, socket.error, ValueError), e:
+                logger.warning('select failed. {}'.format(e))
+                self._close_bad(chs)
+                continue
+
+            for ch in ws:
+                self._call(ch, ch.handle_write)
+
+            for ch in rs:
+                if ch is waker:
+                    waker.clear()
+                else:
+                    self._call(ch, ch.handle_read)
+
+            now = time.time()
+            for ch in chs:
+                self._call(ch, ch.check_timeouts, now)
+
+        with self._lock:
+            chs = self._channels.values() + self._closing
+            self._closing = []
+            self._resetting = []
+        for ch in chs:
+            self._close_channel(ch, 'loop stopped')
+        waker.close()
+
+    def _call(self, ch, func, *args):
+        """
+            call a channel method. an exception, e.g. from a framer or decoder, fails the requests of that
+            channel instead of stopping the loop
+        """
+        try:
+            func(*args)
+        except Exception, e:
+            logger.exception('{} failed. {}'.format(ch, e))
+            self._close_channel(ch, 'channel error. {}'.format(e))
+
+    def _close_channel(self, ch, error):
+        try:
+            ch.close(error=error)
+        except Exception, e:
+            logger.warning('failed to close {}. {}'.format(ch, e))
+
+        while ch.queue:
+            ch.queue.popleft().set_result(error=error)
+
+    def _close_bad(self, chs):
+        for ch in chs:
+            try:
+                select.select([ch], [], [], 0)
+            except (select.error, socket.error, ValueError):
+                ch.close(error='bad file descriptor')
+
+
+class Waker(object):
+    """
+        loopback socket pair used to interrupt select
+    """
+
+    def __init__(self):
+        if hasattr(socket, 'socketpair'):
+            self._r, self._w = socket.socketpair()
+        else:
+            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            srv.bind(('127.0.0.1', 0))
+            srv.listen(1)
+            self._w = socket.create_connection(srv.getsockname())
+            self._r, _ = srv.accept()
+            srv.close()
+
+        self._r.setblocking(0)
+        self._w.setblocking(0)
+
+    def fileno(self):
+        return self._r.fileno()
+
+    def wake(self):
+        try:
+            self._w.send('x')
+        except socket.error:
+            pass
+
+    def clear(self):
+        try:
+            while self._r.recv(DATASIZE):
+                pass
+        except socket.error:
+            pass
+
+    def close(self):
+        self._r.close()
+        self._w.close()
+
+
+_loop = None
+_loop_lock = Lock()
+
+
+def get_io_loop():
+    """
+        the shared IOLoop
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = IOLoop()
+        return _loop
+
+# ============= EOF ====================================
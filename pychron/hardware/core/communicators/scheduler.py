@@ -35,6 +35,10 @@ class CommunicationScheduler(HasTraits):
 
         when setting up the devices use device.set_scheduler to set the shared scheduler
 
+        requests that go through an IOLoop channel bypass the lock. devices on the same port share the channel,
+        which queues their requests and keeps collision_delay between transactions. requests read from the handle
+        directly, e.g. handshakes, are still scheduled
+
     """
 
     #    collision_delay = Float(125)
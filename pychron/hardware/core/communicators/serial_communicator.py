@@ -20,10 +20,19 @@ import glob
 import os
 import sys
 import time
+from contextlib import contextmanager
 
 import serial
 # =============local library imports  ==========================
 from communicator import Communicator, process_response, prep_str, remove_eol_func
+from io_loop import get_io_loop, selectable, Request, SerialChannel, terminator_framer, nchars_framer, \
+    WAIT_MARGIN
+
+DEFAULT_TERMINATORS = ('\r\x00', '\r\n', '\r', '\n')
+
+
+def hex_decoder(r):
+    return ''.join(map('{:02X}'.format, map(ord, r)))
 
 
 def get_ports():
@@ -70,6 +79,10 @@ class SerialCommunicator(Communicator):
     read_terminator_position = None
     clear_output = False
 
+    # use the shared IOLoop instead of polling the handle. only available where the port is selectable
+    multiplexed = False
+    _channel = None
+
     _config = None
 
     @property
@@ -100,6 +113,17 @@ class SerialCommunicator(Communicator):
             self.warning('failed to reset connection')
 
     def close(self):
+        ch = self._channel
+        if ch is not None:
+            self._channel = None
+            # devices on the same port share the channel. if it uses this handle it closes it when it is removed
+            ours = ch.handle is self.handle
+            if ours:
+                ch.owns_handle = True
+            get_io_loop().remove(('serial', self.port))
+            if ours:
+                self.handle = None
+
         if self.handle:
             self.debug('closing handle {}'.format(self.handle))
             self.handle.close()
@@ -126,6 +150,8 @@ class SerialCommunicator(Communicator):
 
         self.set_attribute(config, 'clear_output', 'Communications', 'clear_output',
                            cast='boolean', optional=True)
+        self.set_attribute(config, 'multiplexed', 'Communications', 'multiplexed',
+                           cast='boolean', optional=True, default=False)
 
         parity = self.config_get(config, 'Communications', 'parity', optional=True)
         self.set_parity(parity)
@@ -175,21 +201,21 @@ class SerialCommunicator(Communicator):
                 self.log_tell(cmd, info)
             return
 
-        with self._lock:
-            self._write(cmd, is_hex=is_hex)
-            if verbose:
-                self.log_tell(cmd, info)
+        with self._handle_ctx() as ok:
+            if ok:
+                self._write(cmd, is_hex=is_hex)
+                if verbose:
+                    self.log_tell(cmd, info)
 
     def read(self, nchars=None, *args, **kw):
         """
         """
-        with self._lock:
-            if nchars is not None:
-                r = self._read_nchars(nchars)
-            else:
-                r = self._read_terminator(*args, **kw)
-
-            return r
+        with self._handle_ctx() as ok:
+            if ok:
+                if nchars is not None:
+                    return self._read_nchars(nchars)
+                else:
+                    return self._read_terminator(*args, **kw)
 
     def ask(self, cmd, is_hex=False, verbose=True, delay=None,
             replace=None, remove_eol=True, info=None, nbytes=None,
@@ -210,15 +236,34 @@ class SerialCommunicator(Communicator):
         if not self.handle.isOpen():
             return
 
-        with self._lock:
+        ch = self.get_ask_channel(handshake=handshake, terminator_position=terminator_position)
+        if ch is not None:
+            r = self.ask_async(cmd, is_hex=is_hex, nbytes=nbytes, nchars=nchars, read_terminator=read_terminator)
+            re = r.wait()
+            if r.error:
+                self.info('{}. {}'.format(r.error, prep_str(cmd.strip())))
+
+            if remove_eol:
+                re = remove_eol_func(re)
+
+            if verbose:
+                pre = process_response(re, replace)
+                self.log_response(cmd, pre, info)
+            return re
+
+        with self._handle_ctx() as ok:
+            if not ok:
+                return
+
             if self.clear_output:
                 self.handle.flushInput()
                 self.handle.flushOutput()
             self._write(cmd, is_hex=is_hex)
             if is_hex:
-                if nbytes is None:
-                    nbytes = 8
-                re = self._read_hex(nbytes=nbytes, delay=delay)
+                if nbytes is None and (read_terminator or self.read_terminator):
+                    re = hex_decoder(self._read_terminator(delay=delay, terminator=read_terminator))
+                else:
+                    re = self._read_hex(nbytes=nbytes or 8, delay=delay)
             elif handshake is not None:
                 re = self._read_handshake(handshake, handshake_only, delay=delay)
             elif nchars is not None:
@@ -236,6 +281,60 @@ class SerialCommunicator(Communicator):
 
         return re
 
+    def ask_async(self, cmd, is_hex=False, nbytes=None, nchars=None, read_terminator=None, timeout=None,
+                  callback=None):
+        """
+            send cmd without waiting for the response. requires a channel, see get_channel
+
+            @param timeout: seconds to wait for the response. defaults to the communicator's timeout
+            @param callback: callable(request) called from the IOLoop thread when the response arrives
+            return a Request. Request.wait() blocks until it is done and returns the response
+        """
+        if timeout is None:
+            timeout = self._get_timeout()
+
+        terminator = read_terminator or self.read_terminator
+        decoder = None
+        if is_hex:
+            payload = cmd.decode('hex')
+            if nbytes is None and terminator:
+                framer = terminator_framer(terminator)
+            else:
+                framer = nchars_framer(nbytes or 8)
+            decoder = hex_decoder
+        else:
+            payload = '{}{}'.format(cmd, self.write_terminator or '')
+            if nchars is not None:
+                framer = nchars_framer(nchars)
+            else:
+                framer = terminator_framer(terminator or DEFAULT_TERMINATORS)
+
+        r = Request(payload, timeout, framer=framer, decoder=decoder, clear_input=self.clear_output)
+        if callback:
+            r.add_done_callback(callback)
+        return self._channel.submit(r)
+
+    def get_channel(self):
+        """
+            the IOLoop channel of this port, or None if not multiplexed. devices on the same port, e.g. a RS-485
+            bus, share a channel. the scheduler's collision delay is kept between transactions
+        """
+        if self._channel is None and self.multiplexed and not self.simulation and selectable(self.handle):
+            delay = self.scheduler.collision_delay / 1000. if self.scheduler else 0
+
+            def factory():
+                return SerialChannel(self.handle, self.port, min_interval=delay)
+
+            self._channel = get_io_loop().channel(('serial', self.port), factory)
+        return self._channel
+
+    def get_ask_channel(self, handshake=None, terminator_position=None, **kw):
+        """
+            the channel ask uses. handshakes and terminator positions are only read from the handle directly
+        """
+        if handshake is None and terminator_position is None and self.read_terminator_position is None:
+            return self.get_channel()
+
     def open(self, **kw):
         """
             Use pyserial to create a handle connected to port wth baudrate
@@ -388,6 +487,28 @@ class SerialCommunicator(Communicator):
 
             write(cmd)
 
+    def _get_timeout(self):
+        return self.timeout or 1
+
+    @contextmanager
+    def _handle_ctx(self):
+        """
+            lock the handle for direct use. yields False if the handle is multiplexed and the IOLoop could not be
+            kept off it, see Channel.hold
+        """
+        ch = self._channel
+        if ch is not None and not ch.hold(self._get_timeout() + WAIT_MARGIN):
+            self.warning('could not take {} from the IOLoop'.format(ch))
+            yield False
+            return
+
+        try:
+            with self._lock:
+                yield True
+        finally:
+            if ch is not None:
+                ch.release()
+
     def _read_nchars(self, n, timeout=1, delay=None):
         func = lambda r: self._get_nchars(n, r)
         return self._read_loop(func, delay, timeout)
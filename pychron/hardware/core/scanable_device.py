@@ -28,6 +28,7 @@ from pychron.graph.plot_record import PlotRecord
 from pychron.paths import paths
 from pychron.database.data_warehouse import DataWarehouse
 from pychron.managers.data_managers.csv_data_manager import CSVDataManager
+from pychron.managers.data_managers.scan_data_manager import ScanDataManager
 from pychron.core.helpers.datetime_tools import generate_datetimestamp
 from pychron.hardware.core.alarm import Alarm
 
@@ -86,6 +87,8 @@ class ScanableDevice(ViewableDevice):
                 self.set_attribute(config, 'scan_units', 'Scan', 'units')
                 self.set_attribute(config, 'record_scan_data', 'Scan', 'record', cast='boolean')
                 self.set_attribute(config, 'graph_scan_data', 'Scan', 'graph', cast='boolean')
+                # csv, h5 or binary
+                self.set_attribute(config, 'dm_kind', 'Scan', 'format', default='csv', optional=True)
                 # self.set_attribute(config, 'use_db', 'DataManager', 'use_db', cast='boolean', default=False)
                 # self.set_attribute(config, 'dm_kind', 'DataManager', 'kind', default='csv')
 
@@ -137,6 +140,8 @@ class ScanableDevice(ViewableDevice):
                         ts = generate_datetimestamp()
 
                         self.data_manager.write_to_frame((ts, '{:<8s}'.format('{:0.2f}'.format(x))) + v)
+                    elif self.dm_kind == 'binary':
+                        self.data_manager.write_scan(x, v if isinstance(v, tuple) else (v,))
                     else:
                         tab = self.data_manager.get_table('scan1', '/scans')
                         if tab is not None:
@@ -190,11 +195,13 @@ class ScanableDevice(ViewableDevice):
                 from pychron.managers.data_managers.h5_data_manager import H5DataManager
 
                 klass = H5DataManager
+            elif self.dm_kind == 'binary':
+                klass = ScanDataManager
             else:
                 klass = CSVDataManager
 
             dm = self.data_manager
-            if dm is None:
+            if not isinstance(dm, klass):
                 self.data_manager = dm = klass()
 
             dm.delimiter = '\t'
@@ -220,6 +227,23 @@ class ScanableDevice(ViewableDevice):
         self.timer = Timer(period, self.scan)
         self.info('Scan started {} period={}'.format(self.scan_func, period))
 
+    def get_scan_data(self, npts=1000, t0=None, t1=None, column=1):
+        """
+            return xs, ys of the scan between t0 and t1 downsampled to npts for plotting.
+            only available for binary scans
+        """
+        if isinstance(self.data_manager, ScanDataManager):
+            r = self.data_manager.reader(self.scan_path)
+            if r:
+                return r.downsample(npts, t0, t1, column=column)
+
+    def export_scan(self, path=None, **kw):
+        """
+            export a binary scan as csv. return the path of the csv file
+        """
+        if isinstance(self.data_manager, ScanDataManager):
+            return self.data_manager.export_csv(self.scan_path, path, **kw)
+
     def save_scan_to_db(self):
         from pychron.database.adapters.device_scan_adapter import DeviceScanAdapter
 
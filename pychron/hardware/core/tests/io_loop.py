@@ -0,0 +1,193 @@
+import socket
+import time
+import unittest
+from threading import Thread
+
+from pychron.hardware.core.communicators.io_loop import IOLoop, Request, TCPChannel, UDPChannel, \
+    terminator_framer, nchars_framer
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class LineServer(Thread):
+    """
+        TCP server answering each line with ``echo <line>``. lines starting with ``mute`` are not answered
+    """
+
+    def __init__(self):
+        super(LineServer, self).__init__()
+        self.setDaemon(True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.address = self.sock.getsockname()
+
+    def run(self):
+        while 1:
+            try:
+                conn, _ = self.sock.accept()
+            except socket.error:
+                break
+            buf = ''
+            while 1:
+                data = conn.recv(1024)
+                if not data:
+                    break
+                buf += data
+                while '\n' in buf:
+                    line, buf = buf.split('\n', 1)
+                    if not line.startswith('mute'):
+                        conn.sendall('echo {}\n'.format(line))
+            conn.close()
+
+    def close(self):
+        self.sock.close()
+
+
+class IOLoopTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = IOLoop()
+        self.server = LineServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.loop.stop()
+        self.server.close()
+
+    def _tcp(self, **kw):
+        return self.loop.channel('tcp', lambda: TCPChannel(self.server.address, framer=terminator_framer('\n'),
+                                                           decoder=str.strip, **kw))
+
+    def test_ask(self):
+        ch = self._tcp()
+        self.assertEqual(ch.submit(Request('a\n')).wait(), 'echo a')
+        self.assertEqual(ch.submit(Request('b\n')).wait(), 'echo b')
+
+    def test_pipeline(self):
+        ch = self._tcp(max_inflight=4)
+        rs = [ch.submit(Request('{}\n'.format(i))) for i in range(20)]
+        self.assertListEqual([r.wait() for r in rs], ['echo {}'.format(i) for i in range(20)])
+
+    def test_timeout(self):
+        ch = self._tcp()
+        st = time.time()
+        r = ch.submit(Request('mute\n', timeout=0.2))
+        self.assertIsNone(r.wait())
+        self.assertEqual(r.error, 'timeout')
+        self.assertLess(time.time() - st, 1)
+
+        # the channel recovers
+        self.assertEqual(ch.submit(Request('c\n')).wait(), 'echo c')
+
+    def test_hold(self):
+        ch = self._tcp()
+        r = ch.submit(Request('a\n'))
+        self.assertTrue(ch.hold(2))
+        # requests in flight finish before the channel is held
+        self.assertEqual(r.response, 'echo a')
+
+        r = ch.submit(Request('b\n'))
+        time.sleep(0.2)
+        self.assertFalse(r.done)
+
+        ch.release()
+        self.assertEqual(r.wait(), 'echo b')
+
+    def test_tell(self):
+        ch = self._tcp()
+        r = ch.submit(Request('mute\n', expect_response=False))
+        self.assertIsNone(r.wait())
+        self.assertIsNone(r.error)
+        self.assertEqual(ch.submit(Request('d\n')).wait(), 'echo d')
+
+    def test_callback(self):
+        ch = self._tcp()
+        rs = []
+        r = Request('e\n')
+        r.add_done_callback(lambda ri: rs.append(ri.response))
+        ch.submit(r).wait()
+        self.assertListEqual(rs, ['echo e'])
+
+    def test_refused(self):
+        ch = self.loop.channel('refused', lambda: TCPChannel(('127.0.0.1', free_port())))
+        r = ch.submit(Request('a\n', timeout=2))
+        self.assertIsNone(r.wait())
+        self.assertIsNotNone(r.error)
+
+    def test_udp(self):
+        srv = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        srv.bind(('127.0.0.1', 0))
+
+        def echo():
+            data, addr = srv.recvfrom(1024)
+            srv.sendto(data.upper(), addr)
+
+        t = Thread(target=echo)
+        t.start()
+        ch = self.loop.channel('udp', lambda: UDPChannel(srv.getsockname()))
+        self.assertEqual(ch.submit(Request('abc')).wait(), 'ABC')
+        t.join()
+        srv.close()
+
+    def test_shared(self):
+        a = self._tcp()
+        b = self._tcp()
+        self.assertIs(a, b)
+
+        # still used by b
+        self.assertFalse(self.loop.remove('tcp'))
+        self.assertEqual(b.submit(Request('f\n')).wait(), 'echo f')
+
+        self.assertTrue(self.loop.remove('tcp'))
+        r = b.submit(Request('g\n'))
+        self.assertTrue(r.done)
+        self.assertIsNotNone(r.error)
+
+    def test_decoder_error(self):
+        def decoder(msg):
+            raise ValueError(msg)
+
+        bad = self.loop.channel('bad', lambda: TCPChannel(self.server.address, framer=terminator_framer('\n'),
+                                                          decoder=decoder))
+        r = bad.submit(Request('a\n'))
+        self.assertIsNone(r.wait())
+        self.assertIn('channel error', r.error)
+
+        # the loop keeps running
+        self.assertTrue(self.loop.is_alive)
+        self.assertEqual(self._tcp().submit(Request('b\n')).wait(), 'echo b')
+
+    def test_unresolved(self):
+        ch = self.loop.channel('unresolved', lambda: TCPChannel(('host.invalid', 80)))
+        r = ch.submit(Request('a\n'))
+        self.assertTrue(r.done)
+        self.assertIn('could not connect', r.error)
+        self.assertTrue(self.loop.is_alive)
+
+    def test_wait_timeout(self):
+        # never submitted, i.e. the loop does not complete it
+        r = Request('a\n', timeout=0.1)
+        st = time.time()
+        self.assertIsNone(r.wait(0.2))
+        self.assertIsNotNone(r.error)
+        self.assertLess(time.time() - st, 1)
+
+    def test_framers(self):
+        f = terminator_framer(('\r\n', '\r', '\n'))
+        self.assertIsNone(f('abc'))
+        self.assertEqual(f('abc\r\ndef'), ('abc\r\n', 'def'))
+        self.assertEqual(f('\r\nabc\r'), ('abc\r', ''))
+
+        f = nchars_framer(3)
+        self.assertIsNone(f('ab'))
+        self.assertEqual(f('abcd'), ('abc', 'd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
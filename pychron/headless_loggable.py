@@ -18,8 +18,11 @@
 from traits.api import HasTraits, Str
 
 # ============= standard library imports ========================
+import logging
+
 # ============= local library imports  ==========================
 from pychron.core.helpers.logger_setup import new_logger
+from pychron.core.helpers.queue_logging import LazyMessage
 
 
 class HeadlessLoggable(HasTraits):
@@ -44,7 +47,11 @@ class HeadlessLoggable(HasTraits):
     def warning(self, msg, **kw):
         self.logger.warning(msg)
 
-    def debug(self, msg, **kw):
+    def debug(self, msg, *args, **kw):
+        if args:
+            if not self.logger.isEnabledFor(logging.DEBUG):
+                return
+            msg = LazyMessage(msg, args)
         self.logger.debug(msg)
 
     def critical(self, msg, **kw):
@@ -19,11 +19,13 @@
 from traits.api import HasTraits, Any, String
 
 # ============= standard library imports ========================
+import logging
 # ============= local library imports  ==========================
 from pychron.core.confirmation import confirmation_dialog
 from pychron.globals import globalv
 from pychron.core.helpers.color_generators import colorname_generator
 from pychron.core.helpers.logger_setup import new_logger
+from pychron.core.helpers.queue_logging import LazyMessage
 from threading import current_thread
 
 # from pychron.core.ui.dialogs import myConfirmationDialog, myMessageDialog
@@ -129,7 +131,15 @@ class Loggable(HasTraits):
     def critical(self, msg):
         self._log_('critical', msg)
 
-    def debug(self, msg):
+    def debug(self, msg, *args):
+        """
+            args are str.format arguments of msg. msg is only formatted if the record is written
+        """
+        if args:
+            if self.logger is None or not self.logger.isEnabledFor(logging.DEBUG):
+                return
+            msg = LazyMessage(msg, args)
+
         self._log_('debug', msg)
 
     # dialogs
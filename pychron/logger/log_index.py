@@ -0,0 +1,403 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+line index of large pychron log files.
+
+the file is memory mapped and scanned in blocks for the offset of each line and the timestamp and level of the
+record it belongs to. lines of a multi-line record, e.g. a traceback, get the timestamp and level of the record.
+only the index is kept in memory, lines are read from the map when they are displayed.
+
+searches scan the map block by block with the regex engine and report the matching lines in batches
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import mmap
+import os
+import re
+import time
+from threading import Thread, Lock, Event
+
+from numpy import empty, frombuffer, uint8, nonzero, searchsorted, in1d, unique, asarray, arange, where, \
+    maximum, hstack
+
+# ============= local library imports  ==========================
+
+BLOCK_SIZE = 1 << 22
+
+LEVELS = ('', 'DEBUG', 'INFO', 'WARNING', 'CRITICAL', 'ERROR')
+LEVEL_CODES = {l: i for i, l in enumerate(LEVELS)}
+
+# the start of a line written with logger_setup.gFORMAT
+HEAD_REGEX = re.compile(r'^[^\n]{1,80}?: (\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) '
+                        r'(DEBUG|INFO|WARNING|CRITICAL|ERROR) ', re.MULTILINE)
+
+
+class GrowableArray(object):
+    """
+        append only array. values() is a snapshot that stays valid while the array grows
+    """
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = empty(capacity, dtype=dtype)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def extend(self, vs):
+        n = len(vs)
+        need = self._n + n
+        if need > self._data.shape[0]:
+            d = empty(max(need, 2 * self._data.shape[0]), dtype=self._data.dtype)
+            d[:self._n] = self._data[:self._n]
+            self._data = d
+        self._data[self._n:need] = vs
+        self._n = need
+
+    def values(self):
+        return self._data[:self._n]
+
+    def truncate(self, n):
+        self._n = min(n, self._n)
+
+
+class LogIndex(object):
+    """
+        offsets, timestamps and levels of the lines of a log file.
+
+        build() indexes the file. start() does it in a thread so lines can be read while the index is built
+    """
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+
+        self._offsets = GrowableArray('i8')
+        self._timestamps = GrowableArray('f8')
+        self._levels = GrowableArray('u1')
+
+        self._file = None
+        self._map = None
+        self._size = 0
+        self._indexed = 0
+        self._lock = Lock()
+        self._thread = None
+        self._cancel = Event()
+
+        self._days = {}
+        self._last_timestamp = 0
+        self._last_level = 0
+        # the file did not end with a line ending when it was indexed
+        self._partial = False
+
+    @property
+    def n(self):
+        """
+            number of lines indexed so far
+        """
+        return len(self._offsets)
+
+    @property
+    def progress(self):
+        if self._size:
+            return self._indexed / float(self._size)
+        return 1
+
+    @property
+    def is_building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, callback=None):
+        """
+            build the index in a thread. callback(index) is called after each block
+        """
+        self._cancel.clear()
+        self._thread = t = Thread(name='log_index', target=self.build, args=(callback,))
+        t.setDaemon(True)
+        t.start()
+
+    def wait(self):
+        if self._thread:
+            self._thread.join()
+
+    def build(self, callback=None):
+        """
+            index the lines added since the last build
+        """
+        self._open()
+        if self._partial and self._size > self._indexed:
+            # the last line was not finished. index it again
+            self._partial = False
+            with self._lock:
+                n = self.n - 1
+                self._indexed = int(self._offsets.values()[n])
+                self._last_timestamp = self._timestamps.values()[n - 1] if n else 0
+                self._last_level = self._levels.values()[n - 1] if n else 0
+                for a in (self._offsets, self._timestamps, self._levels):
+                    a.truncate(n)
+
+        mm = self._map
+        while self._indexed < self._size and not self._cancel.is_set():
+            pos = self._indexed
+            end = min(pos + self.block_size, self._size)
+            block = mm[pos:end]
+            if end < self._size:
+                # stop at the last complete line
+                i = block.rfind('\n')
+                if i == -1:
+                    # a line longer than the block
+                    end = mm.find('\n', end)
+                    end = self._size if end == -1 else end + 1
+                    block = mm[pos:end]
+                else:
+                    block = block[:i + 1]
+                    end = pos + i + 1
+            else:
+                self._partial = not block.endswith('\n')
+
+            self._index_block(block, pos)
+            self._indexed = end
+            if callback:
+                callback(self)
+
+    def refresh(self, callback=None):
+        """
+            index lines appended since the index was built. return True if the file grew
+        """
+        if self._map and os.path.getsize(self.path) > self._size:
+            self.build(callback)
+            return True
+
+    def close(self):
+        self._cancel.set()
+        if self._thread:
+            self._thread.join()
+
+        with self._lock:
+            if self._map:
+                self._map.close()
+                self._map = None
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def get_line(self, i):
+        return self.get_lines(i, i + 1)[0]
+
+    def get_lines(self, start, end):
+        """
+            return lines start to end without their line endings
+        """
+        with self._lock:
+            offsets = self._offsets.values()
+            end = min(end, offsets.shape[0])
+            if start >= end:
+                return []
+
+            st = offsets[start]
+            et = offsets[end] if end < offsets.shape[0] else self._indexed
+            text = self._map[st:et]
+
+        return [l.rstrip('\r') for l in text[:-1].split('\n')] if text.endswith('\n') else \
+            [l.rstrip('\r') for l in text.split('\n')]
+
+    def get_level(self, i):
+        return LEVELS[self._levels.values()[i]]
+
+    def get_timestamp(self, i):
+        return self._timestamps.values()[i]
+
+    def find_time(self, t):
+        """
+            return the first line logged at or after t. t is a datetime or seconds since the epoch
+        """
+        if hasattr(t, 'timetuple'):
+            t = time.mktime(t.timetuple()) + t.microsecond * 1e-6
+        return int(searchsorted(self._timestamps.values(), t, side='left'))
+
+    def level_rows(self, levels):
+        """
+            return the lines logged at levels
+        """
+        codes = [LEVEL_CODES[l] for l in levels]
+        return nonzero(in1d(self._levels.values(), codes))[0]
+
+    def search(self, regex, callback, rows=None, batch_size=1000):
+        """
+            search the file for regex in a thread. callback(lines, done) is called with each batch of matching lines.
+
+            rows: only report these lines, e.g. level_rows()
+
+            return the LogSearch
+        """
+        s = LogSearch(self, regex, callback, rows, batch_size)
+        s.start()
+        return s
+
+    def find_lines(self, regex, pos=0, end=None):
+        """
+            return the lines between file offsets pos and end that match regex
+        """
+        with self._lock:
+            offsets = self._offsets.values()
+            if end is None:
+                end = self._indexed
+            text = self._map[pos:end]
+
+        ms = [m.start() + pos for m in regex.finditer(text)]
+        if ms:
+            return unique(searchsorted(offsets, ms, side='right') - 1)
+        return asarray([], dtype='i8')
+
+    # private
+    def _open(self):
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size == self._size and self._map:
+                return
+
+            if self._map:
+                self._map.close()
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+
+            self._size = size
+            if size:
+                self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _index_block(self, block, pos):
+        buf = frombuffer(block, dtype=uint8)
+        starts = nonzero(buf[:-1] == 10)[0] + 1
+        n = starts.shape[0] + 1
+
+        offsets = empty(n, dtype='i8')
+        offsets[0] = 0
+        offsets[1:] = starts
+
+        # timestamp and level of lines that start a record. -1 marks a continuation line
+        ts = empty(n, dtype='f8')
+        ts.fill(-1)
+        lv = empty(n, dtype='u1')
+        days = self._days
+        heads = []
+        for m in HEAD_REGEX.finditer(block):
+            y, mo, d, h, mi, s, ms, level = m.groups()
+            day = (y, mo, d)
+            t0 = days.get(day)
+            if t0 is None:
+                t0 = days[day] = time.mktime((int(y), int(mo), int(d), 0, 0, 0, 0, 0, -1))
+            heads.append((m.start(), t0 + int(h) * 3600 + int(mi) * 60 + int(s) + int(ms) * 1e-3,
+                          LEVEL_CODES[level]))
+
+        if heads:
+            ps, hts, hls = zip(*heads)
+            idx = searchsorted(offsets, ps)
+            ts[idx] = hts
+            lv[idx] = hls
+
+        # carry the record timestamp and level to its continuation lines
+        ts = hstack(([self._last_timestamp], ts))
+        lv = hstack(([self._last_level], lv)).astype('u1')
+        head = ts != -1
+        head[0] = True
+        ii = maximum.accumulate(where(head, arange(n + 1), 0))[1:]
+        ts, lv = ts[ii], lv[ii]
+
+        self._last_timestamp, self._last_level = ts[-1], lv[-1]
+        offsets += pos
+        with self._lock:
+            self._offsets.extend(offsets)
+            self._timestamps.extend(ts)
+            self._levels.extend(lv)
+
+
+class LogSearch(object):
+    """
+        incremental search of a LogIndex. cancel() stops it
+    """
+
+    def __init__(self, index, regex, callback, rows=None, batch_size=1000):
+        if isinstance(regex, (str, unicode)):
+            regex = re.compile(regex, re.MULTILINE)
+
+        self.index = index
+        self.regex = regex
+        self.callback = callback
+        self.rows = rows
+        self.batch_size = batch_size
+        self.nfound = 0
+
+        self._cancel = Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = t = Thread(name='log_search', target=self.run)
+        t.setDaemon(True)
+        t.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self):
+        if self._thread:
+            self._thread.join()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        idx = self.index
+        bs = idx.block_size
+        pos = 0
+        batch = []
+        while not self._cancel.is_set():
+            indexed = idx._indexed
+            if pos >= indexed:
+                if idx.is_building:
+                    # wait for the index to catch up
+                    time.sleep(0.05)
+                    continue
+                break
+
+            end = min(pos + bs, indexed)
+            if end < indexed:
+                # do not split a line
+                offsets = idx._offsets.values()
+                i = searchsorted(offsets, end, side='right') - 1
+                if offsets[i] > pos:
+                    end = int(offsets[i])
+
+            lines = idx.find_lines(self.regex, pos, end)
+            if self.rows is not None and lines.shape[0]:
+                lines = lines[in1d(lines, self.rows)]
+
+            batch.extend(lines.tolist())
+            if len(batch) >= self.batch_size:
+                self._report(batch, False)
+                batch = []
+            pos = end
+
+        if not self._cancel.is_set():
+            self._report(batch, True)
+
+    def _report(self, lines, done):
+        self.nfound += len(lines)
+        self.callback(lines, done)
+
+# ============= EOF =============================================
@@ -15,15 +15,20 @@
 # ===============================================================================
 
 # ============= enthought library imports =======================
-from traits.api import HasTraits, Str, Bool, List, Event, Int
+from traits.api import HasTraits, Str, Bool, List, Event, Int, Any, Float
 from traitsui.api import View, UItem, Item, HGroup, VGroup, TabularEditor, Controller
 # ============= standard library imports ========================
 import os
 import re
+from collections import OrderedDict
+from datetime import datetime
 # ============= local library imports  ==========================
 from traitsui.editors.check_list_editor import CheckListEditor
 from traitsui.tabular_adapter import TabularAdapter
+from numpy import asarray, searchsorted, hstack, unique
 from pychron.core.helpers.datetime_tools import get_datetime
+from pychron.core.ui.gui import invoke_in_main_thread
+from pychron.logger.log_index import LogIndex, LEVELS
 from pychron.pychron_constants import LIGHT_GREEN
 
 
@@ -56,7 +61,7 @@ class LogItem:
 
 name = r'(?P<name>^.{{1,{width}}}):'.format(width=40)
 ts = r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})'
-level = r'(?P<level>(INFO|DEBUG|WARNING|CRITICAL)\s{{1,{width}}})'.format(width=9)
+level = r'(?P<level>(INFO|DEBUG|WARNING|CRITICAL|ERROR)\s{{1,{width}}})'.format(width=9)
 thread = r'(?P<thread>\(.{{1,{width}}}\))'.format(width=10)
 message = r'(?P<message>.*)'
 
@@ -64,9 +69,72 @@ regex = r' '.join((name, ts, level, thread, message))
 regex = re.compile(regex)
 
 
+class LogLines(object):
+    """
+        sequence of LogItems read on demand from a LogIndex. only the rows that are displayed are parsed.
+
+        rows: the lines of the index to show. all lines if None
+        found: sorted lines to mark as found
+    """
+    cache_size = 1000
+
+    def __init__(self, index, factory, rows=None, found=None, cache=None):
+        self.index = index
+        self.factory = factory
+        self.rows = rows
+        self.found = found
+        self._cache = OrderedDict() if cache is None else cache
+
+    def __len__(self):
+        if self.rows is None:
+            return self.index.n
+        return len(self.rows)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+
+        line = row if self.rows is None else int(self.rows[row])
+        cache = self._cache
+        li = cache.get(line)
+        if li is None:
+            li = self.factory(self.index.get_line(line))
+            cache[line] = li
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+        found = self.found
+        li.found = found is not None and _contains(found, line)
+        return li
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def row_of(self, line):
+        """
+            return the row showing line or the first row after it
+        """
+        if self.rows is None:
+            return line
+        return int(searchsorted(self.rows, line))
+
+
+def _contains(a, v):
+    i = searchsorted(a, v)
+    return i < len(a) and a[i] == v
+
+
 class LogModel(HasTraits):
-    items = List
+    items = Any
     path = Str
+    index = None
+
+    # fraction of the file indexed
+    progress = Float
+    refresh_needed = Event
 
     def _factory(self, line):
         li = LogItem()
@@ -82,10 +150,27 @@ class LogModel(HasTraits):
         return li
 
     def open_file(self, path):
+        """
+            index the file in the background. lines are shown as they are indexed
+        """
         self.path = path
-        with open(path, 'r') as rfile:
-            # print rfile.read()
-            self.items = self.oitems = [self._factory(line) for line in self._file(rfile)]
+        self.index = idx = LogIndex(path)
+        self.items = self.oitems = LogLines(idx, self._factory)
+        idx.start(self._handle_indexed)
+
+    def close(self):
+        if self.index:
+            self.index.close()
+
+    def set_rows(self, rows=None, found=None):
+        """
+            show rows of the file, all if None, and mark the found rows
+        """
+        self.items = LogLines(self.index, self._factory, rows, found, cache=self.oitems._cache)
+        self.refresh_needed = True
+
+    def _handle_indexed(self, idx):
+        invoke_in_main_thread(self.trait_set, progress=idx.progress, refresh_needed=True)
 
     def _file(self, r):
         return r
@@ -100,6 +185,11 @@ def tostr(vv):
 
 
 class TwistedLogModel(LogModel):
+    def open_file(self, path):
+        self.path = path
+        with open(path, 'r') as rfile:
+            self.items = self.oitems = [self._factory(line) for line in self._file(rfile)]
+
     def _file(self, r):
         from twisted.logger import eventsFromJSONLogFile
         return eventsFromJSONLogFile(r)
@@ -144,23 +234,44 @@ class TwistedLogModel(LogModel):
 
 class LogViewer(Controller):
     search_entry = Str(enter_set=True, auto_set=False)
+    goto_time = Str(enter_set=True, auto_set=False)
     refresh_needed = Event
+    scroll_to_row = Int
     use_fuzzy = Bool(True)
     use_filter = Bool(True)
-    levels = List(('DEBUG', 'INFO', 'WARNING'))
-    available_levels = List(('DEBUG', 'INFO', 'WARNING'))
+    levels = List(LEVELS[1:])
+    available_levels = List(LEVELS[1:])
+
+    status = Str
+    _search = None
+    _found = None
 
     def init(self, info):
         info.ui.title = 'Log Viewer - {}'.format(os.path.basename(self.model.path))
+        self.model.on_trait_change(self._handle_model_refresh, 'refresh_needed')
         return True
 
-    # def controller_levels_changed(self, info):
-    #     if self.levels:
-    #         items = filter(lambda x: x.level in self.levels, self.model.oitems)
-    #         regex = self._make_search_regex()
-    #         self._set_found(regex, items)
+    def closed(self, info, is_ok):
+        self._cancel_search()
+        self.model.close()
+
+    def controller_levels_changed(self, info):
+        if self.model.index:
+            self._update_indexed()
+
+    def controller_use_filter_changed(self, info):
+        if self.model.index:
+            self._update_indexed()
+
+    def controller_use_fuzzy_changed(self, info):
+        if self.model.index:
+            self._update_indexed()
 
     def controller_search_entry_changed(self, info):
+        if self.model.index:
+            self._update_indexed()
+            return
+
         regex = self._make_search_regex()
         if regex:
             self._set_found(regex, self.model.oitems)
@@ -169,6 +280,90 @@ class LogViewer(Controller):
                 i.found = False
         self.refresh_needed = True
 
+    def controller_goto_time_changed(self, info):
+        idx = self.model.index
+        if not idx or not idx.n or not self.goto_time:
+            return
+
+        t = self._parse_time(self.goto_time.strip(), datetime.fromtimestamp(idx.get_timestamp(0)))
+        if t is None:
+            self.status = 'Invalid time "{}"'.format(self.goto_time)
+        else:
+            self.scroll_to_row = self.model.items.row_of(idx.find_time(t))
+
+    def _parse_time(self, v, first):
+        for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%H:%M:%S', '%H:%M'):
+            try:
+                t = datetime.strptime(v, fmt)
+            except ValueError:
+                continue
+
+            if not fmt.startswith('%Y'):
+                t = datetime.combine(first.date(), t.time())
+            return t
+
+    def _update_indexed(self):
+        """
+            show the lines of the selected levels. if there is a search entry search them in the background and
+            show or mark the matches as they are found
+        """
+        self._cancel_search()
+
+        model = self.model
+        idx = model.index
+        rows = None
+        if set(self.levels) != set(self.available_levels):
+            rows = idx.level_rows(self.levels)
+
+        regex = self._make_search_regex(re.MULTILINE)
+        if not regex:
+            self.status = ''
+            model.set_rows(rows)
+            return
+
+        self._found = found = asarray([], dtype=int)
+        if self.use_filter:
+            model.set_rows(found)
+        else:
+            model.set_rows(rows, found)
+
+        self.status = 'Searching...'
+        search = []
+
+        def handle(lines, done):
+            invoke_in_main_thread(self._add_found, search[0], rows, lines, done)
+
+        search.append(idx.search(regex, handle, rows=rows))
+        self._search = search[0]
+
+    def _add_found(self, search, rows, lines, done):
+        if search is not self._search:
+            return
+
+        if lines:
+            self._found = found = unique(hstack((self._found, lines)))
+            if self.use_filter:
+                self.model.set_rows(found)
+            else:
+                self.model.set_rows(rows, found)
+
+        n = len(self._found)
+        self.status = 'Found {}'.format(n) if done else 'Searching... found {}'.format(n)
+        if done:
+            self._search = None
+
+    def _cancel_search(self):
+        if self._search:
+            self._search.cancel()
+            self._search = None
+
+    def _handle_model_refresh(self):
+        if self._search is None and self.model.progress < 1:
+            self.status = 'Indexing {:0.0f}%'.format(self.model.progress * 100)
+        elif self.status.startswith('Indexing'):
+            self.status = ''
+        self.refresh_needed = True
+
     def _set_found(self, regex, items):
         if not regex:
             self.model.items = items
@@ -183,15 +378,18 @@ class LogViewer(Controller):
                         i.found = False
                 self.model.items = items
 
-    def _make_search_regex(self):
+    def _make_search_regex(self, flags=0):
         v = self.search_entry
         if v:
             if self.use_fuzzy:
                 pat = '.*?'.join(map(re.escape, v))
+            elif flags & re.MULTILINE:
+                # indexed files are searched line by line. match the start of the message or of the line
+                pat = r'(?:^|\) ){}'.format(v)
             else:
                 pat = '^{}'.format(v)
 
-            regex = re.compile(pat)
+            regex = re.compile(pat, flags)
             return regex
 
     def traits_view(self):
@@ -201,10 +399,13 @@ class LogViewer(Controller):
                          HGroup(UItem('controller.levels',
                                       style='custom',
                                       editor=CheckListEditor(name='controller.available_levels',
-                                                             cols=3))))
+                                                             cols=3)),
+                                Item('controller.goto_time', tooltip='Go to time. e.g. 2016-01-01 12:00:00 or 12:00'),
+                                UItem('controller.status', style='readonly')))
 
         v = View(VGroup(ctrlgrp, UItem('items', editor=TabularEditor(adapter=LogAdapter(),
                                                                      refresh='controller.refresh_needed',
+                                                                     scroll_to_row='controller.scroll_to_row',
                                                                      operations=[]))),
                  title='Log Viewer',
                  resizable=True,
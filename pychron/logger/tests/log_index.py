@@ -0,0 +1,112 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from pychron.logger.log_index import LogIndex
+
+FMT = '{:<40}: 2016-03-01 12:{:02d}:{:02d},000 {:<9} (MainThread) {}\n'
+
+
+def line(i):
+    return FMT.format('foo', i // 60, i % 60, ('DEBUG', 'INFO', 'WARNING')[i % 3], 'message {}'.format(i))
+
+
+class LogIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'pychron.current.log')
+        with open(self.path, 'w') as wfile:
+            for i in range(100):
+                wfile.write(line(i))
+                if i == 50:
+                    wfile.write('Traceback (most recent call last):\n  File "foo.py"\n')
+        # small blocks so lines are split across blocks
+        self.index = LogIndex(self.path, block_size=500)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.root)
+
+    def test_build(self):
+        idx = self.index
+        idx.start()
+        idx.wait()
+        self.assertEqual(idx.n, 102)
+        self.assertEqual(idx.progress, 1)
+        self.assertEqual(idx.get_line(0), line(0).rstrip())
+        self.assertEqual(idx.get_lines(51, 53), ['Traceback (most recent call last):', '  File "foo.py"'])
+        self.assertEqual(idx.get_line(101), line(99).rstrip())
+
+    def test_continuation(self):
+        idx = self.index
+        idx.build()
+        # line 50 is 50 % 3 = 2 -> WARNING
+        self.assertEqual(idx.get_level(52), 'WARNING')
+        self.assertEqual(idx.get_timestamp(52), idx.get_timestamp(50))
+
+    def test_find_time(self):
+        idx = self.index
+        idx.build()
+        i = idx.find_time(datetime(2016, 3, 1, 12, 0, 30))
+        self.assertEqual(idx.get_line(i), line(30).rstrip())
+        self.assertEqual(idx.find_time(datetime(2016, 3, 2)), idx.n)
+
+    def test_levels(self):
+        idx = self.index
+        idx.build()
+        rows = idx.level_rows(['WARNING'])
+        self.assertEqual(len(rows), 35)
+        self.assertTrue(all('WARNING' in idx.get_line(r) for r in rows if r not in (51, 52)))
+
+    def test_error_levels(self):
+        with open(self.path, 'a') as wfile:
+            wfile.write(FMT.format('foo', 2, 0, 'ERROR', 'failed'))
+            wfile.write('Traceback (most recent call last):\n')
+            wfile.write(FMT.format('foo', 2, 1, 'CRITICAL', 'stopped'))
+
+        idx = self.index
+        idx.build()
+        self.assertEqual(idx.get_level(102), 'ERROR')
+        self.assertEqual(idx.get_level(103), 'ERROR')
+        self.assertEqual(list(idx.level_rows(['CRITICAL', 'ERROR'])), [102, 103, 104])
+        self.assertEqual(len(idx.level_rows(['DEBUG', 'INFO', 'WARNING', 'CRITICAL', 'ERROR'])), idx.n)
+
+    def test_search(self):
+        idx = self.index
+        idx.build()
+        found = []
+        s = idx.search(re.compile(r'message 4\d', re.MULTILINE), lambda ls, done: found.extend(ls), batch_size=3)
+        s.wait()
+        self.assertEqual(s.nfound, 10)
+        self.assertEqual([idx.get_line(r) for r in found], [line(i).rstrip() for i in range(40, 50)])
+
+        found = []
+        s = idx.search('message 4\d', lambda ls, done: found.extend(ls), rows=idx.level_rows(['DEBUG']))
+        s.wait()
+        self.assertEqual(found, [42, 45, 48])
+
+    def test_refresh(self):
+        idx = self.index
+        with open(self.path, 'a') as wfile:
+            wfile.write(line(100).rstrip())
+
+        idx.build()
+        self.assertEqual(idx.n, 103)
+        self.assertEqual(idx.get_line(102), line(100).rstrip())
+
+        with open(self.path, 'a') as wfile:
+            wfile.write(' continued\n')
+            wfile.write(line(101))
+
+        self.assertTrue(idx.refresh())
+        self.assertEqual(idx.n, 104)
+        self.assertEqual(idx.get_line(102), line(100).rstrip() + ' continued')
+        self.assertEqual(idx.get_line(103), line(101).rstrip())
+        self.assertFalse(idx.refresh())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+binary scan recording.
+
+samples are buffered in memory and appended in blocks to a .npy file of float64 rows, (time, value1, value2...).
+the header is written with room for the shape to grow so the file is a valid npy file, e.g. for numpy.load,
+after every flush. rows are written before the header is updated, so after a crash the header may lag the data but
+never describes rows that are not there. readers use the file size.
+
+times are increasing so time ranges are read from a memory map with a binary search
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+import csv
+import os
+import struct
+import time
+
+from numpy import asarray, memmap, empty, searchsorted, arange, column_stack, hstack
+
+# ============= local library imports  ==========================
+from data_manager import DataManager
+
+MAGIC = '\x93NUMPY\x01\x00'
+HEADER_LEN = 128
+DTYPE = '<f8'
+
+
+def make_header(n, ncols):
+    hlen = HEADER_LEN - len(MAGIC) - 2
+    d = "{{'descr': '{}', 'fortran_order': False, 'shape': ({}, {}), }}".format(DTYPE, n, ncols)
+    return MAGIC + struct.pack('<H', hlen) + d.ljust(hlen - 1) + '\n'
+
+
+def read_ncols(path):
+    with open(path, 'rb') as rfile:
+        h = rfile.read(HEADER_LEN)
+
+    if not h.startswith(MAGIC) or len(h) < HEADER_LEN:
+        raise ValueError('{} is not a scan file'.format(path))
+
+    shape = h[h.index("'shape':"):]
+    shape = shape[shape.index('(') + 1:shape.index(')')]
+    return int(shape.split(',')[1])
+
+
+def _min_max(xs, ys):
+    """
+        the min and max of each row of ys, in time order, and their xs
+    """
+    rows = arange(ys.shape[0])
+    imin = ys.argmin(axis=1)
+    imax = ys.argmax(axis=1)
+    # keep the min and max in time order
+    first = column_stack((imin, imax)).min(axis=1)
+    last = column_stack((imin, imax)).max(axis=1)
+
+    ox = column_stack((xs[rows, first], xs[rows, last])).ravel()
+    oy = column_stack((ys[rows, first], ys[rows, last])).ravel()
+    return ox, oy
+
+
+class ScanWriter(object):
+    """
+        buffered appender of scan rows. flushes every flush_size rows or flush_interval seconds
+    """
+
+    def __init__(self, path, ncols, flush_size=1024, flush_interval=60):
+        self.path = path
+        self.ncols = ncols
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._buf = empty((flush_size, ncols))
+        self._nbuf = 0
+        self._last_flush = time.time()
+
+        if os.path.isfile(path) and os.path.getsize(path) >= HEADER_LEN:
+            nc = read_ncols(path)
+            if nc != ncols:
+                raise ValueError('{} has {} columns not {}'.format(path, nc, ncols))
+            self._nrows = (os.path.getsize(path) - HEADER_LEN) // (8 * ncols)
+            # drop a partial row left by a crash
+            with open(path, 'r+b') as wfile:
+                wfile.truncate(HEADER_LEN + self._nrows * 8 * ncols)
+        else:
+            self._nrows = 0
+            with open(path, 'wb') as wfile:
+                wfile.write(make_header(0, ncols))
+
+    @property
+    def n(self):
+        return self._nrows + self._nbuf
+
+    def append(self, row):
+        self._buf[self._nbuf] = row
+        self._nbuf += 1
+        if self._nbuf == self.flush_size or time.time() - self._last_flush > self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        n = self._nbuf
+        if n:
+            with open(self.path, 'r+b') as wfile:
+                wfile.seek(0, os.SEEK_END)
+                wfile.write(self._buf[:n].astype(DTYPE).tostring())
+                wfile.flush()
+                self._nrows += n
+                wfile.seek(0)
+                wfile.write(make_header(self._nrows, self.ncols))
+
+            self._nbuf = 0
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+
+
+class ScanReader(object):
+    """
+        time range indexed reads of a scan file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.ncols = read_ncols(path)
+        self._data = None
+        self.refresh()
+
+    def refresh(self):
+        """
+            map the rows written so far
+        """
+        n = (os.path.getsize(self.path) - HEADER_LEN) // (8 * self.ncols)
+        if n:
+            self._data = memmap(self.path, dtype=DTYPE, mode='r', offset=HEADER_LEN, shape=(n, self.ncols))
+        else:
+            self._data = empty((0, self.ncols))
+
+    @property
+    def n(self):
+        return self._data.shape[0]
+
+    @property
+    def times(self):
+        return self._data[:, 0]
+
+    def read(self, t0=None, t1=None):
+        """
+            return the rows with t0 <= time <= t1
+        """
+        return self._data[self._slice(t0, t1)]
+
+    def downsample(self, npts, t0=None, t1=None, column=1):
+        """
+            reduce the rows between t0 and t1 to at most npts points for plotting. the min and max of each bin are
+            kept so spikes remain visible
+
+            return xs, ys
+        """
+        d = self._data[self._slice(t0, t1)]
+        n = d.shape[0]
+        nbins = max(npts // 2, 1)
+        if n <= npts:
+            return asarray(d[:, 0]), asarray(d[:, column])
+
+        # the rows left over after the full bins form a final, shorter bin
+        bs = -(-n // nbins)
+        m = (n // bs) * bs
+        ox, oy = _min_max(asarray(d[:m, 0]).reshape(-1, bs), asarray(d[:m, column]).reshape(-1, bs))
+        if m < n:
+            rx, ry = _min_max(asarray(d[m:, 0]).reshape(1, -1), asarray(d[m:, column]).reshape(1, -1))
+            ox, oy = hstack((ox, rx)), hstack((oy, ry))
+        return ox, oy
+
+    def export_csv(self, path, t0=None, t1=None, header=None, delimiter=','):
+        with open(path, 'w') as wfile:
+            writer = csv.writer(wfile, delimiter=delimiter)
+            if header:
+                writer.writerow(header)
+
+            d = self._data[self._slice(t0, t1)]
+            step = 10000
+            for i in xrange(0, d.shape[0], step):
+                writer.writerows(map('{:0.6f}'.format, r) for r in d[i:i + step])
+
+    def _slice(self, t0, t1):
+        ts = self.times
+        i = 0 if t0 is None else searchsorted(ts, t0, side='left')
+        j = ts.shape[0] if t1 is None else searchsorted(ts, t1, side='right')
+        return slice(i, j)
+
+
+class ScanDataManager(DataManager):
+    """
+        DataManager for binary scan files
+    """
+    _extension = 'npy'
+    flush_size = 1024
+    flush_interval = 60
+
+    _writer = None
+
+    def get_current_path(self):
+        return self.frames[self._current_frame]
+
+    def write_scan(self, x, values):
+        """
+            append a sample taken at time x
+        """
+        row = (x,) + tuple(values)
+        w = self._writer
+        if w is None:
+            w = self._writer = ScanWriter(self.get_current_path(), len(row),
+                                          flush_size=self.flush_size,
+                                          flush_interval=self.flush_interval)
+        w.append(row)
+
+    def flush(self):
+        if self._writer:
+            self._writer.flush()
+
+    def close_file(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def delete_frame(self):
+        self._writer = None
+        p = self.get_current_path()
+        if os.path.isfile(p):
+            os.remove(p)
+
+    def reader(self, path=None):
+        """
+            return a ScanReader for path or the current frame, or None if nothing was written
+        """
+        if path is None:
+            self.flush()
+            path = self.get_current_path()
+
+        if os.path.isfile(path):
+            return ScanReader(path)
+
+    def export_csv(self, path=None, out=None, **kw):
+        r = self.reader(path)
+        if r:
+            if out is None:
+                out = '{}.csv'.format(os.path.splitext(r.path)[0])
+            r.export_csv(out, **kw)
+            return out
+
+# ============= EOF ====================================
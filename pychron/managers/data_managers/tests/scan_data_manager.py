@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from numpy import load, arange
+
+from pychron.managers.data_managers.scan_data_manager import ScanWriter, ScanReader
+
+
+class ScanDataManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'scan.npy')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, n, start=0, flush_size=16):
+        w = ScanWriter(self.path, 3, flush_size=flush_size)
+        for i in xrange(start, start + n):
+            w.append((i, i * 2, -i))
+        return w
+
+    def test_buffered(self):
+        w = self._write(20)
+        self.assertEqual(ScanReader(self.path).n, 16)
+        w.close()
+        self.assertEqual(ScanReader(self.path).n, 20)
+
+        # a valid npy file
+        a = load(self.path)
+        self.assertEqual(a.shape, (20, 3))
+        self.assertEqual(a[19, 1], 38)
+
+    def test_append(self):
+        self._write(10).close()
+        self._write(10, start=10).close()
+
+        r = ScanReader(self.path)
+        self.assertEqual(r.n, 20)
+        self.assertListEqual(list(r.times), range(20))
+
+        # a partial row left by a crash is dropped
+        with open(self.path, 'ab') as wfile:
+            wfile.write('\0' * 12)
+        self.assertEqual(ScanReader(self.path).n, 20)
+        self._write(1, start=20).close()
+        self.assertEqual(ScanReader(self.path).read(20)[0, 0], 20)
+
+    def test_read_range(self):
+        self._write(100).close()
+        r = ScanReader(self.path)
+        d = r.read(10, 19.5)
+        self.assertEqual(d.shape, (10, 3))
+        self.assertEqual(d[0, 0], 10)
+        self.assertEqual(d[-1, 0], 19)
+        self.assertEqual(r.read(t0=95).shape[0], 5)
+
+    def test_downsample(self):
+        self._write(1000).close()
+        r = ScanReader(self.path)
+        xs, ys = r.downsample(100)
+        self.assertEqual(xs.shape[0], 100)
+        self.assertEqual(ys[0], 0)
+        self.assertEqual(ys[-1], 1998)
+        self.assertTrue((xs[1:] >= xs[:-1]).all())
+
+        xs, ys = r.downsample(2000, t0=10, t1=20)
+        self.assertListEqual(list(xs), list(arange(10, 21)))
+
+    def test_downsample_remainder(self):
+        # 1001 rows do not fill a whole number of bins. the last rows are kept in a final bin
+        self._write(1001).close()
+        xs, ys = ScanReader(self.path).downsample(100)
+        self.assertLessEqual(xs.shape[0], 100)
+        self.assertEqual(xs[-1], 1000)
+        self.assertEqual(ys[-1], 2000)
+        self.assertTrue((xs[1:] >= xs[:-1]).all())
+
+    def test_export_csv(self):
+        self._write(5).close()
+        p = os.path.join(self.root, 'scan.csv')
+        ScanReader(self.path).export_csv(p, t0=1, header=('time', 'a', 'b'))
+        with open(p) as rfile:
+            lines = rfile.read().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[1], '1.000000,2.000000,-1.000000')
+
+
+if __name__ == '__main__':
+    unittest.main()
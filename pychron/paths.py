@@ -194,6 +194,8 @@ class Paths(object):
     project_dir = None
     meta_root = None
     dvc_dir = None
+    dvc_save_journal_dir = None
+    dvc_analysis_cache = None
     device_scan_dir = None
     isotope_dir = None
 
@@ -416,6 +418,8 @@ class Paths(object):
         self.dvc_dir = join(self.data_dir, '.dvc')
         self.repository_dataset_dir = join(self.dvc_dir, 'repositories')
         self.meta_root = join(self.dvc_dir, 'MetaData')
+        self.dvc_save_journal_dir = join(self.hidden_dir, 'dvc_save_journal')
+        self.dvc_analysis_cache = join(self.hidden_dir, 'dvc_analysis_cache.sqlite')
         self.sample_dir = join(self.data_dir, 'sample_entry')
         self.media_storage_dir = join(self.data_dir, 'media')
         # ==============================================================================
@@ -300,13 +300,24 @@ class FluxResultsEditor(BaseTraitsEditor, SelectionFigure):
             self.information_dialog(msg)
             return
 
-        if self.plotter_options.use_monte_carlo:
-            from pychron.core.stats.monte_carlo import monte_carlo_error_estimation
+        po = self.plotter_options
+        envelope = None
+        if po.use_monte_carlo:
+            from pychron.core.stats.monte_carlo import batch_monte_carlo_error_estimation
 
             pts = array([[p.x, p.y] for p in self.positions])
             nominals = reg.predict(pts)
-            errors = monte_carlo_error_estimation(reg, nominals, pts,
-                                                  ntrials=self.plotter_options.monte_carlo_ntrials)
+            items = [(reg, nominals, pts)]
+            if po.plot_kind != '2D':
+                # estimate the error envelope from the same trials
+                _, epts = self._envelope_points(x, y, r)
+                items.append((reg, reg.predict(epts), epts))
+
+            es = batch_monte_carlo_error_estimation(items, ntrials=po.monte_carlo_ntrials)
+            errors = es[0]
+            if len(es) > 1:
+                envelope = es[1]
+
             for p, j, je in zip(self.positions, nominals, errors):
                 oj = p.saved_j
 
@@ -326,10 +337,10 @@ class FluxResultsEditor(BaseTraitsEditor, SelectionFigure):
 
                     p.dev = (oj - j) / j * 100
 
-        if self.plotter_options.plot_kind == '2D':
+        if po.plot_kind == '2D':
             self._graph_contour(x, y, z, r, reg, refresh)
         else:
-            self._graph_hole_vs_j(x, y, r, reg, refresh)
+            self._graph_hole_vs_j(x, y, r, reg, refresh, envelope)
 
     def _graph_contour(self, x, y, z, r, reg, refresh):
 
@@ -373,7 +384,19 @@ class FluxResultsEditor(BaseTraitsEditor, SelectionFigure):
         return ['Pos: {}'.format(fm.hole_id),
                 'Identifier: {}'.format(fm.identifier)]
 
-    def _graph_hole_vs_j(self, x, y, r, reg, refresh):
+    def _envelope_points(self, x, y, r):
+        """
+            return the hole angles and the points on a circle of radius r the fit is drawn at
+        """
+        xs = arctan2(x, y)
+        a = max((abs(min(xs)), abs(max(xs))))
+        fxs = linspace(-a, a)
+        return fxs, vstack((r * sin(fxs), r * cos(fxs))).T
+
+    def _graph_hole_vs_j(self, x, y, r, reg, refresh, envelope=None):
+        """
+            envelope: monte carlo errors of the fit at _envelope_points
+        """
 
         sel = [i for i, a in enumerate(self.analyses) if a.is_omitted()]
 
@@ -386,16 +409,14 @@ class FluxResultsEditor(BaseTraitsEditor, SelectionFigure):
 
         xs = arctan2(x, y)
         ys = reg.ys
-        a = max((abs(min(xs)), abs(max(xs))))
-        fxs = linspace(-a, a)
-
-        a = r * sin(fxs)
-        b = r * cos(fxs)
-        pts = vstack((a, b)).T
+        fxs, pts = self._envelope_points(x, y, r)
 
         fys = reg.predict(pts)
         yserr = reg.yserr
-        l, u = reg.calculate_error_envelope(fxs, rmodel=fys)
+        if envelope is not None:
+            l, u = fys - envelope, fys + envelope
+        else:
+            l, u = reg.calculate_error_envelope(fxs, rmodel=fys)
 
         lyy = ys - yserr
         uyy = ys + yserr
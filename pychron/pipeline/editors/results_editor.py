@@ -116,6 +116,10 @@ class IsoEvolutionResultsEditor(BaseTraitsEditor, ColumnSorterMixin):
         info = OptionsController(model=pom).edit_traits(view=view('Regression Options'),
                                                         kind='livemodal')
         if info.result:
+            for a in ans:
+                if a.raw_data_cache is not None:
+                    # the raw data was released after fitting. restore it from the cache or reload it
+                    a.load_raw_data(names)
 
             m = RegressionSeriesModel(analyses=ans, plot_options=pom.selected_options)
             c.model = m
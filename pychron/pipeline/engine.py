@@ -19,7 +19,8 @@ import os
 import time
 
 import yaml
-from traits.api import HasTraits, Str, Instance, List, Event, on_trait_change, Any
+from apptools.preferences.preference_binding import bind_preference
+from traits.api import HasTraits, Str, Instance, List, Event, on_trait_change, Any, Bool, Int
 
 from pychron.core.confirmation import remember_confirmation_dialog
 from pychron.core.helpers.filetools import list_directory2, add_extension
@@ -37,6 +38,8 @@ from pychron.pipeline.nodes.figure import IdeogramNode, SpectrumNode, FigureNode
 from pychron.pipeline.nodes.filter import FilterNode
 from pychron.pipeline.nodes.fit import FitIsotopeEvolutionNode, FitBlanksNode, FitICFactorNode, FitFluxNode
 from pychron.pipeline.nodes.grouping import GroupingNode, GraphGroupingNode
+from pychron.pipeline.memo import snapshot_state
+from pychron.pipeline.parallel import PipelinePool
 from pychron.pipeline.nodes.persist import PDFFigureNode, IsotopeEvolutionPersistNode, \
     BlanksPersistNode, ICFactorPersistNode, FluxPersistNode, SetInterpretedAgeNode
 from pychron.pipeline.plot.editors.figure_editor import FigureEditor
@@ -229,11 +232,19 @@ class PipelineEngine(Loggable):
     state = Instance(EngineState)
     editors = List
 
+    # fan out per-analysis node work to a process pool. see pychron.pipeline.parallel
+    use_process_pool = Bool
+    nprocesses = Int(0)
+
+    # skip nodes whose inputs and options have not changed when re-running. see pychron.pipeline.memo
+    use_memoization = Bool
+
     def __init__(self, *args, **kw):
         super(PipelineEngine, self).__init__(*args, **kw)
         self._confirmation_cache = {}
 
         self._load_predefined_templates()
+        self._bind_preferences()
 
     def drop_factory(self, items):
 
@@ -601,6 +612,7 @@ class PipelineEngine(Loggable):
         state.canceled = False
 
         ost = time.time()
+        token = ''
         for idx, node in enumerate(self.pipeline.iternodes(None)):
             if node.enabled:
                 with ActiveCTX(node):
@@ -609,16 +621,14 @@ class PipelineEngine(Loggable):
                         return True
 
                     node.unknowns = []
-                    st = time.time()
                     try:
-                        node.run(state)
+                        token = self._execute_node(idx, node, state, token, self.use_memoization)
                         node.visited = True
                         self.selected = node
                     except NoAnalysesError:
                         self.information_dialog('No Analyses in Pipeline!')
                         self.pipeline.reset()
                         return True
-                    self.debug('{:02n}: {} Runtime: {:0.4f}'.format(idx, node, time.time() - st))
 
                     if state.veto:
                         self.debug('pipeline vetoed by {}'.format(node))
@@ -638,6 +648,8 @@ class PipelineEngine(Loggable):
             return True
 
     def run_pipeline(self, run_from=None, state=None):
+        # only reuse memoized node outputs when re-running with an existing state
+        memoize = self.use_memoization and state is not None
         if state is None:
             state = EngineState()
             self.state = state
@@ -655,6 +667,20 @@ class PipelineEngine(Loggable):
             node.visited = False
             node.index = idx
 
+        if self.use_process_pool:
+            state.pool = PipelinePool(self.nprocesses)
+
+        try:
+            return self._run_nodes(start_node, state, ost, memoize)
+        finally:
+            if state.pool:
+                state.pool.close()
+                state.pool = None
+
+    run = run_pipeline
+
+    def _run_nodes(self, start_node, state, ost, memoize):
+        token = ''
         for idx, node in enumerate(self.pipeline.iternodes(start_node)):
 
             if node.enabled:
@@ -665,9 +691,8 @@ class PipelineEngine(Loggable):
                         self.debug('Pre run failed {}'.format(node))
                         return True
 
-                    st = time.time()
                     try:
-                        node.run(state)
+                        token = self._execute_node(idx, node, state, token, memoize)
                         node.visited = True
                         self.selected = node
                         self.update_detectors()
@@ -675,7 +700,6 @@ class PipelineEngine(Loggable):
                         self.information_dialog('No Analyses in Pipeline!')
                         self.pipeline.reset()
                         return True
-                    self.debug('{:02n}: {} Runtime: {:0.4f}'.format(idx, node, time.time() - st))
 
                     if state.veto:
                         self.debug('pipeline vetoed by {}'.format(node))
@@ -696,7 +720,29 @@ class PipelineEngine(Loggable):
             # self.state = None
             return True
 
-    run = run_pipeline
+    def _execute_node(self, idx, node, state, token, memoize):
+        """
+            run node unless its memoized output is still valid. see pychron.pipeline.memo
+
+            token: identifies the output of the memoizable nodes upstream of node
+            return the token for the next node
+        """
+        st = time.time()
+        key = node.memo_key(state, token) if memoize else None
+        if key and node.restore_memo(key, state):
+            self.debug('{:02n}: {} Cache hit: {:0.4f}'.format(idx, node, time.time() - st))
+        else:
+            before = snapshot_state(state) if node.memoize else None
+            node.run(state)
+            if node.memoize:
+                if state.veto or state.canceled:
+                    key = None
+
+                # a memo without a key is never restored but gives the downstream nodes a new token
+                node.save_memo(key, before, state)
+            self.debug('{:02n}: {} Runtime: {:0.4f}'.format(idx, node, time.time() - st))
+
+        return node.memo_token(token)
 
     def post_run(self, state):
         self.debug('pipeline post run started')
@@ -758,6 +804,11 @@ class PipelineEngine(Loggable):
                 dvc.push_repository(r.name)
 
     # private
+    def _bind_preferences(self):
+        prefid = 'pychron.pipeline'
+        for attr in ('use_process_pool', 'nprocesses', 'use_memoization'):
+            bind_preference(self, attr, '{}.{}'.format(prefid, attr))
+
     def _active_repositories(self):
         if self.selected_repositories:
             repos = self.selected_repositories
@@ -0,0 +1,171 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+memoization of pipeline nodes.
+
+a memoizable node hashes its inputs and options (BaseNode.memo_key). after it runs the changes it made to the
+EngineState are recorded. the next time the pipeline is run with the same key the changes are reapplied instead of
+running the node.
+
+analyses are hashed by identity and the attributes that change interactively, e.g. temp_status, not by their
+values. a node that runs may change the values of the analyses it is given, so the key of every node is chained to
+the output of the memoizable nodes before it
+"""
+
+# ============= enthought library imports =======================
+from traits.api import HasTraits
+# ============= standard library imports ========================
+import hashlib
+from uuid import uuid4
+
+from numpy import ndarray
+
+# ============= local library imports  ==========================
+
+ANALYSIS_ATTRS = ('uuid', 'record_id', 'temp_status', 'tag', 'group_id', 'graph_id')
+
+STATE_ATTRS = ('unknowns', 'references', 'flux_monitors', 'unknown_positions', 'decay_constants',
+               'tables', 'editors', 'append_references', 'has_references', 'has_flux_monitors',
+               'saveable_keys', 'saveable_fits', 'saveable_irradiation_positions', 'iso_evo_results',
+               'geometry', 'level', 'irradiation', 'report_path')
+
+PRIMITIVES = (basestring, int, long, float, bool, type(None))
+
+MAX_DEPTH = 8
+
+
+def update_hash(h, obj, depth=0, seen=None):
+    """
+        update hashlib object h with the content of obj.
+
+        HasTraits objects are hashed by their copyable traits. objects that cannot be hashed by content are
+        hashed by repr, which for most objects includes their id, i.e. a different object is a different key
+    """
+    if seen is None:
+        seen = set()
+
+    if isinstance(obj, PRIMITIVES):
+        h.update(repr(obj))
+    elif isinstance(obj, ndarray):
+        h.update(obj.tostring())
+    elif depth > MAX_DEPTH or id(obj) in seen:
+        h.update('<{}>'.format(id(obj)))
+    elif isinstance(obj, (list, tuple, set)):
+        seen.add(id(obj))
+        if isinstance(obj, set):
+            obj = sorted(obj)
+
+        h.update('[')
+        for o in obj:
+            update_hash(h, o, depth + 1, seen)
+        h.update(']')
+    elif isinstance(obj, dict):
+        seen.add(id(obj))
+        h.update('{')
+        for k in sorted(obj):
+            h.update(repr(k))
+            update_hash(h, obj[k], depth + 1, seen)
+        h.update('}')
+    elif isinstance(obj, HasTraits):
+        seen.add(id(obj))
+        h.update(obj.__class__.__name__)
+        for k in sorted(obj.copyable_trait_names()):
+            h.update(k)
+            update_hash(h, getattr(obj, k), depth + 1, seen)
+    else:
+        h.update(repr(obj))
+
+
+def update_analyses_hash(h, ans, attrs=ANALYSIS_ATTRS):
+    h.update(str(len(ans)))
+    for a in ans:
+        h.update(str(id(a)))
+        for attr in attrs:
+            h.update(repr(getattr(a, attr, None)))
+
+
+def snapshot_state(state):
+    """
+        shallow copy of the EngineState attributes a node may change
+    """
+    return {attr: _copy(getattr(state, attr)) for attr in STATE_ATTRS}
+
+
+def state_changes(before, state):
+    """
+        attributes of state that changed since snapshot `before`. editors are recorded as the editors added
+    """
+    changes = {}
+    for attr in STATE_ATTRS:
+        a, b = before[attr], getattr(state, attr)
+        if attr == 'editors':
+            added = [e for e in b if not any(e is ei for ei in a)]
+            if added:
+                changes[attr] = added
+        elif not _same(a, b):
+            changes[attr] = _copy(b)
+    return changes
+
+
+def apply_changes(changes, state):
+    for attr, v in changes.iteritems():
+        if attr == 'editors':
+            editors = state.editors
+            for e in v:
+                if not any(e is ei for ei in editors):
+                    editors.append(e)
+        else:
+            setattr(state, attr, _copy(v))
+
+
+class NodeMemo(object):
+    """
+        the key a node was run with, the changes it made to the EngineState and its node attributes, and the
+        token identifying its output to downstream nodes
+    """
+
+    def __init__(self, key, changes, attrs):
+        self.key = key
+        self.changes = changes
+        self.attrs = attrs
+        self.token = uuid4().hex
+
+
+def memo_hash(*args):
+    h = hashlib.sha1()
+    for a in args:
+        update_hash(h, a)
+    return h
+
+
+def _copy(v):
+    if isinstance(v, list):
+        return list(v)
+    elif isinstance(v, dict):
+        return dict(v)
+    return v
+
+
+def _same(a, b):
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(ai is bi for ai, bi in zip(a, b))
+    try:
+        return bool(a == b)
+    except BaseException:
+        return a is b
+
+# ============= EOF =============================================
@@ -21,6 +21,8 @@ from traitsui.api import View
 
 # ============= standard library imports ========================
 # ============= local library imports  ==========================
+from pychron.pipeline.memo import memo_hash, update_analyses_hash, state_changes, apply_changes, NodeMemo, \
+    ANALYSIS_ATTRS
 
 
 class BaseNode(HasTraits):
@@ -43,6 +45,17 @@ class BaseNode(HasTraits):
     required = List
     index = -1
 
+    # memoization. see pychron.pipeline.memo
+    # set memoize for nodes whose run only changes the EngineState and their own memo_attrs
+    memoize = False
+    # EngineState attributes the node reads
+    memo_inputs = ('unknowns', 'references')
+    # analysis attributes that change the output of the node
+    memo_analysis_attrs = ANALYSIS_ATTRS
+    # node attributes set by run
+    memo_attrs = ()
+    _memo = None
+
     def clear_data(self):
         self.unknowns = []
         self.references = []
@@ -51,6 +64,45 @@ class BaseNode(HasTraits):
         self.visited = False
         self._manual_configured = False
         self.active = False
+        self._memo = None
+
+    def memo_key(self, state, token=''):
+        """
+            hash of the node's options and inputs. token identifies the output of the memoizable nodes upstream
+        """
+        if self.memoize:
+            h = memo_hash(self.__class__.__name__, token, self._memo_options())
+            for attr in self.memo_inputs:
+                v = getattr(state, attr, None)
+                if isinstance(v, list) and v and hasattr(v[0], 'uuid'):
+                    update_analyses_hash(h, v, self.memo_analysis_attrs)
+                else:
+                    h.update(repr([id(vi) for vi in v]) if isinstance(v, list) else repr(v))
+            return h.hexdigest()
+
+    def memo_token(self, token):
+        """
+            the token passed downstream
+        """
+        if self._memo:
+            token = self._memo.token
+        return token
+
+    def save_memo(self, key, before, state):
+        attrs = {k: getattr(self, k) for k in self.memo_attrs}
+        self._memo = NodeMemo(key, state_changes(before, state), attrs)
+
+    def restore_memo(self, key, state):
+        """
+            reapply the memoized output if it was made with key. return True if it was
+        """
+        memo = self._memo
+        if memo is None or memo.key is None or memo.key != key:
+            return
+
+        apply_changes(memo.changes, state)
+        self.trait_set(**memo.attrs)
+        return True
 
     def pre_load(self, nodedict):
         for k, v in nodedict.iteritems():
@@ -132,6 +184,12 @@ class BaseNode(HasTraits):
 
         return d
 
+    def _memo_options(self):
+        """
+            options that change the output of the node
+        """
+        return self.options
+
     def _options_factory(self):
         if self.options_klass:
             return self.options_klass()
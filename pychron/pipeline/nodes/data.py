@@ -356,7 +356,9 @@ class BaseAutoUnknownNode(UnknownNode):
             print 'ms={}'.format(self.mass_spectrometer)
             unks = self.dvc.get_analyses_by_date_range(low, high,
                                                        analysis_types=ats,
-                                                       mass_spectrometers=self.mass_spectrometer, verbose=self.verbose)
+                                                       mass_spectrometers=self.mass_spectrometer,
+                                                       eager=True,
+                                                       verbose=self.verbose)
             records = [ri for unk in unks for ri in unk.record_views]
 
             print 'retrived n records={}'.format(len(records))
@@ -48,6 +48,9 @@ class FigureNode(BaseNode):
     auto_set_items = True
     use_plotting = True
 
+    memoize = True
+    memo_attrs = ('editor', 'unknowns', 'references')
+
     def refresh(self):
         if self.editor:
             self.editor.refresh_needed = True
@@ -120,6 +123,11 @@ class FigureNode(BaseNode):
 
                     # return self.editors
 
+    def _memo_options(self):
+        pom = self.plotter_options_manager
+        if pom:
+            return pom.selected_options
+
     def configure(self, refresh=True, pre_run=False, **kw):
         # self._configured = True
         if not pre_run:
@@ -198,6 +206,8 @@ class VerticalFluxNode(FigureNode):
     editor_klass = 'pychron.pipeline.plot.editors.vertical_flux_editor,VerticalFluxEditor'
     plotter_options_manager_klass = VerticalFluxOptionsManager
 
+    memo_inputs = ('unknowns', 'references', 'irradiation', 'levels')
+
     def run(self, state):
         editor = super(VerticalFluxNode, self).run(state)
         editor.irradiation = state.irradiation
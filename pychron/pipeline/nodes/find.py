@@ -169,6 +169,11 @@ class FindReferencesNode(FindNode):
     # analysis_type_name = None
     name = 'Find References'
 
+    memoize = True
+    memo_inputs = ('unknowns',)
+    # references are found by run date, so omitting an unknown does not change them
+    memo_analysis_attrs = ('uuid', 'group_id')
+
     def reset(self):
         self.user_choice = None
         super(FindReferencesNode, self).reset()
@@ -187,6 +192,11 @@ class FindReferencesNode(FindNode):
         d['threshold'] = self.threshold
         d['analysis_type'] = self.analysis_type
 
+    def _memo_options(self):
+        return self.trait_get('threshold', 'analysis_type',
+                              'extract_device', 'enable_extract_device',
+                              'mass_spectrometer', 'enable_mass_spectrometer')
+
     def _analysis_type_changed(self, new):
         if new == 'Blank Unknown':
             new = 'Blank'
@@ -17,7 +17,7 @@
 # ============= enthought library imports =======================
 from itertools import groupby
 
-from traits.api import Bool, List, HasTraits, Str, Float, Instance
+from traits.api import Bool, List, HasTraits, Str, Float, Instance, Int, Any
 
 from pychron.core.progress import progress_loader
 from pychron.options.options_manager import BlanksOptionsManager, ICFactorOptionsManager, \
@@ -27,6 +27,9 @@ from pychron.options.views.views import view
 from pychron.pipeline.editors.flux_results_editor import FluxResultsEditor
 from pychron.pipeline.editors.results_editor import IsoEvolutionResultsEditor
 from pychron.pipeline.nodes.figure import FigureNode
+from pychron.pipeline.parallel import pipeline_map
+from pychron.processing.isotope_group import batch_fit_isotope_groups
+from pychron.processing.raw_data_cache import RawDataCache
 from pychron.pychron_constants import NULL_STR
 
 
@@ -200,6 +203,44 @@ class IsoEvoResult(HasTraits):
         return r
 
 
+FIT_ATTRS = ('name', 'fit', 'error_type', 'filter_outliers', 'filter_outlier_iterations',
+             'filter_outlier_std_devs', 'time_zero_offset', 'include_baseline_error')
+
+
+class FitSpec(object):
+    """
+        picklable copy of the attributes of a fit aux plot used by Isotope.set_fit
+    """
+
+    def __init__(self, fit):
+        for attr in FIT_ATTRS:
+            setattr(self, attr, getattr(fit, attr, None))
+
+
+def fit_isotope_evolution(args):
+    """
+        process pool worker. must be a module level function so that it can be pickled.
+
+        load the raw data of an analysis, fit its isotopes and baselines and return its isotopes
+    """
+    an, keys, fits = args
+    an.load_raw_data(keys)
+    an.set_fits(fits)
+    cache_fits(an, keys)
+    return an.isotopes
+
+
+def cache_fits(an, keys):
+    """
+        keep the results of the fits of the isotopes and baselines in keys. see IsotopicMeasurement.cache_fit
+    """
+    for iso in an.itervalues():
+        if iso.name in keys:
+            iso.cache_fit()
+        if iso.detector in keys:
+            iso.baseline.cache_fit()
+
+
 class FitIsotopeEvolutionNode(FitNode):
     editor_klass = 'pychron.pipeline.plot.editors.isotope_evolution_editor,' \
                    'IsotopeEvolutionEditor'
@@ -208,6 +249,16 @@ class FitIsotopeEvolutionNode(FitNode):
     _fits = List
     _keys = List
     use_plotting = False
+    use_batch_regression = Bool(False)
+
+    # release the raw data of each analysis once its results are extracted. the most recently released
+    # raw data, up to raw_data_cache_size (MB), is kept to redisplay without reading it from disk
+    use_streaming = Bool(False)
+    raw_data_cache_size = Int(256)
+    _raw_data_cache = Any
+
+    # the fits do not depend on which analyses are omitted
+    memo_analysis_attrs = ('uuid', 'record_id')
 
     def _options_view_default(self):
         return view('Iso Evo Options')
@@ -231,8 +282,15 @@ class FitIsotopeEvolutionNode(FitNode):
         self._fits = list(reversed([pi for pi in po.get_loadable_aux_plots()]))
         self._keys = [fi.name for fi in self._fits]
 
-        fs = progress_loader(state.unknowns, self._assemble_result, threshold=1,
-                             step=10)
+        if self.use_batch_regression:
+            fs = self._assemble_batch_results(state.unknowns)
+        elif state.pool:
+            fs = self._assemble_parallel_results(state)
+        elif self.use_streaming:
+            fs = self._assemble_streaming_results(state.unknowns)
+        else:
+            fs = progress_loader(state.unknowns, self._assemble_result, threshold=1,
+                                 step=10)
 
         if self.editor:
             self.editor.analysis_groups = [(ai,) for ai in state.unknowns]
@@ -246,14 +304,89 @@ class FitIsotopeEvolutionNode(FitNode):
             e.plotter_options = po
             state.editors.append(e)
 
+    def _to_template(self, d):
+        d['use_batch_regression'] = self.use_batch_regression
+        d['use_streaming'] = self.use_streaming
+        d['raw_data_cache_size'] = self.raw_data_cache_size
+
+    def _assemble_batch_results(self, unknowns):
+        """
+            load all the raw data, fit every isotope of every analysis with one batch regression
+            then assemble the results from the batched fits
+        """
+
+        def load(xi, prog, i, n):
+            if prog:
+                prog.change_message('Load raw data {}'.format(xi.record_id))
+            self._load_analysis(xi)
+            return xi
+
+        ans = progress_loader(unknowns, load, threshold=1, step=10)
+        if ans:
+            batch_fit_isotope_groups(ans, self._keys)
+
+            def func(xi, prog, i, n):
+                if prog:
+                    prog.change_message('Assemble results {}'.format(xi.record_id))
+                return self._make_results(xi)
+
+            return progress_loader(ans, func, threshold=1, step=10)
+
+    def _assemble_parallel_results(self, state):
+        """
+            load the raw data and fit each analysis on the engine's process pool. the fit isotopes replace the
+            isotopes of the unknowns as they arrive
+        """
+        fits = [FitSpec(f) for f in self._fits]
+        xs = [(xi, self._keys, fits) for xi in state.unknowns]
+
+        def callback(x, isotopes):
+            x[0].isotopes = isotopes
+
+        def message(r, i, n):
+            return 'Fit isotope evolutions {}/{}'.format(i + 1, n)
+
+        if pipeline_map(state, fit_isotope_evolution, xs, message=message, callback=callback):
+            return [r for xi in state.unknowns for r in self._make_results(xi)]
+
+    def _assemble_streaming_results(self, unknowns):
+        """
+            load, fit and assemble the results of one analysis at a time then release its raw data so only the
+            raw data of one analysis plus the raw data cache is held in memory
+        """
+        cache = self._raw_data_cache
+        if cache is None:
+            cache = self._raw_data_cache = RawDataCache()
+        cache.max_bytes = self.raw_data_cache_size * 1024 ** 2
+
+        keys = self._keys
+
+        def func(xi, prog, i, n):
+            if prog:
+                prog.change_message('Fit isotope evolutions {}'.format(xi.record_id))
+
+            xi.raw_data_cache = cache
+            self._load_analysis(xi)
+            cache_fits(xi, keys)
+            rs = list(self._make_results(xi))
+            cache.release(xi)
+            return rs
+
+        return progress_loader(unknowns, func, threshold=1, step=10)
+
+    def _load_analysis(self, xi):
+        xi.load_raw_data(self._keys)
+        xi.set_fits(self._fits)
+
     def _assemble_result(self, xi, prog, i, n):
         if prog:
             prog.change_message('Load raw data {}'.format(xi.record_id))
 
-        fits = self._fits
-        xi.load_raw_data(self._keys)
+        self._load_analysis(xi)
+        return self._make_results(xi)
 
-        xi.set_fits(fits)
+    def _make_results(self, xi):
+        fits = self._fits
         isotopes = xi.isotopes
         for f in fits:
             k = f.name
@@ -315,7 +448,7 @@ class FitIsotopeEvolutionNode(FitNode):
                                    curvature=curvature,
                                    curvature_threshold=curvature_threshold,
                                    curvature_goodness=curvature_goodness,
-                                   regression_str=iso.regressor.tostring(),
+                                   regression_str=iso.get_regression_str(),
                                    fit=f.fit,
                                    isotope=k)
 
@@ -324,6 +457,7 @@ class FitFluxNode(FitNode):
     name = 'Fit Flux'
     editor_klass = FluxResultsEditor
     plotter_options_manager_klass = FluxOptionsManager
+    memo_inputs = ('flux_monitors', 'unknown_positions', 'geometry', 'irradiation', 'level')
 
     def _options_view_default(self):
         return view('Flux Options')
@@ -17,7 +17,7 @@
 # ============= enthought library imports =======================
 import os
 
-from traits.api import Str, Instance, List
+from traits.api import Str, Instance, List, Bool
 from traitsui.api import Item
 from traitsui.editors import DirectoryEditor, CheckListEditor
 from uncertainties import ufloat, std_dev, nominal_value
@@ -80,6 +80,9 @@ class DVCPersistNode(PersistNode):
     commit_tag = Str
     modifier = Str
 
+    # stage all the modified files with one index update and make one commit per repository
+    bulk = Bool(False)
+
     # def __init__(self, *args, **kwargs):
     #     super(DVCPersistNode, self).__init__(*args, **kwargs)
 
@@ -88,11 +91,14 @@ class DVCPersistNode(PersistNode):
         if not isinstance(mods, tuple):
             mods = (self.modifier,)
 
-        modp = []
-        for mi in mods:
-            modpi = self.dvc.update_analyses(state.unknowns,
-                                             mi, '<{}> {}'.format(self.commit_tag, msg))
-            modp.append(modpi)
+        msg = '<{}> {}'.format(self.commit_tag, msg)
+        if self.bulk:
+            modp = [self.dvc.update_analyses(state.unknowns, mods, msg, bulk=True)]
+        else:
+            modp = []
+            for mi in mods:
+                modpi = self.dvc.update_analyses(state.unknowns, mi, msg)
+                modp.append(modpi)
 
         if modp:
             state.modified = True
@@ -0,0 +1,87 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+process pool execution of per-analysis pipeline work.
+
+a node declares its per-analysis work as a module level function, so it can be pickled, and calls
+``pipeline_map``. if the engine was configured with a process pool the work is fanned out to it, otherwise the
+function is applied serially. either way results are handed back on the calling thread, in order, as they arrive
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from itertools import imap, izip
+from multiprocessing import Pool, cpu_count
+
+# ============= local library imports  ==========================
+from pychron.core.progress import progress_imap, CancelLoadingError
+
+
+class PipelinePool(object):
+    def __init__(self, nprocesses=0):
+        self.nprocesses = nprocesses or cpu_count()
+        self._pool = None
+
+    def imap(self, func, xs):
+        if self._pool is None:
+            self._pool = Pool(self.nprocesses)
+
+        chunksize = max(1, len(xs) / (4 * self.nprocesses))
+        return self._pool.imap(func, xs, chunksize)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+
+def pipeline_map(state, func, xs, message=None, callback=None, step=10):
+    """
+        apply func to each item of xs.
+
+        state: EngineState. func is run on state.pool if it is set
+        func: module level function with signature func(xi)
+        message: callable with signature message(ri, i, n) returning the progress message for the ith result
+        callback: callable with signature callback(xi, ri). called on this thread as each result arrives
+
+        if the user cancels state.canceled is set and an empty list is returned
+
+        return: list of results. None results are dropped
+    """
+    if not xs:
+        return []
+
+    xs = list(xs)
+    pool = getattr(state, 'pool', None)
+    mapper = pool.imap if pool else imap
+
+    def cimap(f, ys):
+        for xi, ri in izip(ys, mapper(f, ys)):
+            if callback:
+                callback(xi, ri)
+            yield ri
+
+    try:
+        return progress_imap(xs, func, cimap, threshold=1, step=step, message=message, reraise_cancel=True)
+    except CancelLoadingError:
+        state.canceled = True
+        if pool:
+            # discard the outstanding work
+            pool.close()
+        return []
+
+# ============= EOF =============================================
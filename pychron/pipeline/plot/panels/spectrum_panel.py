@@ -18,6 +18,7 @@
 # ============= standard library imports ========================
 from pychron.pipeline.plot.panels.figure_panel import FigurePanel
 from pychron.pipeline.plot.plotter.spectrum import Spectrum
+from pychron.processing.analyses.analysis_group import find_group_plateaus
 
 
 # ============= local library imports  ==========================
@@ -26,6 +27,24 @@ from pychron.pipeline.plot.plotter.spectrum import Spectrum
 class SpectrumPanel(FigurePanel):
     _figure_klass = Spectrum
 
+    def make_graph(self):
+        self._find_plateaus()
+        return super(SpectrumPanel, self).make_graph()
+
+    def _find_plateaus(self):
+        """
+            search for the plateaus of all the spectra at once before they are plotted
+        """
+        po = self.plot_options
+        gs = []
+        for fig in self.figures:
+            ag = fig.analysis_group
+            ag.plateau_nsteps = po.pc_nsteps
+            ag.plateau_gas_fraction = po.pc_gas_fraction
+            gs.append(ag)
+
+        find_group_plateaus(gs)
+
     def _get_init_xlimits(self):
         return None, 0, 100
 
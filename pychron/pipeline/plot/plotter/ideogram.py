@@ -28,7 +28,8 @@ from uncertainties import nominal_value, std_dev
 
 from pychron.core.helpers.formatting import floatfmt
 from pychron.core.stats.peak_detection import fast_find_peaks
-from pychron.core.stats.probability_curves import cumulative_probability, kernel_density
+from pychron.core.stats.probability_curves import cumulative_probability, kernel_density, curve_cache, \
+    curve_key
 from pychron.graph.ticks import IntTickGenerator
 from pychron.pipeline.plot.flow_label import FlowPlotLabel
 from pychron.pipeline.plot.overlays.ideogram_inset_overlay import IdeogramInset, IdeogramPointsInset
@@ -417,10 +418,8 @@ class Ideogram(BaseArArFigure):
                                     location=self.options.inset_location)
             plot.overlays.append(o)
 
-            cfunc = lambda x1, x2: cumulative_probability(self.xs, self.xes, x1, x2, n=N)
-            xs, ys, xmi, xma = self._calculate_asymptotic_limits(cfunc,
-                                                                 # asymptotic_width=10,
-                                                                 tol=self.options.asymptotic_height_percent)
+            xs, ys, xmi, xma = self._calculate_cached_asymptotic_limits(self.xs, self.xes,
+                                                                        tol=self.options.asymptotic_height_percent)
             oo = IdeogramInset(xs, ys,
                                color=d['color'],
                                bgcolor=bgcolor,
@@ -709,10 +708,8 @@ class Ideogram(BaseArArFigure):
 
         else:
             if opt.use_asymptotic_limits and calculate_limits:
-                cfunc = lambda x1, x2: cumulative_probability(ages, errors, x1, x2, n=N)
-
-                bins, probs, x1, x2 = self._calculate_asymptotic_limits(cfunc,
-                                                                        tol=(opt.asymptotic_height_percent or 10))
+                bins, probs, x1, x2 = self._calculate_cached_asymptotic_limits(ages, errors,
+                                                                               tol=(opt.asymptotic_height_percent or 10))
                 self.trait_setq(xmi=x1, xma=x2)
 
                 return bins, probs
@@ -722,6 +719,17 @@ class Ideogram(BaseArArFigure):
     def _calculate_nominal_xlimits(self):
         return self.min_x(self.options.index_attr), self.max_x(self.options.index_attr)
 
+    def _calculate_cached_asymptotic_limits(self, ages, errors, max_iter=200, tol=10):
+        """
+            the asymptotic search evaluates the probability curve up to max_iter times.
+            cache the final curve and limits instead of every intermediate curve
+        """
+        xmi, xma = self._calculate_nominal_xlimits()
+        key = curve_key('asymptotic', ages, errors, xmi, xma, N) + (max_iter, tol)
+
+        cfunc = lambda x1, x2: cumulative_probability(ages, errors, x1, x2, n=N, use_cache=False)
+        return curve_cache.get(key, lambda: self._calculate_asymptotic_limits(cfunc, max_iter=max_iter, tol=tol))
+
     def _calculate_asymptotic_limits(self, cfunc, max_iter=200, tol=10):
         tol *= 0.01
         rx1, rx2 = None, None
@@ -57,6 +57,9 @@ class EngineState(HasTraits):
 
     report_path = None
 
+    # pychron.pipeline.parallel.PipelinePool used by nodes to fan out per-analysis work
+    pool = Any
+
     @cached_property
     def _get_udetectors(self):
         return get_detector_set(self.unknowns)
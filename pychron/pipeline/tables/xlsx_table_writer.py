@@ -29,6 +29,7 @@ from pychron.paths import paths
 from pychron.persistence_loggable import dumpable
 from pychron.pipeline.tables.base_table_writer import BaseTableWriter
 from pychron.pipeline.tables.util import iso_value, value, error, icf_value, icf_error, correction_value
+from pychron.processing.analyses.analysis_group import StepHeatAnalysisGroup, find_group_plateaus
 from pychron.pychron_constants import PLUSMINUS_ONE_SIGMA
 
 subreg = re.compile(r'^<sub>(?P<item>\w+)</sub>')
@@ -613,6 +614,9 @@ class XLSXTableWriter(BaseTableWriter):
 
         repeat_header = self._options.repeat_header
 
+        if self._options.include_plateau_age:
+            find_group_plateaus([g for g in groups if isinstance(g, StepHeatAnalysisGroup)])
+
         for i, group in enumerate(groups):
             self._make_meta(worksheet, group)
             if repeat_header or i == 0:
@@ -16,7 +16,8 @@
 
 # ============= enthought library imports =======================
 from envisage.ui.tasks.preferences_pane import PreferencesPane
-from traitsui.api import View
+from traits.api import Bool, Int
+from traitsui.api import View, Item, VGroup
 
 # ============= standard library imports ========================
 # ============= local library imports  ==========================
@@ -25,6 +26,9 @@ from pychron.envisage.tasks.base_preferences_helper import BasePreferencesHelper
 
 class PipelinePreferences(BasePreferencesHelper):
     preferences_path = 'pychron.pipeline'
+    use_process_pool = Bool
+    nprocesses = Int(0)
+    use_memoization = Bool
 
 
 class PipelinePreferencesPane(PreferencesPane):
@@ -32,7 +36,15 @@ class PipelinePreferencesPane(PreferencesPane):
     category = 'Pipeline'
 
     def traits_view(self):
-        v = View()
+        pool = VGroup(Item('use_process_pool', label='Use Process Pool',
+                           tooltip='Run per-analysis work, e.g. isotope evolution fits, on a pool of processes'),
+                      Item('nprocesses', label='Processes', enabled_when='use_process_pool',
+                           tooltip='Number of processes. 0=number of CPUs'),
+                      Item('use_memoization', label='Reuse Unchanged Node Results',
+                           tooltip='When re-running a pipeline skip nodes whose analyses and options have not '
+                                   'changed'),
+                      label='Execution', show_border=True)
+        v = View(pool)
         return v
 
 # ============= EOF =============================================
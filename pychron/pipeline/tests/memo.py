@@ -0,0 +1,83 @@
+import unittest
+
+from traits.api import HasTraits, Float, Str, List
+
+from pychron.pipeline.memo import memo_hash, update_analyses_hash, snapshot_state, state_changes, apply_changes
+from pychron.pipeline.state import EngineState
+
+
+class Options(HasTraits):
+    threshold = Float
+    name = Str
+    fits = List
+
+
+class Analysis(object):
+    temp_status = 'ok'
+    group_id = 0
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+        self.record_id = uuid
+
+
+class MemoTestCase(unittest.TestCase):
+    def test_options_hash(self):
+        a, b = Options(threshold=1), Options(threshold=1)
+        self.assertEqual(memo_hash(a).hexdigest(), memo_hash(b).hexdigest())
+
+        b.fits.append('linear')
+        self.assertNotEqual(memo_hash(a).hexdigest(), memo_hash(b).hexdigest())
+
+    def test_cycle(self):
+        a = Options()
+        a.fits.append(a)
+        self.assertTrue(memo_hash(a).hexdigest())
+
+    def test_analyses_hash(self):
+        ans = [Analysis('a'), Analysis('b')]
+
+        def key(attrs=('uuid', 'temp_status')):
+            h = memo_hash()
+            update_analyses_hash(h, ans, attrs)
+            return h.hexdigest()
+
+        k = key()
+        self.assertEqual(k, key())
+
+        ans[0].temp_status = 'omit'
+        self.assertNotEqual(k, key())
+        self.assertEqual(key(('uuid',)), key(('uuid',)))
+
+        # same uuid different object
+        k = key(('uuid',))
+        ans[1] = Analysis('b')
+        self.assertNotEqual(k, key(('uuid',)))
+
+    def test_state_changes(self):
+        state = EngineState()
+        unks = [Analysis('a')]
+        state.unknowns = unks
+        editor = object()
+
+        before = snapshot_state(state)
+        state.references = [Analysis('r')]
+        state.editors.append(editor)
+        state.saveable_keys = ['Ar40']
+
+        changes = state_changes(before, state)
+        self.assertSetEqual(set(changes), {'references', 'editors', 'saveable_keys'})
+
+        nstate = EngineState(unknowns=unks)
+        apply_changes(changes, nstate)
+        self.assertIs(nstate.references[0], state.references[0])
+        self.assertIs(nstate.editors[0], editor)
+        self.assertListEqual(nstate.saveable_keys, ['Ar40'])
+
+        # editors are not added twice
+        apply_changes(changes, nstate)
+        self.assertEqual(len(nstate.editors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -317,6 +317,8 @@ class Analysis(ArArAge, IdeogramPlotable):
     # meta
     has_raw_data = False
     has_changes = False
+    # RawDataCache holding the raw data released after fitting
+    raw_data_cache = None
 
     recall_event = Event
     tag_event = Event
@@ -16,6 +16,7 @@
 
 # ============= enthought library imports =======================
 import math
+from itertools import groupby
 
 from numpy import array, nan
 from traits.api import HasTraits, List, Property, cached_property, Str, Bool, Int, Event, Float
@@ -338,6 +339,7 @@ class StepHeatAnalysisGroup(AnalysisGroup):
     plateau_gas_fraction = Float(50)
     plateau_mswd = Float
     plateau_mswd_valid = Bool
+    _plateau_idx = None
 
     # def _get_nanalyses(self):
     #     if self.plateau_steps:
@@ -385,20 +387,45 @@ class StepHeatAnalysisGroup(AnalysisGroup):
         if not (l is None and h is None):
             return l, h
 
+    def get_plateau_steps(self):
+        """
+            return ages, errors, k39, excludes used to find the plateau
+        """
+        ages = [ai.age for ai in self.analyses]
+        errors = [ai.age_err for ai in self.analyses]
+        k39 = [nominal_value(ai.get_computed_value('k39')) for ai in self.analyses]
+        excludes = [i for i, ai in enumerate(self.analyses) if ai.is_omitted()]
+        return ages, errors, k39, excludes
+
+    def set_plateau_idx(self, steps, pidx):
+        """
+            store a plateau found for ``steps`` by ``find_group_plateaus``. it is used by plateau_age as long as the
+            steps and plateau criteria do not change
+        """
+        self._plateau_idx = (self._plateau_key(steps), pidx)
+
+    def _plateau_key(self, steps):
+        ages, errors, k39, excludes = steps
+        return tuple(ages), tuple(errors), tuple(k39), tuple(excludes), self.plateau_nsteps, self.plateau_gas_fraction
+
+    def _get_plateau_idx(self, steps):
+        p = self._plateau_idx
+        if p is not None and p[0] == self._plateau_key(steps):
+            return p[1]
+
     @cached_property
     def _get_plateau_age(self):
         # ages, errors, k39 = self._get_steps()
 
-        ages = [ai.age for ai in self.analyses]
-        errors = [ai.age_err for ai in self.analyses]
-        k39 = [nominal_value(ai.get_computed_value('k39')) for ai in self.analyses]
+        steps = self.get_plateau_steps()
+        ages, errors, k39, excludes = steps
 
         options = {'nsteps': self.plateau_nsteps,
                    'gas_fraction': self.plateau_gas_fraction,
                    'fixed_steps': self.fixed_steps}
 
-        excludes = [i for i, ai in enumerate(self.analyses) if ai.is_omitted()]
-        args = calculate_plateau_age(ages, errors, k39, options=options, excludes=excludes)
+        args = calculate_plateau_age(ages, errors, k39, options=options, excludes=excludes,
+                                     pidx=self._get_plateau_idx(steps))
 
         v, e = 0, 0
         if args:
@@ -430,6 +457,30 @@ class StepHeatAnalysisGroup(AnalysisGroup):
         return ufloat(v, max(0, e))
 
 
+def find_group_plateaus(groups):
+    """
+        find the plateaus of many StepHeatAnalysisGroups in one pass. groups with fixed steps are skipped
+    """
+    groups = [g for g in groups if not any(g.fixed_steps or ())]
+    if not groups:
+        return
+
+    from pychron.processing.plateau import find_plateaus
+
+    for key, gs in groupby(sorted(groups, key=_plateau_criteria), key=_plateau_criteria):
+        gs = list(gs)
+        steps = [g.get_plateau_steps() for g in gs]
+        ages, errors, k39, excludes = zip(*steps)
+        nsteps, gas_fraction = key
+        pidxs = find_plateaus(ages, errors, k39, excludes, nsteps=nsteps, gas_fraction=gas_fraction)
+        for g, s, p in zip(gs, steps, pidxs):
+            g.set_plateau_idx(s, p)
+
+
+def _plateau_criteria(g):
+    return g.plateau_nsteps, g.plateau_gas_fraction
+
+
 class InterpretedAgeGroup(StepHeatAnalysisGroup):
     uuid = Str
     all_analyses = List
@@ -129,11 +129,14 @@ def isochron_regressor(xs, xes, ys, yes,
     return reg
 
 
-def calculate_plateau_age(ages, errors, k39, kind='inverse_variance', method='fleck 1977', options=None, excludes=None):
+def calculate_plateau_age(ages, errors, k39, kind='inverse_variance', method='fleck 1977', options=None, excludes=None,
+                          pidx=None):
     """
         ages: list of ages
         errors: list of corresponding  1sigma errors
         k39: list of 39ArK signals
+        pidx: precomputed plateau (start, end) e.g. from pychron.processing.plateau.find_plateaus.
+            if None the plateau is searched for
 
         return age, error
     """
@@ -165,7 +168,7 @@ def calculate_plateau_age(ages, errors, k39, kind='inverse_variance', method='fl
         sidx, eidx = min(sidx, eidx), min(max(sidx, eidx), n)
         pidx = (sidx, eidx) if sidx < n else None
 
-    else:
+    elif pidx is None:
 
         from pychron.processing.plateau import Plateau
 
@@ -22,14 +22,19 @@ import re
 import struct
 from binascii import hexlify
 from itertools import izip
+from threading import Lock
 
-from numpy import array, Inf, polyfit
+from numpy import array, Inf, polyfit, empty
 from uncertainties import ufloat, nominal_value, std_dev
 
 from pychron.core.geometry.geometry import curvature_at
 from pychron.core.helpers.fits import natural_name_fit, fit_to_degree
+from pychron.core.regression.batch_regressor import fit_to_batch_degree
+from pychron.core.regression.incremental_regressor import IncrementalRegressor, MAX_INCREMENTAL_DEGREE
 from pychron.core.regression.mean_regressor import MeanRegressor
 
+MIN_BUFFER_SIZE = 64
+
 
 def fit_abbreviation(fit, ):
     f = ''
@@ -46,6 +51,30 @@ class BaseMeasurement(object):
     use_manual_error = False
 
     _n = None
+    _buffer = None
+    _buffer_n = 0
+    _buffer_views = None
+    _buffer_generation = 0
+    # incremented whenever xs or ys is set. see IsotopicMeasurement._batch_key
+    _data_generation = 0
+
+    @property
+    def xs(self):
+        return self._xs
+
+    @xs.setter
+    def xs(self, v):
+        self._xs = v
+        self._data_generation += 1
+
+    @property
+    def ys(self):
+        return self._ys
+
+    @ys.setter
+    def ys(self, v):
+        self._ys = v
+        self._data_generation += 1
 
     @property
     def n(self):
@@ -62,6 +91,10 @@ class BaseMeasurement(object):
     def offset_xs(self):
         return self.xs - self.time_zero_offset
 
+    @property
+    def nbytes(self):
+        return self.xs.nbytes + self.ys.nbytes
+
     def __init__(self, name, detector):
         self.name = name
         self.detector = detector
@@ -69,6 +102,80 @@ class BaseMeasurement(object):
         self.mass = 0
         self.time_zero_offset = 0
 
+    def release_data(self):
+        """
+            remove the data to free memory. n is kept.
+
+            return the arguments for restore_data
+        """
+        xs, ys, n = self.xs, self.ys, self._n
+        self._n = n or xs.shape[0]
+        self.xs, self.ys = array([]), array([])
+        self._buffer = self._buffer_views = None
+        self._buffer_n = 0
+        return xs, ys, n
+
+    def restore_data(self, xs, ys, n):
+        self.xs, self.ys = xs, ys
+        self._n = n
+
+    def reserve(self, n):
+        """
+        preallocate storage for at least ``n`` points so ``append_point`` does not have to reallocate
+        """
+        buf = self._get_buffer()
+        if buf.shape[1] < n:
+            self._resize_buffer(n)
+
+    def append_point(self, x, y):
+        """
+        append a single point.
+
+        points are written into a preallocated 2xN buffer that grows by doubling. ``xs`` and ``ys`` are
+        views into the buffer so no copy of the existing data is made
+        """
+        buf = self._get_buffer()
+        i = self._buffer_n
+        if i == buf.shape[1]:
+            buf = self._resize_buffer(max(2 * i, MIN_BUFFER_SIZE))
+
+        buf[0, i] = x
+        buf[1, i] = y
+        self._buffer_n = n = i + 1
+        self._set_buffer_views(buf, n)
+
+    def _get_buffer(self):
+        buf = self._buffer
+        if buf is None or not self._has_buffer_views():
+            # xs/ys were replaced, e.g. by unpack_data. reseed the buffer from the current data
+            xs, ys = self.xs, self.ys
+            n = min(len(xs), len(ys))
+            buf = empty((2, max(n, MIN_BUFFER_SIZE)))
+            buf[0, :n] = xs[:n]
+            buf[1, :n] = ys[:n]
+            self._buffer = buf
+            self._buffer_n = n
+            self._buffer_generation += 1
+            self._set_buffer_views(buf, n)
+        return buf
+
+    def _has_buffer_views(self):
+        views = self._buffer_views
+        return views is not None and views[0] is self.xs and views[1] is self.ys
+
+    def _resize_buffer(self, size):
+        n = self._buffer_n
+        buf = empty((2, size))
+        buf[:, :n] = self._buffer[:, :n]
+        self._buffer = buf
+        self._set_buffer_views(buf, n)
+        return buf
+
+    def _set_buffer_views(self, buf, n):
+        self.xs = xs = buf[0, :n]
+        self.ys = ys = buf[1, :n]
+        self._buffer_views = (xs, ys)
+
     def pack(self, endianness=None, as_hex=True):
         if endianness is None:
             endianness = self.endianness
@@ -96,6 +203,20 @@ class BaseMeasurement(object):
             # print self.name, self.xs.shape, self.ys.shape
             # print self.name, self.ys
 
+    def unpack_array(self, a, n_only=False):
+        """
+        set xs, ys from a 2xN array in packed column order, e.g. from the binary raw data store
+        """
+        x, y = a
+        if self.reverse_unpack:
+            x, y = y, x
+
+        if n_only:
+            self.n = len(x)
+        else:
+            self.xs = array(x, dtype=float)
+            self.ys = array(y, dtype=float)
+
     def _unpack_blob(self, blob, endianness=None):
         if endianness is None:
             endianness = self.endianness
@@ -152,6 +273,9 @@ class IsotopicMeasurement(BaseMeasurement):
     _ovalue = None
 
     _fn = None
+    _batch_result = None
+    _incremental = None
+    _incremental_lock = None
 
     def __init__(self, *args, **kw):
         super(IsotopicMeasurement, self).__init__(*args, **kw)
@@ -159,8 +283,11 @@ class IsotopicMeasurement(BaseMeasurement):
 
     @property
     def fn(self):
+        b = self._get_fast_result()
         if self._fn is not None:
             n = self._fn
+        elif b:
+            n = b['n']
         elif self._regressor:
             n = self._regressor.clean_xs.shape[0]
         else:
@@ -174,6 +301,154 @@ class IsotopicMeasurement(BaseMeasurement):
     def set_filtering(self, d):
         self.filter_outliers_dict = d.copy()
 
+    def set_batch_result(self, result, i):
+        """
+            use the ith series of a BatchRegressionResult instead of the regressor.
+            the result is ignored once the data, fit or filtering change
+        """
+        self._batch_result = {'key': self._batch_key(),
+                              'value': result.value[i],
+                              'error': result.error[i],
+                              'n': result.n[i],
+                              'noutliers': result.noutliers(i),
+                              'regression_str': result.tostring(i)}
+
+    def cache_fit(self):
+        """
+            calculate the current fit and keep its results the same way as a batch result so they survive
+            pickling, e.g. when fit on the pipeline's process pool
+        """
+        if self.xs.shape[0] > 1 and not self._get_batch_result():
+            reg = self.regressor
+            n = reg.clean_xs.shape[0]
+            self._batch_result = {'key': self._batch_key(),
+                                  'value': reg.predict(0),
+                                  'error': reg.predict_error(0),
+                                  'n': n,
+                                  'noutliers': reg.xs.shape[0] - n,
+                                  'regression_str': reg.tostring()}
+
+    def release_data(self):
+        """
+            the results of the current fit are kept. see cache_fit
+        """
+        b = self._get_batch_result()
+        ret = super(IsotopicMeasurement, self).release_data()
+        self._regressor = None
+        if b:
+            b['key'] = self._batch_key()
+        return ret
+
+    def restore_data(self, xs, ys, n):
+        b = self._get_batch_result()
+        super(IsotopicMeasurement, self).restore_data(xs, ys, n)
+        if b:
+            b['key'] = self._batch_key()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # incremental fits are only used during data collection
+        state.pop('_incremental', None)
+        state.pop('_incremental_lock', None)
+        if self._get_batch_result():
+            # the regressor is rebuilt if needed
+            state.pop('_regressor', None)
+        return state
+
+    def set_incremental(self, enabled=True):
+        """
+            while enabled value and error are calculated from running least squares sums that are updated with
+            the points appended since the last access, instead of refitting all the points.
+            only used while xs/ys are the buffers filled by ``append_point``
+        """
+        if self._incremental_lock is None:
+            self._incremental_lock = Lock()
+
+        with self._incremental_lock:
+            self._incremental = {} if enabled else None
+
+    def _has_fit(self):
+        """
+            enough points to fit or a batch result, which is kept when the data is released
+        """
+        return self.xs.shape[0] > 1 or self._get_batch_result() is not None
+
+    def _get_fast_result(self):
+        return self._get_batch_result() or self._get_incremental_result()
+
+    def _get_incremental_result(self):
+        """
+            value and error are read by the data collection, conditionals and plotting threads at once.
+            the state is only read and updated while holding _incremental_lock
+        """
+        lock = self._incremental_lock
+        if lock is None:
+            return
+
+        with lock:
+            return self._update_incremental()
+
+    def _update_incremental(self):
+        state = self._incremental
+        if state is None or not self._has_buffer_views():
+            return
+
+        degree = fit_to_batch_degree(self.fit)
+        if degree is None or degree > MAX_INCREMENTAL_DEGREE:
+            return
+
+        et = self.error_type if degree else self.error_type or 'SEM'
+        key = (degree, et, self.time_zero_offset, self._buffer_generation)
+        if state.get('key') != key:
+            state.clear()
+            state.update(key=key, regressor=IncrementalRegressor(degree, et), npts=0, outliers=None)
+
+        reg = state['regressor']
+        xs, ys = self.xs, self.ys
+        n = min(xs.shape[0], ys.shape[0])
+        i = state['npts']
+        if i < n:
+            reg.add_many(xs[i:n] - self.time_zero_offset, ys[i:n])
+            state['npts'] = n
+            state['result'] = None
+
+        fod = self.filter_outliers_dict or {}
+        fkey = tuple(sorted(fod.items()))
+        r = state.get('result')
+        if r is None or r['fkey'] != fkey:
+            r = {'fkey': fkey, 'refit': False}
+            fit, outliers = reg, ()
+            if fod.get('filter_outliers'):
+                # a new point changes the fit of all the points so every point is tested again. this is the same
+                # as BaseRegressor.calculate_filtered_data but the fits are solved from the running sums
+                fit, outliers = reg.filter_outliers(xs[:n] - self.time_zero_offset, ys[:n],
+                                                    fod.get('iterations', 1),
+                                                    fod.get('std_devs', 2))
+                po = state['outliers']
+                # the excluded set changed. use a full refit for this update
+                r['refit'] = po is None or po.shape != outliers.shape or (po != outliers).any()
+                state['outliers'] = outliers
+
+            if not r['refit'] and fit.supported:
+                r.update(value=fit.value, error=fit.error, n=fit.n, noutliers=len(outliers))
+            else:
+                r['refit'] = True
+
+            state['result'] = r
+
+        if not r['refit']:
+            return r
+
+    def _get_batch_result(self):
+        b = self._batch_result
+        if b is not None and b['key'] == self._batch_key():
+            return b
+
+    def _batch_key(self):
+        fod = self.filter_outliers_dict
+        return (self._data_generation, self.xs.shape[0], self.fit, self.error_type, self.time_zero_offset,
+                tuple(sorted(fod.items())) if fod else ())
+
     def set_fit_blocks(self, fit):
         """
             fit: either tuple of (fit, error_type) or str
@@ -294,7 +569,11 @@ class IsotopicMeasurement(BaseMeasurement):
         # elif self.user_defined_value:
         #     return self._value
 
-        if not self.use_stored_value and not self.user_defined_value and self.xs.shape[0] > 1:
+        if not self.use_stored_value and not self.user_defined_value and self._has_fit():
+            b = self._get_fast_result()
+            if b:
+                return b['value']
+
             v = self.regressor.predict(0)
             return v
         else:
@@ -307,7 +586,11 @@ class IsotopicMeasurement(BaseMeasurement):
         # elif self.user_defined_error:
         #     return self._error
 
-        if not self.use_stored_value and not self.user_defined_error and self.xs.shape[0] > 1:
+        if not self.use_stored_value and not self.user_defined_error and self._has_fit():
+            b = self._get_fast_result()
+            if b:
+                return b['error']
+
             v = self.regressor.predict_error(0)
             return v
         else:
@@ -412,8 +695,19 @@ class IsotopicMeasurement(BaseMeasurement):
         return self.regressor.calculate_standard_error_fit()
 
     def noutliers(self):
+        b = self._get_fast_result()
+        if b:
+            return b['noutliers']
+
         return self.regressor.xs.shape[0] - self.regressor.clean_xs.shape[0]
 
+    def get_regression_str(self):
+        b = self._get_batch_result()
+        if b:
+            return b['regression_str']
+
+        return self.regressor.tostring()
+
     def _get_curvature_ys(self):
         return self.regressor.predict(self.xs)
 
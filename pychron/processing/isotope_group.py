@@ -19,7 +19,6 @@ import logging
 import os
 from ConfigParser import ConfigParser
 
-from numpy import append as npappend
 from traits.api import Property, Dict, Str
 from traits.has_traits import HasTraits
 from uncertainties import ufloat
@@ -31,6 +30,41 @@ from pychron.processing.isotope import Isotope, Baseline
 logger = logging.getLogger('ISO')
 
 
+def batch_fit_isotope_groups(groups, keys=None, include_baselines=True):
+    """
+        fit the isotopes (and baselines) of many IsotopeGroups with one call to batch_regress.
+        isotopes the batch engine cannot handle fall back to their own regressors
+
+        keys: isotope names or detector names (baselines). None=all
+        return number of series fit by the batch engine
+    """
+    from pychron.core.regression.batch_regressor import batch_regress, fit_to_batch_degree
+
+    ms = []
+    for g in groups:
+        for iso in g.itervalues():
+            if keys is None or iso.name in keys:
+                ms.append(iso)
+            if include_baselines and (keys is None or iso.detector in keys):
+                ms.append(iso.baseline)
+
+    ms = [mi for mi in ms if mi.xs.shape[0] > 1 and fit_to_batch_degree(mi.fit) is not None]
+    if not ms:
+        return 0
+
+    result = batch_regress([mi.offset_xs for mi in ms],
+                           [mi.ys for mi in ms],
+                           [mi.fit for mi in ms],
+                           error_calc_types=[mi.error_type for mi in ms],
+                           filter_outliers_dicts=[mi.filter_outliers_dict for mi in ms])
+    n = 0
+    for i, mi in enumerate(ms):
+        if result.supported[i]:
+            mi.set_batch_result(result, i)
+            n += 1
+    return n
+
+
 class IsotopeGroup(HasTraits):
     isotopes = Dict
     isotope_keys = Property
@@ -40,6 +74,12 @@ class IsotopeGroup(HasTraits):
     def keys(self):
         return self.isotopes.keys()
 
+    def batch_fit(self, keys=None, include_baselines=True):
+        """
+            fit all isotopes with the vectorized batch regression engine instead of one regressor per isotope
+        """
+        return batch_fit_isotope_groups((self,), keys, include_baselines)
+
     def __getitem__(self, item):
         return self.isotopes[item]
 
@@ -102,6 +142,22 @@ class IsotopeGroup(HasTraits):
         for iso in self.iter_isotopes():
             self.isotopes[iso.name] = Isotope(iso.name, iso.detector)
 
+    def release_raw_data(self):
+        """
+            remove the raw data of every isotope, baseline and sniff to free memory. fit results are kept.
+
+            return a dict of {name: (detector, data)} that can be passed to restore_raw_data
+        """
+        return {k: (iso.detector, [m.release_data() for m in (iso, iso.baseline, iso.sniff)])
+                for k, iso in self.isotopes.iteritems()}
+
+    def restore_raw_data(self, released):
+        for k, (det, data) in released.iteritems():
+            iso = self.isotopes.get(k)
+            if iso is not None and iso.detector == det:
+                for m, args in zip((iso, iso.baseline, iso.sniff), data):
+                    m.restore_data(*args)
+
     def get_baseline(self, attr):
         if attr.endswith('bs'):
             attr = attr[:-2]
@@ -238,10 +294,7 @@ class IsotopeGroup(HasTraits):
             if kind == 'sniff':
                 isotope._value = signal
 
-            xs = npappend(isotope.xs, x)
-            ys = npappend(isotope.ys, signal)
-            isotope.xs = xs
-            isotope.ys = ys
+            isotope.append_point(x, signal)
             # isotope.trait_setq(xs=xs, ys=ys)
             # isotope.xs = hstack((isotope.xs, (x,)))
             # isotope.ys = hstack((isotope.ys, (signal,)))
@@ -263,6 +316,24 @@ class IsotopeGroup(HasTraits):
                     _append(isotopes[i])
                     return True
 
+    def reserve_data(self, kind, n):
+        """
+        preallocate storage for ``n`` additional points of ``kind`` (signal, baseline, sniff, whiff)
+        for every isotope
+        """
+        for iso in self.isotopes.itervalues():
+            if kind in ('sniff', 'baseline', 'whiff'):
+                iso = getattr(iso, kind)
+            iso.reserve(iso.xs.shape[0] + n)
+
+    def set_incremental(self, enabled=True):
+        """
+        toggle incremental regression of the signals and baselines. see IsotopicMeasurement.set_incremental
+        """
+        for iso in self.isotopes.itervalues():
+            iso.set_incremental(enabled)
+            iso.baseline.set_incremental(enabled)
+
     def clear_baselines(self):
         for k in self.isotopes:
             self.set_baseline(k, None, (0, 0))
@@ -15,30 +15,11 @@
 # ===============================================================================
 
 # ============= enthought library imports =======================
-from numpy import argmax, array
+from numpy import array, arange, asarray, full, nan, zeros, where, errstate, cumsum, isfinite
 from traits.api import HasTraits, List, Array
 
-from pychron.core.stats.core import validate_mswd, calculate_mswd
-
-
-def memoize(function):
-    cache = {}
-
-    def closure(*args):
-        # return function(*args)
-        if args not in cache:
-            cache[args] = function(*args)
-        return cache[args]
-
-    return closure
-
-
-class Log():
-    def debug(self, txt):
-        pass
-        # print 'debug --- {}'.format(txt)
-
-log = Log()
+FLECK = 'fleck 1977'
+MAHON = 'mahon 1996'
 
 
 class Plateau(HasTraits):
@@ -59,115 +40,170 @@ class Plateau(HasTraits):
         """
             method: str either fleck 1977 or mahon 1996
         """
-        if method.lower() == 'mahon 1996':
+        if method.lower() == MAHON:
             self.use_mswd = True
             self.use_overlap = False
         else:
             self.use_mswd = False
             self.use_overlap = True
 
-        n = len(self.ages)
         excludes = self.excludes
-        ss = [s for i, s in enumerate(self.signals) if i not in excludes]
+        self.total_signal = float(sum([s for i, s in enumerate(self.signals) if i not in excludes]))
+
+        return find_plateaus([self.ages], [self.errors], [self.signals], [excludes],
+                             method=method,
+                             nsteps=self.nsteps,
+                             overlap_sigma=self.overlap_sigma,
+                             gas_fraction=self.gas_fraction)[0]
+
+
+def find_plateaus(ages, errors, signals, excludes=None, method=FLECK, nsteps=3, overlap_sigma=2, gas_fraction=50):
+    """
+        find the plateau of many spectra at once.
+
+        ages, errors, signals: sequences of per spectrum arrays. the spectra may have different numbers of steps
+        excludes: sequence of per spectrum excluded step indices
+
+        every (start, end) pair of every spectrum is tested at once.
+        the gas fraction test uses running sums of the signal from each start step,
+        the Fleck 1977 overlap test uses cumulative counts of non-overlapping pairs and
+        the Mahon 1996 test uses prefix sums of the weighted mean/MSWD components.
+
+        the longest plateau of each spectrum is returned as (start, end) or [] if none was found,
+        the same selection as iterating over every start and end step
+    """
+    ns = len(ages)
+    lens = asarray([len(a) for a in ages], dtype=int)
+    m = lens.max() if ns else 0
+    if not m:
+        return [[] for _ in xrange(ns)]
+
+    if excludes is None:
+        excludes = [[]] * ns
+
+    A = full((ns, m), nan)
+    E = full((ns, m), nan)
+    S = zeros((ns, m))
+    X = zeros((ns, m), dtype=bool)
+    for i, (a, e, s, ex) in enumerate(zip(ages, errors, signals, excludes)):
+        n = lens[i]
+        A[i, :n] = a
+        E[i, :n] = e
+        S[i, :n] = s
+        if ex:
+            X[i, [j for j in ex if 0 <= j < n]] = True
+
+    idx = arange(m)
+    valid = idx < lens[:, None]
+    included = valid & ~X
+
+    # upper triangle of (start, end) pairs
+    T = idx[:, None] <= idx[None, :]
+    ok = T & (idx[None, :] - idx[:, None] + 1 >= nsteps)
+    ok = ok[None] & included[:, None, :]
+
+    # gas fraction. running sums from each start, in the same order as summing the steps one by one
+    sig = where(included, S, 0)
+    ss = cumsum(where(T[None], sig[:, None, :], 0), axis=2)
+    total = ss[:, 0, -1]
+    with errstate(divide='ignore', invalid='ignore'):
+        ok &= ss / total[:, None, None] >= gas_fraction / 100.
+
+    if method.lower() == MAHON:
+        ok &= _mswd_ok(A, E, T)
+    else:
+        ok &= _overlap_ok(A, E, T, overlap_sigma)
+
+    ends = where(ok, idx, -1).max(2)
+    spans = where(included & (ends > 0), ends - idx, -1)
+
+    ret = []
+    for i in xrange(ns):
+        j = spans[i].argmax()
+        if spans[i, j] >= 0:
+            ret.append((int(j), int(ends[i, j])))
+        else:
+            ret.append([])
+    return ret
 
-        self.total_signal = float(sum(ss))
-        # log.info(self.total_signal)
 
-        idxs = []
-        spans = []
+def _overlap_ok(A, E, T, overlap_sigma):
+    """
+        Fleck 1977. every pair of steps between start and end overlap at ``overlap_sigma``. excluded steps
+        are included in the test
 
-        overlap_func = memoize(self._overlap)
-        for i in range(n):
-            if i in excludes:
-                continue
-            idx = self._find_plateaus(n, i, excludes, overlap_func)
-            if idx:
-                # log.debug('found {} {}'.format(*idx))
-                idxs.append(idx)
-                spans.append(idx[1] - idx[0])
+        return (spectra, start, end) boolean array
+    """
+    e = E * overlap_sigma
+    lo = A - e
+    hi = A + e
+    with errstate(invalid='ignore'):
+        bad = ~(lo[:, :, None] < hi[:, None, :])
 
-        if spans:
-            return idxs[argmax(array(spans))]
+    m = T.shape[0]
+    bad[:, arange(m), arange(m)] = False
 
-        return idxs
+    # bad pairs indexed by (first step, last step)
+    bad = (bad | bad.transpose(0, 2, 1)) & T[None]
 
-    def _find_plateaus(self, n, start, excludes, overlap_func):
-        potential_end = None
-        for i in range(start, n, 1):
-            if i in excludes:
-                continue
+    # number of bad pairs with first>=start and last<=end
+    n = bad[:, ::-1, :].cumsum(1)[:, ::-1, :].cumsum(2)
+    return n == 0
 
-            if not self.check_nsteps(start, i):
-                log.debug('{} {} nsteps failed'.format(start, i))
-                continue
 
-            if self.use_overlap and not self.check_overlap(start, i, overlap_func):
-                log.debug('{} {} overlap failed'.format(start, i))
-                # potential_end=None
-                break
+def _mswd_ok(A, E, T):
+    """
+        Mahon 1996. the MSWD of the steps between start and end is within the 95% confidence interval of the
+        reduced chi2. excluded steps are included in the test
 
-            if self.use_mswd and not self.check_mswd(start, i):
-                continue
+        return (spectra, start, end) boolean array
+    """
+    from scipy.stats import chi2
 
-            if not self.check_percent_released(start, i):
-                log.debug('{} {} percent failed'.format(start, i))
-                continue
+    ns, m = A.shape
 
-            potential_end = i
+    def prefix(v):
+        p = zeros((ns, m + 1))
+        p[:, 1:] = cumsum(v, axis=1)
+        return p
 
-        if potential_end:
-            return start, potential_end
+    def window(p):
+        # sum of steps start..end
+        return p[:, None, 1:] - p[:, :-1, None]
 
-    def check_percent_released(self, start, end):
-        ss = sum([(s if not i in self.excludes else 0)
-                  for i, s in enumerate(self.signals)][start:end + 1])
+    with errstate(divide='ignore', invalid='ignore'):
+        # shift the ages to reduce cancellation in sum(w*x**2)-sum(w*x)**2/sum(w)
+        a = A - array([r[isfinite(r)].mean() if isfinite(r).any() else 0 for r in A])[:, None]
+        w = E ** -2
 
-        log.debug('percent {} {} {}'.format(start, end, ss / self.total_signal))
+        # steps with a zero or invalid error/age always give an invalid MSWD. count them separately so they
+        # do not poison the sums of the other windows
+        good = isfinite(w) & isfinite(a)
+        nbad = window(prefix(~good))
+        sw = window(prefix(where(good, w, 0)))
+        swa = window(prefix(where(good, w * a, 0)))
+        swaa = window(prefix(where(good, w * a * a, 0)))
 
-        return ss / self.total_signal >= self.gas_fraction/100.
+        idx = arange(m)
+        n = idx[None, :] - idx[:, None] + 1
+        mswd = (swaa - swa ** 2 / sw) / (n - 1)
 
-    def check_mswd(self, start, end):
-        """
-            return False if not valid
-        """
-        ages = self.ages[start, end + 1]
-        errors = self.errors[start, end + 1]
-        mswd = calculate_mswd(ages, errors)
-        return validate_mswd(mswd, len(ages))
-
-    def check_overlap(self, start, end, overlap_func):
-        overlap_sigma = self.overlap_sigma
-        for c, i in enumerate(range(start, end, 1)):
-            for j in range(start + c, end + 1, 1):
-                if i == j:
-                    continue
-
-                try:
-                    if not overlap_func(i, j, overlap_sigma):
-                        return
-                except BaseException, e:
-                    import traceback
-                    log.debug('Overlap exception: {}'.format(e, traceback.format_exc()))
-                    continue
-        else:
-            return True
+        dof = arange(1, max(m, 2), dtype=float)
+        low, high = chi2(dof, scale=1 / dof).interval(0.95)
+        low = _pad_limits(low, m)
+        high = _pad_limits(high, m)
 
-    def _overlap(self, start, end, overlap_sigma):
-        # log.debug('checking overlap {} {} '.format(start, end))
+        nn = where(T, n, 0)
+        ok = T[None] & (n >= 2)[None] & (nbad == 0) & (low[nn] <= mswd) & (mswd <= high[nn])
+    return ok
 
-        a1 = self.ages[start]
-        a2 = self.ages[end]
-        e1 = self.errors[start]
-        e2 = self.errors[end]
 
-        e1 *= overlap_sigma
-        e2 *= overlap_sigma
-
-        # log.debug('{}<{} {}>{}'.format(a1 - e1 , a2 + e2, a1 + e1 , a2 - e2))
-        return a1 - e1 < a2 + e2 and a1 + e1 > a2 - e2
-
-    def check_nsteps(self, start, end):
-        return (end - start) + 1 >= self.nsteps
+def _pad_limits(v, m):
+    """
+        index by number of steps. limits for n<2 are nan
+    """
+    p = full(m + 1, nan)
+    p[2:] = v[:m - 1]
+    return p
 
 # ============= EOF =============================================
-
@@ -0,0 +1,136 @@
+# ===============================================================================
+# Copyright 2016 Jake Ross
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ===============================================================================
+
+"""
+bounded in-memory cache of released raw data.
+
+when many analyses are fit in sequence their raw data is released as soon as the fit results are extracted
+(IsotopeGroup.release_raw_data) and handed to a RawDataCache. the most recently released arrays are kept up to
+``max_bytes``. restoring an analysis that is still cached avoids reading its raw data from disk again
+"""
+
+# ============= enthought library imports =======================
+# ============= standard library imports ========================
+from collections import OrderedDict
+from threading import Lock
+
+# ============= local library imports  ==========================
+
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+
+def released_nbytes(released):
+    return sum(xs.nbytes + ys.nbytes
+               for _, data in released.itervalues()
+               for xs, ys, _ in data)
+
+
+def covers(released, key):
+    """
+        true if released has the signal data for an isotope key, e.g. Ar40 or Ar40H1, or the baseline data for a
+        detector key
+    """
+    for name, (det, data) in released.iteritems():
+        if key in (name, '{}{}'.format(name, det)):
+            return data[0][0].shape[0] > 0
+        elif key == det:
+            return data[1][0].shape[0] > 0
+
+
+class RawDataCache(object):
+    """
+        LRU of released raw data keyed by analysis uuid. safe to share between threads
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, group):
+        return self._key(group) in self._entries
+
+    def release(self, group):
+        """
+            release the raw data of group and keep it, evicting the least recently used entries to stay within
+            max_bytes. return the number of bytes released
+        """
+        released = group.release_raw_data()
+        n = released_nbytes(released)
+        key = self._key(group)
+        with self._lock:
+            self._pop(key)
+            if n <= self.max_bytes:
+                self._entries[key] = (released, n)
+                self._nbytes += n
+                while self._nbytes > self.max_bytes:
+                    self._pop(next(iter(self._entries)))
+        return n
+
+    def restore(self, group, keys=None):
+        """
+            put the cached raw data back into group.
+
+            return True if group was cached and the entry has the data for every key
+        """
+        key = self._key(group)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            # mark as most recently used
+            self._entries[key] = entry
+
+        released, n = entry
+        if keys and not all(covers(released, k) for k in keys):
+            return False
+
+        group.restore_raw_data(released)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    # private
+    def _key(self, group):
+        return getattr(group, 'uuid', None) or id(group)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[1]
+
+    def __getstate__(self):
+        # the cached arrays are not sent along with an analysis, e.g. to a process pool
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def __repr__(self):
+        return 'RawDataCache<{} entries, {}/{} bytes>'.format(len(self._entries), self._nbytes, self.max_bytes)
+
+# ============= EOF =============================================
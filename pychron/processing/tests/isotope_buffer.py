@@ -0,0 +1,74 @@
+import unittest
+
+from numpy import array, arange
+
+from pychron.processing.isotope import Isotope, MIN_BUFFER_SIZE
+from pychron.processing.isotope_group import IsotopeGroup
+
+
+class IsotopeBufferTestCase(unittest.TestCase):
+    def setUp(self):
+        self.group = IsotopeGroup()
+        self.group.isotopes = {'Ar40': Isotope('Ar40', 'H1'),
+                               'Ar39': Isotope('Ar39', 'AX')}
+
+    def test_append(self):
+        for i in xrange(200):
+            self.group.append_data('Ar40', 'H1', i, 2 * i, 'signal')
+
+        iso = self.group.isotopes['Ar40']
+        self.assertEqual(iso.n, 200)
+        self.assertListEqual(list(iso.xs), range(200))
+        self.assertListEqual(list(iso.ys), range(0, 400, 2))
+
+    def test_baseline(self):
+        for i in xrange(10):
+            self.assertTrue(self.group.append_data(None, 'AX', i, 0.1, 'baseline'))
+
+        self.assertEqual(self.group.isotopes['Ar39'].baseline.n, 10)
+        self.assertEqual(self.group.isotopes['Ar40'].baseline.n, 0)
+
+    def test_reserve(self):
+        self.group.reserve_data('sniff', 500)
+        iso = self.group.isotopes['Ar40']
+        buf = iso.sniff._buffer
+        self.assertEqual(buf.shape[1], 500)
+
+        for i in xrange(500):
+            self.group.append_data('Ar40', 'H1', i, i, 'sniff')
+
+        # no reallocation within the reserved size
+        self.assertIs(iso.sniff._buffer, buf)
+        self.assertEqual(iso.sniff.n, 500)
+
+    def test_doubling(self):
+        iso = self.group.isotopes['Ar40']
+        for i in xrange(MIN_BUFFER_SIZE + 1):
+            iso.append_point(i, i)
+        self.assertEqual(iso._buffer.shape[1], 2 * MIN_BUFFER_SIZE)
+
+    def test_views_unchanged(self):
+        iso = self.group.isotopes['Ar40']
+        for i in xrange(10):
+            iso.append_point(i, i)
+
+        ys = iso.ys
+        for i in xrange(1000):
+            iso.append_point(i, -1)
+
+        self.assertListEqual(list(ys), range(10))
+
+    def test_replaced_data(self):
+        iso = self.group.isotopes['Ar40']
+        for i in xrange(10):
+            iso.append_point(i, i)
+
+        iso.xs = array([0, 1, 2.])
+        iso.ys = array([5, 6, 7.])
+        iso.append_point(3, 8)
+        self.assertListEqual(list(iso.xs), list(arange(4)))
+        self.assertListEqual(list(iso.ys), [5, 6, 7, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
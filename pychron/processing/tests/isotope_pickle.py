@@ -0,0 +1,75 @@
+import cPickle as pickle
+import unittest
+
+from numpy import linspace
+
+from pychron.processing.isotope import Isotope
+
+
+class IsotopePickleTestCase(unittest.TestCase):
+    def setUp(self):
+        iso = Isotope('Ar40', 'H1')
+        iso.xs = linspace(0, 100, 50)
+        iso.ys = 10 - 0.01 * iso.xs + 0.001 * (iso.xs % 3)
+        iso.set_fit('linear')
+        self.iso = iso
+
+    def _roundtrip(self, iso):
+        return pickle.loads(pickle.dumps(iso, pickle.HIGHEST_PROTOCOL))
+
+    def test_cache_fit(self):
+        iso = self.iso
+        v, e = iso.value, iso.error
+        iso.cache_fit()
+        self.assertIsNotNone(iso._get_batch_result())
+        self.assertAlmostEqual(iso.value, v)
+        self.assertAlmostEqual(iso.error, e)
+
+    def test_roundtrip(self):
+        iso = self.iso
+        iso.cache_fit()
+        s = iso.get_regression_str()
+
+        riso = self._roundtrip(iso)
+        b = riso._get_batch_result()
+        self.assertIsNotNone(b)
+        self.assertIsNone(riso._regressor)
+        self.assertAlmostEqual(riso.value, iso.value)
+        self.assertAlmostEqual(riso.error, iso.error)
+        self.assertEqual(riso.get_regression_str(), s)
+
+        # changing the fit invalidates the cached result
+        riso.set_fit('parabolic')
+        self.assertIsNone(riso._get_batch_result())
+
+    def test_replace_data(self):
+        iso = self.iso
+        iso.cache_fit()
+        v = iso.value
+
+        # same shape, new values. the cached result must not be used
+        iso.ys = iso.ys + 1
+        self.assertIsNone(iso._get_batch_result())
+        self.assertAlmostEqual(iso.value, v + 1)
+
+    def test_release_restore(self):
+        iso = self.iso
+        iso.cache_fit()
+        xs, ys, n = iso.release_data()
+        self.assertIsNotNone(iso._get_batch_result())
+
+        iso.restore_data(xs, ys, n)
+        self.assertIsNotNone(iso._get_batch_result())
+
+        # new data after the restore invalidates it
+        iso.xs = xs.copy()
+        self.assertIsNone(iso._get_batch_result())
+
+    def test_roundtrip_uncached(self):
+        riso = self._roundtrip(self.iso)
+        self.assertIsNone(riso._get_batch_result())
+        self.assertAlmostEqual(riso.value, self.iso.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 __author__ = 'ross'
 import unittest
 
-from pychron.processing.plateau import Plateau
+from pychron.processing.plateau import Plateau, find_plateaus, MAHON
 
 
 class PlateauTestCase(unittest.TestCase):
@@ -115,6 +115,32 @@ class PlateauTestCase(unittest.TestCase):
         idx = (1, 4)
         return ages, errors, signals, exclude, idx
 
+    def test_find_plateaus_bulk(self):
+        spectra = [self._get_test_data_pass1(),
+                   self._get_test_data_pass2(),
+                   self._get_test_data_fail1(),
+                   self._get_test_data_real_fail()]
+
+        ages, errors, signals, idxs = zip(*spectra)
+        pidxs = find_plateaus(ages, errors, signals)
+        self.assertListEqual(pidxs, list(idxs))
+
+    def test_find_plateaus_bulk_exclude(self):
+        ages, errors, signals, idx = self._get_test_data_fail1()
+        a, b = find_plateaus([ages, ages], [errors, errors], [signals, signals], [[6], []])
+        self.assertEqual(a, (1, 4))
+        self.assertEqual(b, idx)
+
+    def test_find_plateaus_mahon(self):
+        ages = [7, 1.0, 1.1, 0.9, 1.05, 0.95, 1.0, 1.1, 7]
+        errors = [0.1] * 9
+        signals = [1] * 9
+        idx = (1, 7)
+        p = Plateau(ages=ages, errors=errors, signals=signals)
+        pidx = p.find_plateaus(MAHON)
+
+        self.assertEqual(pidx, idx)
+
 
 if __name__ == '__main__':
     unittest.main()
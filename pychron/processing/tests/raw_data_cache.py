@@ -0,0 +1,79 @@
+import unittest
+
+from numpy import linspace
+
+from pychron.processing.isotope import Isotope
+from pychron.processing.isotope_group import IsotopeGroup
+from pychron.processing.raw_data_cache import RawDataCache
+
+
+def make_group(uuid, n=50):
+    iso = Isotope('Ar40', 'H1')
+    iso.xs = linspace(0, 100, n)
+    iso.ys = 10 - 0.01 * iso.xs + 0.001 * (iso.xs % 3)
+    iso.set_fit('linear')
+    iso.baseline.xs = linspace(0, 10, n)
+    iso.baseline.ys = 0.01 + 0.0001 * (iso.baseline.xs % 3)
+    iso.baseline.set_fit('average')
+
+    g = IsotopeGroup(isotopes={'Ar40': iso})
+    g.uuid = uuid
+    return g
+
+
+class RawDataCacheTestCase(unittest.TestCase):
+    def test_release_keeps_fit(self):
+        g = make_group('a')
+        iso = g.isotopes['Ar40']
+        v, e = iso.value, iso.error
+        iso.cache_fit()
+
+        released = g.release_raw_data()
+        self.assertEqual(iso.xs.shape[0], 0)
+        self.assertEqual(iso.n, 50)
+        self.assertAlmostEqual(iso.value, v)
+        self.assertAlmostEqual(iso.error, e)
+
+        g.restore_raw_data(released)
+        self.assertEqual(iso.xs.shape[0], 50)
+        self.assertIsNotNone(iso._get_batch_result())
+        self.assertAlmostEqual(iso.value, v)
+
+    def test_restore(self):
+        cache = RawDataCache()
+        g = make_group('a')
+        n = cache.release(g)
+        self.assertEqual(cache.nbytes, n)
+        self.assertIn(g, cache)
+
+        self.assertFalse(cache.restore(g, ('Ar39',)))
+        self.assertTrue(cache.restore(g, ('Ar40H1', 'H1')))
+        self.assertEqual(g.isotopes['Ar40'].xs.shape[0], 50)
+        self.assertEqual(g.isotopes['Ar40'].baseline.xs.shape[0], 50)
+
+    def test_evict(self):
+        gs = [make_group(u) for u in 'abc']
+        n = gs[0].isotopes['Ar40'].nbytes + gs[0].isotopes['Ar40'].baseline.nbytes
+
+        cache = RawDataCache(max_bytes=2 * n)
+        cache.release(gs[0])
+        cache.release(gs[1])
+        # a is now the most recently used
+        self.assertTrue(cache.restore(gs[0]))
+        cache.release(gs[2])
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertIn(gs[0], cache)
+        self.assertNotIn(gs[1], cache)
+        self.assertFalse(cache.restore(gs[1]))
+
+    def test_too_large(self):
+        cache = RawDataCache(max_bytes=10)
+        cache.release(make_group('a'))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
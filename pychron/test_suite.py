@@ -30,6 +30,8 @@ def suite():
     from pychron.core.tests.spell_correct import SpellCorrectTestCase
     from pychron.core.tests.filtering_tests import FilteringTestCase
     from pychron.core.stats.tests.peak_detection_test import MultiPeakDetectionTestCase
+    from pychron.core.stats.tests.probability_curves_test import CumulativeProbabilityTestCase
+    from pychron.core.stats.tests.monte_carlo_test import MonteCarloTestCase
     from pychron.experiment.tests.repository_identifier import ExperimentIdentifierTestCase
 
     from pychron.stage.tests.stage_map import StageMapTestCase, \
@@ -43,12 +45,30 @@ def suite():
     # from pychron.entry.tests.analysis_loader import XLSAnalysisLoaderTestCase
     from pychron.core.regression.tests.regression import OLSRegressionTest, MeanRegressionTest, \
         FilterOLSRegressionTest, OLSRegressionTest2
+    from pychron.core.regression.tests.batch_regression import BatchRegressionTest
+    from pychron.core.regression.tests.incremental_regression import IncrementalRegressionTest
+    from pychron.dvc.tests.raw_store import RawDataStoreTestCase
+    from pychron.dvc.tests.save_queue import DVCSaveQueueTestCase
+    from pychron.dvc.tests.sparse import SparseCheckoutTestCase
+    from pychron.dvc.tests.repository_sync import RepositorySyncTestCase
+    from pychron.dvc.tests.analysis_cache import AnalysisCacheTestCase
+    from pychron.dvc.tests.dvc_analysis_pickle import DVCAnalysisPickleTestCase
+    from pychron.git_archive.test.transaction import GitTransactionTestCase
     from pychron.experiment.tests.frequency_test import FrequencyTestCase, FrequencyTemplateTestCase
     from pychron.experiment.tests.position_regex_test import XYTestCase
     from pychron.experiment.tests.renumber_aliquot_test import RenumberAliquotTestCase
 
     from pychron.external_pipette.tests.external_pipette import ExternalPipetteTestCase
     from pychron.processing.tests.plateau import PlateauTestCase
+    from pychron.processing.tests.isotope_buffer import IsotopeBufferTestCase
+    from pychron.processing.tests.isotope_pickle import IsotopePickleTestCase
+    from pychron.pipeline.tests.memo import MemoTestCase
+    from pychron.processing.tests.raw_data_cache import RawDataCacheTestCase
+    from pychron.hardware.core.tests.io_loop import IOLoopTestCase
+    from pychron.dashboard.tests.poll_scheduler import PollSchedulerTestCase
+    from pychron.managers.data_managers.tests.scan_data_manager import ScanDataManagerTestCase
+    from pychron.core.helpers.tests.queue_logging import QueueLoggingTestCase
+    from pychron.logger.tests.log_index import LogIndexTestCase
     from pychron.processing.tests.ratio import RatioTestCase
     from pychron.pyscripts.tests.extraction_script import WaitForTestCase
     from pychron.pyscripts.tests.measurement_pyscript import InterpolationTestCase, DocstrContextTestCase
@@ -77,6 +97,8 @@ def suite():
              # SimilarTestCase,
              FilteringTestCase,
              MultiPeakDetectionTestCase,
+             CumulativeProbabilityTestCase,
+             MonteCarloTestCase,
              ExperimentIdentifierTestCase,
              StageMapTestCase,
              TransformTestCase,
@@ -95,7 +117,25 @@ def suite():
              OLSRegressionTest2,
              MeanRegressionTest,
              FilterOLSRegressionTest,
+             BatchRegressionTest,
+             IncrementalRegressionTest,
+             RawDataStoreTestCase,
+             DVCSaveQueueTestCase,
+             SparseCheckoutTestCase,
+             RepositorySyncTestCase,
+             AnalysisCacheTestCase,
+             DVCAnalysisPickleTestCase,
+             GitTransactionTestCase,
              PlateauTestCase,
+             IsotopeBufferTestCase,
+             IsotopePickleTestCase,
+             MemoTestCase,
+             RawDataCacheTestCase,
+             IOLoopTestCase,
+             PollSchedulerTestCase,
+             ScanDataManagerTestCase,
+             QueueLoggingTestCase,
+             LogIndexTestCase,
              ExternalPipetteTestCase,
              WaitForTestCase,
              XYTestCase,